@@ -40,112 +40,123 @@ def get_typesystem():
 
     return typesystem
 
-def get_head_arc(arcs, token_i):
-    head_arcs_ = [a for a in arcs if (a['start']==token_i and a['dir']=='left')
-        or (a['end']==token_i and a['dir']=='right')]
+class DependencyGraph:
+    """Arcs of a displacy parse, indexed by head and by dependent.
+
+    An arc points from its head to its dependent: for dir 'right' the head
+    is 'start', for dir 'left' it is 'end'. Arcs keep their parse order in
+    both indexes, so results equal a scan over the full arc list.
+    """
+
+    def __init__(self, arcs):
+        self.arcs = arcs
+        self._dependent_arcs = {}
+        self._head_arcs = {}
+        for arc in arcs:
+            self._dependent_arcs.setdefault(arc_head(arc), []).append(arc)
+            self._head_arcs.setdefault(arc_dependent(arc), []).append(arc)
+        # results of get_dependents_recursive, the graph only lives for one sentence
+        self.recursive_cache = {}
+
+    def dependent_arcs(self, token_i):
+        """Arcs with token_i as head."""
+        return self._dependent_arcs.get(token_i, [])
+
+    def head_arcs(self, token_i, label=None):
+        """Arcs with token_i as dependent, optionally only with the given label."""
+        arcs = self._head_arcs.get(token_i, [])
+        if label is None:
+            return arcs
+        return [a for a in arcs if a['label'] == label]
 
+def arc_head(arc):
+    return arc['start'] if arc['dir'] == 'right' else arc['end']
+
+def arc_dependent(arc):
+    return arc['end'] if arc['dir'] == 'right' else arc['start']
+
+def get_head_arc(graph, token_i):
     head_arcs = {}
-    for arc in head_arcs_:
-        if arc['start']==token_i and arc['dir']=='left':
-            head_arcs[arc['end']] = arc['label']
-        elif arc['end']==token_i and arc['dir']=='right':
-            head_arcs[arc['start']] = arc['label']
+    for arc in graph.head_arcs(token_i):
+        head_arcs[arc_head(arc)] = arc['label']
             
     assert len(head_arcs) == 1
     return list(head_arcs.items())
 
-def get_children(arcs, token_i):
-    pred_arcs_ = [a for a in arcs if (a['start']==token_i and a['dir']=='right')
-            or (a['end']==token_i and a['dir']=='left')]
-    
+def get_children(graph, token_i):
     pred_arcs = {}
-    for arc in pred_arcs_:
-        if arc['start']==token_i and arc['dir']=='right':
-            pred_arcs[arc['end']] = arc['label']
-        elif arc['end']==token_i and arc['dir']=='left':
-            pred_arcs[arc['start']] = arc['label']
+    for arc in graph.dependent_arcs(token_i):
+        pred_arcs[arc_dependent(arc)] = arc['label']
             
     return pred_arcs
 
-def get_dependents(arcs, token_i):
-    pred_arcs_ = [a for a in arcs if (a['start']==token_i and a['dir']=='right')
-            or (a['end']==token_i and a['dir']=='left')]
-    
+def get_dependents(graph, token_i):
     pred_arcs = {}
-    for arc in pred_arcs_:
+    for arc in graph.dependent_arcs(token_i):
         if arc['label'] == 'acl':
             continue
-        if arc['start']==token_i and arc['dir']=='right':
-            pred_arcs[arc['end']] = arc['label']
-        elif arc['end']==token_i and arc['dir']=='left':
-            pred_arcs[arc['start']] = arc['label']
+        pred_arcs[arc_dependent(arc)] = arc['label']
             
     return pred_arcs
 
-def get_dependents_l2(arcs, token_i):
-    pred_arcs_ = [a for a in arcs if (a['start']==token_i and a['dir']=='right')
-            or (a['end']==token_i and a['dir']=='left')]
-    
+def get_dependents_l2(graph, token_i):
     pred_arcs = {}
-    for arc in pred_arcs_:
+    for arc in graph.dependent_arcs(token_i):
         if arc['label'] == 'acl':
             continue
-        if arc['start']==token_i and arc['dir']=='right':
-            pred_arcs[arc['end']] = arc['label']
-            token_ii = arc['end']
-            arc_ = get_dependents(arcs, token_ii)
-            pred_arcs.update(arc_)
-
-
-        elif arc['end']==token_i and arc['dir']=='left':
-            pred_arcs[arc['start']] = arc['label']
-            token_ii = arc['start']
-            arc_ = get_dependents(arcs, token_ii)
-            pred_arcs.update(arc_)
+        token_ii = arc_dependent(arc)
+        pred_arcs[token_ii] = arc['label']
+        arc_ = get_dependents(graph, token_ii)
+        pred_arcs.update(arc_)
 
     return pred_arcs
             
-def get_arcs(arcs, token_i, tokens, stop_pos, stop_dep):
-    pred_arcs_ = [a for a in arcs if (a['start']==token_i and a['dir']=='right')
-            or (a['end']==token_i and a['dir']=='left')]
-    
+def get_arcs(graph, token_i, tokens, stop_pos, stop_dep):
     pred_arcs = []
-    for arc in pred_arcs_:
+    for arc in graph.dependent_arcs(token_i):
         if arc['label'] == 'acl' or arc['label'] == 'punct' or arc['label']=='expl':
             continue
         
-        #if arc['start']==token_i and arc['dir']=='right' and tokens[arc['end']-1].pos_ != 'VERB':
-        if arc['start']==token_i and arc['dir']=='right' and\
-                tokens[arc['end']-1].pos_ != stop_pos and not stop_dep in arc['label']:
-            #pred_arcs[arc['end']] = arc['label']
-            pred_arcs.append(arc['end'])
-        elif arc['end']==token_i and arc['dir']=='left' and\
-                tokens[arc['start']-1].pos_ != stop_pos and not stop_dep in arc['label']:
-        #elif arc['end']==token_i and arc['dir']=='left' and tokens[arc['start']-1].pos_ != 'VERB':
-            #pred_arcs[arc['start']] = arc['label']
-            pred_arcs.append(arc['start'])
+        dependent = arc_dependent(arc)
+        if tokens[dependent-1].pos_ != stop_pos and not stop_dep in arc['label']:
+            pred_arcs.append(dependent)
 
     return pred_arcs
 
-def get_current_arc(arcs, token_i):
-    arcs = [a for a in arcs if (a['start']==token_i and a['dir']=='left')
-            or (a['end']==token_i and a['dir']=='right')]
+def get_current_arc(graph, token_i):
+    arcs = graph.head_arcs(token_i)
 
     assert len(arcs) == 1
 
     return arcs[0]
     
-def get_dependents_recursive(arcs, token_i, tokens, t=0, stop_pos='VERB', stop_dep=' '):
-    pred_arcs = get_arcs(arcs, token_i, tokens, stop_pos=stop_pos, stop_dep=stop_dep)
-    current_arc = get_current_arc(arcs, token_i)
+def get_dependents_recursive(graph, token_i, tokens, t=0, stop_pos='VERB', stop_dep=' '):
+    # only t == 0 changes the result, every subtree is collected once per sentence
+    key = (token_i, t != 0, stop_pos, stop_dep)
+    if key not in graph.recursive_cache:
+        graph.recursive_cache[key] = _get_dependents_recursive(graph, token_i, tokens, t,
+                stop_pos, stop_dep)
+    return list(graph.recursive_cache[key])
+
+def _get_dependents_recursive(graph, token_i, tokens, t, stop_pos, stop_dep):
+    pred_arcs = get_arcs(graph, token_i, tokens, stop_pos=stop_pos, stop_dep=stop_dep)
+    current_arc = get_current_arc(graph, token_i)
     c_arc_l = current_arc['label']
     cur_pos = tokens[token_i-1].pos_
     if len(pred_arcs) == 0 or (cur_pos == stop_pos and t!=0) or (stop_dep in c_arc_l):
         return []
+    # the dependents of a dependent are a subset of its own result, so adding
+    # the results of the direct dependents in order yields the same first
+    # occurrences (and set) as expanding every added dependent again
+    dependents = list(pred_arcs)
+    seen = set(pred_arcs)
     for arc_i in pred_arcs:
-        pred_arcs.extend(get_dependents_recursive(arcs, arc_i, tokens, t=t+1, stop_dep=stop_dep))
+        for dependent in get_dependents_recursive(graph, arc_i, tokens, t=t+1, stop_dep=stop_dep):
+            if dependent not in seen:
+                seen.add(dependent)
+                dependents.append(dependent)
 
-    return list(set(pred_arcs))
+    return list(set(dependents))
 
 def get_dependents_recursive_spacy(node):
     if not node.children:
@@ -242,6 +253,7 @@ def srl(diaparse_sentence, tokens_, poss, tags, nlp,
     #disp = diaparse.sentences[0].to_displacy()
     disp = diaparse_sentence.to_displacy()
     arcs = disp['arcs']
+    graph = DependencyGraph(arcs)
     
     words = {i: w['text'] for i, w in enumerate(disp['words'])}
     
@@ -263,22 +275,19 @@ def srl(diaparse_sentence, tokens_, poss, tags, nlp,
     for token in verbs:
         token_i = token.i + 1
 
-        pred_arcs_ = [a for a in arcs if (a['start']==token_i and a['dir']=='right')
-                    or (a['end']==token_i and a['dir']=='left')]
+        pred_arcs_ = graph.dependent_arcs(token_i)
 
-        token_cop_i = [a['end'] for a in arcs if
-                (a['start']==token_i and a['dir']=='left') and a['label']=='cop']
+        cop_arcs = graph.head_arcs(token_i, 'cop')
+        token_cop_i = [a['end'] for a in cop_arcs if a['dir']=='left']
         if len(token_cop_i) == 0:
-            token_cop_i = [a['start'] for a in arcs if ((a['start']==token_i and a['dir']=='left')
-                        or (a['end']==token_i and a['dir']=='right')) and a['label']=='cop']
+            token_cop_i = [a['start'] for a in cop_arcs]
 
         if len(token_cop_i) == 1:
             token_cop_i = token_cop_i[0]
         else:
             token_cop_i = None
 
-        pred_arcs_cop = [a for a in arcs if (a['start']==token_cop_i and a['dir']=='right')
-                    or (a['end']==token_cop_i and a['dir']=='left')]
+        pred_arcs_cop = graph.dependent_arcs(token_cop_i)
         
         
         rels_dict = {
@@ -299,7 +308,7 @@ def srl(diaparse_sentence, tokens_, poss, tags, nlp,
             elif arc['end']==token_i and arc['dir']=='left':
                 pred_arcs[arc['start']] = arc['label']
                 
-        assert pred_arcs == get_children(arcs, token_i)
+        assert pred_arcs == get_children(graph, token_i)
         ##copulae
         for arc in pred_arcs_cop:
             if arc['start']==token_cop_i and arc['dir']=='right':
@@ -336,15 +345,15 @@ def srl(diaparse_sentence, tokens_, poss, tags, nlp,
         pred_arcs = {k: v for k, v in pred_arcs.items() if v!='conj'}
         for i, arc in pred_arcs.items():                        
             if opt_dependents == 'first level' and tokens[i-1].pos_ != 'VERB':
-                children = [k for k, v in get_dependents(arcs, i).items() 
+                children = [k for k, v in get_dependents(graph, i).items() 
                         if not v in ['punct']]
                 i_ = [i] + children
             elif opt_dependents == 'second level' and tokens[i-1].pos_ != 'VERB':
-                children = [k for k, v in get_dependents_l2(arcs, i).items() 
+                children = [k for k, v in get_dependents_l2(graph, i).items() 
                         if not v in ['punct']]
                 i_ = [i] + children
             elif opt_dependents == 'all' and tokens[i-1].pos_ != 'VERB':
-                children = get_dependents_recursive(arcs, i, tokens)
+                children = get_dependents_recursive(graph, i, tokens)
                 i_ = [i] + children if not children is None else [i]
             else:
                 i_ = [i]
@@ -353,26 +362,22 @@ def srl(diaparse_sentence, tokens_, poss, tags, nlp,
 
             if arc == 'nsubj':
                 t_i = token_i
-                cop_ = [a for a in arcs if a['label']=='cop' and
-                    ((a['end']==t_i  and a['dir']=='right')
-                        or (a['start']==t_i  and a['dir']=='left'))]
+                cop_ = graph.head_arcs(t_i, 'cop')
                 if len(cop_) == 1:
                     t_i = cop_[0]['start'] if cop_[0]['dir'] == 'right' else cop_[0]['end']
-                acl_ = [a for a in arcs if a['label']=='acl' and
-                    ((a['end']==t_i  and a['dir']=='right')
-                        or (a['start']==t_i  and a['dir']=='left'))]
+                acl_ = graph.head_arcs(t_i, 'acl')
 
                 #TODO if len(acl_) == 1 and tokens[i-1].pos_=='PRON':
                 if len(acl_) == 1 and tokens[i-1].tag_=='PRELS':
                     acl = acl_[0]['start'] if acl_[0]['dir'] == 'right' else acl_[0]['end']
                     if opt_dependents == 'first level':
-                        children = [k for k in get_dependents(arcs, acl).keys()]
+                        children = [k for k in get_dependents(graph, acl).keys()]
                         i_ = [acl] + children if not children is None else [acl]
                     elif opt_dependents == 'second level':
-                        children = [k for k in get_dependents_l2(arcs, acl).keys()]
+                        children = [k for k in get_dependents_l2(graph, acl).keys()]
                         i_ = [acl] + children if not children is None else [acl]
                     elif opt_dependents == 'all':
-                        children = get_dependents_recursive(arcs, acl, tokens)
+                        children = get_dependents_recursive(graph, acl, tokens)
                         i_ = [acl] + children if not children is None else [acl]
                     else:
                         i_ = [acl]
@@ -412,8 +417,8 @@ def srl(diaparse_sentence, tokens_, poss, tags, nlp,
                         'i': i_
                     }
                     
-                    pass_arcs_ = [a for a in arcs if (a['start']==i and a['dir']=='right')
-                        or (a['end']==i and a['dir']=='left') and a['label']=='nmod']
+                    pass_arcs_ = [a for a in graph.dependent_arcs(i) if a['dir']=='right'
+                        or a['label']=='nmod']
                     pass_arcs = {}
                     for parc in pass_arcs_:
                         if parc['start']==i and parc['dir']=='right':
@@ -429,19 +434,17 @@ def srl(diaparse_sentence, tokens_, poss, tags, nlp,
                             'i': list(pass_arcs.keys()),
                         } 
                 else:                            
-                    acl_ = [a for a in arcs if a['label']=='acl' and
-                        ((a['end']==token_i  and a['dir']=='right')
-                            or (a['start']==token_i  and a['dir']=='left'))]
+                    acl_ = graph.head_arcs(token_i, 'acl')
                     if len(acl_) == 1 and tokens[i-1].tag_=='PRELS':
                         acl = acl_[0]['start'] if acl_[0]['dir'] == 'right' else acl_[0]['end']
                         if opt_dependents == 'first level':
-                            children = [k for k in get_dependents(arcs, acl).keys()]
+                            children = [k for k in get_dependents(graph, acl).keys()]
                             i_ = [acl] + children if not children is None else [acl]
                         elif opt_dependents == 'second level':
-                            children = [k for k in get_dependents_l2(arcs, acl).keys()]
+                            children = [k for k in get_dependents_l2(graph, acl).keys()]
                             i_ = [acl] + children if not children is None else [acl]
                         elif opt_dependents == 'all':
-                            children = get_dependents_recursive(arcs, acl, tokens)
+                            children = get_dependents_recursive(graph, acl, tokens)
                             i_ = [acl] + children if not children is None else [acl]
                         else:
                             i_ = [acl]
@@ -469,7 +472,7 @@ def srl(diaparse_sentence, tokens_, poss, tags, nlp,
             #if ARG1 full -> ARG2 (iobj has priority) set intersection + NOUN
             elif arc == 'obl' and 'aux:pass' in pred_arcs.values():
             #elif arc == 'obl' and 'nsubj:pass' in pred_arcs.values():
-                children = [lemmas_spacy[j] for j in get_dependents_recursive(arcs, i, tokens)]
+                children = [lemmas_spacy[j] for j in get_dependents_recursive(graph, i, tokens)]
                 if 'von' in children or 'durch' in children:
                     rels_dict[0] = {
                         'role': 'ARG0',
@@ -480,14 +483,10 @@ def srl(diaparse_sentence, tokens_, poss, tags, nlp,
             elif arc == 'obj':
                 #TODO
                 t_i = token_i
-                cop_ = [a for a in arcs if a['label']=='cop' and
-                    ((a['end']==t_i  and a['dir']=='right')
-                        or (a['start']==t_i  and a['dir']=='left'))]
+                cop_ = graph.head_arcs(t_i, 'cop')
                 if len(cop_) == 1:
                     t_i = cop_[0]['start'] if cop_[0]['dir'] == 'right' else cop_[0]['end']
-                acl_ = [a for a in arcs if a['label']=='acl' and
-                    ((a['end']==t_i  and a['dir']=='right')
-                        or (a['start']==t_i  and a['dir']=='left'))]
+                acl_ = graph.head_arcs(t_i, 'acl')
 
 
                 
@@ -498,16 +497,14 @@ def srl(diaparse_sentence, tokens_, poss, tags, nlp,
                 if len(acl_) == 1 and tokens[i-1].tag_=='PRELS':
                     appos = None
                     acl = acl_[0]['start'] if acl_[0]['dir'] == 'right' else acl_[0]['end']
-                    appos_ = [a for a in arcs if a['label']=='appos' and
-                        ((a['end']==acl  and a['dir']=='right')
-                            or (a['start']==acl  and a['dir']=='left'))]
+                    appos_ = graph.head_arcs(acl, 'appos')
                     if len(appos_) == 1:
                         appos = appos_[0]['start'] if appos_[0]['dir'] == 'right' else appos_[0]['end']
-                        children = get_dependents_recursive(arcs, appos, tokens,
+                        children = get_dependents_recursive(graph, appos, tokens,
                                 stop_dep='appos')
                         i_ = [appos] + children if not children is None else [appos]
                     else:
-                        children = get_dependents_recursive(arcs, acl, tokens)
+                        children = get_dependents_recursive(graph, acl, tokens)
 
                         i_ = [acl] + children if not children is None else [acl]
 
@@ -552,7 +549,7 @@ def srl(diaparse_sentence, tokens_, poss, tags, nlp,
                     if ex_arc != '':
                         ex_arc = rels_dict[2]['text']
                         if ex_arc == '':
-                            children = get_dependents_recursive(arcs, i, tokens)
+                            children = get_dependents_recursive(graph, i, tokens)
                             i_ = [i] + children if not children is None else [i]
                             rels_dict[2] = {
                                 'role': 'ARG2',
@@ -561,7 +558,7 @@ def srl(diaparse_sentence, tokens_, poss, tags, nlp,
                                 'i': i_
                             }
                     else:
-                        children = get_dependents_recursive(arcs, i, tokens)
+                        children = get_dependents_recursive(graph, i, tokens)
                         i_ = [i] + children if not children is None else [i]
                         rels_dict[1] = {
                             'role': 'ARG1',
@@ -578,7 +575,7 @@ def srl(diaparse_sentence, tokens_, poss, tags, nlp,
                         ex_arc = rels_dict[2]['text']
 
                     if ex_arc == '':
-                        children = get_dependents_recursive(arcs, i, tokens)
+                        children = get_dependents_recursive(graph, i, tokens)
                         i_ = [i] + children if not children is None else [i]
                         rels_dict[role] = {
                         'role': f'ARG{role}',
@@ -591,7 +588,7 @@ def srl(diaparse_sentence, tokens_, poss, tags, nlp,
                         role = 2
 
                         if ex_arc == '':
-                            children = get_dependents_recursive(arcs, i, tokens)
+                            children = get_dependents_recursive(graph, i, tokens)
                             i_ = [i] + children if not children is None else [i]
                             rels_dict[role] = {
                             'role': f'ARG{role}',
@@ -601,7 +598,7 @@ def srl(diaparse_sentence, tokens_, poss, tags, nlp,
                             }
             elif arc == 'ccomp':
                 ex_arc = rels_dict[1]['text']
-                children = get_dependents_recursive(arcs, i, tokens)
+                children = get_dependents_recursive(graph, i, tokens)
                 #i_ = [i] + children
                 i_ = [i] + children if not children is None else [i]
                 if ex_arc == '':
@@ -613,7 +610,7 @@ def srl(diaparse_sentence, tokens_, poss, tags, nlp,
                         'i': i_
                     }
             elif arc == 'csubj:pass':# or arc == 'advcl':
-                children = get_dependents_recursive(arcs, i, tokens)
+                children = get_dependents_recursive(graph, i, tokens)
                 i_ = [i] + children if not children is None else [i]
                 ex_arc = rels_dict[2]['text']
                 if ex_arc == '':
@@ -638,7 +635,7 @@ def srl(diaparse_sentence, tokens_, poss, tags, nlp,
                     for child in children_spacy:
                         grandchildren_spacy = [x.i for x in child.children if x.i==i-1]
                         if len(grandchildren_spacy) > 0:
-                            children = get_dependents_recursive(arcs, i, tokens)
+                            children = get_dependents_recursive(graph, i, tokens)
                             i_ = [i] + children if not children is None else [i]
                             #TODO
                             if rels_dict[1]['role'] == '':
@@ -653,7 +650,7 @@ def srl(diaparse_sentence, tokens_, poss, tags, nlp,
                                 'i': i_
                             }                        
                 else:
-                    children = get_dependents_recursive(arcs, i, tokens)
+                    children = get_dependents_recursive(graph, i, tokens)
                     i_ = [i] + children if not children is None else [i]
                     ner = ners[i]
                     if 'LOC' in ner:
@@ -687,17 +684,17 @@ def srl(diaparse_sentence, tokens_, poss, tags, nlp,
 
         if rels_dict[0]['text'] == '':                    
             lemma_verb = None
-            head_arc_i, head_arc_label = get_head_arc(arcs, token_i)[0]
+            head_arc_i, head_arc_label = get_head_arc(graph, token_i)[0]
             try:
                 lemma_verb = lemmas[head_arc_i]
             except KeyError:
                 pass
             if head_arc_label == 'xcomp':
                 if lemma_verb in verbs_object:
-                    head_arc_children = get_children(arcs, head_arc_i)
+                    head_arc_children = get_children(graph, head_arc_i)
                     for arc_c_i, arc_c_label in head_arc_children.items():
                         if arc_c_label == 'obj':
-                            children = get_dependents_recursive(arcs, arc_c_i, tokens)
+                            children = get_dependents_recursive(graph, arc_c_i, tokens)
                             i_ = [arc_c_i] + children if not children is None else [arc_c_i]
                             rels_dict[0] = {
                             'role': 'ARG0',
@@ -707,10 +704,10 @@ def srl(diaparse_sentence, tokens_, poss, tags, nlp,
                             'i': i_
                             }
                 else:# lemma_verb in verbs_subject:                        
-                    head_arc_children = get_children(arcs, head_arc_i)
+                    head_arc_children = get_children(graph, head_arc_i)
                     for arc_c_i, arc_c_label in head_arc_children.items():
                         if arc_c_label == 'nsubj':
-                            pas = [ck for ck, cv in get_children(arcs, arc_c_i).items()
+                            pas = [ck for ck, cv in get_children(graph, arc_c_i).items()
                                     if ':pass' in cv]
                             #if passive ARG0 -> ARG1
                             if len(pas) > 0:
@@ -718,7 +715,7 @@ def srl(diaparse_sentence, tokens_, poss, tags, nlp,
                             else:
                                 role = 0
 
-                            children = get_dependents_recursive(arcs, arc_c_i, tokens)
+                            children = get_dependents_recursive(graph, arc_c_i, tokens)
                             i_ = [arc_c_i] + children if not children is None else [arc_c_i]
                             rels_dict[0] = {
                             'role': 'ARG0',
@@ -745,11 +742,11 @@ def srl(diaparse_sentence, tokens_, poss, tags, nlp,
                 t_i = token_i
             else:
                 t_i = token_cop_i
-            for arc in arcs:
-                if arc['dir'] == 'right' and arc['end'] == t_i and arc['label'] == 'conj':
-                    cop_root = [ck for ck, cv in get_children(arcs, arc['start']).items()
+            for arc in graph.head_arcs(t_i, 'conj'):
+                if arc['dir'] == 'right':
+                    cop_root = [ck for ck, cv in get_children(graph, arc['start']).items()
                         if cv=='cop']
-                    pas = [ck for ck, cv in get_children(arcs, arc['end']).items()
+                    pas = [ck for ck, cv in get_children(graph, arc['end']).items()
                             if ':pass' in cv]
                     #if passive ARG0 -> ARG1
                     if len(pas) > 0:
@@ -764,12 +761,12 @@ def srl(diaparse_sentence, tokens_, poss, tags, nlp,
                             #TODO
                             return
                         pass_root = [ck for ck, cv
-                            in get_children(arcs, arc['start']).items() if ':pass' in cv]
+                            in get_children(graph, arc['start']).items() if ':pass' in cv]
                         if len(pass_root) > 0:
                             role_root = 1
                         else:
                             role_root = 0
-                        cop = [ck for ck, cv in get_children(arcs, i).items()
+                        cop = [ck for ck, cv in get_children(graph, i).items()
                             if cv=='cop']
                         if len(cop) > 0:
                             if role == 0:
@@ -794,7 +791,7 @@ def srl(diaparse_sentence, tokens_, poss, tags, nlp,
                         except IndexError:
                             return
 
-                        cop = [ck for ck, cv in get_children(arcs, i).items()
+                        cop = [ck for ck, cv in get_children(graph, i).items()
                             if cv=='cop']
                         if len(cop) > 0:
                             if role == 0:
@@ -829,15 +826,15 @@ def srl(diaparse_sentence, tokens_, poss, tags, nlp,
                     i_1 = arc['end']
 
                 if opt_dependents == 'first level' and tokens[i_0-1].pos_ != 'VERB':
-                    children = [k for k, v in get_dependents(arcs, i_0).items() 
+                    children = [k for k, v in get_dependents(graph, i_0).items() 
                             if not v in ['punct']]
                     i_ = [i_0] + children
                 elif opt_dependents == 'second level' and tokens[i_0-1].pos_ != 'VERB':
-                    children = [k for k, v in get_dependents_l2(arcs, i_0).items() 
+                    children = [k for k, v in get_dependents_l2(graph, i_0).items() 
                             if not v in ['punct']]
                     i_ = [i_0] + children
                 elif opt_dependents == 'all' and tokens[i_0-1].pos_ != 'VERB':
-                    children = [k for k in get_dependents_recursive(arcs, i_0, tokens)] 
+                    children = [k for k in get_dependents_recursive(graph, i_0, tokens)] 
                     i_ = [i_0] + children
                 else:
                     i_ = [i_0]
@@ -850,15 +847,15 @@ def srl(diaparse_sentence, tokens_, poss, tags, nlp,
                 }
 
                 if opt_dependents == 'first level' and tokens[i_1-1].pos_ != 'VERB':
-                    children = [k for k, v in get_dependents(arcs, i_1).items() 
+                    children = [k for k, v in get_dependents(graph, i_1).items() 
                             if not v in ['punct']]
                     i_ = [i_1] + children
                 elif opt_dependents == 'second level' and tokens[i_1-1].pos_ != 'VERB':
-                    children = [k for k, v in get_dependents_l2(arcs, i_1).items() 
+                    children = [k for k, v in get_dependents_l2(graph, i_1).items() 
                             if not v in ['punct']]
                     i_ = [i_1] + children
                 elif opt_dependents == 'all' and tokens[i_1-1].pos_ != 'VERB':
-                    children = [k for k in get_dependents_recursive(arcs, i_1, tokens)]
+                    children = [k for k in get_dependents_recursive(graph, i_1, tokens)]
                     i_ = [i_1] + children
                 else:
                     i_ =  [i_1]
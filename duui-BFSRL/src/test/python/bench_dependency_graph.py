@@ -0,0 +1,63 @@
+import argparse
+import os
+import signal
+import sys
+import time
+
+from test_dependency_graph import SERVICE_DIR, fake_parse, load_bfsrl, run_srl, use_linear_helpers
+
+
+class TimeLimit(Exception):
+    pass
+
+
+def time_limit(*args):
+    raise TimeLimit()
+
+
+def time_srl(bfsrl, parses, limit):
+    # total time of srl() on the parses, None once a parse exceeds the limit in seconds
+    signal.signal(signal.SIGALRM, time_limit)
+    total = 0.0
+    for parse in parses:
+        signal.alarm(limit)
+        try:
+            start = time.perf_counter()
+            run_srl(bfsrl, parse, "all")
+            total += time.perf_counter() - start
+        except TimeLimit:
+            return None
+        finally:
+            signal.alarm(0)
+    return total
+
+
+def benchmark(lengths, count, limit):
+    os.chdir(SERVICE_DIR)
+    bfsrl = load_bfsrl(lambda modules, name, module: modules.__setitem__(name, module), lambda path: sys.path.insert(0, path))
+    graph_helpers = {name: getattr(bfsrl, name) for name in
+                     ["get_children", "get_dependents", "get_dependents_l2", "get_dependents_recursive"]}
+    linear_done = True
+    for n in lengths:
+        # deep trees, every token attaches to one of the 8 previous tokens most of the time
+        parses = [fake_parse(n, 5000 + seed, depth_bias=8) for seed in range(count)]
+        linear_time = None
+        if linear_done:
+            use_linear_helpers(setattr, bfsrl)
+            linear_time = time_srl(bfsrl, parses, limit)
+            linear_done = linear_time is not None
+            for name, helper in graph_helpers.items():
+                setattr(bfsrl, name, helper)
+        graph_time = time_srl(bfsrl, parses, 0)
+        linear = f"{linear_time * 1000:.1f} ms" if linear_time is not None else f"> {limit} s per parse"
+        print(f"{count} parses of {n} tokens: linear scans {linear}, dependency graph {graph_time * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    # e.g. python src/test/python/bench_dependency_graph.py --tokens 20 40 80 160 320
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tokens", type=int, nargs="+", default=[20, 40, 80, 160, 320])
+    parser.add_argument("--parses", type=int, default=20)
+    parser.add_argument("--limit", type=int, default=10, help="seconds per parse before the linear scans are skipped")
+    args = parser.parse_args()
+    benchmark(args.tokens, args.parses, args.limit)
@@ -0,0 +1,227 @@
+import importlib
+import random
+import sys
+import types
+from pathlib import Path
+
+import pytest
+
+SERVICE_DIR = Path(__file__).resolve().parents[2] / "main" / "python"
+
+LABELS = ["nsubj", "obj", "iobj", "obl", "xcomp", "ccomp", "cop", "acl", "appos", "conj", "nmod", "det", "amod",
+          "punct", "aux:pass", "nsubj:pass", "compound:prt", "csubj:pass", "mark", "expl", "advmod", "ng"]
+POS = ["VERB", "NOUN", "PRON", "ADJ", "AUX", "DET", "ADP"]
+TAGS = ["PRELS", "VAFIN", "NN", "ADJA", "VVFIN", "ART"]
+OPT_DEPENDENTS = ["all", "first level", "second level", "none"]
+
+
+class FakeToken:
+    # the attributes of a spaCy token used by srl()
+    def __init__(self, i, text, pos, tag, dep):
+        self.i, self.text, self.pos_, self.tag_, self.dep_ = i, text, pos, tag, dep
+        self.lemma_ = text.lower()
+        self.ent_type = i % 7 == 3
+        self.ent_type_ = "LOC" if self.ent_type else ""
+        self.children = []
+
+
+class FakeSentence:
+    # a diaparser sentence, srl() uses to_displacy() and the heads in values[6]
+    def __init__(self, heads, rels, words):
+        self.heads, self.rels, self.words = heads, rels, words
+        self.values = [None] * 6 + [heads]
+
+    def to_displacy(self):
+        arcs = []
+        for j, (head, rel) in enumerate(zip(self.heads, self.rels), 1):
+            if head < j:
+                arcs.append({"start": head, "end": j, "label": rel, "dir": "right"})
+            else:
+                arcs.append({"start": j, "end": head, "label": rel, "dir": "left"})
+        return {"words": [{"text": "ROOT"}] + [{"text": w} for w in self.words], "arcs": arcs}
+
+
+def fake_parse(n, seed, depth_bias):
+    # random dependency tree rooted at token 1, tokens attach to one of the depth_bias previous tokens
+    # most of the time, so a small depth_bias gives deep trees
+    rng = random.Random(seed)
+    heads = [0]
+    for j in range(2, n + 1):
+        heads.append(rng.randint(max(1, j - depth_bias), j - 1) if rng.random() < 0.9 else rng.randint(1, j - 1))
+    rels = ["root"] + [rng.choice(LABELS) for _ in range(n - 1)]
+    words = ["w" + "abcdefghij"[j % 10] + "abcdefghij"[j // 10 % 10] + "abcdefghij"[j // 100] for j in range(1, n + 1)]
+    poss = [rng.choice(POS) for _ in range(n)]
+    tags = [rng.choice(TAGS) for _ in range(n)]
+
+    def nlp(text):
+        tokens = [FakeToken(i, w, p, t, r) for i, (w, p, t, r) in enumerate(zip(words, poss, tags, rels))]
+        for j, head in enumerate(heads, 1):
+            if head:
+                tokens[head - 1].children.append(tokens[j - 1])
+        return tokens
+
+    return FakeSentence(heads, rels, words), words, poss, tags, nlp
+
+
+def run_srl(bfsrl, parse, opt_dependents, opt_appos=True):
+    sentence, words, poss, tags, nlp = parse
+    try:
+        return "ok", bfsrl.srl(sentence, list(words), list(poss), list(tags), nlp, opt_dependents, opt_appos, None)
+    except Exception as ex:
+        # the rules assert on some random trees, the same error has to be raised by both versions
+        return "error", type(ex).__name__, str(ex)
+
+
+# The former helpers of bfsrl.py, every query scans the full arc list
+
+def linear_get_children(arcs, token_i):
+    pred_arcs = {}
+    for arc in arcs:
+        if arc['start'] == token_i and arc['dir'] == 'right':
+            pred_arcs[arc['end']] = arc['label']
+        elif arc['end'] == token_i and arc['dir'] == 'left':
+            pred_arcs[arc['start']] = arc['label']
+    return pred_arcs
+
+
+def linear_get_dependents(arcs, token_i):
+    return {k: v for k, v in linear_get_children(arcs, token_i).items() if v != 'acl'}
+
+
+def linear_get_dependents_l2(arcs, token_i):
+    pred_arcs = {}
+    for arc in arcs:
+        if arc['label'] == 'acl':
+            continue
+        if arc['start'] == token_i and arc['dir'] == 'right':
+            pred_arcs[arc['end']] = arc['label']
+            pred_arcs.update(linear_get_dependents(arcs, arc['end']))
+        elif arc['end'] == token_i and arc['dir'] == 'left':
+            pred_arcs[arc['start']] = arc['label']
+            pred_arcs.update(linear_get_dependents(arcs, arc['start']))
+    return pred_arcs
+
+
+def linear_get_arcs(arcs, token_i, tokens, stop_pos, stop_dep):
+    pred_arcs = []
+    for arc in arcs:
+        if arc['label'] == 'acl' or arc['label'] == 'punct' or arc['label'] == 'expl':
+            continue
+        if arc['start'] == token_i and arc['dir'] == 'right' and \
+                tokens[arc['end'] - 1].pos_ != stop_pos and not stop_dep in arc['label']:
+            pred_arcs.append(arc['end'])
+        elif arc['end'] == token_i and arc['dir'] == 'left' and \
+                tokens[arc['start'] - 1].pos_ != stop_pos and not stop_dep in arc['label']:
+            pred_arcs.append(arc['start'])
+    return pred_arcs
+
+
+def linear_get_current_arc(arcs, token_i):
+    arcs = [a for a in arcs if (a['start'] == token_i and a['dir'] == 'left')
+            or (a['end'] == token_i and a['dir'] == 'right')]
+    assert len(arcs) == 1
+    return arcs[0]
+
+
+def linear_get_dependents_recursive(arcs, token_i, tokens, t=0, stop_pos='VERB', stop_dep=' '):
+    # extends the list it iterates over, so every collected subtree is expanded again
+    pred_arcs = linear_get_arcs(arcs, token_i, tokens, stop_pos=stop_pos, stop_dep=stop_dep)
+    c_arc_l = linear_get_current_arc(arcs, token_i)['label']
+    cur_pos = tokens[token_i - 1].pos_
+    if len(pred_arcs) == 0 or (cur_pos == stop_pos and t != 0) or (stop_dep in c_arc_l):
+        return []
+    for arc_i in pred_arcs:
+        pred_arcs.extend(linear_get_dependents_recursive(arcs, arc_i, tokens, t=t + 1, stop_dep=stop_dep))
+    return list(set(pred_arcs))
+
+
+def use_linear_helpers(set_attr, bfsrl):
+    # srl() with the recursive and dependent queries answered by the linear scans
+    set_attr(bfsrl, "get_children", lambda graph, token_i: linear_get_children(graph.arcs, token_i))
+    set_attr(bfsrl, "get_dependents", lambda graph, token_i: linear_get_dependents(graph.arcs, token_i))
+    set_attr(bfsrl, "get_dependents_l2", lambda graph, token_i: linear_get_dependents_l2(graph.arcs, token_i))
+    set_attr(bfsrl, "get_dependents_recursive",
+             lambda graph, token_i, tokens, t=0, stop_pos='VERB', stop_dep=' ':
+             linear_get_dependents_recursive(graph.arcs, token_i, tokens, t, stop_pos, stop_dep))
+
+
+def load_bfsrl(set_item, syspath_prepend):
+    # the parser and tagger only load the models, the rules run without them
+    if importlib.util.find_spec("diaparser") is None:
+        parsers = types.ModuleType("diaparser.parsers")
+        parsers.Parser = object
+        set_item(sys.modules, "diaparser", types.ModuleType("diaparser"))
+        set_item(sys.modules, "diaparser.parsers", parsers)
+    if importlib.util.find_spec("HanTa") is None:
+        tagger = types.ModuleType("HanTa")
+        tagger.HanoverTagger = object
+        set_item(sys.modules, "HanTa", tagger)
+    syspath_prepend(str(SERVICE_DIR))
+    sys.modules.pop("bfsrl", None)
+    return importlib.import_module("bfsrl")
+
+
+@pytest.fixture
+def bfsrl(monkeypatch):
+    # the xcomp word lists are read from the working directory
+    monkeypatch.chdir(SERVICE_DIR)
+    return load_bfsrl(monkeypatch.setitem, monkeypatch.syspath_prepend)
+
+
+def parses(count, max_tokens):
+    for seed in range(count):
+        rng = random.Random(seed)
+        yield fake_parse(rng.randint(3, max_tokens), seed, depth_bias=rng.randint(1, 5))
+
+
+def test_graph_queries_match_linear_scans(bfsrl):
+    for sentence, words, poss, tags, nlp in parses(100, 40):
+        arcs = sentence.to_displacy()["arcs"]
+        graph = bfsrl.DependencyGraph(arcs)
+        tokens = nlp(" ".join(words))
+        for token_i in range(1, len(words) + 1):
+            assert bfsrl.get_children(graph, token_i) == linear_get_children(arcs, token_i)
+            assert bfsrl.get_dependents(graph, token_i) == linear_get_dependents(arcs, token_i)
+            assert bfsrl.get_dependents_l2(graph, token_i) == linear_get_dependents_l2(arcs, token_i)
+            assert bfsrl.get_current_arc(graph, token_i) is linear_get_current_arc(arcs, token_i)
+            for stop_pos, stop_dep in [("VERB", " "), ("NOUN", "obj")]:
+                assert bfsrl.get_arcs(graph, token_i, tokens, stop_pos, stop_dep) == \
+                    linear_get_arcs(arcs, token_i, tokens, stop_pos, stop_dep)
+
+
+def test_memoized_recursion_matches_linear_scan(bfsrl):
+    for sentence, words, poss, tags, nlp in parses(200, 25):
+        arcs = sentence.to_displacy()["arcs"]
+        graph = bfsrl.DependencyGraph(arcs)
+        tokens = nlp(" ".join(words))
+        for stop_dep in [" ", "acl", "nmod"]:
+            for t in [0, 1]:
+                for token_i in range(1, len(words) + 1):
+                    # same list, including the order of list(set(...))
+                    assert bfsrl.get_dependents_recursive(graph, token_i, tokens, t=t, stop_dep=stop_dep) == \
+                        linear_get_dependents_recursive(arcs, token_i, tokens, t=t, stop_dep=stop_dep)
+
+
+def test_memoized_results_are_copies(bfsrl):
+    sentence, words, poss, tags, nlp = fake_parse(30, 0, depth_bias=2)
+    graph = bfsrl.DependencyGraph(sentence.to_displacy()["arcs"])
+    tokens = nlp(" ".join(words))
+    first = bfsrl.get_dependents_recursive(graph, 1, tokens)
+    first.append(-1)
+    assert -1 not in bfsrl.get_dependents_recursive(graph, 1, tokens)
+
+
+@pytest.mark.parametrize("opt_dependents", OPT_DEPENDENTS)
+def test_srl_matches_linear_helpers(bfsrl, monkeypatch, opt_dependents):
+    fake_parses = list(parses(150, 25))
+    expected = []
+    with monkeypatch.context() as m:
+        use_linear_helpers(m.setattr, bfsrl)
+        for parse in fake_parses:
+            expected.append([run_srl(bfsrl, parse, opt_dependents, opt_appos) for opt_appos in [True, False]])
+
+    results = [[run_srl(bfsrl, parse, opt_dependents, opt_appos) for opt_appos in [True, False]] for parse in fake_parses]
+
+    assert results == expected
+    # most random trees yield predicates with roles
+    assert sum(bool(r[0] == "ok" and r[1]) for pair in results for r in pair) > len(results)
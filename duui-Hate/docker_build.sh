@@ -169,6 +169,7 @@ docker build \
   --build-arg MODEL_SOURCE \
   --build-arg MODEL_LANG \
   -t ${DOCKER_REGISTRY}${ANNOTATOR_NAME}"-"${MODEL_SPECNAME}:${ANNOTATOR_VERSION}${DUUI_CUDA} \
+  --build-context duui-runtime=../duui-runtime \
   -f src/main/docker/Dockerfile${DUUI_CUDA} \
   .
 
@@ -1,19 +1,20 @@
 from pydantic import BaseModel
-from pydantic_settings import BaseSettings
-from typing import List, Optional, Dict, Union
-import logging
+from typing import List, Optional
 from time import time
-from fastapi import FastAPI, Response
-from cassis import load_typesystem
 import torch
-from functools import lru_cache
 from hatechecker import HateCheck, HateCheckEziisk
 from threading import Lock
+from duui_runtime import (
+    AnnotationMeta,
+    DocumentModification,
+    DuuiService,
+    RuntimeSettings,
+    UimaSentenceSelection,
+    fix_unicode_problems,
+    stage,
+)
 # from sp_correction import SentenceBestPrediction
 
-# Settings
-# These are automatically loaded from env variables
-from starlette.responses import PlainTextResponse
 model_lock = Lock()
 
 sources = {
@@ -26,54 +27,35 @@ languages = {
     "gronlp": "en"
 }
 
-class Settings(BaseSettings):
-    # Name of this annotator
-    annotator_name: str
-    # Version of this annotator
-    annotator_version: str
-    # Log level
-    log_level: str
+
+# Settings
+# These are automatically loaded from env variables, the annotator name and
+# version, log level and model cache size are provided by RuntimeSettings
+class Settings(RuntimeSettings):
     # model_name
     model_name: str
     # Name of this annotator
     model_version: str
-    #cach_size
-    model_cache_size: int
+    # max number of padded tokens per forward pass
+    batch_max_tokens: int = 8192
     # url of the model
     model_source: str
     # language of the model
     model_lang: str
+    # typesystem and Lua communication script of this annotator
+    typesystem_filename: Optional[str] = 'TypeSystemHate.xml'
+    lua_communication_script_filename: Optional[str] = "duui_hate.lua"
 
 
 # Load settings from env vars
 settings = Settings()
-lru_cache_with_size = lru_cache(maxsize=settings.model_cache_size)
-logging.basicConfig(level=settings.log_level)
-logger = logging.getLogger(__name__)
+service = DuuiService(settings, description="Hate annotator")
+app = service.app
+logger = service.logger
 
 device = 0 if torch.cuda.is_available() else "cpu"
 logger.info(f'USING {device}')
-# Load the predefined typesystem that is needed for this annotator to work
-typesystem_filename = 'TypeSystemHate.xml'
-logger.debug("Loading typesystem from \"%s\"", typesystem_filename)
-with open(typesystem_filename, 'rb') as f:
-    typesystem = load_typesystem(f)
-    logger.debug("Base typesystem:")
-    logger.debug(typesystem.to_xml())
 
-# Load the Lua communication script
-lua_communication_script_filename = "duui_hate.lua"
-logger.debug("Loading Lua communication script from \"%s\"", lua_communication_script_filename)
-
-class UimaSentence(BaseModel):
-    text: str
-    begin: int
-    end: int
-
-
-class UimaSentenceSelection(BaseModel):
-    selection: str
-    sentences: List[UimaSentence]
 
 # Request sent by DUUI
 # Note, this is transformed by the Lua script
@@ -87,26 +69,13 @@ class DUUIRequest(BaseModel):
     #
 
 
-# UIMA type: mark modification of the document
-class DocumentModification(BaseModel):
-    user: str
-    timestamp: int
-    comment: str
-
-
-# UIMA type: adds metadata to each annotation
-class AnnotationMeta(BaseModel):
-    name: str
-    version: str
-    modelName: str
-    modelVersion: str
+def load_model(model_name):
+    if model_name == "HateCheckEziisk":
+        model_i = HateCheckEziisk(device, max_tokens=settings.batch_max_tokens)
+    else:
+        model_i = HateCheck(model_name, device, max_tokens=settings.batch_max_tokens)
+    return model_i
 
-def fix_unicode_problems(text):
-    # fix emoji in python string and prevent json error on response
-    # File "/usr/local/lib/python3.8/site-packages/starlette/responses.py", line 190, in render
-    # UnicodeEncodeError: 'utf-8' codec can't encode characters in position xx-yy: surrogates not allowed
-    clean_text = text.encode('utf-16', 'surrogatepass').decode('utf-16', 'surrogateescape')
-    return clean_text
 
 def process_selection(model_name, selection):
     begin = []
@@ -120,8 +89,9 @@ def process_selection(model_name, selection):
         s.text
         for s in selection.sentences
     ]
-    with model_lock:
-        classifier = load_model(model_name)
+    with stage("load_model"):
+        classifier = service.models.get(model_name, lambda: load_model(model_name))
+    with model_lock, stage("inference"):
         results = classifier.hate_prediction(texts)
         for c, res in enumerate(results):
             sentence = selection.sentences[c]
@@ -135,6 +105,19 @@ def process_selection(model_name, selection):
     return {"begin": begin, "end": end, "non_hate": non_hate, "hate": hate}
 
 
+def process_selections(selections):
+    begins = []
+    ends = []
+    non_hate = []
+    hate = []
+    for selection in selections:
+        output = process_selection(settings.model_name, selection)
+        begins.extend(output["begin"])
+        ends.extend(output["end"])
+        non_hate.extend(output["non_hate"])
+        hate.extend(output["hate"])
+    return begins, ends, non_hate, hate
+
 
 # Response sent by DUUI
 # Note, this is transformed by the Lua script
@@ -160,51 +143,6 @@ class DUUIResponse(BaseModel):
     model_lang: str
 
 
-
-app = FastAPI(
-    openapi_url="/openapi.json",
-    docs_url="/api",
-    redoc_url=None,
-    title=settings.annotator_name,
-    description="Hate annotator",
-    version=settings.model_version,
-    terms_of_service="https://www.texttechnologylab.org/legal_notice/",
-    contact={
-        "name": "TTLab Team",
-        "url": "https://texttechnologylab.org",
-        "email": "bagci@em.uni-frankfurt.de",
-    },
-    license_info={
-        "name": "AGPL",
-        "url": "http://www.gnu.org/licenses/agpl-3.0.en.html",
-    },
-)
-
-with open(lua_communication_script_filename, 'rb') as f:
-    lua_communication_script = f.read().decode("utf-8")
-logger.debug("Lua communication script:")
-logger.debug(lua_communication_script_filename)
-
-
-# Get typesystem of this annotator
-@app.get("/v1/typesystem")
-def get_typesystem() -> Response:
-    # TODO remove cassis dependency, as only needed for typesystem at the moment?
-    xml = typesystem.to_xml()
-    xml_content = xml.encode("utf-8")
-
-    return Response(
-        content=xml_content,
-        media_type="application/xml"
-    )
-
-
-# Return Lua communication script
-@app.get("/v1/communication_layer", response_class=PlainTextResponse)
-def get_communication_layer() -> str:
-    return lua_communication_script
-
-
 # Return documentation info
 @app.get("/v1/documentation")
 def get_documentation():
@@ -213,7 +151,7 @@ def get_documentation():
 
 # Process request from DUUI
 @app.post("/v1/process")
-def post_process(request: DUUIRequest):
+async def post_process(request: DUUIRequest):
     # Return data
     # Save modification start time for later
     modification_timestamp_seconds = int(time())
@@ -222,39 +160,14 @@ def post_process(request: DUUIRequest):
     non_hate = []
     hate = []
 
-    try:
-        model_source = settings.model_source
-        model_lang = settings.model_lang
-        # set meta Informations
-        meta = AnnotationMeta(
-            name=settings.annotator_name,
-            version=settings.annotator_version,
-            modelName=settings.model_name,
-            modelVersion=settings.model_version,
-        )
-        # Add modification info
-        modification_meta_comment = f"{settings.annotator_name} ({settings.annotator_version}))"
-        modification_meta = DocumentModification(
-            user=settings.annotator_name,
-            timestamp=modification_timestamp_seconds,
-            comment=modification_meta_comment
-        )
+    # set meta Informations
+    meta = service.annotation_meta(settings.model_name, settings.model_version)
+    # Add modification info
+    modification_meta = service.document_modification(timestamp=modification_timestamp_seconds)
 
-        for selection in request.selections:
-            output = process_selection(settings.model_name, selection)
-            begins.extend(output["begin"])
-            ends.extend(output["end"])
-            non_hate.extend(output["non_hate"])
-            hate.extend(output["hate"])
+    try:
+        # inference runs in the service executor, off the event loop
+        begins, ends, non_hate, hate = await service.run(process_selections, request.selections)
     except Exception as ex:
         logger.exception(ex)
     return DUUIResponse(meta=meta, modification_meta=modification_meta, begins=begins, ends=ends, non_hate=non_hate, hate=hate, model_name=settings.model_name, model_version=settings.model_version, model_source=settings.model_source, model_lang=settings.model_lang)
-
-@lru_cache_with_size
-def load_model(model_name):
-    if model_name == "HateCheckEziisk":
-        model_i = HateCheckEziisk(device)
-    else:
-        model_i = HateCheck(model_name, device)
-    return model_i
-
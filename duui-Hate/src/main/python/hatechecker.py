@@ -1,6 +1,7 @@
 import torch
 import math
 from transformers import AutoModelForSequenceClassification, AutoTokenizer
+from duui_runtime.batching import DEFAULT_MAX_TOKENS, TokenBudgetBatcher
 from scipy.special import softmax
 import numpy as np
 from typing import List
@@ -100,7 +101,7 @@ map_hate = {
 
 
 class HateCheck:
-    def __init__(self, model_name: str, device='cuda:0'):
+    def __init__(self, model_name: str, device='cuda:0', max_tokens: int = DEFAULT_MAX_TOKENS):
         self.device = device
         if model_name == "Exqrch/IndoBERTweet-HateSpeech":
             self.tokenizer = AutoTokenizer.from_pretrained("indolem/indobertweet-base-uncased")
@@ -112,39 +113,35 @@ class HateCheck:
             self.model.resize_token_embeddings(len(self.tokenizer))
         self.class_mapping = self.model.config.id2label
         self.labels = list(map_hate[model_name].values())
+        self.batcher = TokenBudgetBatcher(self.tokenizer, self.model, device, max_tokens=max_tokens)
 
 
     def hate_prediction(self, texts: List[str]):
-        with torch.no_grad():
-            score_list = []
-            inputs = self.tokenizer(texts, return_tensors="pt", padding=True, truncation=True, max_length=512).to(self.device)
-            outputs = self.model(**inputs)
-            scores = outputs[0].detach().cpu().numpy()
-            for score in scores:
-                score_dict_i = []
-                score_i = softmax(score)
-                ranking = np.argsort(score_i)
-                ranking = ranking[::-1]
-                for i in range(score.shape[0]):
-                    score_dict_i.append({"label": self.labels[ranking[i]], "score": float(score_i[ranking[i]])})
-                score_list.append(score_dict_i)
+        score_list = []
+        scores = self.batcher.logits(texts)
+        for score in scores:
+            score_dict_i = []
+            score_i = softmax(score)
+            ranking = np.argsort(score_i)
+            ranking = ranking[::-1]
+            for i in range(score.shape[0]):
+                score_dict_i.append({"label": self.labels[ranking[i]], "score": float(score_i[ranking[i]])})
+            score_list.append(score_dict_i)
         return score_list
 
 
 class HateCheckEziisk:
-    def __init__(self, device='cuda:0'):
+    def __init__(self, device='cuda:0', max_tokens: int = DEFAULT_MAX_TOKENS):
         self.device = device
         self.tokenizer = AutoTokenizer.from_pretrained("EZiisk/EZ_finetune_Vidgen_model_RHS_Best_Tokenizer")
         self.model = AutoModelForSequenceClassification.from_pretrained("EZiisk/EZ_finetune_Vidgen_model_RHS_Best").to(device)
         self.class_mapping = self.model.config.id2label
         self.labels = ["NOT HATE", "HATE"]
+        self.batcher = TokenBudgetBatcher(self.tokenizer, self.model, device, max_tokens=max_tokens)
 
     def hate_prediction(self, texts: List[str]):
         score_list = []
-        inputs = self.tokenizer(texts, return_tensors="pt", padding=True, truncation=True, max_length=512).to(
-            self.device)
-        outputs = self.model(**inputs)
-        scores = outputs[0].detach().cpu().numpy()
+        scores = self.batcher.logits(texts)
         for score in scores:
             score_dict_i = []
             score_i = softmax(score)
@@ -0,0 +1,82 @@
+import importlib
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+SERVICE_DIR = Path(__file__).resolve().parents[2] / "main" / "python"
+
+
+class DummyHateCheck:
+    # tiny local model instead of the transformers checkpoint, texts containing "hate" are hateful
+    loads = 0
+
+    def __init__(self, model_name):
+        DummyHateCheck.loads += 1
+        self.model_name = model_name
+
+    def hate_prediction(self, texts):
+        results = []
+        for text in texts:
+            score = 0.9 if "hate" in text.lower() else 0.2
+            labels = [{"label": "HATE", "score": score}, {"label": "NOT HATE", "score": 1 - score}]
+            results.append(sorted(labels, key=lambda r: r["score"], reverse=True))
+        return results
+
+
+@pytest.fixture
+def duui_hate(monkeypatch):
+    monkeypatch.setenv("ANNOTATOR_NAME", "duui-hate")
+    monkeypatch.setenv("ANNOTATOR_VERSION", "0.0.1")
+    monkeypatch.setenv("LOG_LEVEL", "INFO")
+    monkeypatch.setenv("MODEL_CACHE_SIZE", "1")
+    monkeypatch.setenv("MODEL_NAME", "GroNLP/hateBERT")
+    monkeypatch.setenv("MODEL_VERSION", "1d439ddf8a588fc8c44c4169ff9e102f3e839cca")
+    monkeypatch.setenv("MODEL_SOURCE", "https://huggingface.co/GroNLP/hateBERT")
+    monkeypatch.setenv("MODEL_LANG", "EN")
+    monkeypatch.chdir(SERVICE_DIR)
+    monkeypatch.syspath_prepend(str(SERVICE_DIR))
+    sys.modules.pop("duui_hate", None)
+    module = importlib.import_module("duui_hate")
+    monkeypatch.setattr(module, "load_model", DummyHateCheck)
+    DummyHateCheck.loads = 0
+    yield module
+    module.service.executor.shutdown()
+    sys.modules.pop("duui_hate", None)
+
+
+def test_process(duui_hate):
+    client = TestClient(duui_hate.app)
+    request = {
+        "doc_len": 31,
+        "lang": "en",
+        "selections": [{
+            "selection": "de.tudarmstadt.ukp.dkpro.core.api.segmentation.type.Sentence",
+            "sentences": [
+                {"text": "I hate you.", "begin": 0, "end": 11},
+                {"text": "Have a nice day.", "begin": 12, "end": 28},
+            ],
+        }],
+    }
+
+    for _ in range(2):
+        response = client.post("/v1/process", json=request)
+        assert response.status_code == 200
+
+    result = response.json()
+    assert result["begins"] == [0, 12]
+    assert result["ends"] == [11, 28]
+    assert result["hate"] == pytest.approx([0.9, 0.2])
+    assert result["non_hate"] == pytest.approx([0.1, 0.8])
+    assert result["meta"]["modelName"] == "GroNLP/hateBERT"
+    assert result["modification_meta"]["comment"] == "duui-hate (0.0.1)"
+    assert DummyHateCheck.loads == 1
+    assert "inference;dur=" in response.headers["Server-Timing"]
+
+
+def test_standard_endpoints(duui_hate):
+    client = TestClient(duui_hate.app)
+    assert client.get("/v1/communication_layer").text.startswith("StandardCharsets")
+    assert b"org.texttechnologylab.uima.type.Sentiment" in client.get("/v1/typesystem").content
+    assert client.get("/v1/metrics").status_code == 200
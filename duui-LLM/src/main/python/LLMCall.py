@@ -1,57 +1,84 @@
-from openai import OpenAI
+from functools import lru_cache
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
 from typing import Union
+import httpx
+
+
+# Defaults for the pooled clients
+DEFAULT_MAX_CONNECTIONS = 8
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_TIMEOUT = 600.0
+
+
+@lru_cache(maxsize=16)
+def get_async_client(url: str, port: int, api_key: str = None, max_connections: int = DEFAULT_MAX_CONNECTIONS,
+                     max_retries: int = DEFAULT_MAX_RETRIES, timeout: float = DEFAULT_TIMEOUT) -> AsyncOpenAI:
+    # One long-lived client per server, requests reuse its pooled HTTP connections.
+    # Failed requests (connection errors, timeouts, 408/409/429/5xx) are retried by the
+    # client with exponential backoff and jitter, honoring Retry-After headers.
+    http_client = DefaultAsyncHttpxClient(
+        limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+    )
+    if api_key is None:
+        return AsyncOpenAI(
+            base_url=f"http://{url}:{port}/v1/",
+            api_key="ollama",
+            max_retries=max_retries,
+            timeout=timeout,
+            http_client=http_client,
+        )
+    return AsyncOpenAI(
+        # required but ignored
+        api_key=api_key,
+        max_retries=max_retries,
+        timeout=timeout,
+        http_client=http_client,
+    )
+
+
+def build_messages(text: str, system_prompt: Union[None,str]=None, prefix_prompt: Union[None, str]=None, suffix_prompt: Union[str, None]=None):
+    prefix = "" if prefix_prompt is None else prefix_prompt
+    suffix = "" if suffix_prompt is None else suffix_prompt
+    input_prompt = f"{prefix}{text}{suffix}"
+    if system_prompt is not None:
+        messages = [
+            {
+                "role": "system",
+                "content": system_prompt
+            },
+            {
+                "role": "user",
+                "content": input_prompt
+            }
+        ]
+    else:
+        messages = [
+            {
+                "role": "user",
+                "content": input_prompt
+            }
+        ]
+    return messages
 
 
 class OpenAIProcessing:
-    def __init__(self, url: str, port: int, seed: int = None, temperature: float = None, api_key: str = None):
-        if api_key is None:
-            self.openai = OpenAI(
-                base_url=f"http://{url}:{port}/v1/",
-                api_key="ollama"
-            )
-        else:
-            self.openai = OpenAI(
-                # required but ignored
-                api_key=api_key,
-            )
+    def __init__(self, url: str, port: int, seed: int = None, temperature: float = None, api_key: str = None,
+                 max_connections: int = DEFAULT_MAX_CONNECTIONS, max_retries: int = DEFAULT_MAX_RETRIES, timeout: float = DEFAULT_TIMEOUT):
+        self.openai = get_async_client(url, port, api_key, max_connections, max_retries, timeout)
         self.seed = seed if seed is not None else 0
         self.temperature = temperature if temperature is not None else 1.0
         self.url = url
         self.port = port
 
-    def process_messages(self, model_name, messages):
-        return self.openai.chat.completions.create(
+    async def process_messages(self, model_name, messages):
+        response = await self.openai.chat.completions.create(
                 model=model_name,
                 seed=self.seed,
                 messages=messages,
                 temperature=self.temperature,
-            ).to_dict()
-
-    def process(self, text: str, model_name: str, system_prompt: Union[None,str]=None, prefix_prompt: Union[None, str]=None, suffix_prompt: Union[str, None]=None):
-        prefix = "" if prefix_prompt is None else prefix_prompt
-        suffix = "" if suffix_prompt is None else suffix_prompt
-        input_prompt = f"{prefix}{text}{suffix}"
-        if system_prompt is not None:
-            messages = [
-                {
-                    "role": "system",
-                    "content": system_prompt
-                },
-                {
-                    "role": "user",
-                    "content": input_prompt
-                }
-            ]
-        else:
-            messages = [
-                {
-                    "role": "user",
-                    "content": input_prompt
-                }
-            ]
-        return self.openai.chat.completions.create(
-            model=model_name,
-            seed=self.seed,
-            messages=messages,
-            temperature=self.temperature,
-        ).to_dict()
+            )
+        return response.to_dict()
+
+    async def process(self, text: str, model_name: str, system_prompt: Union[None,str]=None, prefix_prompt: Union[None, str]=None, suffix_prompt: Union[str, None]=None):
+        messages = build_messages(text, system_prompt, prefix_prompt, suffix_prompt)
+        return await self.process_messages(model_name, messages)
@@ -6,8 +6,9 @@ from fastapi import FastAPI, Response
 from cassis import load_typesystem
 from functools import lru_cache
 from threading import Lock
+import asyncio
 import time
-from LLMCall import OpenAIProcessing
+from LLMCall import OpenAIProcessing, DEFAULT_MAX_CONNECTIONS, DEFAULT_MAX_RETRIES, DEFAULT_TIMEOUT
 import json
 # from sp_correction import SentenceBestPrediction
 
@@ -27,6 +28,12 @@ class Settings(BaseSettings):
     annotator_version: str
     # Log level
     log_level: str
+    # Max number of prompts sent to the LLM server at the same time
+    max_concurrent_requests: int = DEFAULT_MAX_CONNECTIONS
+    # Retries of a failed LLM call, with exponential backoff
+    max_retries: int = DEFAULT_MAX_RETRIES
+    # Timeout of a LLM call in seconds
+    request_timeout: float = DEFAULT_TIMEOUT
 
 # Load settings from env vars
 settings = Settings()
@@ -164,9 +171,21 @@ def get_documentation():
     return "Test"
 
 
+async def process_prompt(llm, semaphore, prompt_i, model_name):
+    systemprompt = None if prompt_i["systemPrompt"]["text"]=="" else prompt_i["systemPrompt"]["text"]
+    prefix = None if prompt_i["prefix"]["text"]=="" else prompt_i["prefix"]["text"]
+    suffix = None if prompt_i["suffix"]["text"]=="" else prompt_i["suffix"]["text"]
+    prompt_text = prompt_i["text"]
+    async with semaphore:
+        start_time = time.time()
+        response_llm = await llm.process(prompt_text, model_name, system_prompt=systemprompt, prefix_prompt=prefix, suffix_prompt=suffix)
+        time_seconds = time.time() - start_time
+    return response_llm, time_seconds
+
+
 # Process request from DUUI
 @app.post("/v1/process")
-def post_process(request: DUUIRequest):
+async def post_process(request: DUUIRequest):
     # Return data
     # Save modification start time for later
     modification_timestamp_seconds = int(time.time())
@@ -195,24 +214,26 @@ def post_process(request: DUUIRequest):
         temperature = request.temperature
 
         text = request.text
-        prompts = request.prompts
+        prompts = request.prompts if request.prompts is not None else []
         model_name = request.model_name
-        llm = OpenAIProcessing(url=url, port=port, seed=seed, temperature=temperature)
-        # Process the text
-        for prompt_i in prompts:
-            systemprompt = None if prompt_i["systemPrompt"]["text"]=="" else prompt_i["systemPrompt"]["text"]
-            prefix = None if prompt_i["prefix"]["text"]=="" else prompt_i["prefix"]["text"]
-            suffix = None if prompt_i["suffix"]["text"]=="" else prompt_i["suffix"]["text"]
-            id_prompt = prompt_i["id"]
-            prompt_begin = prompt_i["begin"]
-            prompt_end = prompt_i["end"]
-            begin_prompts.append(prompt_begin)
-            end_prompts.append(prompt_end)
-            id_prompts.append(id_prompt)
-            prompt_text = prompt_i["text"]
-            start_time = time.time()
-            response_llm = llm.process(prompt_text, model_name, system_prompt=systemprompt, prefix_prompt=prefix, suffix_prompt=suffix)
-            time_seconds = time.time() - start_time
+        llm = OpenAIProcessing(url=url, port=port, seed=seed, temperature=temperature,
+                               max_connections=settings.max_concurrent_requests, max_retries=settings.max_retries,
+                               timeout=settings.request_timeout)
+        # Process the prompts concurrently, at most max_concurrent_requests at a time,
+        # the results are collected in the order of the prompts
+        semaphore = asyncio.Semaphore(settings.max_concurrent_requests)
+        results = await asyncio.gather(
+            *(process_prompt(llm, semaphore, prompt_i, model_name) for prompt_i in prompts),
+            return_exceptions=True
+        )
+        for prompt_i, result in zip(prompts, results):
+            if isinstance(result, BaseException):
+                logger.error("Prompt %s failed: %s", prompt_i["id"], result)
+                continue
+            response_llm, time_seconds = result
+            begin_prompts.append(prompt_i["begin"])
+            end_prompts.append(prompt_i["end"])
+            id_prompts.append(prompt_i["id"])
             additional.append(json.dumps({"url": url, "port": port, "model_name": request.model_name, "seed": seed, "temperature": temperature, "duration": time_seconds}))
             # logger.debug(f"Processing time: {time_seconds} seconds")
             content = response_llm["choices"][0]["message"]["content"]
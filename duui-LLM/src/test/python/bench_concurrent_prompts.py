@@ -0,0 +1,35 @@
+import argparse
+import os
+import sys
+import time
+
+from test_concurrent_prompts import SERVICE_DIR, StubLLMServer, llm_request, load_service, process
+
+
+def benchmark(prompts, delay, limits, reject_every):
+    with StubLLMServer(delay, reject_every) as server:
+        service = load_service(os.environ.__setitem__)
+        for limit in limits:
+            # limit 1 sends one prompt after another, as before the concurrent dispatch
+            service.settings.max_concurrent_requests = limit
+            server.reset()
+            start = time.perf_counter()
+            response = process(service, llm_request(service, server.port, prompts))
+            elapsed = time.perf_counter() - start
+            print(
+                f"limit {limit}: {prompts} prompts, {elapsed:.2f}s, {len(response.contents)} contents, "
+                f"max in flight {server.max_in_flight}, rejected with 429 {server.rejected}"
+            )
+
+
+if __name__ == "__main__":
+    # e.g. python src/test/python/bench_concurrent_prompts.py --prompts 200 --delay 0.1
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--prompts", type=int, default=200)
+    parser.add_argument("--delay", type=float, default=0.1)
+    parser.add_argument("--limit", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--reject-every", type=int, default=0)
+    args = parser.parse_args()
+    sys.path.insert(0, str(SERVICE_DIR))
+    os.chdir(SERVICE_DIR)
+    benchmark(args.prompts, args.delay, args.limit, args.reject_every)
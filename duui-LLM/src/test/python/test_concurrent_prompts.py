@@ -0,0 +1,167 @@
+import asyncio
+import hashlib
+import importlib
+import json
+import random
+import socket
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("openai")
+uvicorn = pytest.importorskip("uvicorn")
+from fastapi import FastAPI, Request  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+
+SERVICE_DIR = Path(__file__).resolve().parents[2] / "main" / "python"
+
+
+class StubLLMServer:
+    # OpenAI compatible chat completions server: answers after about delay seconds (0.5 to 1.5 times,
+    # fixed per prompt, so that the answers arrive out of order), the first attempt of every
+    # reject_every-th prompt is rejected with 429
+    def __init__(self, delay=0.05, reject_every=0):
+        self.delay = delay
+        self.reject_every = reject_every
+        self.port = free_port()
+        self.reset()
+        self.app = FastAPI()
+        self.app.post("/v1/chat/completions")(self.completions)
+        self.server = uvicorn.Server(uvicorn.Config(self.app, host="127.0.0.1", port=self.port, log_level="warning"))
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+
+    def reset(self):
+        self.requests = 0
+        self.rejected = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.seen = set()
+
+    async def completions(self, request: Request):
+        body = await request.json()
+        content = body["messages"][-1]["content"]
+        digest = hashlib.md5(repr(body["messages"]).encode()).hexdigest()
+        self.requests += 1
+        if self.reject_every and int(digest, 16) % self.reject_every == 0 and digest not in self.seen:
+            self.seen.add(digest)
+            self.rejected += 1
+            return JSONResponse({"error": {"message": "rate limited"}}, status_code=429, headers={"retry-after-ms": "20"})
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(self.delay * random.Random(digest).uniform(0.5, 1.5))
+        self.in_flight -= 1
+        return {
+            "id": f"chatcmpl-{digest[:12]}", "object": "chat.completion", "created": 0, "model": body["model"],
+            "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": f"answer to {content}"}}],
+            "usage": {"prompt_tokens": len(content), "completion_tokens": 3, "total_tokens": len(content) + 3},
+        }
+
+    def __enter__(self):
+        self.thread.start()
+        while not self.server.started:
+            time.sleep(0.01)
+        return self
+
+    def __exit__(self, *args):
+        self.server.should_exit = True
+        self.thread.join()
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def load_service(set_env):
+    set_env("ANNOTATOR_NAME", "duui-llm")
+    set_env("ANNOTATOR_VERSION", "0.0.1")
+    set_env("LOG_LEVEL", "WARNING")
+    for module_name in ["duui_LLM", "LLMCall"]:
+        sys.modules.pop(module_name, None)
+    return importlib.import_module("duui_LLM")
+
+
+def llm_request(service, port, count, seed=0):
+    rng = random.Random(seed)
+    prompts = [
+        {
+            "id": i, "begin": i * 10, "end": i * 10 + 5,
+            "text": f"prompt {i} " + " ".join(rng.choices(["alpha", "beta", "gamma"], k=5)),
+            "systemPrompt": {"text": rng.choice(["", "be brief"])}, "prefix": {"text": "Q: "}, "suffix": {"text": ""},
+        }
+        for i in range(count)
+    ]
+    return service.DUUIRequest(
+        text="document", lang="en", len=8, prompts=prompts, seed=1, temperature=0.0, url="127.0.0.1", port=port,
+        model_name="stub",
+    )
+
+
+def process(service, request):
+    # every run has its own event loop, the pooled clients belong to the loop they were created in
+    sys.modules["LLMCall"].get_async_client.cache_clear()
+    return asyncio.run(service.post_process(request))
+
+
+@pytest.fixture(scope="module")
+def server():
+    with StubLLMServer() as server:
+        yield server
+
+
+@pytest.fixture
+def service(monkeypatch, server):
+    monkeypatch.chdir(SERVICE_DIR)
+    monkeypatch.syspath_prepend(str(SERVICE_DIR))
+    server.reset()
+    server.reject_every = 0
+    return load_service(monkeypatch.setenv)
+
+
+def test_results_are_in_prompt_order(service, server, monkeypatch):
+    monkeypatch.setattr(service.settings, "max_concurrent_requests", 4)
+    request = llm_request(service, server.port, 40)
+    response = process(service, request)
+
+    assert response.id_prompts == list(range(40))
+    assert response.begin_prompts == [prompt["begin"] for prompt in request.prompts]
+    assert response.end_prompts == [prompt["end"] for prompt in request.prompts]
+    assert response.contents == [f"answer to Q: {prompt['text']}" for prompt in request.prompts]
+    assert all("content" not in json.loads(r)["choices"][0]["message"] for r in response.responses)
+    # the prompts are sent concurrently, but never more than the limit at a time
+    assert server.max_in_flight == 4
+
+
+def test_rate_limited_prompts_are_retried(service, server, monkeypatch):
+    monkeypatch.setattr(service.settings, "max_concurrent_requests", 8)
+    server.reject_every = 4
+    response = process(service, llm_request(service, server.port, 40))
+
+    assert server.rejected > 0
+    assert server.requests == 40 + server.rejected
+    assert response.id_prompts == list(range(40))
+
+
+def test_failed_prompts_are_left_out(service, server, monkeypatch):
+    monkeypatch.setattr(service.settings, "max_retries", 0)
+    server.reject_every = 4
+    request = llm_request(service, server.port, 40)
+    response = process(service, request)
+
+    assert 0 < len(response.id_prompts) == 40 - server.rejected
+    assert response.id_prompts == sorted(response.id_prompts)
+    outputs = [response.begin_prompts, response.end_prompts, response.responses, response.contents, response.additional]
+    assert all(len(output) == len(response.id_prompts) for output in outputs)
+    for i, content in zip(response.id_prompts, response.contents):
+        assert content == f"answer to Q: {request.prompts[i]['text']}"
+
+
+def test_client_is_shared_between_requests(service, server):
+    first = service.OpenAIProcessing("127.0.0.1", server.port, seed=1)
+    second = service.OpenAIProcessing("127.0.0.1", server.port, seed=2)
+    assert first.openai is second.openai
+    assert service.OpenAIProcessing("127.0.0.1", server.port + 1).openai is not first.openai
@@ -18,9 +18,19 @@ SENTENCE_ENDERS = "!.?"
 SUBSCRIPT = str.maketrans("0123456789", "₀₁₂₃₄₅₆₇₈₉")
 DOC_NAME = "<document_name>"
 
+# What to do with documents longer than doc_max_segments of the model config:
+# keep: predict them as a whole, discard: return no clusters,
+# split: feed them in windows of segments (the incremental model carries its entities over)
+LONG_DOC_STRATEGIES = ["keep", "discard", "split"]
+
 
 class CorefHandler:
-    def __init__(self):
+    def __init__(self, long_doc_strategy="split", max_batch_segments=16):
+        if long_doc_strategy not in LONG_DOC_STRATEGIES:
+            raise ValueError(f"Invalid strategy for long documents {long_doc_strategy}, use one of {LONG_DOC_STRATEGIES}")
+        self.long_doc_strategy = long_doc_strategy
+        # Max number of segments encoded in one BERT forward pass
+        self.max_batch_segments = max_batch_segments
         self.device = torch.device("cuda:0" if torch.cuda.is_available() else "cpu")
         if torch.cuda.is_available():
             torch.cuda.empty_cache()  # clear GPU memory
@@ -43,16 +53,14 @@ class CorefHandler:
 
         self.model.load_state_dict(state_dict)
         self.model.eval()
+        # predict documents longer than doc_max_segments as a whole
+        self.model.eval_only = long_doc_strategy == "keep"
 
         self.basic_tokenizer = BasicTokenizer(do_lower_case=False)
         if self.runner.config['model_type'] == 'electra':
             self.tokenizer = ElectraTokenizer.from_pretrained(self.runner.config['bert_tokenizer_name'], strip_accents=False)
         else:
             self.tokenizer = BertTokenizer.from_pretrained(self.runner.config['bert_tokenizer_name'])
-        if self.runner.config['incremental']:
-            self.tensorizer.long_doc_strategy = "keep"
-        else:
-            self.tensorizer.long_doc_strategy = "discard"
 
     def text_to_token_list(self, text):
         words = self.basic_tokenizer.tokenize(text)
@@ -67,32 +75,29 @@ class CorefHandler:
             out.append(sentence)
         return out
 
-    def preprocess(self, tokenized_sentences: list):
-        document = get_document('_', tokenized_sentences, 'german', 20, self.tokenizer, 'nested_list')
-        _, example = self.tensorizer.tensorize_example(document, is_training=False)[0]
-        token_map = self.tensorizer.stored_info['subtoken_maps']['_']
-        # Remove gold
-        tensorized = [torch.tensor(e) for e in example[:7]]
-
+    def preprocess(self, documents: list):
+        """
+        Tensorizes a batch of documents, each a list of tokenized sentences.
+        """
         #output_format = 'raw', 'conll', 'list'
         output_format = "list"
-        return tensorized, (token_map, tokenized_sentences), output_format
-
+        preprocessed = []
+        for tokenized_sentences in documents:
+            document = get_document('_', tokenized_sentences, 'german', 20, self.tokenizer, 'nested_list')
+            _, example = self.tensorizer.tensorize_example(document, is_training=False)[0]
+            token_map = self.tensorizer.stored_info['subtoken_maps']['_']
+            # Remove gold
+            tensorized = [torch.tensor(e) for e in example[:7]]
+            preprocessed.append((tensorized, (token_map, tokenized_sentences), output_format))
+        return preprocessed
 
     def postprocess(self, inference_output):
-        # We only support a batch size of one!
-        assert len(inference_output) == 1
-        output, (token_map, tokenized_sentences), output_mode = inference_output[0]
-        if self.runner.config['incremental']:
-            span_starts, span_ends, mention_to_cluster_id, predicted_clusters = output
-        else:
-            _, _, _, span_starts, span_ends, antecedent_idx, antecedent_scores = output
-            predicted_clusters, _, _ = self.model.get_predicted_clusters(
-                span_starts.cpu().numpy(),
-                span_ends.cpu().numpy(),
-                antecedent_idx.cpu().numpy(),
-                antecedent_scores.detach().cpu().numpy()
-            )
+        return [
+            self.postprocess_document(predicted_clusters, token_map, tokenized_sentences, output_mode)
+            for predicted_clusters, (token_map, tokenized_sentences), output_mode in inference_output
+        ]
+
+    def postprocess_document(self, predicted_clusters, token_map, tokenized_sentences, output_mode):
         predicted_clusters_words = []
         for cluster in predicted_clusters:
             current_cluster = []
@@ -110,7 +115,7 @@ class CorefHandler:
             # but its only meant for direct human usage, so it should be fine.
             for sentence_ender in SENTENCE_ENDERS + ",":
                 text = text.replace(" " + sentence_ender, sentence_ender)
-            return [text]
+            return text
         elif output_mode == "conll":
             lines = [f"#begin document {DOC_NAME}"]
             for sentence_id, sentence in enumerate(tokenized_sentences, 1):
@@ -130,17 +135,20 @@ class CorefHandler:
                 DOC_NAME: token_map
             }
             output_conll(input_file, output_file, predictions, token_maps, False)
-            return [output_file.getvalue()]
+            return output_file.getvalue()
         else:
-            return [predicted_clusters_words]
+            return predicted_clusters_words
 
     def inference(self, data, *args, **kwargs):
-        in_data, token_info, output_mode = data
-        marshalled_data = [d.to(self.device) for d in in_data]
+        examples = [in_data for in_data, _, _ in data]
         with torch.no_grad():
-            results = self.model(*marshalled_data, *args, **kwargs)
-        # Batch size 1, so we wrap this into a batch list
-        return [(results, token_info, output_mode)]
+            predicted_clusters = self.model.predict_clusters_batch(
+                examples,
+                max_batch_segments=self.max_batch_segments,
+                split_long_docs=self.long_doc_strategy == "split",
+            )
+        return [(clusters, token_info, output_mode)
+                for clusters, (_, token_info, output_mode) in zip(predicted_clusters, data)]
 
 
 if __name__ == "__main__":
@@ -157,11 +165,11 @@ if __name__ == "__main__":
 
     #data = handler.text_to_token_list("Die Rhizocephala tanzen. Der Buntspecht frisst die Rhizocephala. Die Rhizocephala erteilt dem Buntspecht eine Lektion. Rhizocephala wurde gefressen. Rhizocephala wurde nicht gefressen. ")
 
-    preprocessed = handler.preprocess(data)
+    preprocessed = handler.preprocess([data])
     print("preprocessed", preprocessed)
     inference_output = handler.inference(preprocessed)
     print("inference_output", inference_output)
     postprocessed = handler.postprocess(inference_output)
-    print("postprocessed", postprocessed)
+    print("postprocessed", postprocessed[0])
 
 
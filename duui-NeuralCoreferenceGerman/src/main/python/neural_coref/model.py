@@ -18,6 +18,21 @@ logging.basicConfig(format='%(asctime)s - %(levelname)s - %(name)s - %(message)s
 logger = logging.getLogger()
 
 
+def segment_batches(units, max_batch_segments):
+    """ Groups (example index, first segment, end segment) units into batches of at most max_batch_segments segments;
+    a larger unit forms a batch on its own """
+    batch, batch_segments = [], 0
+    for unit in units:
+        num_segments = unit[2] - unit[1]
+        if batch and batch_segments + num_segments > max_batch_segments:
+            yield batch
+            batch, batch_segments = [], 0
+        batch.append(unit)
+        batch_segments += num_segments
+    if batch:
+        yield batch
+
+
 class CorefModel(nn.Module):
     def __init__(self, config, device, num_genres=None):
         super().__init__()
@@ -233,9 +248,19 @@ class CorefModel(nn.Module):
     def forward(self, *input):
         return self.get_predictions_and_loss(*input)
 
+    def encode_segments(self, input_ids, input_mask, max_batch_segments=None):
+        """ BERT embeddings of the segments, computed for at most max_batch_segments segments at a time """
+        if max_batch_segments is None or input_ids.shape[0] <= max_batch_segments:
+            return self.bert(input_ids, attention_mask=input_mask)[0]
+        return torch.cat([
+            self.bert(input_ids[i:i + max_batch_segments], attention_mask=input_mask[i:i + max_batch_segments])[0]
+            for i in range(0, input_ids.shape[0], max_batch_segments)
+        ])
+
     def get_predictions_and_loss(self, input_ids, input_mask, speaker_ids, sentence_len, genre, sentence_map,
-                                 is_training, gold_starts=None, gold_ends=None, gold_mention_cluster_map=None):
-        """ Model and input are already on the device """
+                                 is_training, gold_starts=None, gold_ends=None, gold_mention_cluster_map=None,
+                                 bert_output=None):
+        """ Model and input are already on the device; bert_output can hold the already encoded segments """
         device = self.device
         conf = self.config
 
@@ -246,7 +271,9 @@ class CorefModel(nn.Module):
             do_loss = True
 
         # Get token emb
-        mention_doc = self.bert(input_ids, attention_mask=input_mask)[0]  # [num seg, num max tokens, emb size]
+        if bert_output is None:
+            bert_output = self.bert(input_ids, attention_mask=input_mask)[0]
+        mention_doc = bert_output  # [num seg, num max tokens, emb size]
         input_mask = input_mask.to(torch.bool)
         mention_doc = mention_doc[input_mask]
         speaker_ids = speaker_ids[input_mask]
@@ -453,6 +480,56 @@ class CorefModel(nn.Module):
             top_antecedent_scores
         ], loss
 
+    def predict_clusters_batch(self, examples, max_batch_segments=16, split_long_docs=False):
+        """
+        Predicts the clusters of several documents, examples are tensorized examples without gold (the first
+        7 tensors) on any device. BERT encodes the segments of several documents at once, at most
+        max_batch_segments per forward pass. Documents longer than doc_max_segments are discarded (unless
+        eval_only is set), with split_long_docs they are predicted in independent chunks of doc_max_segments
+        segments instead. Returns the clusters (subtoken spans) of every document.
+        """
+        conf = self.config
+        max_segments = conf['doc_max_segments']
+        # (example index, first segment, end segment)
+        units = []
+        for i, example in enumerate(examples):
+            num_segments = example[0].shape[0]
+            if num_segments <= max_segments or self.eval_only:
+                units.append((i, 0, num_segments))
+            elif split_long_docs:
+                units.extend((i, start, min(start + max_segments, num_segments)) for start in range(0, num_segments, max_segments))
+            else:
+                logger.warning('Not predicting document longer than doc_max_segments')
+
+        predicted_clusters = [[] for _ in examples]
+        for batch in segment_batches(units, max_batch_segments):
+            batch_input_ids = torch.cat([examples[i][0][start:end] for i, start, end in batch]).to(self.device)
+            batch_input_mask = torch.cat([examples[i][1][start:end] for i, start, end in batch]).to(self.device)
+            bert_output = self.encode_segments(batch_input_ids, batch_input_mask, max_batch_segments)
+            batch_offset = 0
+            for i, start, end in batch:
+                input_ids, input_mask, speaker_ids, sentence_len, genre, sentence_map, is_training = examples[i][:7]
+                word_offset = int(input_mask[:start].sum())
+                num_words = int(input_mask[start:end].sum())
+                unit_example = (input_ids[start:end], input_mask[start:end], speaker_ids[start:end], sentence_len[start:end],
+                                genre, sentence_map[word_offset:word_offset + num_words], is_training)
+                _, _, _, span_starts, span_ends, antecedent_idx, antecedent_scores = self.get_predictions_and_loss(
+                    *[d.to(self.device) for d in unit_example],
+                    bert_output=bert_output[batch_offset:batch_offset + end - start]
+                )
+                batch_offset += end - start
+                clusters, _, _ = self.get_predicted_clusters(
+                    span_starts.cpu().numpy(),
+                    span_ends.cpu().numpy(),
+                    antecedent_idx.cpu().numpy(),
+                    antecedent_scores.detach().cpu().numpy()
+                )
+                predicted_clusters[i].extend(
+                    tuple((span_start + word_offset, span_end + word_offset) for span_start, span_end in cluster)
+                    for cluster in clusters
+                )
+        return predicted_clusters
+
     def _extract_top_spans(self, candidate_idx_sorted, candidate_starts, candidate_ends, num_top_spans):
         """ Keep top non-cross-overlapping candidates ordered by scores; compute on CPU because of loop """
         selected_candidate_idx = []
@@ -616,6 +693,8 @@ class IncrementalCorefModel(CorefModel):
         # Takes concat(entity_representation, span_representation)
         self.entity_representation_gate = nn.Linear(self.span_emb_size * 2, 1)
         # self.create_entity = torch.nn.Embedding(1, self.config['feature_emb_size'])
+        # Documents are processed in windows of this many segments, entities are carried over between windows
+        self.window_segments = 5
 
     def forward(self, *input, **kwargs):
         return self.get_predictions_incremental(*input, **kwargs)
@@ -629,7 +708,7 @@ class IncrementalCorefModel(CorefModel):
     def get_predictions_incremental(self, input_ids, input_mask, speaker_ids, sentence_len, genre, sentence_map,
                                     is_training, gold_starts=None, gold_ends=None, gold_mention_cluster_map=None,
                                     global_loss_chance=0.0, teacher_forcing=False):
-        max_segments = 5
+        max_segments = self.window_segments
 
         mention_to_cluster_id = {}
         predicted_clusters = []
@@ -707,16 +786,66 @@ class IncrementalCorefModel(CorefModel):
         else:
             return out
 
+    def predict_clusters_batch(self, examples, max_batch_segments=16, split_long_docs=True):
+        """
+        Predicts the clusters of several documents, see CorefModel.predict_clusters_batch. Documents of any
+        length are fed through the model window by window (split_long_docs has no effect), only the current
+        window of every document is moved to the device. BERT encodes the windows of several documents at once.
+        """
+        states = [{
+            'entities': None,
+            'cpu_entities': IncrementalEntities(conf=self.config, device="cpu", gold_strategy=GoldLabelStrategy.MOST_RECENT),
+            'offset': 0,
+        } for _ in examples]
+        num_windows = max([-(-example[0].shape[0] // self.window_segments) for example in examples], default=0)
+        for window in range(num_windows):
+            window_start = window * self.window_segments
+            units = [(i, window_start, min(window_start + self.window_segments, example[0].shape[0]))
+                     for i, example in enumerate(examples) if window_start < example[0].shape[0]]
+            for batch in segment_batches(units, max_batch_segments):
+                batch_input_ids = torch.cat([examples[i][0][start:end] for i, start, end in batch]).to(self.device)
+                batch_input_mask = torch.cat([examples[i][1][start:end] for i, start, end in batch]).to(self.device)
+                bert_output = self.encode_segments(batch_input_ids, batch_input_mask, max_batch_segments)
+                batch_offset = 0
+                for i, start, end in batch:
+                    input_ids, input_mask, speaker_ids, sentence_len, genre, sentence_map, is_training = examples[i][:7]
+                    state = states[i]
+                    num_words = int(input_mask[start:end].sum())
+                    window_example = (input_ids[start:end], input_mask[start:end], speaker_ids[start:end], sentence_len[start:end],
+                                      genre, sentence_map[state['offset']:state['offset'] + num_words], is_training)
+                    state['entities'], new_cpu_entities = self.get_predictions_incremental_internal(
+                        *[d.to(self.device) for d in window_example],
+                        entities=state['entities'],
+                        do_loss=False,
+                        offset=state['offset'],
+                        bert_output=bert_output[batch_offset:batch_offset + end - start],
+                    )
+                    batch_offset += end - start
+                    state['offset'] += num_words
+                    state['cpu_entities'].extend(new_cpu_entities)
+
+        predicted_clusters = []
+        for state in states:
+            if state['entities'] is not None:
+                state['cpu_entities'].extend(state['entities'])
+            _, _, _, clusters = state['cpu_entities'].get_result(
+                remove_singletons=not self.config['incremental_singletons']
+            )
+            predicted_clusters.append(clusters)
+        return predicted_clusters
+
     def get_predictions_incremental_internal(self, input_ids, input_mask, speaker_ids, sentence_len, genre, sentence_map,
                                              is_training, gold_starts=None, gold_ends=None, gold_mention_cluster_map=None,
                                              entities=None, do_loss=None, offset=0, loss_strategy=GoldLabelStrategy.MOST_RECENT,
-                                             teacher_forcing=False):
+                                             teacher_forcing=False, bert_output=None):
         device = self.device
         conf = self.config
         return_singletons = conf['incremental_singletons']
 
         # The model should already be trained so we detach the BERT part, massively improving performance
-        mention_doc = self.bert(input_ids, attention_mask=input_mask)[0].detach()  # [num seg, num max tokens, emb size]
+        if bert_output is None:
+            bert_output = self.bert(input_ids, attention_mask=input_mask)[0]
+        mention_doc = bert_output.detach()  # [num seg, num max tokens, emb size]
 
         input_mask = input_mask.to(torch.bool)
         mention_doc = mention_doc[input_mask]
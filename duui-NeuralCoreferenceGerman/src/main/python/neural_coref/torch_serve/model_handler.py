@@ -45,10 +45,10 @@ class CorefHandler(BaseHandler):
             self.tokenizer = ElectraTokenizer.from_pretrained(self.runner.config['bert_tokenizer_name'], strip_accents=False)
         else:
             self.tokenizer = BertTokenizer.from_pretrained(self.runner.config['bert_tokenizer_name'])
-        if self.runner.config['incremental']:
-            self.tensorizer.long_doc_strategy = "keep"
-        else:
-            self.tensorizer.long_doc_strategy = "discard"
+        # Documents longer than doc_max_segments are split into windows of segments, the incremental
+        # model carries its entities over, the c2f model predicts the windows independently
+        self.split_long_docs = True
+        self.max_batch_segments = self.runner.config.get('max_batch_segments', 16)
 
     def text_to_token_list(self, text):
         words = self.basic_tokenizer.tokenize(text)
@@ -65,40 +65,35 @@ class CorefHandler(BaseHandler):
 
     def preprocess(self, data):
         """
-        Transform raw input into model input data.
+        Transform raw input into model input data, one entry per request of the batch.
         """
-        # Take the input data and make it inference ready
-        inner_data = data[0].get("data")
-        if inner_data is None:
-            inner_data = data[0].get("body")
-        text = inner_data.get("text")
-        output_mode = inner_data.get("output_format", 'raw' if text is not None else 'list')
-        if text is not None:
-            tokenized_sentences = self.text_to_token_list(text)
-        else:
-            tokenized_sentences = inner_data.get("tokenized_sentences")
-        document = get_document('_', tokenized_sentences, 'german', model_config.WINDOWSIZE, self.tokenizer, 'nested_list')
-        _, example = self.tensorizer.tensorize_example(document, is_training=False)[0]
-        token_map = self.tensorizer.stored_info['subtoken_maps']['_']
-        # Remove gold
-        tensorized = [torch.tensor(e) for e in example[:7]]
-        return tensorized, (token_map, tokenized_sentences), output_mode
-
+        preprocessed = []
+        for row in data:
+            # Take the input data and make it inference ready
+            inner_data = row.get("data")
+            if inner_data is None:
+                inner_data = row.get("body")
+            text = inner_data.get("text")
+            output_mode = inner_data.get("output_format", 'raw' if text is not None else 'list')
+            if text is not None:
+                tokenized_sentences = self.text_to_token_list(text)
+            else:
+                tokenized_sentences = inner_data.get("tokenized_sentences")
+            document = get_document('_', tokenized_sentences, 'german', model_config.WINDOWSIZE, self.tokenizer, 'nested_list')
+            _, example = self.tensorizer.tensorize_example(document, is_training=False)[0]
+            token_map = self.tensorizer.stored_info['subtoken_maps']['_']
+            # Remove gold
+            tensorized = [torch.tensor(e) for e in example[:7]]
+            preprocessed.append((tensorized, (token_map, tokenized_sentences), output_mode))
+        return preprocessed
 
     def postprocess(self, inference_output):
-        # We only support a batch size of one!
-        assert len(inference_output) == 1
-        output, (token_map, tokenized_sentences), output_mode = inference_output[0]
-        if self.runner.config['incremental']:
-            span_starts, span_ends, mention_to_cluster_id, predicted_clusters = output
-        else:
-            _, _, _, span_starts, span_ends, antecedent_idx, antecedent_scores = output
-            predicted_clusters, _, _ = self.model.get_predicted_clusters(
-                span_starts.cpu().numpy(),
-                span_ends.cpu().numpy(),
-                antecedent_idx.cpu().numpy(),
-                antecedent_scores.detach().cpu().numpy()
-            )
+        return [
+            self.postprocess_document(predicted_clusters, token_map, tokenized_sentences, output_mode)
+            for predicted_clusters, (token_map, tokenized_sentences), output_mode in inference_output
+        ]
+
+    def postprocess_document(self, predicted_clusters, token_map, tokenized_sentences, output_mode):
         predicted_clusters_words = []
         for cluster in predicted_clusters:
             current_cluster = []
@@ -116,7 +111,7 @@ class CorefHandler(BaseHandler):
             # but its only meant for direct human usage, so it should be fine.
             for sentence_ender in SENTENCE_ENDERS + ",":
                 text = text.replace(" " + sentence_ender, sentence_ender)
-            return [text]
+            return text
         elif output_mode == "conll":
             lines = [f"#begin document {DOC_NAME}"]
             for sentence_id, sentence in enumerate(tokenized_sentences, 1):
@@ -136,14 +131,17 @@ class CorefHandler(BaseHandler):
                 DOC_NAME: token_map
             }
             output_conll(input_file, output_file, predictions, token_maps, False)
-            return [output_file.getvalue()]
+            return output_file.getvalue()
         else:
-            return [predicted_clusters_words]
+            return predicted_clusters_words
 
     def inference(self, data, *args, **kwargs):
-        in_data, token_info, output_mode = data
-        marshalled_data = [d.to(self.device) for d in in_data]
+        examples = [in_data for in_data, _, _ in data]
         with torch.no_grad():
-            results = self.model(*marshalled_data, *args, **kwargs)
-        # Batch size 1, so we wrap this into a batch list
-        return [(results, token_info, output_mode)]
+            predicted_clusters = self.model.predict_clusters_batch(
+                examples,
+                max_batch_segments=self.max_batch_segments,
+                split_long_docs=self.split_long_docs,
+            )
+        return [(clusters, token_info, output_mode)
+                for clusters, (_, token_info, output_mode) in zip(predicted_clusters, data)]
@@ -36,6 +36,10 @@ class Settings(BaseSettings):
     textimager_coref_log_level: str
     # Model name
     textimager_coref_parser_model_name: str
+    # Strategy for documents longer than doc_max_segments: keep, discard or split
+    textimager_coref_long_doc_strategy: str = "split"
+    # Max number of segments encoded in one BERT forward pass
+    textimager_coref_max_batch_segments: int = 16
     # Model LRU cache size
 
 
@@ -173,7 +177,6 @@ def get_parser_model_name():
 typesystem_filename = 'TypeSystemCoref.xml'
 with open(typesystem_filename, 'rb') as f:
     typesystem = load_typesystem(f)
-    print(typesystem.to_xml())
 
 
 lua_communication_script_filename = "textimager_duui_coref_ger.lua"
@@ -247,12 +250,13 @@ def get_typesystem() -> Response:
 
 dt = datetime.now()
 
-handler = CorefHandler()
+handler = CorefHandler(
+    long_doc_strategy=settings.textimager_coref_long_doc_strategy,
+    max_batch_segments=settings.textimager_coref_max_batch_segments,
+)
 
 @app.post("/v1/process")
 def post_process(request: TextImagerRequest) -> TextImagerResponse:
-    print("post_process")
-    print(request)
     device = 'GPU' if torch.cuda.is_available() else 'CPU'
     logger.info(f'USING {device}')
     if device == 'GPU':
@@ -270,23 +274,19 @@ def post_process(request: TextImagerRequest) -> TextImagerResponse:
     dt = datetime.now()
     tokenized_document = request.tokenized_document
     text = request.text
-    print("tokenized_document", tokenized_document)
     token_list = []
     flat_token_list = []
     for tokenized_sent in tokenized_document:
         token_list.append([token["text"] for token in tokenized_sent])
         flat_token_list.extend(tokenized_sent)
-    print("token_list", token_list)
     #flat_token_list = [item for sublist in token_list for item in sublist]
-    print("flat_token_list", flat_token_list)
+    logger.debug("Processing %d sentences, %d tokens", len(token_list), len(flat_token_list))
 
-    preprocessed = handler.preprocess(token_list)
-    print("preprocessed", preprocessed)
+    preprocessed = handler.preprocess([token_list])
     inference_output = handler.inference(preprocessed)
-    print("inference_output", inference_output)
     postprocessed = handler.postprocess(inference_output)
-    print("postprocessed", postprocessed)
     postprocessed = postprocessed[0]
+    logger.debug("Found %d clusters", len(postprocessed))
 
     if len(postprocessed) == 0:
         return TextImagerResponse(
@@ -316,8 +316,6 @@ def post_process(request: TextImagerRequest) -> TextImagerResponse:
                               begin_gr=g_begin, end_gr=g_end,
                               rel_type="COREF", write=True))
 
-    print(postprocessed)
-
     dte = datetime.now()
     print(dte, 'Finished processing', flush=True)
     print('Time elapsed', f'{dte-dt}', flush=True)
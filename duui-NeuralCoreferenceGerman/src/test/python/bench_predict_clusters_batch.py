@@ -0,0 +1,45 @@
+import argparse
+import random
+import sys
+import tempfile
+import time
+
+import torch
+import transformers
+from duui_runtime import testing
+
+from test_predict_clusters_batch import load_model_module, make_example, make_model, predict_batch, predict_document
+
+
+def benchmark(documents, max_segments, batch_segments, hidden_size, layers):
+    # the encoder is loaded from a classifier checkpoint, its unused head is reported
+    transformers.logging.set_verbosity_error()
+    model_module = load_model_module(setattr, lambda path: sys.path.insert(0, path))
+    bert_path = tempfile.mkdtemp()
+    testing.save_tiny_random_classifier(bert_path, hidden_size=hidden_size, layers=layers)
+    rng = random.Random(3)
+    vocab_size = len(testing.tiny_tokenizer())
+    examples = [make_example(rng, rng.randint(1, max_segments), vocab_size) for _ in range(documents)]
+    for incremental in [False, True]:
+        name = "incremental" if incremental else "c2f"
+        model = make_model(model_module, bert_path, incremental)
+        start = time.perf_counter()
+        for example in examples:
+            predict_document(model, example, incremental)
+        print(f"{name} per document: {documents / (time.perf_counter() - start):.1f} docs/s")
+        for max_batch_segments in batch_segments:
+            start = time.perf_counter()
+            predict_batch(model, examples, max_batch_segments=max_batch_segments)
+            print(f"{name} max_batch_segments={max_batch_segments}: {documents / (time.perf_counter() - start):.1f} docs/s")
+
+
+if __name__ == "__main__":
+    # e.g. python src/test/python/bench_predict_clusters_batch.py --documents 48 --hidden-size 256 --layers 4
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--documents", type=int, default=48)
+    parser.add_argument("--max-segments", type=int, default=4, help="documents have 1 to max-segments segments")
+    parser.add_argument("--batch-segments", type=int, nargs="+", default=[16, 32])
+    parser.add_argument("--hidden-size", type=int, default=256)
+    parser.add_argument("--layers", type=int, default=4)
+    args = parser.parse_args()
+    benchmark(args.documents, args.max_segments, args.batch_segments, args.hidden_size, args.layers)
@@ -0,0 +1,169 @@
+import collections
+import collections.abc
+import importlib
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("transformers")
+testing = pytest.importorskip("duui_runtime.testing")
+
+SERVICE_DIR = Path(__file__).resolve().parents[2] / "main" / "python"
+
+SEGMENT_LEN = 128
+DOC_MAX_SEGMENTS = 6
+CONFIG = dict(
+    genres=['n'], max_segment_len=SEGMENT_LEN, max_span_width=8, loss_type='marginalized', dropout_rate=0.3,
+    use_features=True, feature_emb_size=20, use_metadata=False, use_segment_distance=True,
+    span_width_embedding_size=30, use_width_prior=True, use_distance_prior=True, num_antecedent_distance_buckets=30,
+    max_training_sentences=5, fine_grained=True, higher_order='attended_antecedent', model_heads=True, ffnn_size=64,
+    ffnn_depth=1, coref_depth=1, cluster_ffnn_size=64, max_top_antecedents=10, top_span_ratio=0.4,
+    max_num_extracted_spans=3900, doc_max_segments=DOC_MAX_SEGMENTS, mention_loss_coef=0,
+    incremental_singletons=False, long_doc_strategy='keep', new_cluster_threshold=0.0, evict=True,
+    unconditional_eviction_limit=1500, singleton_eviction_limit=400, memory_limit=3.0,
+)
+
+
+def load_model_module(set_attr, syspath_prepend):
+    # neural_coref targets Python 3.8, where collections still exports Iterable
+    set_attr(collections, "Iterable", collections.abc.Iterable)
+    syspath_prepend(str(SERVICE_DIR))
+    return importlib.import_module("neural_coref.model")
+
+
+def make_model(model_module, bert_path, incremental, **config):
+    torch.manual_seed(1)
+    model_class = model_module.IncrementalCorefModel if incremental else model_module.CorefModel
+    model = model_class(dict(CONFIG, bert_pretrained_name_or_path=str(bert_path), **config), torch.device('cpu'))
+    return model.eval()
+
+
+def make_example(rng, num_segments, vocab_size):
+    # tensorized example without gold: full segments and a shorter last one, sentences of 5 to 25 subtokens
+    lengths = [SEGMENT_LEN] * (num_segments - 1) + [rng.randint(10, SEGMENT_LEN)]
+    input_ids = torch.zeros(num_segments, SEGMENT_LEN, dtype=torch.long)
+    input_mask = torch.zeros(num_segments, SEGMENT_LEN, dtype=torch.long)
+    for segment, length in enumerate(lengths):
+        input_ids[segment, :length] = torch.tensor([rng.randrange(len(testing.SPECIAL_TOKENS), vocab_size) for _ in range(length)])
+        input_mask[segment, :length] = 1
+    num_words = sum(lengths)
+    sentence_map, sentence = [], 0
+    while len(sentence_map) < num_words:
+        sentence_map += [sentence] * rng.randint(5, 25)
+        sentence += 1
+    return [input_ids, input_mask, torch.zeros_like(input_ids), torch.tensor(lengths), torch.tensor(0),
+            torch.tensor(sentence_map[:num_words]), torch.tensor(False)]
+
+
+def predict_document(model, example, incremental):
+    # the former per-document forward
+    with torch.no_grad():
+        output = model(*example)
+    if incremental:
+        return output[3]
+    _, _, _, span_starts, span_ends, antecedent_idx, antecedent_scores = output
+    clusters, _, _ = model.get_predicted_clusters(span_starts.numpy(), span_ends.numpy(), antecedent_idx.numpy(),
+                                                  antecedent_scores.numpy())
+    return clusters
+
+
+def predict_batch(model, examples, **kwargs):
+    with torch.no_grad():
+        return model.predict_clusters_batch(examples, **kwargs)
+
+
+def chunk(example, start, end):
+    # segments start:end of an example, with their part of the sentence map
+    word_offset = int(example[1][:start].sum())
+    num_words = int(example[1][start:end].sum())
+    return word_offset, [example[0][start:end], example[1][start:end], example[2][start:end], example[3][start:end],
+                         example[4], example[5][word_offset:word_offset + num_words], example[6]]
+
+
+def as_tuples(clusters):
+    return [tuple(tuple(int(i) for i in mention) for mention in cluster) for cluster in clusters]
+
+
+@pytest.fixture(scope="module")
+def bert_path(tmp_path_factory):
+    path = tmp_path_factory.mktemp("tiny_bert")
+    testing.save_tiny_random_classifier(str(path), hidden_size=32, layers=2)
+    return path
+
+
+@pytest.fixture
+def model_module(monkeypatch):
+    return load_model_module(lambda *args: monkeypatch.setattr(*args, raising=False), monkeypatch.syspath_prepend)
+
+
+@pytest.fixture(scope="module")
+def examples():
+    rng = random.Random(0)
+    vocab_size = len(testing.tiny_tokenizer())
+    return [make_example(rng, rng.randint(1, DOC_MAX_SEGMENTS), vocab_size) for _ in range(12)]
+
+
+@pytest.mark.parametrize("incremental", [False, True], ids=["c2f", "incremental"])
+@pytest.mark.parametrize("max_batch_segments", [1, 4, 16, 64])
+def test_batched_clusters_equal_per_document(model_module, bert_path, examples, incremental, max_batch_segments):
+    model = make_model(model_module, bert_path, incremental)
+    expected = [as_tuples(predict_document(model, example, incremental)) for example in examples]
+
+    clusters = predict_batch(model, examples, max_batch_segments=max_batch_segments)
+
+    assert [as_tuples(c) for c in clusters] == expected
+    assert sum(len(c) for c in expected) > 0
+
+
+def test_split_equals_per_chunk_prediction(model_module, bert_path):
+    model = make_model(model_module, bert_path, incremental=False)
+    long_doc = make_example(random.Random(1), 15, len(testing.tiny_tokenizer()))
+
+    expected = []
+    for start in range(0, 15, DOC_MAX_SEGMENTS):
+        word_offset, example = chunk(long_doc, start, min(start + DOC_MAX_SEGMENTS, 15))
+        expected += [tuple((s + word_offset, e + word_offset) for s, e in cluster)
+                     for cluster in as_tuples(predict_document(model, example, False))]
+
+    for max_batch_segments in [4, 8, 64]:
+        split = predict_batch(model, [long_doc], max_batch_segments=max_batch_segments, split_long_docs=True)[0]
+        assert as_tuples(split) == expected
+    assert expected
+    # without split the document is discarded, with eval_only it is predicted at once
+    assert predict_batch(model, [long_doc], split_long_docs=False) == [[]]
+    model.eval_only = True
+    assert as_tuples(predict_batch(model, [long_doc], max_batch_segments=4)[0]) == \
+        as_tuples(predict_document(model, long_doc, False))
+
+
+@pytest.mark.parametrize("incremental", [False, True], ids=["c2f", "incremental"])
+def test_offsets_in_mixed_batches(model_module, bert_path, incremental):
+    # regression test for the offsets of predict_clusters_batch: the encoder output of a document is sliced out of
+    # a batch of other documents (bert_output), the sentence map of a chunk or window starts at its word_offset,
+    # and the spans of a chunk are shifted back by it
+    model = make_model(model_module, bert_path, incremental)
+    rng = random.Random(2)
+    vocab_size = len(testing.tiny_tokenizer())
+    documents = [make_example(rng, num_segments, vocab_size) for num_segments in [1, 14, 3, 7, 2]]
+    alone = [as_tuples(predict_batch(model, [document], max_batch_segments=1, split_long_docs=True)[0])
+             for document in documents]
+
+    for max_batch_segments in [3, 8, 64]:
+        for order in [[0, 1, 2, 3, 4], [4, 3, 2, 1, 0], [2, 0, 4, 1, 3]]:
+            clusters = predict_batch(model, [documents[i] for i in order], max_batch_segments=max_batch_segments,
+                                     split_long_docs=True)
+            assert [as_tuples(c) for c in clusters] == [alone[i] for i in order]
+
+    for document, clusters in zip(documents, alone):
+        num_words = int(document[1].sum())
+        sentence_map = document[5].tolist()
+        for cluster in clusters:
+            for start, end in cluster:
+                # spans stay inside the document and inside one of its sentences
+                assert 0 <= start <= end < num_words
+                assert sentence_map[start] == sentence_map[end]
+    # the chunks and windows after the first one hold mentions as well
+    assert any(start >= 6 * SEGMENT_LEN for cluster in alone[1] for start, _ in cluster)
@@ -25,6 +25,8 @@ class Settings(BaseSettings):
     model_version: str
     #cach_size
     model_cache_size: int
+    # max number of padded tokens per forward pass
+    batch_max_tokens: int = 8192
     # url of the model
     model_source: str
     # language of the model
@@ -261,6 +263,6 @@ def post_process(request: DUUIRequest):
 
 @lru_cache_with_size
 def load_model(model_name):
-    model_i = OffensiveCheck(model_name, device)
+    model_i = OffensiveCheck(model_name, device, max_tokens=settings.batch_max_tokens)
     return model_i
 
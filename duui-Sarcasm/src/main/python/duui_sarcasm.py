@@ -29,6 +29,8 @@ class Settings(BaseSettings):
     model_version: str
     #cach_size
     model_cache_size: int
+    # max number of padded tokens per forward pass
+    batch_max_tokens: int = 8192
     # url of the model
     model_source: str
     # language of the model
@@ -242,6 +244,6 @@ def post_process(request: DUUIRequest):
 
 @lru_cache_with_size
 def load_model(model_name) -> SarcasmCheck:
-    model_i = SarcasmCheck(model_name, device)
+    model_i = SarcasmCheck(model_name, device, max_tokens=settings.batch_max_tokens)
     return model_i
 
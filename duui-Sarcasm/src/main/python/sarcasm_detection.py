@@ -1,5 +1,6 @@
 from transformers import AutoModelForSequenceClassification
 from transformers import AutoTokenizer
+from duui_runtime.batching import DEFAULT_MAX_TOKENS, TokenBudgetBatcher
 import string
 from typing import List
 import torch
@@ -24,13 +25,14 @@ map_sarcasm = {
 
 
 class SarcasmCheck:
-    def __init__(self, model_name: str, device='cuda:0', cache_dir="/storage/nlp/huggingface/models"):
+    def __init__(self, model_name: str, device='cuda:0', cache_dir="/storage/nlp/huggingface/models", max_tokens: int = DEFAULT_MAX_TOKENS):
         self.device = device
         self.model_name = model_name
         self.tokenizer = AutoTokenizer.from_pretrained(model_name, cache_dir=cache_dir)
         self.model = AutoModelForSequenceClassification.from_pretrained(model_name, cache_dir=cache_dir).to(device)
         self.class_mapping = self.model.config.id2label
         self.labels = list(map_sarcasm[model_name].values())
+        self.batcher = TokenBudgetBatcher(self.tokenizer, self.model, device, max_tokens=max_tokens)
 
     def preprocess_data(self, texts: List[str]):
         texts = [text.lower().translate(str.maketrans('', '', string.punctuation)) for text in texts]
@@ -39,20 +41,16 @@ class SarcasmCheck:
     def sarcasm_prediction(self, texts):
         if self.model_name == "helinivan/multilingual-sarcasm-detector":
             texts = self.preprocess_data(texts)
-        with torch.no_grad():
-            score_list = []
-            inputs = self.tokenizer(texts, return_tensors="pt", padding=True, truncation=True, max_length=512).to(
-                self.device)
-            outputs = self.model(**inputs)
-            scores = outputs[0].detach().cpu().numpy()
-            for score in scores:
-                score_dict_i = []
-                score_i = softmax(score)
-                ranking = np.argsort(score_i)
-                ranking = ranking[::-1]
-                for i in range(score.shape[0]):
-                    score_dict_i.append({"label": self.labels[ranking[i]], "score": float(score_i[ranking[i]])})
-                score_list.append(score_dict_i)
+        score_list = []
+        scores = self.batcher.logits(texts)
+        for score in scores:
+            score_dict_i = []
+            score_i = softmax(score)
+            ranking = np.argsort(score_i)
+            ranking = ranking[::-1]
+            for i in range(score.shape[0]):
+                score_dict_i.append({"label": self.labels[ranking[i]], "score": float(score_i[ranking[i]])})
+            score_list.append(score_dict_i)
         return score_list
 
 
@@ -14,6 +14,7 @@ docker build \
   --build-arg TEXTIMAGER_SPBERT_MODEL_NAME \
   --build-arg TEXTIMAGER_SPBERT_MODEL_VERSION \
   -t ${DOCKER_REGISTRY}${TEXTIMAGER_SPBERT_ANNOTATOR_NAME}:${TEXTIMAGER_SPBERT_ANNOTATOR_VERSION} \
+  --build-context duui-runtime=../duui-runtime \
   -f src/main/docker/Dockerfile \
   .
 
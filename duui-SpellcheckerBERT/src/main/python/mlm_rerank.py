@@ -0,0 +1,125 @@
+from typing import Any, Callable, Dict, List, Tuple
+
+import torch
+from duui_runtime.batching import token_budget_batches
+from transformers import AutoModelForMaskedLM, AutoTokenizer
+
+# Default number of (padded) tokens per forward pass, smaller than for classifiers,
+# as the masked LM returns logits over the full vocabulary for every token
+DEFAULT_RERANK_MAX_TOKENS = 2048
+
+
+def transfer_casing(word: str, token: str) -> str:
+    # SymSpell works on lowercase words, restore the capitalization of the original token for the LM
+    if token[:1].isupper():
+        return word[:1].upper() + word[1:]
+    return word
+
+
+class MaskedLMReranker:
+    # Reranks the SymSpell candidates of all misspelled tokens of a document with a
+    # masked language model. Every misspelled position is masked once per distinct
+    # candidate length (in subwords), all masked sentences of the document are scored
+    # in length sorted batches under a token budget. A candidate scores the mean log
+    # probability of its subwords at the masked positions.
+    def __init__(self, tokenizer: Any, model: Any, device: Any, max_tokens: int = DEFAULT_RERANK_MAX_TOKENS, max_length: int = 512):
+        self.tokenizer = tokenizer
+        self.model = model
+        self.device = device
+        self.max_tokens = max_tokens
+        self.max_length = max_length
+        # special tokens around a single sequence, e.g. [CLS] ... [SEP] for BERT
+        plain = tokenizer("x", add_special_tokens=False)["input_ids"]
+        special = tokenizer("x")["input_ids"]
+        start = next(i for i in range(len(special)) if special[i:i + len(plain)] == plain)
+        self.prefix_ids = special[:start]
+        self.suffix_ids = special[start + len(plain):]
+
+    @classmethod
+    def from_pretrained(cls, model_name: str, device: Any, max_tokens: int = DEFAULT_RERANK_MAX_TOKENS, max_length: int = 512) -> "MaskedLMReranker":
+        tokenizer = AutoTokenizer.from_pretrained(model_name)
+        model = AutoModelForMaskedLM.from_pretrained(model_name)
+        model.to(device)
+        model.eval()
+        return cls(tokenizer, model, device, max_tokens, max_length)
+
+    def rerank(self, sentences: List[List[Dict[str, Any]]], lookup_candidates: Callable[[str], List[str]]) -> int:
+        # sentences: output of spellchecker, tokens with spellout "wrong" get the best
+        # candidate as suggestion and the scores in "toolPred", returns the number of reranked tokens
+        word_ids_cache: Dict[str, List[int]] = {}
+
+        def word_ids(word: str) -> List[int]:
+            if word not in word_ids_cache:
+                word_ids_cache[word] = self.tokenizer(word, add_special_tokens=False)["input_ids"]
+            return word_ids_cache[word]
+
+        # masked sequences, each with the candidates (and their subword ids) it scores
+        sequences: List[List[int]] = []
+        sequence_candidates: List[List[Tuple[int, int, str, List[int]]]] = []
+        for s, sentence in enumerate(sentences):
+            # context: SymSpell suggestions for wrong tokens, original text otherwise
+            context = []
+            for token in sentence:
+                if token.get("spellout") == "wrong":
+                    context.append(word_ids(transfer_casing(token["suggestion"], token["token"])))
+                else:
+                    context.append(word_ids(token["token"]))
+
+            for t, token in enumerate(sentence):
+                if token.get("spellout") != "wrong":
+                    continue
+                candidates = lookup_candidates(token["token"].lower())
+                if len(candidates) < 2:
+                    continue
+                by_length: Dict[int, List[Tuple[int, int, str, List[int]]]] = {}
+                for candidate in candidates:
+                    ids = word_ids(transfer_casing(candidate, token["token"]))
+                    if ids:
+                        by_length.setdefault(len(ids), []).append((s, t, candidate, ids))
+                for length, length_candidates in by_length.items():
+                    sequences.append(self._masked_sequence(context, t, length))
+                    sequence_candidates.append(length_candidates)
+
+        if not sequences:
+            return 0
+
+        scores: Dict[Tuple[int, int], Dict[str, float]] = {}
+        mask_token_id = self.tokenizer.mask_token_id
+        lengths = [len(ids) for ids in sequences]
+        with torch.inference_mode():
+            for batch in token_budget_batches(lengths, self.max_tokens):
+                inputs = self.tokenizer.pad([{"input_ids": sequences[i]} for i in batch], return_tensors="pt").to(self.device)
+                logits = self.model(**inputs).logits
+                for row, i in enumerate(batch):
+                    mask_positions = (inputs["input_ids"][row] == mask_token_id).nonzero(as_tuple=True)[0]
+                    log_probs = torch.log_softmax(logits[row, mask_positions].float(), dim=-1)
+                    for s, t, candidate, ids in sequence_candidates[i]:
+                        position_ids = torch.arange(len(ids), device=log_probs.device)
+                        subword_ids = torch.tensor(ids, device=log_probs.device)
+                        score = log_probs[position_ids, subword_ids].mean().item()
+                        scores.setdefault((s, t), {})[candidate] = score
+
+        for (s, t), candidate_scores in scores.items():
+            probabilities = torch.softmax(torch.tensor(list(candidate_scores.values())), dim=0).tolist()
+            best_candidate, best_probability = max(zip(candidate_scores.keys(), probabilities), key=lambda c: c[1])
+            token = sentences[s][t]
+            token["suggestion"] = best_candidate
+            token["toolPred"] = {
+                "Bert": {
+                    "word": best_candidate,
+                    "probability": best_probability
+                }
+            }
+
+        return len(scores)
+
+    def _masked_sequence(self, context: List[List[int]], index: int, length: int) -> List[int]:
+        # replace the word at index by length masks, long sentences are cut to a window around the masks
+        left = [i for ids in context[:index] for i in ids]
+        right = [i for ids in context[index + 1:] for i in ids]
+        budget = self.max_length - len(self.prefix_ids) - len(self.suffix_ids) - length
+        if len(left) + len(right) > budget:
+            keep_left = min(len(left), max(budget // 2, budget - len(right)))
+            left = left[len(left) - keep_left:]
+            right = right[:budget - keep_left]
+        return self.prefix_ids + left + [self.tokenizer.mask_token_id] * length + right + self.suffix_ids
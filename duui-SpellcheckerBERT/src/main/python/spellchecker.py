@@ -1,8 +1,28 @@
 from symspellpy import SymSpell, Verbosity
-from typing import List
+from typing import Dict, List, Optional
 
 
-def spellchecker(sentence: List[str], begin: List[str], end: List[str], speller: SymSpell, lower_case: bool):
+def lookup_word(word: str, speller: SymSpell) -> Optional[str]:
+    # known words are their own closest suggestion, no need to search the deletes
+    if word in speller.words:
+        return word
+    suggestions = speller.lookup(word, Verbosity.CLOSEST, max_edit_distance=2)
+    if suggestions:
+        return str(suggestions[0].term)
+    return None
+
+
+def lookup_candidates(word: str, speller: SymSpell, max_candidates: int) -> List[str]:
+    # all suggestions within the edit distance, sorted by distance and frequency like lookup_word
+    suggestions = speller.lookup(word, Verbosity.ALL, max_edit_distance=2)
+    return [str(suggestion.term) for suggestion in suggestions[:max_candidates]]
+
+
+def spellchecker(sentence: List[str], begin: List[str], end: List[str], speller: SymSpell, lower_case: bool,
+                 lookup_cache: Optional[Dict[str, Optional[str]]] = None):
+    # lookup_cache maps each word to its best suggestion, share it between sentences to look up every word once
+    if lookup_cache is None:
+        lookup_cache = {}
     spellchecked = []
     for c, token in enumerate(sentence):
         if token.isalnum() and not token.isdigit():
@@ -10,12 +30,16 @@ def spellchecker(sentence: List[str], begin: List[str], end: List[str], speller:
                 word = token.lower()
             else:
                 word = token
-            suggestions = speller.lookup(word, Verbosity.CLOSEST, max_edit_distance=2)
-            if suggestions:
-                if suggestions[0].term == word:
+            if word in lookup_cache:
+                suggestion = lookup_cache[word]
+            else:
+                suggestion = lookup_word(word, speller)
+                lookup_cache[word] = suggestion
+            if suggestion is not None:
+                if suggestion == word:
                     spellchecked.append({"spellout": "right",
                                          "token": token,
-                                         "suggestion": str(suggestions[0].term),
+                                         "suggestion": suggestion,
                                          "index": c,
                                          "begin": begin[c],
                                          "end": end[c]
@@ -24,7 +48,7 @@ def spellchecker(sentence: List[str], begin: List[str], end: List[str], speller:
                     spellchecked.append({
                         "spellout": "wrong",
                         "token": token,
-                        "suggestion": str(suggestions[0].term),
+                        "suggestion": suggestion,
                         "index": c,
                         "begin": begin[c],
                         "end": end[c]
@@ -113,7 +113,12 @@ function deserialize(inputCas, inputStream)
                     spellout_anno:setBegin(token["begin"])
                     spellout_anno:setEnd(token["end"])
                     spellout_anno:setReplacement(token["suggestion"])
-                    spellout_anno:setCertainty(1.0)
+                    -- reranked suggestions carry the probability of the masked LM
+                    if token["toolPred"] ~= nil then
+                        spellout_anno:setCertainty(token["toolPred"]["Bert"]["probability"])
+                    else
+                        spellout_anno:setCertainty(1.0)
+                    end
                     spellout_anno:addToIndexes()
 -- --                     print("suggestion")
 --
@@ -5,9 +5,8 @@ import logging
 from time import time
 from fastapi import FastAPI, Response
 from cassis import load_typesystem
-# from sp_correction import SentenceBestPrediction
 from symspellpy import SymSpell
-from spellchecker import spellchecker
+from spellchecker import lookup_candidates, spellchecker
 
 # Settings
 # These are automatically loaded from env variables
@@ -25,6 +24,12 @@ class Settings(BaseSettings):
     textimager_spbert_model_name: str
     # Name of this annotator
     textimager_spbert_model_version: str
+    # Masked LM to rerank the SymSpell candidates with, disabled if empty
+    textimager_spbert_rerank_model_name: str = ""
+    # Max number of SymSpell candidates per misspelled token
+    textimager_spbert_rerank_candidates: int = 5
+    # Max number of (padded) tokens per masked LM forward pass
+    textimager_spbert_rerank_max_tokens: int = 2048
 
 
 # Load settings from env vars
@@ -41,6 +46,28 @@ with open(typesystem_filename, 'rb') as f:
     logger.debug("Base typesystem:")
     logger.debug(typesystem.to_xml())
 
+# Load the SymSpell dictionary once, building it takes seconds and hundreds of MB
+dictionary_path = "de-100k.txt"
+logger.info("Loading SymSpell dictionary from \"%s\"", dictionary_path)
+dictionary_load_start = time()
+sym_spell = SymSpell(max_dictionary_edit_distance=2, prefix_length=7)
+sym_spell.load_dictionary(dictionary_path, term_index=0, count_index=1)
+logger.info("Loaded SymSpell dictionary in %.2f seconds", time() - dictionary_load_start)
+
+# Load the masked LM for context-aware reranking of the SymSpell candidates
+reranker = None
+if settings.textimager_spbert_rerank_model_name:
+    from mlm_rerank import MaskedLMReranker
+    import torch
+
+    rerank_device = "cuda" if torch.cuda.is_available() else "cpu"
+    logger.info("Loading rerank model \"%s\" on %s", settings.textimager_spbert_rerank_model_name, rerank_device)
+    reranker = MaskedLMReranker.from_pretrained(
+        settings.textimager_spbert_rerank_model_name,
+        rerank_device,
+        max_tokens=settings.textimager_spbert_rerank_max_tokens
+    )
+
 # Load the Lua communication script
 lua_communication_script_filename = "textimager_duui_spbert.lua"
 logger.debug("Loading Lua communication script from \"%s\"", lua_communication_script_filename)
@@ -190,17 +217,15 @@ def post_process(request: TextImagerRequest):
                 document_token_sentences[c].append(token_i["text"])
                 begin_token_sentences[c].append(token_i["begin"])
                 end_token_sentences[c].append(token_i["end"])
-        sym_spell = SymSpell(max_dictionary_edit_distance=2, prefix_length=7)
-        dictionary_path = "de-100k.txt"
-        sym_spell.load_dictionary(dictionary_path, term_index=0, count_index=1)
-        # sen_pred = SentenceBestPrediction("", "bert-base-uncased", "all-mpnet-base-v2", 0)
+        # repeated words are looked up once per request
+        lookup_cache = {}
         right_words = 0
         wrong_words = 0
         unknown_words = 0
         skipped_words = 0
         for c, sen_i in enumerate(document_token_sentences):
             spell_out = spellchecker(sen_i, begin_token_sentences[c], end_token_sentences[c], sym_spell,
-                                     lower_case=True)
+                                     lower_case=True, lookup_cache=lookup_cache)
             symspell_out.append(spell_out)
             for spell_i in spell_out:
                 token_type = spell_i["spellout"]
@@ -212,12 +237,17 @@ def post_process(request: TextImagerRequest):
                     unknown_words += 1
                 elif token_type == "skipped":
                     skipped_words += 1
-            # sen_org = " ".join(sen_i)
-            # sen_test, sen_org = sen_pred.mask_sentence(spell_out)
-            # sen_pred.set_sen_org(sen_org)
-            # pred_sentences = sen_pred.get_Mask_prediction(sen_test)
-            # cos_sim_sentences = sen_pred.get_sentence_sim(pred_sentences)
-            # symspell_out.append(sen_pred.get_best_word(cos_sim_sentences, spell_out))
+        if reranker is not None:
+            # all misspelled tokens of the document are reranked in batched masked LM passes
+            candidates_cache = {}
+
+            def lookup_cached_candidates(word):
+                if word not in candidates_cache:
+                    candidates_cache[word] = lookup_candidates(word, sym_spell, settings.textimager_spbert_rerank_candidates)
+                return candidates_cache[word]
+
+            reranked = reranker.rerank(symspell_out, lookup_cached_candidates)
+            logger.debug("Reranked %d tokens", reranked)
         good_quality = 0.0
         unknown_quality = 0.0
         quality = 0.0
@@ -0,0 +1,28 @@
+import argparse
+import copy
+import time
+
+import torch
+
+from test_mlm_rerank import MaskedLMReranker, noisy_document, tiny_random_mlm
+
+
+def benchmark(sentences, budgets):
+    tokenizer, model = tiny_random_mlm(hidden_size=128, layers=4)
+    document, lookup = noisy_document(sentences)
+    for max_tokens in budgets:
+        reranker = MaskedLMReranker(tokenizer, model, "cpu", max_tokens=max_tokens)
+        start = time.perf_counter()
+        reranked = reranker.rerank(copy.deepcopy(document), lookup)
+        elapsed = time.perf_counter() - start
+        print(f"max_tokens={max_tokens}: {reranked} reranked tokens, {elapsed:.2f}s, {reranked / elapsed:.0f} tokens/s")
+
+
+if __name__ == "__main__":
+    # e.g. python src/test/python/bench_mlm_rerank.py --sentences 200, max_tokens=1 is one masked sentence per pass
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sentences", type=int, default=200)
+    parser.add_argument("--max-tokens", type=int, nargs="+", default=[1, 256, 2048])
+    args = parser.parse_args()
+    torch.set_num_threads(1)
+    benchmark(args.sentences, args.max_tokens)
@@ -0,0 +1,45 @@
+import argparse
+import os
+import time
+
+from symspellpy import SymSpell, Verbosity
+
+from test_spellchecker import SERVICE_DIR, load_service, noisy_request
+
+
+def per_request_dictionary(request):
+    # the former request: a new SymSpell with the dictionary, every word is searched
+    speller = SymSpell(max_dictionary_edit_distance=2, prefix_length=7)
+    speller.load_dictionary("de-100k.txt", term_index=0, count_index=1)
+    for sentence in request["tokens"]:
+        for token in sentence:
+            if token["text"].isalnum():
+                speller.lookup(token["text"].lower(), Verbosity.CLOSEST, max_edit_distance=2)
+
+
+def benchmark(requests, sentences):
+    from fastapi.testclient import TestClient
+
+    request = noisy_request(sentences)
+    start = time.perf_counter()
+    for _ in range(requests):
+        per_request_dictionary(request)
+    print(f"dictionary per request: {(time.perf_counter() - start) / requests:.2f}s/request")
+
+    start = time.perf_counter()
+    client = TestClient(load_service(os.environ.__setitem__).app)
+    print(f"service startup: {time.perf_counter() - start:.2f}s")
+    start = time.perf_counter()
+    for _ in range(requests):
+        client.post("/v1/process", json=request)
+    print(f"dictionary loaded once: {(time.perf_counter() - start) / requests:.2f}s/request")
+
+
+if __name__ == "__main__":
+    # e.g. python src/test/python/bench_spellchecker.py --requests 5 --sentences 300
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=5)
+    parser.add_argument("--sentences", type=int, default=300)
+    args = parser.parse_args()
+    os.chdir(SERVICE_DIR)
+    benchmark(args.requests, args.sentences)
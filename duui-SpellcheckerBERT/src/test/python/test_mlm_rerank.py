@@ -0,0 +1,132 @@
+import copy
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+torch = pytest.importorskip("torch")
+transformers = pytest.importorskip("transformers")
+tokenizers = pytest.importorskip("tokenizers")
+
+SERVICE_DIR = Path(__file__).resolve().parents[2] / "main" / "python"
+sys.path.insert(0, str(SERVICE_DIR))
+
+from mlm_rerank import MaskedLMReranker  # noqa: E402
+
+WORDS = [f"wort{chr(97 + i)}{chr(97 + j)}" for i in range(26) for j in range(10)]
+# words that are split into two subwords, to mask candidates of different lengths
+PIECES = ["land", "haus", "##tag", "##rat"]
+SPECIAL_TOKENS = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"]
+
+
+def tiny_random_mlm(hidden_size=32, layers=2):
+    # a randomly initialized BERT masked LM with a lowercasing word piece tokenizer, no download needed
+    vocab = {token: i for i, token in enumerate(SPECIAL_TOKENS + WORDS + PIECES)}
+    backend = tokenizers.Tokenizer(tokenizers.models.WordPiece(vocab, unk_token="[UNK]"))
+    backend.normalizer = tokenizers.normalizers.Lowercase()
+    backend.pre_tokenizer = tokenizers.pre_tokenizers.Whitespace()
+    backend.post_processor = tokenizers.processors.TemplateProcessing(
+        single="[CLS] $A [SEP]", special_tokens=[("[CLS]", vocab["[CLS]"]), ("[SEP]", vocab["[SEP]"])]
+    )
+    tokenizer = transformers.PreTrainedTokenizerFast(
+        tokenizer_object=backend, pad_token="[PAD]", unk_token="[UNK]", cls_token="[CLS]", sep_token="[SEP]",
+        mask_token="[MASK]",
+    )
+    config = transformers.BertConfig(
+        vocab_size=len(vocab), hidden_size=hidden_size, num_hidden_layers=layers, num_attention_heads=2,
+        intermediate_size=hidden_size * 4, max_position_embeddings=512,
+    )
+    torch.manual_seed(0)
+    model = transformers.BertForMaskedLM(config).eval()
+    return tokenizer, model
+
+
+def spellchecked(words, wrong):
+    # spellchecker output, the tokens at the indices in wrong are misspelled with the first candidate as suggestion
+    return [
+        {"spellout": "wrong" if i in wrong else "right", "token": word, "suggestion": wrong.get(i, [word])[0].lower()}
+        for i, word in enumerate(words)
+    ]
+
+
+def noisy_document(sentences, words_per_sentence=16, noise=0.2, candidates=5, seed=0):
+    rng = random.Random(seed)
+    document = []
+    lookup = {}
+    for s in range(sentences):
+        words = rng.choices(WORDS, k=words_per_sentence)
+        wrong = {}
+        for i, word in enumerate(words):
+            if rng.random() < noise:
+                words[i] = f"{word}x{s}"
+                wrong[i] = [word] + rng.sample(WORDS + ["landtag", "hausrat"], candidates - 1)
+                lookup[words[i]] = wrong[i]
+        document.append(spellchecked(words, wrong))
+    return document, lookup.get
+
+
+def test_scores_do_not_depend_on_the_token_budget():
+    tokenizer, model = tiny_random_mlm()
+    document, lookup = noisy_document(20)
+
+    results = []
+    for max_tokens in [1, 64, 2048]:
+        sentences = copy.deepcopy(document)
+        reranked = MaskedLMReranker(tokenizer, model, "cpu", max_tokens=max_tokens).rerank(sentences, lookup)
+        results.append((reranked, sentences))
+
+    assert results[0][0] > 40
+    for reranked, sentences in results[1:]:
+        assert reranked == results[0][0]
+        for sentence, expected in zip(sentences, results[0][1]):
+            for token, expected_token in zip(sentence, expected):
+                assert token["suggestion"] == expected_token["suggestion"]
+                if "toolPred" in expected_token:
+                    assert token["toolPred"]["Bert"]["probability"] == pytest.approx(
+                        expected_token["toolPred"]["Bert"]["probability"], abs=1e-5
+                    )
+
+
+def test_scores_match_one_forward_pass_per_candidate():
+    tokenizer, model = tiny_random_mlm()
+    candidates = ["wortab", "landtag", "wortcd", "hausrat"]
+    sentence = spellchecked(["Wortaa", "Wortxy", "wortba", "wortbb"], {1: candidates})
+
+    assert MaskedLMReranker(tokenizer, model, "cpu").rerank([sentence], lambda word: candidates) == 1
+
+    scores = []
+    for candidate in candidates:
+        ids = tokenizer(candidate, add_special_tokens=False)["input_ids"]
+        masked = " ".join(["wortaa", *["[MASK]"] * len(ids), "wortba", "wortbb"])
+        inputs = tokenizer(masked, return_tensors="pt")
+        with torch.inference_mode():
+            logits = model(**inputs).logits[0, 2:2 + len(ids)]
+        scores.append(torch.log_softmax(logits, dim=-1)[range(len(ids)), ids].mean().item())
+    probabilities = torch.softmax(torch.tensor(scores), dim=0)
+
+    best = int(probabilities.argmax())
+    assert sentence[1]["suggestion"] == candidates[best]
+    assert sentence[1]["toolPred"]["Bert"] == {"word": candidates[best], "probability": pytest.approx(probabilities[best].item(), abs=1e-5)}
+    # the other tokens are left as they are
+    assert all("toolPred" not in token for i, token in enumerate(sentence) if i != 1)
+
+
+def test_tokens_with_less_than_two_candidates_are_kept():
+    tokenizer, model = tiny_random_mlm()
+    sentence = spellchecked(["wortaa", "wortxy"], {1: ["wortab"]})
+
+    assert MaskedLMReranker(tokenizer, model, "cpu").rerank([sentence], lambda word: ["wortab"]) == 0
+    assert sentence[1]["suggestion"] == "wortab"
+    assert "toolPred" not in sentence[1]
+
+
+def test_long_sentences_are_cut_around_the_mask():
+    tokenizer, model = tiny_random_mlm()
+    reranker = MaskedLMReranker(tokenizer, model, "cpu", max_length=16)
+    context = [[tokenizer.convert_tokens_to_ids(word)] for word in WORDS[:40]]
+
+    sequence = reranker._masked_sequence(context, 30, 2)
+    assert len(sequence) == 16
+    assert sequence.count(tokenizer.mask_token_id) == 2
+    assert sequence[0] == tokenizer.cls_token_id and sequence[-1] == tokenizer.sep_token_id
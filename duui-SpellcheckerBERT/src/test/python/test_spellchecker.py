@@ -0,0 +1,108 @@
+import importlib
+import random
+import sys
+from pathlib import Path
+
+from symspellpy import SymSpell
+
+SERVICE_DIR = Path(__file__).resolve().parents[2] / "main" / "python"
+sys.path.insert(0, str(SERVICE_DIR))
+
+from spellchecker import lookup_word, spellchecker  # noqa: E402
+
+
+def small_speller():
+    speller = SymSpell(max_dictionary_edit_distance=2, prefix_length=7)
+    for word, count in [("ich", 100), ("habe", 80), ("im", 90), ("landtag", 10), ("halte", 20), ("die", 200)]:
+        speller.create_dictionary_entry(word, count)
+    return speller
+
+
+class CountingSpeller:
+    # counts the SymSpell searches, the dictionary itself is shared with the wrapped speller
+    def __init__(self, speller):
+        self.speller = speller
+        self.words = speller.words
+        self.lookups = []
+
+    def lookup(self, word, *args, **kwargs):
+        self.lookups.append(word)
+        return self.speller.lookup(word, *args, **kwargs)
+
+
+def test_repeated_and_known_words_are_not_searched():
+    speller = CountingSpeller(small_speller())
+    sentence = ["Ich", "habe", "Landtg", "!", "ich", "landtg", "Xyzzyq", "42"]
+    offsets = list(range(len(sentence)))
+
+    cache = {}
+    first = spellchecker(sentence, offsets, offsets, speller, lower_case=True, lookup_cache=cache)
+    second = spellchecker(sentence, offsets, offsets, speller, lower_case=True, lookup_cache=cache)
+
+    assert [t["spellout"] for t in first] == ["right", "right", "wrong", "skipped", "right", "wrong", "unknown", "skipped"]
+    assert first[2]["suggestion"] == "landtag"
+    assert first == second
+    # only the unknown words are searched, each once
+    assert speller.lookups == ["landtg", "xyzzyq"]
+
+
+def test_cached_results_match_uncached():
+    speller = small_speller()
+    sentence = ["Ich", "habe", "im", "Landtg", "die", "halt", "Ich", "hbe"]
+    offsets = list(range(len(sentence)))
+
+    cached = spellchecker(sentence, offsets, offsets, speller, lower_case=True, lookup_cache={})
+    uncached = [lookup_word(token.lower(), speller) for token in sentence]
+    assert [t["suggestion"] for t in cached] == uncached
+
+
+def load_service(set_env):
+    set_env("TEXTIMAGER_SPBERT_ANNOTATOR_NAME", "textimager-duui-spbert")
+    set_env("TEXTIMAGER_SPBERT_ANNOTATOR_VERSION", "0.0.1")
+    set_env("TEXTIMAGER_SPBERT_LOG_LEVEL", "WARNING")
+    set_env("TEXTIMAGER_SPBERT_MODEL_NAME", "symspell")
+    set_env("TEXTIMAGER_SPBERT_MODEL_VERSION", "0.0.1")
+    set_env("TEXTIMAGER_SPBERT_RERANK_MODEL_NAME", "")
+    sys.modules.pop("textimager_duui_spbert", None)
+    return importlib.import_module("textimager_duui_spbert")
+
+
+def noisy_request(sentences, words_per_sentence=16, noise=0.2, seed=0):
+    # sentences of frequent dictionary words, a part of the words gets a replaced character
+    rng = random.Random(seed)
+    with open(SERVICE_DIR / "de-100k.txt", encoding="utf-8") as fp:
+        words = [line.split()[0] for _, line in zip(range(5000), fp)]
+    tokens = []
+    begin = 0
+    for _ in range(sentences):
+        sentence = []
+        for word in rng.choices(words, k=words_per_sentence):
+            if rng.random() < noise and len(word) > 3:
+                i = rng.randrange(len(word))
+                word = word[:i] + rng.choice("abcdefghijklmnopqrstuvwxyz") + word[i + 1:]
+            sentence.append({"text": word, "begin": begin, "end": begin + len(word)})
+            begin += len(word) + 1
+        tokens.append(sentence)
+    return {"text": " ".join(t["text"] for s in tokens for t in s), "lang": "de", "tokens": tokens}
+
+
+def test_dictionary_is_loaded_once(monkeypatch):
+    from fastapi.testclient import TestClient
+
+    loads = []
+    load_dictionary = SymSpell.load_dictionary
+
+    def counting_load_dictionary(self, *args, **kwargs):
+        loads.append(args[0])
+        return load_dictionary(self, *args, **kwargs)
+
+    monkeypatch.chdir(SERVICE_DIR)
+    monkeypatch.setattr(SymSpell, "load_dictionary", counting_load_dictionary)
+    client = TestClient(load_service(monkeypatch.setenv).app)
+
+    request = noisy_request(5)
+    responses = [client.post("/v1/process", json=request).json() for _ in range(2)]
+
+    assert loads == ["de-100k.txt"]
+    assert responses[0]["tokens"] == responses[1]["tokens"]
+    assert responses[0]["tokens"][-1][0]["wrong"] > 0
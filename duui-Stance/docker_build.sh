@@ -42,6 +42,7 @@ docker build \
   --build-arg MODEL_LANG \
   --build-arg CHATGPT_KEY \
   -t ${DOCKER_REGISTRY}${ANNOTATOR_NAME}"-"${MODEL_NAME}:${ANNOTATOR_VERSION}${ANNOTATOR_CUDA} \
+  --build-context duui-runtime=../duui-runtime \
   -f src/main/docker/Dockerfile${ANNOTATOR_CUDA} \
   .
 
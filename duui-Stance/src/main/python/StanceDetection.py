@@ -1,4 +1,5 @@
 from transformers import AutoTokenizer, AutoModelForSequenceClassification
+from duui_runtime.batching import DEFAULT_MAX_TOKENS, TokenBudgetBatcher
 import torch
 from scipy.special import softmax
 import numpy as np
@@ -9,20 +10,18 @@ from openai import OpenAI
 
 
 class TransformerStance:
-    def __init__(self, model_name, device):
+    def __init__(self, model_name, device, max_tokens: int = DEFAULT_MAX_TOKENS):
         self.device = device
         self.tokenizer = AutoTokenizer.from_pretrained(model_name)
         self.model = AutoModelForSequenceClassification.from_pretrained(model_name)
         self.model.to(device)
         self.model.eval()
         self.id2label = {0: 'AGAINST', 1: 'FAVOR', 2: 'NONE'}
+        self.batcher = TokenBudgetBatcher(self.tokenizer, self.model, device, max_tokens=max_tokens)
 
     def predict(self, texts, hypothesis_template):
         score_list = []
-        inputs = self.tokenizer(texts, return_tensors="pt", padding=True, truncation=True, max_length=512).to(
-            self.device)
-        outputs = self.model(**inputs)
-        scores = outputs[0].detach().cpu().numpy()
+        scores = self.batcher.logits(texts)
         for score in scores:
             score_dict_i = {}
             score_i = softmax(score)
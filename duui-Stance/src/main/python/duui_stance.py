@@ -73,6 +73,8 @@ class Settings(BaseSettings):
     # model_name: str
     # Name of this annotator
     model_cache_size: int
+    # max number of padded tokens per forward pass
+    batch_max_tokens: int = 8192
     chatgpt_key: str
 
 
@@ -201,7 +203,7 @@ def load_model(model_name, chatgpt_key=""):
         case "mlburnham":
             model_i = zeroshotClassification("mlburnham/deberta-v3-base-polistance-affect-v1.0", device)
         case "kornosk":
-            model_i = TransformerStance("kornosk/bert-election2020-twitter-stance-trump", device)
+            model_i = TransformerStance("kornosk/bert-election2020-twitter-stance-trump", device, max_tokens=settings.batch_max_tokens)
         case "gpt4":
             model_i = ChatGPT("gpt-4", chatgpt_key)
         case "gpt3.5":
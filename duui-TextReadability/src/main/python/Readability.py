@@ -1,4 +1,4 @@
-import textstat
+from TextStatistics import TextStatistics
 from diversity import compression_ratio, homogenization_score, ngram_diversity_score
 
 
@@ -7,35 +7,36 @@ class ReadabilityMetricsTextStat:
         pass
 
     def compute_readability(self, texts):
+        # all metrics are derived from counts shared in a single pass over the text
+        stats = TextStatistics(texts)
         dict_readability = {}
-        dict_readability["Flesch Reading Ease"] = textstat.flesch_reading_ease(texts)
-        dict_readability["Flesch-Kincaid Grade Level"] = textstat.flesch_kincaid_grade(texts)
-        dict_readability["Smog Index"] = textstat.smog_index(texts)
-        dict_readability["Coleman-Liau Index"] = textstat.coleman_liau_index(texts)
-        dict_readability["Automated Readability Index"] = textstat.automated_readability_index(texts)
-        dict_readability["Dale-Chall Readability Score"] = textstat.dale_chall_readability_score(texts)
-        dict_readability["Difficult Words"] = textstat.difficult_words(texts)
-        dict_readability["Linsear Write Formula"] = textstat.linsear_write_formula(texts)
-        dict_readability["Dale-Chall Readability Score"] = textstat.dale_chall_readability_score(texts)
-        dict_readability["Gunning Fog"] = textstat.gunning_fog(texts)
-        dict_readability["Text Standard"] = textstat.text_standard(texts, float_output=True)
-        dict_readability["Spache Readability"] = textstat.spache_readability(texts)
-        dict_readability["McAlpine EFLAW"]= textstat.mcalpine_eflaw(texts)
-        dict_readability["Reading Time"] = textstat.reading_time(texts, ms_per_char=14.69)
-        dict_readability["Fernandez-Huerta"] = textstat.fernandez_huerta(texts)
-        dict_readability["Szigriszt-Pazos (ES)"] = textstat.szigriszt_pazos(texts)
-        dict_readability["Gutierrez Polini (ES)"] = textstat.gutierrez_polini(texts)
-        dict_readability["Crawford (ES)"] = textstat.crawford(texts)
-        dict_readability["Gulpeasse Index (IT)"] = textstat.gulpease_index(texts)
-        dict_readability["Osman (AR)"] = textstat.osman(texts)
-        dict_readability["Wiener Sachtextformel (DE)"] = textstat.wiener_sachtextformel(texts, 1)
-        dict_readability["Syllable Count"] = textstat.syllable_count(texts)
-        dict_readability["Lexicon Count"] = textstat.lexicon_count(texts, removepunct=True)
-        dict_readability["Sentence Count"] = textstat.sentence_count(texts)
-        dict_readability["Character Count"] = textstat.char_count(texts, ignore_spaces=True)
-        dict_readability["Letter Count"] = textstat.letter_count(texts)
-        dict_readability["Polysyllable Count"] = textstat.polysyllabcount(texts)
-        dict_readability["Monosyllable Count"] = textstat.monosyllabcount(texts)
+        dict_readability["Flesch Reading Ease"] = stats.flesch_reading_ease()
+        dict_readability["Flesch-Kincaid Grade Level"] = stats.flesch_kincaid_grade()
+        dict_readability["Smog Index"] = stats.smog_index()
+        dict_readability["Coleman-Liau Index"] = stats.coleman_liau_index()
+        dict_readability["Automated Readability Index"] = stats.automated_readability_index()
+        dict_readability["Dale-Chall Readability Score"] = stats.dale_chall_readability_score()
+        dict_readability["Difficult Words"] = stats.unique_difficult_word_count
+        dict_readability["Linsear Write Formula"] = stats.linsear_write_formula()
+        dict_readability["Gunning Fog"] = stats.gunning_fog()
+        dict_readability["Text Standard"] = stats.text_standard()
+        dict_readability["Spache Readability"] = stats.spache_readability()
+        dict_readability["McAlpine EFLAW"]= stats.mcalpine_eflaw()
+        dict_readability["Reading Time"] = stats.reading_time(ms_per_char=14.69)
+        dict_readability["Fernandez-Huerta"] = stats.fernandez_huerta()
+        dict_readability["Szigriszt-Pazos (ES)"] = stats.szigriszt_pazos()
+        dict_readability["Gutierrez Polini (ES)"] = stats.gutierrez_polini()
+        dict_readability["Crawford (ES)"] = stats.crawford()
+        dict_readability["Gulpeasse Index (IT)"] = stats.gulpease_index()
+        dict_readability["Osman (AR)"] = stats.osman()
+        dict_readability["Wiener Sachtextformel (DE)"] = stats.wiener_sachtextformel(1)
+        dict_readability["Syllable Count"] = stats.syllable_count
+        dict_readability["Lexicon Count"] = stats.word_count
+        dict_readability["Sentence Count"] = stats.sentence_count
+        dict_readability["Character Count"] = stats.char_count
+        dict_readability["Letter Count"] = stats.letter_count
+        dict_readability["Polysyllable Count"] = stats.polysyllable_count
+        dict_readability["Monosyllable Count"] = stats.monosyllable_count
 
         return dict_readability
 
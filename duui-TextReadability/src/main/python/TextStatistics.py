@@ -0,0 +1,353 @@
+import math
+import re
+from collections import Counter
+from functools import lru_cache
+
+from textstat.backend.utils import get_cmudict, get_lang_cfg, get_lang_easy_words, get_lang_root, get_pyphen
+from textstat.backend.utils.constants import RE_NONCONTRACTION_APOSTROPHE
+
+# Same tokenization rules as textstat 0.7.7 (backend/transformations, backend/selections)
+_RE_NONCONTRACTION_APOSTROPHE = re.compile(RE_NONCONTRACTION_APOSTROPHE)
+_RE_PUNCTUATION = re.compile(r"[^\w\s]")
+_RE_PUNCTUATION_KEEP_APOSTROPHE = re.compile(r"[^\w\s\']")
+_RE_WHITESPACE = re.compile(r"\s")
+_RE_LETTER = re.compile(r"\w")
+_RE_SENTENCE = re.compile(r"\b[^.!?]+[.!?]*", re.UNICODE)
+_RE_TASHKEEL = re.compile("[\u064e\u064b\u064f\u064c\u0650\u064d\u0651]")
+_RE_ARABIC_STRESS = re.compile(r"[\u064B\u064C\u064D\u0651]")
+_RE_ARABIC_SYLLABLE_FALLBACK = re.compile(r"[\u0627\u0649\?\.\!\,\s*]")
+_RE_FASEEH_UNI = re.compile(r"[\u0626\u0621\u0624\u0630\u0638]")
+_RE_FASEEH_BI = re.compile(r"(\u0648\u0627|\u0648\u0646)")
+_ARABIC_SHORT_VOWELS = {"\u064E", "\u064F", "\u0650"}
+_ARABIC_LONG_VOWELS = {"\u0627", "\u0648", "\u064a"}
+
+
+def _remove_punctuation(text):
+    return _RE_PUNCTUATION_KEEP_APOSTROPHE.sub("", _RE_NONCONTRACTION_APOSTROPHE.sub("", text))
+
+
+def _list_words(text):
+    return _remove_punctuation(text).split()
+
+
+@lru_cache(maxsize=65536)
+def _word_syllables(word, lang):
+    # word is already lowercased and stripped of punctuation
+    phones = get_cmudict(lang)
+    if phones is not None:
+        pronunciations = phones.get(word)
+        if pronunciations:
+            return sum(1 for p in pronunciations[0] if p[-1].isdigit())
+    return len(get_pyphen(lang).positions(word)) + 1
+
+
+def _count_sentences(text):
+    if len(text) == 0:
+        return 0
+    sentences = _RE_SENTENCE.findall(text)
+    ignore_count = sum(1 for sentence in sentences if len(_list_words(sentence)) <= 2)
+    return max(1, len(sentences) - ignore_count)
+
+
+def _count_arabic_syllables(words, text):
+    short_count = 0
+    long_count = 0
+    char_list = "".join(words)
+    for i, c in enumerate(char_list):
+        if c in _ARABIC_SHORT_VOWELS:
+            if i + 1 < len(char_list) and char_list[i + 1] in _ARABIC_LONG_VOWELS:
+                long_count += 1
+            else:
+                short_count += 1
+    stress_count = len(_RE_ARABIC_STRESS.findall(text))
+    if short_count == 0:
+        short_count = len(_RE_ARABIC_SYLLABLE_FALLBACK.sub("", text)) - 2
+    return short_count + 2 * (long_count + stress_count)
+
+
+def _grade_range(score):
+    return [math.floor(score), math.ceil(score), round(score)]
+
+
+class TextStatistics:
+    """Counts shared by all textstat readability formulas, computed in a single pass.
+
+    The text is tokenized once and every word is looked up once in the syllable
+    dictionary. All formulas are derived from these counts and follow textstat 0.7.7.
+    """
+
+    def __init__(self, text, lang="en_US"):
+        self.lang = lang
+        self.char_count = len(_RE_WHITESPACE.sub("", text))
+        self.letter_count = len(_RE_LETTER.findall(text))
+        self.sentence_count = _count_sentences(text)
+
+        # words with punctuation (including contraction apostrophes) kept
+        tokens = text.split()
+        self.token_count = len(tokens)
+        # words as counted by textstat.lexicon_count
+        words = _list_words(text)
+        self.word_count = len(words)
+        # words with all punctuation removed, used for word length counts
+        plain_words = _RE_PUNCTUATION.sub("", text).split()
+        self.long_word_count = sum(1 for w in plain_words if len(w) > 6)
+        self.miniword_count = sum(1 for w in plain_words if len(w) <= 3)
+
+        easy_words = get_lang_easy_words(lang)
+        gunning_fog_threshold = int(get_lang_cfg(lang, "syllable_threshold"))
+        self.syllable_count = 0
+        self.monosyllable_count = 0
+        self.polysyllable_count = 0
+        self.difficult_word_count = 0
+        self.gunning_fog_difficult_word_count = 0
+        self.dale_chall_difficult_word_count = 0
+        difficult_words = set()
+        for word in words:
+            lower = word.lower()
+            syllables = _word_syllables(lower, lang)
+            self.syllable_count += syllables
+            if syllables == 1:
+                self.monosyllable_count += 1
+            elif syllables >= 3:
+                self.polysyllable_count += 1
+            if lower in easy_words:
+                continue
+            self.dale_chall_difficult_word_count += 1
+            if syllables >= 2:
+                self.difficult_word_count += 1
+                difficult_words.add(word)
+            if syllables >= gunning_fog_threshold:
+                self.gunning_fog_difficult_word_count += 1
+        self.unique_difficult_word_count = len(difficult_words)
+
+        self._linsear_write = self._compute_linsear_write(tokens, words)
+        self._osman = self._compute_osman(plain_words, text)
+
+    def _compute_linsear_write(self, tokens, words):
+        # only the first 100 words are used
+        if len(tokens) > 100:
+            words_list = []
+            i_text = 0
+            while i_text < len(tokens) and len(words_list) < 100:
+                word = _remove_punctuation(tokens[i_text])
+                i_text += 1
+                if len(word) > 0:
+                    words_list.append(word)
+            sentence_count = _count_sentences(" ".join(tokens[:i_text]))
+        else:
+            words_list = words
+            sentence_count = _count_sentences(" ".join(tokens))
+
+        easy_word = 0
+        difficult_word = 0
+        for word in words_list:
+            syllables = _word_syllables(word.lower(), self.lang)
+            if syllables >= 3:
+                difficult_word += 1
+            elif syllables > 0:
+                easy_word += 1
+        if sentence_count == 0:
+            return 0.0
+        number = float((easy_word * 1 + difficult_word * 3) / sentence_count)
+        if number <= 20:
+            number -= 2
+        return number / 2
+
+    def _compute_osman(self, plain_words, text):
+        if self.word_count == 0:
+            return 0.0
+        complex_words = sum(1 for w in plain_words if len(_RE_TASHKEEL.findall(w)) > 5)
+        long_words = sum(1 for w in plain_words if len(w) > 5)
+        faseeh = 0
+        for w in plain_words:
+            if len(_RE_FASEEH_UNI.findall(w)) + len(_RE_FASEEH_BI.findall(w)) > 0 \
+                    and _count_arabic_syllables([w], w) > 5:
+                faseeh += 1
+        syllables = _count_arabic_syllables(plain_words, text)
+        rates = complex_words + syllables + faseeh + long_words
+        return 200.791 - (1.015 * self.words_per_sentence()) - (24.181 * (rates / self.word_count))
+
+    def words_per_sentence(self):
+        if self.sentence_count == 0:
+            return 0.0
+        return self.word_count / self.sentence_count
+
+    def syllables_per_word(self):
+        if self.word_count == 0:
+            return 0.0
+        return self.syllable_count / self.word_count
+
+    def sentences_per_word(self):
+        if self.word_count == 0:
+            return 0.0
+        return self.sentence_count / self.word_count
+
+    def letters_per_word(self):
+        if self.word_count == 0:
+            return 0.0
+        return self.letter_count / self.word_count
+
+    def chars_per_word(self):
+        # punctuation-only tokens count as words, because their characters are counted
+        if self.token_count == 0:
+            return 0.0
+        return self.char_count / self.token_count
+
+    def flesch_reading_ease(self):
+        sentence_length = self.words_per_sentence()
+        syllables = self.syllables_per_word()
+        if sentence_length == 0 or syllables == 0:
+            return 0.0
+        lang_root = get_lang_root(self.lang)
+        return (
+            get_lang_cfg(lang_root, "fre_base")
+            - get_lang_cfg(lang_root, "fre_sentence_length") * sentence_length
+            - get_lang_cfg(lang_root, "fre_syll_per_word") * syllables
+        )
+
+    def flesch_kincaid_grade(self):
+        sentence_length = self.words_per_sentence()
+        syllables = self.syllables_per_word()
+        if sentence_length == 0 or syllables == 0:
+            return 0.0
+        return (0.39 * sentence_length) + (11.8 * syllables) - 15.59
+
+    def smog_index(self):
+        if self.sentence_count == 0:
+            return 0.0
+        return (1.043 * (30 * (self.polysyllable_count / self.sentence_count)) ** 0.5) + 3.1291
+
+    def coleman_liau_index(self):
+        letters = self.letters_per_word() * 100
+        sentences = self.sentences_per_word() * 100
+        if letters == 0 or sentences == 0:
+            return 0.0
+        return (0.058 * letters) - (0.296 * sentences) - 15.8
+
+    def automated_readability_index(self):
+        a = self.chars_per_word()
+        b = self.words_per_sentence()
+        if a == 0 or b == 0:
+            return 0.0
+        return (4.71 * a) + (0.5 * b) - 21.43
+
+    def dale_chall_readability_score(self):
+        if self.word_count == 0:
+            return 0.0
+        per_difficult_words = 100 * self.dale_chall_difficult_word_count / self.word_count
+        score = (0.1579 * per_difficult_words) + (0.0496 * self.words_per_sentence())
+        if per_difficult_words > 5:
+            score += 3.6365
+        return score
+
+    def linsear_write_formula(self):
+        return self._linsear_write
+
+    def gunning_fog(self):
+        if self.word_count == 0:
+            return 0.0
+        per_diff_words = 100 * self.gunning_fog_difficult_word_count / self.word_count
+        return 0.4 * (self.words_per_sentence() + per_diff_words)
+
+    def text_standard(self):
+        grade = []
+        grade.extend(_grade_range(self.flesch_kincaid_grade()))
+
+        score = self.flesch_reading_ease()
+        if 90 <= score < 100:
+            grade.append(5)
+        elif 80 <= score < 90:
+            grade.append(6)
+        elif 70 <= score < 80:
+            grade.append(7)
+        elif 60 <= score < 70:
+            grade.append(8)
+            grade.append(9)
+        elif 50 <= score < 60:
+            grade.append(10)
+        elif 40 <= score < 50:
+            grade.append(11)
+        elif 30 <= score < 40:
+            grade.append(12)
+        else:
+            grade.append(13)
+
+        grade.extend(_grade_range(self.smog_index()))
+        grade.extend(_grade_range(self.coleman_liau_index()))
+        grade.extend(_grade_range(self.automated_readability_index()))
+        grade.extend(_grade_range(self.dale_chall_readability_score()))
+        grade.extend(_grade_range(self.linsear_write_formula()))
+        grade.extend(_grade_range(self.gunning_fog()))
+        return float(Counter(grade).most_common(1)[0][0])
+
+    def spache_readability(self):
+        if self.word_count == 0:
+            return 0.0
+        pdw = 100 * self.difficult_word_count / self.word_count
+        return (0.141 * self.words_per_sentence()) + (0.086 * pdw) + 0.839
+
+    def mcalpine_eflaw(self):
+        if self.sentence_count == 0:
+            return 0.0
+        return (self.word_count + self.miniword_count) / self.sentence_count
+
+    def reading_time(self, ms_per_char=14.69):
+        return ms_per_char * self.char_count / 1000
+
+    def fernandez_huerta(self):
+        sentence_length = self.words_per_sentence()
+        syllables = self.syllables_per_word()
+        if sentence_length == 0 or syllables == 0:
+            return 0.0
+        return 206.84 - (60 * syllables) - (1.02 * sentence_length)
+
+    def szigriszt_pazos(self):
+        if self.word_count == 0 or self.sentence_count == 0:
+            return 0.0
+        return (
+            get_lang_cfg(self.lang, "fre_base")
+            - 62.3 * (self.syllable_count / self.word_count)
+            - (self.word_count / self.sentence_count)
+        )
+
+    def gutierrez_polini(self):
+        lpw = self.letters_per_word()
+        wps = self.words_per_sentence()
+        if lpw == 0 or wps == 0:
+            return 0.0
+        return 95.2 - 9.7 * lpw - 0.35 * wps
+
+    def crawford(self):
+        sentences_per_words = 100 * self.sentences_per_word()
+        syllables_per_words = 100 * self.syllables_per_word()
+        if sentences_per_words == 0 or syllables_per_words == 0:
+            return 0.0
+        return -0.205 * sentences_per_words + 0.049 * syllables_per_words - 3.407
+
+    def gulpease_index(self):
+        spw = self.sentences_per_word()
+        cpw = self.chars_per_word()
+        if spw == 0 or cpw == 0:
+            return 0.0
+        return (300 * spw) - (10 * cpw) + 89
+
+    def osman(self):
+        return self._osman
+
+    def wiener_sachtextformel(self, variant):
+        if self.word_count == 0:
+            return 0.0
+        ms = 100 * self.polysyllable_count / self.word_count
+        sl = self.words_per_sentence()
+        iw = 100 * self.long_word_count / self.word_count
+        es = 100 * self.monosyllable_count / self.word_count
+        if variant == 1:
+            return (0.1935 * ms) + (0.1672 * sl) + (0.1297 * iw) - (0.0327 * es) - 0.875
+        elif variant == 2:
+            return (0.2007 * ms) + (0.1682 * sl) + (0.1373 * iw) - 2.779
+        elif variant == 3:
+            return (0.2963 * ms) + (0.1905 * sl) - 1.1144
+        elif variant == 4:
+            return (0.2744 * ms) + (0.2656 * sl) - 1.693
+        else:
+            raise ValueError("variant can only be an integer between 1 and 4")
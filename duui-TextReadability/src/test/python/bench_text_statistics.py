@@ -0,0 +1,29 @@
+import argparse
+import time
+
+from test_text_statistics import ReadabilityMetricsTextStat, assert_same_metrics, synthetic_text, textstat_readability
+
+
+def benchmark(word_counts):
+    # load cmudict, pyphen and the easy word lists outside of the measurements
+    assert_same_metrics(synthetic_text(100))
+    for n_words in word_counts:
+        text = synthetic_text(n_words)
+        start = time.perf_counter()
+        textstat_readability(text)
+        textstat_time = time.perf_counter() - start
+        start = time.perf_counter()
+        ReadabilityMetricsTextStat().compute_readability(text)
+        single_pass_time = time.perf_counter() - start
+        print(
+            f"{n_words} words: textstat {textstat_time:.3f}s, single pass {single_pass_time:.3f}s, "
+            f"speedup {textstat_time / single_pass_time:.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    # e.g. python src/test/python/bench_text_statistics.py --words 1000 10000 50000
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--words", type=int, nargs="+", default=[1000, 10000, 50000])
+    args = parser.parse_args()
+    benchmark(args.words)
@@ -0,0 +1,131 @@
+import math
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+textstat = pytest.importorskip("textstat")
+pytest.importorskip("diversity")
+
+SERVICE_DIR = Path(__file__).resolve().parents[2] / "main" / "python"
+sys.path.insert(0, str(SERVICE_DIR))
+
+from Readability import ReadabilityMetricsTextStat  # noqa: E402
+
+VOCABULARY = (
+    "the a of and to in is it that was he for on are as with his they at be this from have or by one had "
+    "not but what all were when we there can an your which their said if do will each about how up out them "
+    "then she many some so these would other into has more her two like him see time could no make than first "
+    "been its who now people my made over did down only way find use may water long little very after words "
+    "called just where most know government university information development international environment "
+    "organization particularly responsibility communication understanding administration opportunity "
+    "extraordinary community political experience "
+    "don't it's we're they've you'll"
+).split()
+
+EDGE_TEXTS = [
+    "",
+    " ",
+    "Word",
+    "...",
+    "!?!",
+    "no punctuation at all in this text",
+    "One. Two! Three? Four",
+    "Mr. Smith paid $3.50 for 2 apples, i.e. 1.75 each.",
+    "It's the students' book, isn't it? 'Quoted' words and rock 'n' roll.",
+    "Hyphenated well-known long-term self-explanatory words.",
+    "Internationalization responsibilities extraordinarily characterized.",
+    "A\n\nline break\tand tab separated  text.",
+    "Ünïcödé wörds ßtraße café naïve.",
+    "😀 emoji 😀 text 🎉.",
+    "UPPER CASE SENTENCE. lower case sentence.",
+    "Der Ausschuss hat die Beschlussempfehlung angenommen.",
+    "مرحبا بالعالم. هذا نص عربي.",
+    "Short. " * 200,
+]
+
+
+class PyphenFallback:
+    # textstat 0.7.7 means to count the syllables of words missing from cmudict with pyphen, but only
+    # catches IndexError and TypeError and raises KeyError for them, TextStatistics uses the fallback
+    def __init__(self, phones):
+        self.phones = phones
+
+    def __getitem__(self, word):
+        return self.phones.get(word) or []
+
+
+@pytest.fixture(autouse=True)
+def cmudict_fallback(monkeypatch):
+    count_syllables = sys.modules["textstat.backend.counts._count_syllables"]
+    get_cmudict = count_syllables.get_cmudict
+    monkeypatch.setattr(
+        count_syllables, "get_cmudict",
+        lambda lang: None if get_cmudict(lang) is None else PyphenFallback(get_cmudict(lang))
+    )
+
+
+def textstat_readability(text):
+    # the former per metric textstat calls, every call tokenizes the text again
+    return {
+        "Flesch Reading Ease": textstat.flesch_reading_ease(text),
+        "Flesch-Kincaid Grade Level": textstat.flesch_kincaid_grade(text),
+        "Smog Index": textstat.smog_index(text),
+        "Coleman-Liau Index": textstat.coleman_liau_index(text),
+        "Automated Readability Index": textstat.automated_readability_index(text),
+        "Dale-Chall Readability Score": textstat.dale_chall_readability_score(text),
+        "Difficult Words": textstat.difficult_words(text),
+        "Linsear Write Formula": textstat.linsear_write_formula(text),
+        "Gunning Fog": textstat.gunning_fog(text),
+        "Text Standard": textstat.text_standard(text, float_output=True),
+        "Spache Readability": textstat.spache_readability(text),
+        "McAlpine EFLAW": textstat.mcalpine_eflaw(text),
+        "Reading Time": textstat.reading_time(text, ms_per_char=14.69),
+        "Fernandez-Huerta": textstat.fernandez_huerta(text),
+        "Szigriszt-Pazos (ES)": textstat.szigriszt_pazos(text),
+        "Gutierrez Polini (ES)": textstat.gutierrez_polini(text),
+        "Crawford (ES)": textstat.crawford(text),
+        "Gulpeasse Index (IT)": textstat.gulpease_index(text),
+        "Osman (AR)": textstat.osman(text),
+        "Wiener Sachtextformel (DE)": textstat.wiener_sachtextformel(text, 1),
+        "Syllable Count": textstat.syllable_count(text),
+        "Lexicon Count": textstat.lexicon_count(text, removepunct=True),
+        "Sentence Count": textstat.sentence_count(text),
+        "Character Count": textstat.char_count(text, ignore_spaces=True),
+        "Letter Count": textstat.letter_count(text),
+        "Polysyllable Count": textstat.polysyllabcount(text),
+        "Monosyllable Count": textstat.monosyllabcount(text),
+    }
+
+
+def synthetic_text(n_words, seed=0):
+    # random sentences of 3 to 30 words, some end without a full stop
+    rng = random.Random(seed)
+    sentences = []
+    remaining = n_words
+    while remaining > 0:
+        length = min(remaining, rng.randint(3, 30))
+        sentence = " ".join(rng.choice(VOCABULARY) for _ in range(length))
+        sentences.append(sentence.capitalize() + rng.choice([".", "!", "?", ", and"]))
+        remaining -= length
+    return " ".join(sentences)
+
+
+def assert_same_metrics(text):
+    expected = textstat_readability(text)
+    results = ReadabilityMetricsTextStat().compute_readability(text)
+
+    assert results.keys() == expected.keys()
+    for metric, value in expected.items():
+        assert math.isclose(results[metric], value, rel_tol=1e-9, abs_tol=1e-9), (metric, results[metric], value)
+
+
+@pytest.mark.parametrize("text", EDGE_TEXTS)
+def test_edge_texts_match_textstat(text):
+    assert_same_metrics(text)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_synthetic_texts_match_textstat(seed):
+    assert_same_metrics(synthetic_text(2000, seed))
@@ -16,6 +16,7 @@ docker build \
   --build-arg TRANSLATION_ANNOTATOR_VERSION \
   --build-arg TRANSLATION_LOG_LEVEL \
   -t ${DOCKER_REGISTRY}${TRANSLATION_ANNOTATOR_NAME}:${TRANSLATION_ANNOTATOR_VERSION}${TRANSLATION_ANNOTATOR_CUDA} \
+  --build-context duui-runtime=../duui-runtime \
   -f src/main/docker/Dockerfile${TRANSLATION_ANNOTATOR_CUDA} \
   .
 
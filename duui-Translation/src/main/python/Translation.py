@@ -1,5 +1,7 @@
 import os.path
+from typing import Callable, List
 
+from duui_runtime.batching import token_budget_batches
 from transformers import T5Tokenizer, T5ForConditionalGeneration
 from transformers import AutoTokenizer, AutoModelForSeq2SeqLM, pipeline
 import torch
@@ -35,50 +37,102 @@ LANGUAGES_FLORES200 = [
 "bak_Cyrl",  "dyu_Latn",  "heb_Hebr",  "khk_Cyrl",	"lvs_Latn",  "pan_Guru",  "som_Latn",  "tum_Latn"
 ]
 
+# Default number of (padded) source tokens per generate call
+DEFAULT_TRANSLATION_MAX_TOKENS = 4096
+
+
+def translate_in_batches(tokenizer, texts: List[str], translate_batch: Callable[[List[str]], List[str]],
+                         max_tokens: int = DEFAULT_TRANSLATION_MAX_TOKENS, max_length: int = 512,
+                         prefix: str = "") -> List[str]:
+    # Translates every distinct text once, in length sorted batches under a token budget,
+    # translate_batch translates a list of texts, the translations are returned in the order of texts.
+    # The budget is measured on the texts as translate_batch tokenizes them, with the prefix it prepends
+    unique_texts = list(dict.fromkeys(texts))
+    if not unique_texts:
+        return []
+    lengths = [len(ids) for ids in tokenizer([f"{prefix}{text}" for text in unique_texts], truncation=True,
+                                             max_length=max_length)["input_ids"]]
+    translations = {}
+    for batch in token_budget_batches(lengths, max_tokens):
+        batch_texts = [unique_texts[i] for i in batch]
+        for text, translation in zip(batch_texts, translate_batch(batch_texts)):
+            translations[text] = translation
+    return [translations[text] for text in texts]
+
+
 MBArt_FACEBOOK = ["ar_AR", "cs_CZ", "de_DE", "en_XX", "es_XX", "et_EE", "fi_FI", "fr_XX", "gu_IN", "hi_IN", "it_IT", "ja_XX", "kk_KZ", "ko_KR", "lt_LT", "lv_LV", "my_MM", "ne_NP", "nl_XX", "ro_RO", "ru_RU", "si_LK", "tr_TR", "vi_VN", "zh_CN", "af_ZA", "az_AZ", "bn_IN", "fa_IR", "he_IL", "hr_HR", "id_ID", "ka_GE", "km_KH", "mk_MK", "ml_IN", "mn_MN", "mr_IN", "pl_PL", "ps_AF", "pt_XX", "sv_SE", "sw_KE", "ta_IN", "te_IN", "th_TH", "tl_XX", "uk_UA", "ur_PK", "xh_ZA", "gl_ES", "sl_SI"]
 
 class TranslationTransformer:
-    def __init__(self, model_name: str, device='cuda:0'):
+    def __init__(self, model_name: str, device='cuda:0', max_tokens: int = DEFAULT_TRANSLATION_MAX_TOKENS):
         self.device = device
+        self.max_tokens = max_tokens
         self.tokenizer = T5Tokenizer.from_pretrained(model_name)
         self.model = T5ForConditionalGeneration.from_pretrained(model_name).to(device)
 
     def translate(self, texts: str, langin: str, langout: str):
-        with torch.no_grad():
-            prefix = f"translate {langin} to {langout}: "
-            inputs = self.tokenizer(f"{prefix}{texts}", return_tensors="pt", padding=True, truncation=True,
-                                    max_length=512).to(self.device)
-            outputs = self.model.generate(**inputs)
-            return self.tokenizer.decode(outputs[0], skip_special_tokens=True)
+        return self.translate_batch([texts], langin, langout)[0]
+
+    def translate_batch(self, texts: List[str], langin: str, langout: str) -> List[str]:
+        prefix = f"translate {langin} to {langout}: "
+
+        def translate_batch(batch_texts):
+            with torch.no_grad():
+                inputs = self.tokenizer([f"{prefix}{text}" for text in batch_texts], return_tensors="pt", padding=True,
+                                        truncation=True, max_length=512).to(self.device)
+                outputs = self.model.generate(**inputs)
+                return self.tokenizer.batch_decode(outputs, skip_special_tokens=True)
+
+        return translate_in_batches(self.tokenizer, texts, translate_batch, self.max_tokens, prefix=prefix)
 
 class LanguageM2M:
-    def __init__(self, model_name: str, device='cuda:0'):
+    def __init__(self, model_name: str, device='cuda:0', max_tokens: int = DEFAULT_TRANSLATION_MAX_TOKENS):
         model = AutoModelForSeq2SeqLM.from_pretrained(model_name).to(device)
         tokenizer = AutoTokenizer.from_pretrained(model_name)
         self.device = device
+        self.max_tokens = max_tokens
         self.model = model
         self.tokenizer = tokenizer
 
     def translate(self, texts: str, langin: str, langout: str):
+        return self.translate_batch([texts], langin, langout)[0]
+
+    def translate_batch(self, texts: List[str], langin: str, langout: str) -> List[str]:
         self.tokenizer.src_lang = langin
-        encoded_in = self.tokenizer(texts, return_tensors="pt", padding=True, truncation=True, max_length=512).to(self.device)
-        generated_tokens = self.model.generate(**encoded_in, forced_bos_token_id=self.tokenizer.lang_code_to_id[langout])
-        output = self.tokenizer.batch_decode(generated_tokens, skip_special_tokens=True)
-        return output[0]
+
+        def translate_batch(batch_texts):
+            encoded_in = self.tokenizer(batch_texts, return_tensors="pt", padding=True, truncation=True, max_length=512).to(self.device)
+            generated_tokens = self.model.generate(**encoded_in, forced_bos_token_id=self.tokenizer.lang_code_to_id[langout])
+            return self.tokenizer.batch_decode(generated_tokens, skip_special_tokens=True)
+
+        return translate_in_batches(self.tokenizer, texts, translate_batch, self.max_tokens)
 
 class LanguageNLLB:
-    def __init__(self, model_name: str, device='cuda:0'):
+    def __init__(self, model_name: str, device='cuda:0', max_tokens: int = DEFAULT_TRANSLATION_MAX_TOKENS):
         model = AutoModelForSeq2SeqLM.from_pretrained(model_name).to(device)
         tokenizer = AutoTokenizer.from_pretrained(model_name)
         self.device = device
+        self.max_tokens = max_tokens
         self.model = model
         self.tokenizer = tokenizer
+        # translation pipelines per (source, target) language, the pipelines share model and tokenizer
+        self.translators = {}
+
+    def get_translator(self, langin: str, langout: str):
+        if (langin, langout) not in self.translators:
+            self.translators[(langin, langout)] = pipeline("translation", model =self.model, tokenizer =self.tokenizer, src_lang = langin, tgt_lang = langout, max_length = 400)
+        return self.translators[(langin, langout)]
 
     def translate(self, text: str, langin: str, langout: str):
-        translator = pipeline("translation", model =self.model, tokenizer =self.tokenizer, src_lang = langin, tgt_lang = langout, max_length = 400)
-        output = translator(text)
-        translated_text = output[0]["translation_text"]
-        return translated_text
+        return self.translate_batch([text], langin, langout)[0]
+
+    def translate_batch(self, texts: List[str], langin: str, langout: str) -> List[str]:
+        translator = self.get_translator(langin, langout)
+
+        def translate_batch(batch_texts):
+            output = translator(batch_texts, batch_size=len(batch_texts))
+            return [translated["translation_text"] for translated in output]
+
+        return translate_in_batches(self.tokenizer, texts, translate_batch, self.max_tokens)
 
 def language_match(lang: str):
     lang_name = ""
@@ -128,6 +182,10 @@ class WhisperTranslation:
             os.remove("speech.mp3")
         print(result.text)
 
+    def translate_batch(self, texts: List[str], langin: str, langout: str) -> List[str]:
+        # every text is spoken and transcribed on its own
+        return [self.translate(text, langin, langout) for text in texts]
+
     def text2speech(self, text: str, lang: str):
         tts = gTTS(text, lang=lang)
         tts.save("speech.mp3")
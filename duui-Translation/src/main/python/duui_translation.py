@@ -9,7 +9,7 @@ from cassis import load_typesystem
 import torch
 from threading import Lock
 from functools import lru_cache
-from Translation import LanguageNLLB, LanguageM2M, WhisperTranslation, TranslationTransformer, language_to_flores200, language_to_MBART, language_match
+from Translation import LanguageNLLB, LanguageM2M, WhisperTranslation, TranslationTransformer, language_to_flores200, language_to_MBART, language_match, DEFAULT_TRANSLATION_MAX_TOKENS
 import json
 # from sp_correction import SentenceBestPrediction
 
@@ -57,6 +57,8 @@ class Settings(BaseSettings):
     # translation_model_name: str
     # Name of this annotator
     translation_model_cache_size: int
+    # Max number of (padded) source tokens per generate call
+    translation_max_tokens: int = DEFAULT_TRANSLATION_MAX_TOKENS
 
 
 # Load settings from env vars
@@ -184,15 +186,15 @@ def get_documentation():
 def load_model(model_name):
     match model_name:
         case "MBART":
-            model_i = LanguageM2M("facebook/mbart-large-50-many-to-many-mmt", device=device)
+            model_i = LanguageM2M("facebook/mbart-large-50-many-to-many-mmt", device=device, max_tokens=settings.translation_max_tokens)
         case "NLLB":
-            model_i = LanguageNLLB("facebook/nllb-200-distilled-600M", device=device)
+            model_i = LanguageNLLB("facebook/nllb-200-distilled-600M", device=device, max_tokens=settings.translation_max_tokens)
         case "Whisper":
             model_i = WhisperTranslation(device_i=device, model_name="small")
         case "FlanT5Base":
-            model_i = TranslationTransformer(model_name="google/flan-t5-base")
+            model_i = TranslationTransformer(model_name="google/flan-t5-base", max_tokens=settings.translation_max_tokens)
         case _:
-            model_i = LanguageNLLB("facebook/nllb-200-distilled-600M", device=device)
+            model_i = LanguageNLLB("facebook/nllb-200-distilled-600M", device=device, max_tokens=settings.translation_max_tokens)
     return model_i
 
 
@@ -217,12 +219,23 @@ def get_lang(model_name, lang):
     return lang_out
 
 
+def translate_texts(model, model_name, texts, languages_in, lang_out):
+    # Translates all texts into lang_out, texts with the same source language are translated together
+    lang_output = get_lang(model_name, lang_out)
+    lang_inputs = {lang_in: get_lang(model_name, lang_in) for lang_in in set(languages_in)}
+    groups = {}
+    for c, lang_in in enumerate(languages_in):
+        groups.setdefault(lang_inputs[lang_in][0], []).append(c)
+    translations = [None] * len(texts)
+    for lang_input, indices in groups.items():
+        group_translations = model.translate_batch([texts[c] for c in indices], lang_input, lang_output[0])
+        for c, translation_text in zip(indices, group_translations):
+            translations[c] = translation_text
+    return translations
+
+
 def process_selection(model_name, selection, translations):
     output = {}
-    begin = []
-    end = []
-    text = []
-    langin = []
     translation_out = []
     begin_out = []
     end_out = []
@@ -231,31 +244,22 @@ def process_selection(model_name, selection, translations):
     translation_list = translations.split(",")
     with model_lock:
         model = load_model(model_name)
-        for select_i in selection:
-            begin.append(select_i["begin"])
-            end.append(select_i["end"])
-            text.append(select_i["text"])
-            langin.append(select_i["language"])
-        for c, text_i in enumerate(text):
-            begin_i = begin[c]
-            end_i = end[c]
-            lang_i = langin[c]
-            for c2, lang_out_i in enumerate(translation_list):
-                if c2 == 0:
-                    lang_input = get_lang(model_name, lang_i)
-                    lang_output = get_lang(model_name, lang_out_i)
-                    text_in = text_i
-                    art_out.append("Normal")
-                else:
-                    lang_input = get_lang(model_name, translation_list[c2-1])
-                    lang_output = get_lang(model_name, lang_out_i)
-                    text_in = translation_text
-                    art_out.append("Translated")
-                end_out.append(end_i)
-                translation_text = model.translate(text_in, lang_input[0], lang_output[0])
-                translation_out.append(translation_text)
-                begin_out.append(begin_i)
-                language_out.append(lang_out_i)
+        # Every language of the translation list translates the output of the previous language,
+        # so the list is followed step by step, each step translates all selections at once
+        texts = [select_i["text"] for select_i in selection]
+        languages_in = [select_i["language"] for select_i in selection]
+        steps = []
+        for lang_out_i in translation_list:
+            texts = translate_texts(model, model_name, texts, languages_in, lang_out_i)
+            languages_in = [lang_out_i] * len(texts)
+            steps.append(texts)
+    for c, select_i in enumerate(selection):
+        for c2, lang_out_i in enumerate(translation_list):
+            begin_out.append(select_i["begin"])
+            end_out.append(select_i["end"])
+            translation_out.append(steps[c2][c])
+            language_out.append(lang_out_i)
+            art_out.append("Normal" if c2 == 0 else "Translated")
     output = {
         "begin": begin_out,
         "end": end_out,
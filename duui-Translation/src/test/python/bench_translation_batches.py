@@ -0,0 +1,44 @@
+import argparse
+import os
+import sys
+import time
+
+import transformers
+
+from test_translation_batches import SERVICE_DIR, chain_process_selection, load_service, random_selection, tiny_marian
+
+
+def benchmark(service, selection_counts, translations, max_tokens, hidden_size, layers):
+    model = tiny_marian(sys.modules["Translation"], max_tokens, hidden_size, layers)
+    service.load_model = lambda model_name: model
+    # first generate call outside of the measurements
+    service.process_selection("FlanT5Base", random_selection(2, 0), translations)
+    for count in selection_counts:
+        selection = random_selection(count, count)
+        start = time.perf_counter()
+        expected = chain_process_selection(service, "FlanT5Base", selection, translations)
+        chain_time = time.perf_counter() - start
+        start = time.perf_counter()
+        output = service.process_selection("FlanT5Base", selection, translations)
+        batched_time = time.perf_counter() - start
+        # padding changes the float sums of the random model, so a few greedy decodes may differ
+        same = sum(a == b for a, b in zip(output["translation"], expected["translation"]))
+        print(
+            f"{count} selections, {translations}: one text at a time {chain_time:.2f}s, batched {batched_time:.2f}s, "
+            f"speedup {chain_time / batched_time:.1f}x, {same}/{len(expected['translation'])} translations equal"
+        )
+
+
+if __name__ == "__main__":
+    # e.g. python src/test/python/bench_translation_batches.py --selections 16 128 --translations de,fr
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--selections", type=int, nargs="+", default=[16, 128])
+    parser.add_argument("--translations", default="de,fr")
+    parser.add_argument("--max-tokens", type=int, default=4096)
+    parser.add_argument("--hidden-size", type=int, default=256)
+    parser.add_argument("--layers", type=int, default=4)
+    args = parser.parse_args()
+    os.chdir(SERVICE_DIR)
+    transformers.logging.set_verbosity_error()
+    service = load_service(os.environ.__setitem__, dict.__setitem__, lambda path: sys.path.insert(0, path))
+    benchmark(service, args.selections, args.translations, args.max_tokens, args.hidden_size, args.layers)
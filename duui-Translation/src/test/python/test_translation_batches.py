@@ -0,0 +1,202 @@
+import importlib
+import importlib.util
+import random
+import sys
+import types
+from pathlib import Path
+
+import pytest
+
+torch = pytest.importorskip("torch")
+transformers = pytest.importorskip("transformers")
+pytest.importorskip("iso639")
+pytest.importorskip("gtts")
+pytest.importorskip("cassis")
+pytest.importorskip("pydantic_settings")
+testing = pytest.importorskip("duui_runtime.testing")
+
+SERVICE_DIR = Path(__file__).resolve().parents[2] / "main" / "python"
+
+MODEL_NAMES = ["MBART", "NLLB", "FlanT5Base"]
+LANGUAGES = ["en", "de", "fr", "tr", "xx"]
+TRANSLATION_LISTS = ["de", "de,fr", "en,de,tr", "fr,fr"]
+
+
+def load_translation(set_item, syspath_prepend):
+    # whisper only loads the speech model of WhisperTranslation, the other models run without it
+    if importlib.util.find_spec("whisper") is None:
+        set_item(sys.modules, "whisper", types.ModuleType("whisper"))
+    syspath_prepend(str(SERVICE_DIR))
+    sys.modules.pop("Translation", None)
+    return importlib.import_module("Translation")
+
+
+def load_service(set_env, set_item, syspath_prepend):
+    # the language lists, the type system and the Lua script are read from the working directory
+    set_env("TRANSLATION_ANNOTATOR_NAME", "duui-translation")
+    set_env("TRANSLATION_ANNOTATOR_VERSION", "0.0.1")
+    set_env("TRANSLATION_LOG_LEVEL", "WARNING")
+    set_env("TRANSLATION_MODEL_CACHE_SIZE", "1")
+    load_translation(set_item, syspath_prepend)
+    sys.modules.pop("duui_translation", None)
+    return importlib.import_module("duui_translation")
+
+
+def tiny_marian(translation, max_tokens, hidden_size=32, layers=2, seed=0):
+    # TranslationTransformer around a randomly initialized Marian model and the tiny tokenizer
+    tokenizer = testing.tiny_tokenizer()
+    config = transformers.MarianConfig(
+        vocab_size=len(tokenizer), d_model=hidden_size, encoder_layers=layers, decoder_layers=layers,
+        encoder_attention_heads=2, decoder_attention_heads=2, encoder_ffn_dim=hidden_size * 2,
+        decoder_ffn_dim=hidden_size * 2, max_position_embeddings=512, pad_token_id=tokenizer.pad_token_id,
+        eos_token_id=tokenizer.sep_token_id, decoder_start_token_id=tokenizer.pad_token_id,
+    )
+    torch.manual_seed(seed)
+    model = transformers.MarianMTModel(config).eval()
+    model.generation_config.max_new_tokens = 12
+    translator = translation.TranslationTransformer.__new__(translation.TranslationTransformer)
+    translator.device = "cpu"
+    translator.max_tokens = max_tokens
+    translator.tokenizer = tokenizer
+    translator.model = model
+    return translator
+
+
+class FakeTranslator:
+    # deterministic translations through translate_in_batches, records every translated batch
+    def __init__(self, translation, max_tokens=64):
+        self.translation = translation
+        self.tokenizer = testing.tiny_tokenizer()
+        self.max_tokens = max_tokens
+        self.batches = []
+
+    def translate(self, text, langin, langout):
+        return self.translate_batch([text], langin, langout)[0]
+
+    def translate_batch(self, texts, langin, langout):
+        def translate_batch(batch_texts):
+            self.batches.append((langin, langout, list(batch_texts)))
+            return [f"{langout} {' '.join(reversed(text.split()))}" for text in batch_texts]
+
+        return self.translation.translate_in_batches(self.tokenizer, texts, translate_batch, self.max_tokens)
+
+
+def chain_process_selection(service, model_name, selection, translations):
+    # the former process_selection: every selection is translated along the list on its own, one text at a time
+    begin, end, text, langin = [], [], [], []
+    translation_out, begin_out, end_out, art_out, language_out = [], [], [], [], []
+    translation_list = translations.split(",")
+    model = service.load_model(model_name)
+    for select_i in selection:
+        begin.append(select_i["begin"])
+        end.append(select_i["end"])
+        text.append(select_i["text"])
+        langin.append(select_i["language"])
+    for c, text_i in enumerate(text):
+        for c2, lang_out_i in enumerate(translation_list):
+            if c2 == 0:
+                lang_input = service.get_lang(model_name, langin[c])
+                text_in = text_i
+                art_out.append("Normal")
+            else:
+                lang_input = service.get_lang(model_name, translation_list[c2 - 1])
+                text_in = translation_text
+                art_out.append("Translated")
+            lang_output = service.get_lang(model_name, lang_out_i)
+            end_out.append(end[c])
+            translation_text = model.translate(text_in, lang_input[0], lang_output[0])
+            translation_out.append(translation_text)
+            begin_out.append(begin[c])
+            language_out.append(lang_out_i)
+    return {"begin": begin_out, "end": end_out, "translation": translation_out, "languages": language_out,
+            "art": art_out}
+
+
+def random_selection(count, seed):
+    # sentences in random languages, some of them twice
+    rng = random.Random(seed)
+    texts = testing.random_texts(count, 30, seed)
+    selection = []
+    for i in range(count):
+        text = rng.choice(texts[:i]) if i and rng.random() < 0.2 else texts[i]
+        selection.append({"begin": 100 * i, "end": 100 * i + len(text), "text": text, "language": rng.choice(LANGUAGES)})
+    return selection
+
+
+@pytest.fixture
+def translation(monkeypatch):
+    return load_translation(monkeypatch.setitem, monkeypatch.syspath_prepend)
+
+
+@pytest.fixture
+def service(monkeypatch):
+    monkeypatch.chdir(SERVICE_DIR)
+    return load_service(monkeypatch.setenv, monkeypatch.setitem, monkeypatch.syspath_prepend)
+
+
+@pytest.mark.parametrize("model_name", MODEL_NAMES)
+@pytest.mark.parametrize("translations", TRANSLATION_LISTS)
+def test_process_selection_matches_chain(service, monkeypatch, model_name, translations):
+    selection = random_selection(40, seed=len(translations))
+    chain_model = FakeTranslator(sys.modules["Translation"])
+    monkeypatch.setattr(service, "load_model", lambda name: chain_model)
+    expected = chain_process_selection(service, model_name, selection, translations)
+
+    model = FakeTranslator(sys.modules["Translation"])
+    monkeypatch.setattr(service, "load_model", lambda name: model)
+    output = service.process_selection(model_name, selection, translations)
+
+    assert output == expected
+    assert len(output["translation"]) == len(selection) * len(translations.split(","))
+    # every step translates all selections of a source language in budget sized batches
+    assert len(model.batches) < len(chain_model.batches)
+    assert len(chain_model.batches) == len(output["translation"])
+
+
+def test_empty_selection(service, monkeypatch):
+    model = FakeTranslator(sys.modules["Translation"])
+    monkeypatch.setattr(service, "load_model", lambda name: model)
+    assert service.process_selection("NLLB", [], "de,fr") == \
+        {"begin": [], "end": [], "translation": [], "languages": [], "art": []}
+    assert model.batches == []
+
+
+def test_translate_in_batches_order_and_duplicates(translation):
+    texts = testing.random_texts(50, 40, seed=1)
+    texts += texts[:10]
+    batches = []
+
+    def translate_batch(batch_texts):
+        batches.append(batch_texts)
+        return [text.upper() for text in batch_texts]
+
+    tokenizer = testing.tiny_tokenizer()
+    translated = translation.translate_in_batches(tokenizer, texts, translate_batch, max_tokens=128)
+
+    assert translated == [text.upper() for text in texts]
+    assert sorted(text for batch in batches for text in batch) == sorted(set(texts))
+    for batch in batches:
+        if len(batch) > 1:
+            assert len(batch) * max(len(ids) for ids in tokenizer(batch)["input_ids"]) <= 128
+    assert translation.translate_in_batches(tokenizer, [], translate_batch) == []
+
+
+def test_token_budget_counts_the_prefix(translation, monkeypatch):
+    # FlanT5 prepends "translate <in> to <out>: ", the padded generate inputs stay under the budget
+    translator = tiny_marian(translation, max_tokens=96)
+    generated = []
+    generate = translator.model.generate
+
+    def record_generate(**inputs):
+        generated.append(tuple(inputs["input_ids"].shape))
+        return generate(**inputs)
+
+    monkeypatch.setattr(translator.model, "generate", record_generate)
+    texts = testing.random_texts(30, 12, seed=2)
+    translations = translator.translate_batch(texts, "English", "German")
+
+    assert len(translations) == len(texts)
+    assert all(isinstance(t, str) for t in translations)
+    assert sum(batch_size for batch_size, _ in generated) == len(set(texts))
+    assert all(batch_size * length <= 96 for batch_size, length in generated if batch_size > 1)
+    assert any(batch_size > 1 for batch_size, _ in generated)
@@ -17,6 +17,7 @@ docker build \
   --build-arg DUUI_CANARY_ANNOTATOR_VERSION \
   --build-arg DUUI_CANARY_LOG_LEVEL \
   -t ${DOCKER_REGISTRY}${DUUI_CANARY_ANNOTATOR_NAME}:${DUUI_CANARY_ANNOTATOR_VERSION}${DUUI_CANARY_VARIANT} \
+  --build-context duui-runtime=../duui-runtime \
   -f "src/main/docker/Dockerfile${DUUI_CANARY_VARIANT}" \
   --progress=plain \
   .
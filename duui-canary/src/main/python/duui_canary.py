@@ -1,19 +1,19 @@
 import base64
-import json
 import logging
-import subprocess
-import sys
 from platform import python_version
 from sys import version as sys_version
-from pathlib import Path
-from tempfile import TemporaryDirectory
+from threading import Lock
 from time import time
 from typing import List, Optional
 
+import numpy as np
+
 from cassis import load_typesystem
+from duui_runtime.audio import decode_audio
 from fastapi import FastAPI, Response
 from fastapi.responses import PlainTextResponse, JSONResponse
 from nemo import __version__ as nemo_version
+from nemo.collections.asr.models import EncDecMultiTaskModel
 from pydantic import BaseModel
 from pydantic_settings import BaseSettings
 
@@ -91,6 +91,12 @@ class Settings(BaseSettings):
     annotator_name: str
     annotator_version: str
     log_level: str
+    # model to load on startup, empty to load on first request
+    preload_model: Optional[str] = "nvidia/canary-1b-flash"
+    # length of the audio chunks, recommended for longer audio files
+    chunk_len_in_secs: float = 10.0
+    # number of chunks transcribed in one batch
+    batch_size: int = 4
 
     class Config:
         env_prefix = 'duui_canary_'
@@ -115,6 +121,84 @@ with open("src/main/resources/typesystem.xml", 'rb') as fp:
     logger.debug("UIMA Typesystem:")
     logger.debug(typesystem_xml_content)
 
+# Sample rate expected by the Canary models
+SAMPLE_RATE = 16000
+
+
+# Keeps the Canary model loaded for the lifetime of the service, the audio is split
+# into chunks that are transcribed in batches directly from memory, the timestamps
+# of every chunk are shifted by the start of the chunk
+class CanaryWorker:
+    def __init__(self, chunk_len_in_secs: float, batch_size: int):
+        self.chunk_len_in_secs = chunk_len_in_secs
+        self.batch_size = batch_size
+        self.model_name = None
+        self.model = None
+        # the model is not thread safe, only one request at a time
+        self.lock = Lock()
+
+    def _load(self, model_name: str) -> None:
+        if self.model_name == model_name:
+            return
+
+        logger.info("Loading model %s...", model_name)
+        model = EncDecMultiTaskModel.from_pretrained(model_name)
+        model.eval()
+        self.model = model
+        self.model_name = model_name
+        logger.info("Model %s loaded", model_name)
+
+    def load(self, model_name: str) -> None:
+        with self.lock:
+            self._load(model_name)
+
+    def split(self, audio: np.ndarray) -> List[np.ndarray]:
+        chunk_size = int(self.chunk_len_in_secs * SAMPLE_RATE)
+        chunks = [audio[start:start+chunk_size] for start in range(0, len(audio), chunk_size)]
+        # append a very short last chunk to the previous one instead of transcribing it alone
+        if len(chunks) > 1 and len(chunks[-1]) < SAMPLE_RATE:
+            last = chunks.pop()
+            chunks[-1] = np.concatenate([chunks[-1], last])
+        return chunks
+
+    def transcribe(self, model_name: str, audio: np.ndarray, language: str) -> dict:
+        transcript = {"word": [], "segment": []}
+
+        chunks = self.split(audio)
+        if len(chunks) == 0:
+            return transcript
+
+        with self.lock:
+            self._load(model_name)
+            hypotheses = self.model.transcribe(
+                audio=chunks,
+                batch_size=self.batch_size,
+                source_lang=language,
+                target_lang=language,  # TODO offer translation?
+                pnc="yes",
+                timestamps=True,
+                verbose=False,
+            )
+
+        chunk_start = 0.0
+        for chunk, hypothesis in zip(chunks, hypotheses):
+            for key in transcript.keys():
+                for entry in hypothesis.timestamp.get(key, []):
+                    entry = dict(entry)
+                    if entry.get("start") is not None:
+                        entry["start"] = entry["start"] + chunk_start
+                    if entry.get("end") is not None:
+                        entry["end"] = entry["end"] + chunk_start
+                    transcript[key].append(entry)
+            chunk_start += len(chunk) / SAMPLE_RATE
+
+        return transcript
+
+
+canary_worker = CanaryWorker(settings.chunk_len_in_secs, settings.batch_size)
+if settings.preload_model:
+    canary_worker.load(settings.preload_model)
+
 app = FastAPI(
     title=settings.annotator_name,
     description="DUUI Canary",
@@ -201,155 +285,89 @@ def post_process(request: DUUIRequest) -> DUUIResponse:
         raise Exception(f"Model {model_name} not supported")
     logger.info("Model: %s", model_name)
 
-    with TemporaryDirectory() as temp_dir:
-        temp_path = Path(temp_dir)
-
-        audio_temp = temp_path / "audio_unk"
-        with open(audio_temp, "wb") as fp:
-            fp.write(base64.b64decode(request.audio))
-
-
-        # convert audio for nemo/canary: mono, 16kHz and wav
-        # TODO are these different per model?
-        sample_rate = 16000
-        mono = True
-        audio_path = temp_path / "audio.wav"
-        command = [
-            "ffmpeg",
-            "-i", str(audio_temp),
-            "-ar", str(sample_rate),
-            "-ac", "1" if mono else "2",
-            "-f", "wav",
-            str(audio_path)
-        ]
-        logger.debug("Running audio conversion command:")
-        logger.debug(" ".join(command))
-        process = subprocess.run(command, capture_output=True, text=True)
-
-        if process.returncode != 0:
-            logger.error("Audio conversion command failed with return code %d", process.returncode)
-            logger.error("Output:")
-            logger.error(process.stdout)
-            logger.error("Error:")
-            logger.error(process.stderr)
-            raise Exception("Audio conversion failed: " + process.stderr)
-
-        manifest = {
-            "audio_filepath": str(audio_path),
-            "taskname": "asr",
-            "source_lang": language,
-            "target_lang": language,  # TODO offer translation?
-            "pnc": "yes"
-        }
-        logger.debug("Manifest:")
-        logger.debug(manifest)
-        manifest_path = temp_path / "manifest.json"
-        with open(manifest_path, "w", encoding="UTF-8") as fp:
-            # NOTE the manifest content needs to be a single line
-            json.dump(manifest, fp)
-
-        output_path = temp_path / "output.json"
-        command = [
-            f"{sys.executable}",
-            "./speech_to_text_aed_chunked_infer.py",
-            f"pretrained_name={model_name}",
-            f"dataset_manifest={manifest_path}",
-            f"output_filename={output_path}",
-            "chunk_len_in_secs=10",  # recommended for longer audio files
-            "timestamps=True",
-        ]
-        logger.debug("Running transcription command:")
-        logger.debug(" ".join(command))
-        process = subprocess.run(command, capture_output=True, text=True)
-
-        # check for errors, but dont fail directly, check for output
-        if process.returncode != 0:
-            logger.error("Transcription command failed with return code %d", process.returncode)
-            logger.error("Output:")
-            logger.error(process.stdout)
-            logger.error("Error:")
-            logger.error(process.stderr)
-
-        with open(output_path, "r", encoding="UTF-8") as fp:
-            transcript = json.load(fp)
-
-        current_length = 0
-        for word in transcript["word"]:
-            # TODO offsets starten nicht bei 0?
-            """
-            {
-              "word": "Bricht",
-              "start_offset": 91,
-              "end_offset": 97,
-              "start": 7.28,
-              "end": 7.76
-            },
-            """
-            audio_start = word.get("start")
-            audio_end = word.get("end")
-            text = word.get("word").strip()
-
-            if audio_start is None or audio_end is None:
-                continue
-
-            if len(text) == 0 and audio_start == audio_end:
-                continue
-
-            results_tokens.append(AudioToken(
-                timeStart=float(audio_start),
-                timeEnd=float(audio_end),
-                text=text,
-                begin=current_length,
-                end=current_length + len(text)
-            ))
-
-            if len(text) > 0:
-                results_full_text += text + " "
-                current_length += len(text) + 1
-
-        current_length = 0
-        for word in transcript["segment"]:
-            """
-            {
-              "segment": "Bricht euch den Hals und wir lachen uns .",
-              "start_offset": 91,
-              "end_offset": 123,
-              "start": 7.28,
-              "end": 9.84
-            },
-            """
-            audio_start = word.get("start")
-            audio_end = word.get("end")
-            text = word.get("segment").strip()
-
-            if audio_start is None or audio_end is None:
-                continue
-
-            if len(text) == 0 and audio_start == audio_end:
-                continue
-
-            results_segments.append(AudioSentence(
-                timeStart=float(audio_start),
-                timeEnd=float(audio_end),
-                begin=current_length,
-                end=current_length + len(text)
-            ))
-
-            if len(text) > 0:
-                current_length += len(text) + 1
-
-        meta = AnnotationMeta(
-            name=settings.annotator_name,
-            version=settings.annotator_version,
-            modelName=f"NeMo {model_name}",
-            modelVersion=nemo_version
-        )
-
-        modification_meta = DocumentModification(
-            user=settings.annotator_name,
-            timestamp=modification_timestamp_seconds,
-            comment=f"{settings.annotator_name} ({settings.annotator_version}), NeMo {model_name} ({nemo_version})"
-        )
+    # decode and convert audio for nemo/canary in memory: mono, 16kHz
+    # TODO are these different per model?
+    audio = decode_audio(base64.b64decode(request.audio), sample_rate=SAMPLE_RATE)
+
+    transcript = canary_worker.transcribe(model_name, audio, language)
+
+    current_length = 0
+    for word in transcript["word"]:
+        # TODO offsets starten nicht bei 0?
+        """
+        {
+          "word": "Bricht",
+          "start_offset": 91,
+          "end_offset": 97,
+          "start": 7.28,
+          "end": 7.76
+        },
+        """
+        audio_start = word.get("start")
+        audio_end = word.get("end")
+        text = word.get("word").strip()
+
+        if audio_start is None or audio_end is None:
+            continue
+
+        if len(text) == 0 and audio_start == audio_end:
+            continue
+
+        results_tokens.append(AudioToken(
+            timeStart=float(audio_start),
+            timeEnd=float(audio_end),
+            text=text,
+            begin=current_length,
+            end=current_length + len(text)
+        ))
+
+        if len(text) > 0:
+            results_full_text += text + " "
+            current_length += len(text) + 1
+
+    current_length = 0
+    for word in transcript["segment"]:
+        """
+        {
+          "segment": "Bricht euch den Hals und wir lachen uns .",
+          "start_offset": 91,
+          "end_offset": 123,
+          "start": 7.28,
+          "end": 9.84
+        },
+        """
+        audio_start = word.get("start")
+        audio_end = word.get("end")
+        text = word.get("segment").strip()
+
+        if audio_start is None or audio_end is None:
+            continue
+
+        if len(text) == 0 and audio_start == audio_end:
+            continue
+
+        results_segments.append(AudioSentence(
+            timeStart=float(audio_start),
+            timeEnd=float(audio_end),
+            begin=current_length,
+            end=current_length + len(text)
+        ))
+
+        if len(text) > 0:
+            current_length += len(text) + 1
+
+    meta = AnnotationMeta(
+        name=settings.annotator_name,
+        version=settings.annotator_version,
+        modelName=f"NeMo {model_name}",
+        modelVersion=nemo_version
+    )
+
+    modification_meta = DocumentModification(
+        user=settings.annotator_name,
+        timestamp=modification_timestamp_seconds,
+        comment=f"{settings.annotator_name} ({settings.annotator_version}), NeMo {model_name} ({nemo_version})"
+    )
 
     logger.debug(meta)
     logger.debug(modification_meta)
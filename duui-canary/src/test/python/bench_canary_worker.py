@@ -0,0 +1,65 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from test_canary_worker import COMPONENT_DIR, StubModel, load_service, sine_wave
+
+
+def subprocess_inference(audio_path, output_path):
+    # the former speech_to_text_aed_chunked_infer.py run: a fresh interpreter that loads the model
+    model = StubModel.from_pretrained("nvidia/canary-1b-flash").eval()
+    audio = np.load(audio_path)
+    hypothesis = model.transcribe([audio], 1, "en", "en", "yes", True, False)[0]
+    with open(output_path, "w", encoding="UTF-8") as fp:
+        json.dump(hypothesis.timestamp, fp)
+
+
+def benchmark(requests, audio_seconds):
+    audio = sine_wave(audio_seconds)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        audio_path = Path(temp_dir) / "audio.npy"
+        output_path = Path(temp_dir) / "output.json"
+        start = time.perf_counter()
+        for _ in range(requests):
+            np.save(audio_path, audio)
+            subprocess.run(
+                [sys.executable, str(Path(__file__).resolve()), "--infer", str(audio_path), str(output_path),
+                 "--load-seconds", str(StubModel.load_seconds)],
+                check=True,
+            )
+            with open(output_path, "r", encoding="UTF-8") as fp:
+                json.load(fp)
+        print(f"subprocess per request: {(time.perf_counter() - start) / requests * 1000:.0f} ms/request")
+
+    service = load_service(os.environ.__setitem__, sys.modules.__setitem__)
+    worker = service.CanaryWorker(chunk_len_in_secs=10.0, batch_size=4)
+    worker.load("nvidia/canary-1b-flash")
+    start = time.perf_counter()
+    for _ in range(requests):
+        worker.transcribe("nvidia/canary-1b-flash", audio, "en")
+    print(f"resident worker: {(time.perf_counter() - start) / requests * 1000:.0f} ms/request")
+
+
+if __name__ == "__main__":
+    # e.g. python src/test/python/bench_canary_worker.py --load-seconds 20, the stub load time
+    # stands in for loading canary-1b-flash
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=5)
+    parser.add_argument("--audio-seconds", type=float, default=30.0)
+    parser.add_argument("--load-seconds", type=float, default=2.0)
+    parser.add_argument("--infer", nargs=2, type=Path, metavar=("AUDIO", "OUTPUT"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    StubModel.load_seconds = args.load_seconds
+    if args.infer:
+        subprocess_inference(*args.infer)
+    else:
+        sys.path.insert(0, str(COMPONENT_DIR))
+        os.chdir(COMPONENT_DIR)
+        benchmark(args.requests, args.audio_seconds)
@@ -0,0 +1,121 @@
+import importlib
+import sys
+import threading
+import time
+import types
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+COMPONENT_DIR = Path(__file__).resolve().parents[3]
+SAMPLE_RATE = 16000
+
+
+class StubModel:
+    # stands in for EncDecMultiTaskModel: loading takes load_seconds, every chunk is
+    # transcribed as one word per half second and one segment
+    load_seconds = 0.0
+    loads = 0
+    active = 0
+    max_active = 0
+    counter_lock = threading.Lock()
+
+    @classmethod
+    def from_pretrained(cls, model_name):
+        time.sleep(cls.load_seconds)
+        cls.loads += 1
+        return cls()
+
+    def eval(self):
+        return self
+
+    def transcribe(self, audio, batch_size, source_lang, target_lang, pnc, timestamps, verbose):
+        with StubModel.counter_lock:
+            StubModel.active += 1
+            StubModel.max_active = max(StubModel.max_active, StubModel.active)
+        time.sleep(0.01)
+        hypotheses = [types.SimpleNamespace(timestamp=stub_timestamps(len(chunk) / SAMPLE_RATE)) for chunk in audio]
+        with StubModel.counter_lock:
+            StubModel.active -= 1
+        return hypotheses
+
+
+def stub_timestamps(duration):
+    words = [
+        {"word": f"w{i}", "start": i * 0.5, "end": i * 0.5 + 0.4}
+        for i in range(int(duration * 2))
+    ]
+    return {"word": words, "segment": [{"segment": "s", "start": 0.0, "end": duration}]}
+
+
+def sine_wave(seconds, frequency=440.0):
+    return np.sin(2 * np.pi * frequency * np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE).astype(np.float32)
+
+
+def load_service(set_env, set_module):
+    # NeMo is replaced by the stub model, the service only imports the model class and the version
+    nemo = types.ModuleType("nemo")
+    nemo.__version__ = "stub"
+    models = types.ModuleType("nemo.collections.asr.models")
+    models.EncDecMultiTaskModel = StubModel
+    set_module("nemo", nemo)
+    set_module("nemo.collections", types.ModuleType("nemo.collections"))
+    set_module("nemo.collections.asr", types.ModuleType("nemo.collections.asr"))
+    set_module("nemo.collections.asr.models", models)
+
+    set_env("DUUI_CANARY_ANNOTATOR_NAME", "duui-canary")
+    set_env("DUUI_CANARY_ANNOTATOR_VERSION", "0.0.1")
+    set_env("DUUI_CANARY_LOG_LEVEL", "WARNING")
+    set_env("DUUI_CANARY_PRELOAD_MODEL", "")
+    module_name = "src.main.python.duui_canary"
+    sys.modules.pop(module_name, None)
+    return importlib.import_module(module_name)
+
+
+@pytest.fixture
+def service(monkeypatch):
+    monkeypatch.chdir(COMPONENT_DIR)
+    monkeypatch.syspath_prepend(str(COMPONENT_DIR))
+    monkeypatch.setattr(StubModel, "loads", 0)
+    monkeypatch.setattr(StubModel, "max_active", 0)
+    return load_service(monkeypatch.setenv, lambda name, module: monkeypatch.setitem(sys.modules, name, module))
+
+
+def test_model_is_loaded_once(service):
+    worker = service.CanaryWorker(chunk_len_in_secs=10.0, batch_size=4)
+    for _ in range(3):
+        worker.transcribe("nvidia/canary-1b-flash", sine_wave(3), "en")
+    assert StubModel.loads == 1
+
+
+def test_timestamps_are_shifted_by_the_chunk_start(service):
+    worker = service.CanaryWorker(chunk_len_in_secs=10.0, batch_size=4)
+    transcript = worker.transcribe("nvidia/canary-1b-flash", sine_wave(25), "en")
+
+    assert [(s["start"], s["end"]) for s in transcript["segment"]] == [(0.0, 10.0), (10.0, 20.0), (20.0, 25.0)]
+    starts = [w["start"] for w in transcript["word"]]
+    assert len(starts) == 50
+    assert starts == sorted(starts)
+    assert transcript["word"][20] == {"word": "w0", "start": 10.0, "end": 10.4}
+
+
+def test_short_last_chunk_is_merged(service):
+    worker = service.CanaryWorker(chunk_len_in_secs=10.0, batch_size=4)
+    chunks = worker.split(sine_wave(20.5))
+    assert [len(c) / SAMPLE_RATE for c in chunks] == [10.0, 10.5]
+    assert worker.split(np.zeros(0, dtype=np.float32)) == []
+
+
+def test_concurrent_requests_are_serialized(service):
+    worker = service.CanaryWorker(chunk_len_in_secs=10.0, batch_size=4)
+    threads = [
+        threading.Thread(target=worker.transcribe, args=("nvidia/canary-1b-flash", sine_wave(5), "en"))
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert StubModel.loads == 1
+    assert StubModel.max_active == 1
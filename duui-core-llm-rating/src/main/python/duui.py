@@ -1,8 +1,11 @@
 import importlib
 import json
 import logging
+from concurrent.futures import ThreadPoolExecutor, wait
+from functools import lru_cache
 from platform import python_version
 from sys import version as sys_version
+from threading import Lock
 from time import time
 from typing import List, Optional
 
@@ -11,7 +14,7 @@ from fastapi import FastAPI, Response
 from fastapi.responses import PlainTextResponse
 from langchain_core.messages.base import message_to_dict
 from langchain_core.messages import SystemMessage, HumanMessage
-from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_ollama import ChatOllama
 from pydantic import BaseModel
 from pydantic_settings import BaseSettings
@@ -21,6 +24,11 @@ class Settings(BaseSettings):
     annotator_name: str
     annotator_version: str
     log_level: str
+    # number of prompts of a document that are evaluated in parallel
+    max_concurrent_prompts: int = 4
+    # number of cached LLM clients (by their args) and prompt chains (by their template messages)
+    llm_cache_size: int = 8
+    chain_cache_size: int = 1024
 
     class Config:
         env_prefix = 'duui_core_llm_rating_'
@@ -34,6 +42,10 @@ logger.info("TTLab TextImager DUUI CORE LLM Rating")
 logger.info("Name: %s", settings.annotator_name)
 logger.info("Version: %s", settings.annotator_version)
 
+# shared by all requests, so that max_concurrent_prompts also bounds the load on the LLM server
+prompt_executor = ThreadPoolExecutor(max_workers=settings.max_concurrent_prompts)
+llm_lock = Lock()
+
 TEXTIMAGER_ANNOTATOR_OUTPUT_TYPES = [
     "org.texttechnologylab.type.llm.prompt.Result"
 ]
@@ -193,15 +205,143 @@ def get_input_output() -> TextImagerInputOutput:
     )
 
 
-def _query_llm(prompt_messages, llm, prompt_args):
+@lru_cache(maxsize=None)
+def _message_class(class_module, class_name):
+    module = importlib.import_module(class_module)
+    return getattr(module, class_name)
+
+
+@lru_cache(maxsize=settings.llm_cache_size)
+def _get_llm(llm_args_key):
+    # llm_args_key: llm args as json with sorted keys
+    return ChatOllama(**json.loads(llm_args_key))
+
+
+def _message_key(message):
+    # everything a prompt message is built from
+    return message.role, message.content, message.class_module, message.class_name
+
+
+def _filled_message_name(position):
+    # prompt variable of a message that was filled by the LLM, its content differs for every prompt,
+    # so it is passed on invocation instead of being part of the cached chain
+    return f"__filled_message_{position}"
+
+
+def _build_prompt_message(role, content, class_module, class_name):
+    # we support three types of messages:
+    # - simple tuple consisting of content and role, this supports placeholders
+    # - message-class based, consisting of content (and implicit role), this does not support placeholder resolution
+    # - template-class based, consisting of content with support for placeholders
+    if class_module is not None and class_name is not None:
+        # create Langchain-class-based message
+        constructor = _message_class(class_module, class_name)
+
+        # content is always json encoded on Langchain-class-messages
+        msg_content = json.loads(content)
+
+        if "prompt" in constructor.model_fields:
+            return constructor.from_template(msg_content)
+        elif "content" in constructor.model_fields:
+            return constructor(content=msg_content)
+        return None
+    return role, content
+
+
+@lru_cache(maxsize=settings.chain_cache_size)
+def _get_chain(llm_args_key, message_keys):
+    # compiled prompt template and LLM, reused by all prompts with the same template messages,
+    # message keys that are strings are the placeholders of filled messages
+    prompt_messages = []
+    for message_key in message_keys:
+        if isinstance(message_key, str):
+            prompt_messages.append(MessagesPlaceholder(message_key))
+            continue
+        prompt_message = _build_prompt_message(*message_key)
+        if prompt_message is not None:
+            prompt_messages.append(prompt_message)
     prompt_messages = ChatPromptTemplate.from_messages(prompt_messages)
-    chain = prompt_messages | llm
+    # concurrent prompts must not create the same client twice
+    with llm_lock:
+        llm = _get_llm(llm_args_key)
+    return prompt_messages | llm
+
+
+def _query_llm(message_keys, llm_args_key, prompt_args, filled_messages):
+    chain = _get_chain(llm_args_key, message_keys)
 
-    llm_result = chain.invoke(prompt_args)
+    # the filled messages are formatted with the prompt arguments, like the template messages
+    filled_prompt_args = {
+        name: filled_message.format_messages(**prompt_args)
+        for name, filled_message in filled_messages.items()
+    }
+    llm_result = chain.invoke({**prompt_args, **filled_prompt_args})
     llm_result = message_to_dict(llm_result)
     return llm_result
 
 
+def _process_prompt(prompt, llm_args, llm_args_key):
+    llm_results = []
+
+    # context data that is given to llm invocation
+    # consists of "global" prompt arguments and additionally extracted content from messages
+    context = json.loads(prompt.args)
+
+    message_keys = []
+    # messages filled by the model, by their prompt variable
+    filled_messages = {}
+    for message in prompt.messages:
+        filled = False
+        # check if this message should be filled by the model
+        # only fill if no content (== json encoded empty string) is available
+        if message.fillable is True and message.content == "\"\"":
+            filled = True
+            llm_t_start = time()
+            llm_result = _query_llm(tuple(message_keys), llm_args_key, context, filled_messages)
+            llm_t_end = time()
+            llm_t_duration = llm_t_end - llm_t_start
+            llm_content = llm_result["data"]["content"]
+
+            # add the result to this message
+            # NOTE that we always encode the content as json, as we expect for all "Langchain" messages
+            message.content = json.dumps(llm_content)
+
+            # add results to output
+            del llm_result["data"]["content"]
+            llm_result = {
+                **llm_result,
+                "prompt_args": context,
+                "llm_args": llm_args,
+                "llm_t_start": llm_t_start,
+                "llm_t_end": llm_t_end,
+                "llm_t_duration": llm_t_duration
+            }
+            llm_results.append(LLMResult(
+                meta=json.dumps(llm_result),
+                prompt_ref=prompt.ref,
+                message_ref=message.ref
+            ))
+
+        # if set, extract this messages content into the context
+        if message.context_name is not None:
+            if message.context_name in context:
+                logger.warning("Context name \"%s\" already exists, overwriting", message.context_name)
+            # content is always json encoded on Langchain-class-messages
+            context[message.context_name] = json.loads(message.content)
+
+        # add message to prompt
+        if filled:
+            prompt_message = _build_prompt_message(*_message_key(message))
+            if prompt_message is not None:
+                name = _filled_message_name(len(message_keys))
+                filled_messages[name] = ChatPromptTemplate.from_messages([prompt_message])
+                message_keys.append(name)
+        else:
+            message_keys.append(_message_key(message))
+
+    return llm_results
+
+
 @app.post("/v1/process")
 def post_process(request: TextImagerRequest) -> TextImagerResponse:
     modification_timestamp_seconds = int(time())
@@ -212,77 +352,23 @@ def post_process(request: TextImagerRequest) -> TextImagerResponse:
 
     try:
         llm_args = json.loads(request.llm_args)
-        llm = ChatOllama(**llm_args)
-
-        for prompt in request.prompts:
-            # context data that is given to llm invocation
-            # consists of "global" prompt arguments and additionally extracted content from messages
-            context = json.loads(prompt.args)
-
-            prompt_messages = []
-            for message in prompt.messages:
-                # check if this message should be filled by the model
-                # only fill if no content (== json encoded empty string) is available
-                if message.fillable is True and message.content == "\"\"":
-                    llm_t_start = time()
-                    llm_result = _query_llm(prompt_messages, llm, context)
-                    llm_t_end = time()
-                    llm_t_duration = llm_t_end - llm_t_start
-                    llm_content = llm_result["data"]["content"]
-
-                    # add the result to this message
-                    # NOTE that we always encode the content as json, as we expect for all "Langchain" messages
-                    message.content = json.dumps(llm_content)
-
-                    # add results to output
-                    del llm_result["data"]["content"]
-                    llm_result = {
-                        **llm_result,
-                        "prompt_args": context,
-                        "llm_args": llm_args,
-                        "llm_t_start": llm_t_start,
-                        "llm_t_end": llm_t_end,
-                        "llm_t_duration": llm_t_duration
-                    }
-                    llm_results.append(LLMResult(
-                        meta=json.dumps(llm_result),
-                        prompt_ref=prompt.ref,
-                        message_ref=message.ref
-                    ))
-
-                # if set, extract this messages content into the context
-                if message.context_name is not None:
-                    if message.context_name in context:
-                        logger.warning("Context name \"%s\" already exists, overwriting", message.context_name)
-                    # content is always json encoded on Langchain-class-messages
-                    context[message.context_name] = json.loads(message.content)
-
-                # add message to prompt
-                # we support three types of messages:
-                # - simple tuple consisting of content and role, this supports placeholders
-                # - message-class based, consisting of content (and implicit role), this does not support placeholder resolution
-                # - template-class based, consisting of content with support for placeholders
-                if message.class_module is not None and message.class_name is not None:
-                    # create Langchain-class-based message
-                    module = importlib.import_module(message.class_module)
-                    constructor = getattr(module, message.class_name)
-
-                    # content is always json encoded on Langchain-class-messages
-                    msg_content = json.loads(message.content)
-
-                    if "prompt" in constructor.model_fields:
-                        prompt_messages.append(
-                            constructor.from_template(msg_content)
-                        )
-                    elif "content" in constructor.model_fields:
-                        prompt_messages.append(
-                            constructor(content=msg_content)
-                        )
-                else:
-                    prompt_messages.append((
-                        message.role,
-                        message.content
-                    ))
+        llm_args_key = json.dumps(llm_args, sort_keys=True)
+
+        # the messages of a prompt depend on each other, the prompts of a document are evaluated
+        # concurrently, the results are collected in the order of the prompts
+        futures = [
+            prompt_executor.submit(_process_prompt, prompt, llm_args, llm_args_key)
+            for prompt in request.prompts
+        ]
+        try:
+            for future in futures:
+                llm_results.extend(future.result())
+        finally:
+            # if a prompt failed, do not start the remaining ones and wait for the running ones,
+            # as they modify the messages of the request
+            for future in futures:
+                future.cancel()
+            wait(futures)
 
         try:
             model_name, _, model_version = llm_args["model"].partition(":")
@@ -0,0 +1,194 @@
+import importlib.util
+import json
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Any, List
+
+import pytest
+
+pytest.importorskip("cassis")
+pytest.importorskip("pydantic_settings")
+pytest.importorskip("langchain_ollama")
+langchain_core = pytest.importorskip("langchain_core")
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.prompts import ChatPromptTemplate
+
+COMPONENT_DIR = Path(__file__).resolve().parents[3]
+MAX_CONCURRENT_PROMPTS = 3
+
+
+class FakeChatModel(BaseChatModel):
+    # answers with a checksum of the prompt after a fixed latency, counts the prompts that are in flight
+    latency: float = 0.0
+    in_flight: int = 0
+    max_in_flight: int = 0
+    prompts: List[Any] = []
+    lock: Any = None
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.lock = threading.Lock()
+        self.prompts = []
+
+    @property
+    def _llm_type(self):
+        return "fake"
+
+    def _generate(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs) -> ChatResult:
+        with self.lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            time.sleep(self.latency)
+            prompt = tuple((message.type, message.content) for message in messages)
+            with self.lock:
+                self.prompts.append(prompt)
+            answer = f"rating {zlib.crc32(json.dumps(prompt).encode()) % 10} after {len(messages)} messages"
+            return ChatResult(generations=[ChatGeneration(message=AIMessage(content=answer))])
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+
+def load_service(set_env, chdir):
+    # the type system and the Lua script are read relative to the component directory, as in the image
+    set_env("DUUI_CORE_LLM_RATING_ANNOTATOR_NAME", "duui-core-llm-rating")
+    set_env("DUUI_CORE_LLM_RATING_ANNOTATOR_VERSION", "0.0.1")
+    set_env("DUUI_CORE_LLM_RATING_LOG_LEVEL", "WARNING")
+    set_env("DUUI_CORE_LLM_RATING_MAX_CONCURRENT_PROMPTS", str(MAX_CONCURRENT_PROMPTS))
+    chdir(COMPONENT_DIR)
+    spec = importlib.util.spec_from_file_location("duui_core_llm_rating", COMPONENT_DIR / "src" / "main" / "python" / "duui.py")
+    service = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(service)
+    return service
+
+
+def class_message(ref, class_module, class_name, content, **kwargs):
+    return dict(content=json.dumps(content), class_module=class_module, class_name=class_name, ref=ref, **kwargs)
+
+
+def synthetic_prompts(count, first_ref=0):
+    # rating prompts as the Lua script sends them: system message, templated question, the filled rating
+    # (extracted into the context), a follow-up question as role tuple and the filled explanation
+    prompts = []
+    for i in range(count):
+        ref = first_ref + 10 * i
+        messages = [
+            class_message(ref + 1, "langchain_core.messages", "SystemMessage", "You rate the readability of texts."),
+            class_message(ref + 2, "langchain_core.prompts", "HumanMessagePromptTemplate", "Rate the text: {text}"),
+            class_message(ref + 3, "langchain_core.messages", "AIMessage", "", fillable=True, context_name="rating"),
+            dict(role="human", content="Why is {text} rated {rating}?", ref=ref + 4),
+            class_message(ref + 5, "langchain_core.messages", "AIMessage", "", fillable=True),
+        ]
+        if i % 4 == 3:
+            # prompts with a given answer only fill the explanation
+            messages[2] = class_message(ref + 3, "langchain_core.messages", "AIMessage", "rating 5", fillable=True,
+                                        context_name="rating")
+        prompts.append(dict(messages=messages, args=json.dumps({"text": f"text number {i}"}), ref=ref))
+    return prompts
+
+
+def make_request(service, prompts):
+    return service.TextImagerRequest(prompts=prompts, llm_args=json.dumps({"model": "fake:1"}))
+
+
+def sequential_process(service, request, llm):
+    # the former post_process: one prompt after the other, a new chain for every filled message
+    llm_results = []
+    for prompt in request.prompts:
+        context = json.loads(prompt.args)
+        prompt_messages = []
+        for message in prompt.messages:
+            if message.fillable is True and message.content == "\"\"":
+                chain = ChatPromptTemplate.from_messages(prompt_messages) | llm
+                llm_content = langchain_core.messages.message_to_dict(chain.invoke(context))["data"]["content"]
+                message.content = json.dumps(llm_content)
+                llm_results.append((prompt.ref, message.ref, llm_content))
+            if message.context_name is not None:
+                context[message.context_name] = json.loads(message.content)
+            prompt_message = service._build_prompt_message(message.role, message.content, message.class_module,
+                                                           message.class_name)
+            if prompt_message is not None:
+                prompt_messages.append(prompt_message)
+    return llm_results
+
+
+def response_results(response):
+    return [(r.prompt_ref, r.message_ref, json.loads(r.meta)["data"].get("content")) for r in response.llm_results]
+
+
+@pytest.fixture
+def service(monkeypatch):
+    return load_service(monkeypatch.setenv, monkeypatch.chdir)
+
+
+@pytest.fixture
+def llm(service, monkeypatch):
+    llm = FakeChatModel()
+    monkeypatch.setattr(service, "_get_llm", lambda llm_args_key: llm)
+    return llm
+
+
+def test_results_match_sequential_chains(service, llm):
+    reference_llm = FakeChatModel()
+    reference_request = make_request(service, synthetic_prompts(24))
+    expected_results = sequential_process(service, reference_request, reference_llm)
+
+    request = make_request(service, synthetic_prompts(24))
+    response = service.post_process(request)
+
+    # the content is moved from the results into the filled messages
+    assert [(prompt_ref, message_ref) for prompt_ref, message_ref, _ in response_results(response)] == \
+        [(prompt_ref, message_ref) for prompt_ref, message_ref, _ in expected_results]
+    filled = {message.ref: json.loads(message.content) for prompt in response.prompts for message in prompt.messages
+              if message.fillable}
+    assert [filled[message_ref] for _, message_ref, _ in expected_results] == \
+        [content for _, _, content in expected_results]
+    assert response.prompts == reference_request.prompts
+    # the model saw the same prompts, the filled answers included
+    assert sorted(llm.prompts) == sorted(reference_llm.prompts)
+    assert response.meta.modelName == "fake"
+
+
+def test_chain_cache_is_keyed_on_template_messages(service, llm):
+    service.post_process(make_request(service, synthetic_prompts(40)))
+    service.post_process(make_request(service, synthetic_prompts(40, first_ref=1000)))
+
+    # one chain per template prefix that is queried: the rating, the explanation after a filled and after a
+    # given rating, the filled ratings of other prompts do not add chains
+    cache_info = service._get_chain.cache_info()
+    assert cache_info.currsize == 3
+    assert cache_info.misses == 3
+    assert len(llm.prompts) == 2 * 2 * 40 - 2 * 10
+
+
+def test_in_flight_limit_and_result_order(service, llm):
+    llm.latency = 0.05
+    requests = [make_request(service, synthetic_prompts(12, first_ref=1000 * r)) for r in range(3)]
+    responses = [None] * len(requests)
+
+    def process(r):
+        responses[r] = service.post_process(requests[r])
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=process, args=(r,)) for r in range(len(requests))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    duration = time.perf_counter() - start
+
+    # the prompts of all requests share the executor, the messages of a prompt are queried one after the other
+    assert llm.max_in_flight == MAX_CONCURRENT_PROMPTS
+    queries = sum(len(response.llm_results) for response in responses)
+    assert duration < 0.05 * queries / 2
+    for r, response in enumerate(responses):
+        # results in the order of the prompts and their messages, as sequential processing returns them
+        expected = [(prompt["ref"], message["ref"]) for prompt in synthetic_prompts(12, first_ref=1000 * r)
+                    for message in prompt["messages"] if message.get("fillable") and message["content"] == "\"\""]
+        assert [(prompt_ref, message_ref) for prompt_ref, message_ref, _ in response_results(response)] == expected
@@ -300,6 +300,8 @@ class Settings(BaseSettings):
     image_to_text_model_version: str
     #cach_size
     image_to_text_model_cache_size: str
+    # maximum number of images per generate call
+    image_to_text_batch_size: int = 8
 
 
 
@@ -553,6 +555,16 @@ def get_model_and_processor(model_name):
     return _loaded_models[model_name], _loaded_processors[model_name]
 
 
+@lru_cache_with_size
+def load_processor(model_name):
+    return AutoProcessor.from_pretrained(model_name, device=device, trust_remote_code=True)
+
+
+@lru_cache_with_size
+def load_generation_config(model_name):
+    return GenerationConfig.from_pretrained(model_name)
+
+
 
 
 
@@ -614,7 +626,7 @@ def process_complex(model_name, images, prompt, mode):
         "do_sample": True,
     }
 
-    generation_config = GenerationConfig.from_pretrained(model_name)
+    generation_config = load_generation_config(model_name)
 
 
     generate_ids = model.generate(
@@ -703,15 +715,24 @@ def generate_custom_entities(image, generated_text, return_gounding=False, detai
 
     return entities, generated_text, processed_entities_text if return_gounding else None
 
-def process_image(model_name, image, prompt, complex=False):
-    print("processing image, with prompt, ", prompt)
-    # convert image from base64 to PIL
-    image = convert_base64_to_image(image)
+def image_batches(images, batch_size):
+    """
+    Indices of the images in batches of at most batch_size. Images are grouped by size,
+    so that the processor outputs of a batch have the same shape and stack without padding.
+    """
+    groups = {}
+    for i, image in enumerate(images):
+        groups.setdefault(image.size, []).append(i)
+    for indices in groups.values():
+        for start in range(0, len(indices), batch_size):
+            yield indices[start:start + batch_size]
+
 
+def generate_texts(model_name, images, prompt, complex=False):
     # Load the model
     model = load_model(model_name, low_cpu_mem_usage=True)
     # Load the processor
-    processor = AutoProcessor.from_pretrained(model_name, device=device, trust_remote_code=True)
+    processor = load_processor(model_name)
 
     # phi-4 model
     if complex:
@@ -731,81 +752,88 @@ def process_image(model_name, image, prompt, complex=False):
             add_generation_prompt=True
         )
 
-    # get the inputs for the model
-    inputs = processor(text=prompt, images=image, return_tensors="pt")
-    inputs.to(device)
-
-    if complex:
-        generation_config = GenerationConfig.from_pretrained(model_name)
-
-        generation_args = {
-            "max_new_tokens": 512,
-            "temperature": 0.5,
-            "do_sample": True,
-        }
-
-        generated_ids = model.generate(
-            **inputs,
-            **generation_args,
-            generation_config=generation_config,
-        )
-    else:
-        # generate the IDs
-        generated_ids = model.generate(
-            pixel_values=inputs["pixel_values"],
-            input_ids=inputs["input_ids"],
-            attention_mask=inputs["attention_mask"],
-            image_embeds=None,
-            image_embeds_position_mask=inputs["image_embeds_position_mask"],
-            use_cache=True,
-            max_new_tokens=1024,
-        )
-
-    generated_text = processor.batch_decode(generated_ids, skip_special_tokens=True)[0]
-
-    generated_text = generated_text.replace(prompt, "")
-
-    if complex:
-
-        # # Free GPU memory if available
-        # model.to("cpu")
-
-        entities, processed_text, _ = generate_custom_entities(image.copy(), generated_text)
+    # all images of a request share the prompt, so batches only need to be grouped by image size
+    generated_texts = [None] * len(images)
+    for batch in image_batches(images, settings.image_to_text_batch_size):
+        # get the inputs for the model
+        inputs = processor(text=[prompt] * len(batch), images=[images[i] for i in batch], return_tensors="pt")
+        inputs.to(device)
+
+        if complex:
+            generation_args = {
+                "max_new_tokens": 512,
+                "temperature": 0.5,
+                "do_sample": True,
+            }
 
-        print("entities: ", entities)
+            generated_ids = model.generate(
+                **inputs,
+                **generation_args,
+                generation_config=load_generation_config(model_name),
+            )
+        else:
+            # generate the IDs
+            generated_ids = model.generate(
+                pixel_values=inputs["pixel_values"],
+                input_ids=inputs["input_ids"],
+                attention_mask=inputs["attention_mask"],
+                image_embeds=None,
+                image_embeds_position_mask=inputs["image_embeds_position_mask"],
+                use_cache=True,
+                max_new_tokens=1024,
+            )
 
-        entities_out = []
-        for bbox, label in zip(entities['bboxes'], entities['labels']):
-            # Get the character positions
-            start, end = find_label_positions(processed_text, label)
+        for i, generated_text in zip(batch, processor.batch_decode(generated_ids, skip_special_tokens=True)):
+            generated_texts[i] = generated_text.replace(prompt, "")
 
+    return generated_texts
 
-            x1, y1, x2, y2 = bbox
-            # Convert relative bboxes to absolute
-            absolute_bboxes = [
-                (
-                    int(x1),
-                    int(y1),
-                    int(x2),
-                    int(y2)
-                )
-            ]
 
-            # Add entity with updated position info
-            entities_out.append(Entity(name=label, begin=start, end=end, bounding_box=absolute_bboxes))
+def process_images(model_name, images, prompt, complex=False):
+    """
+    Generates the text for all images (PIL) in batches, returns the processed text and the entities per image.
+    """
+    logger.debug("processing %d images, with prompt %s", len(images), prompt)
+    generated_texts = generate_texts(model_name, images, prompt, complex)
+    processor = load_processor(model_name)
+
+    results = []
+    for image, generated_text in zip(images, generated_texts):
+        if complex:
+            entities, processed_text, _ = generate_custom_entities(image.copy(), generated_text)
+
+            entities_out = []
+            for bbox, label in zip(entities['bboxes'], entities['labels']):
+                # Get the character positions
+                start, end = find_label_positions(processed_text, label)
+
+
+                x1, y1, x2, y2 = bbox
+                # Convert relative bboxes to absolute
+                absolute_bboxes = [
+                    (
+                        int(x1),
+                        int(y1),
+                        int(x2),
+                        int(y2)
+                    )
+                ]
+
+                # Add entity with updated position info
+                entities_out.append(Entity(name=label, begin=start, end=end, bounding_box=absolute_bboxes))
             entities = entities_out
 
-    else:
-        # By default, the generated  text is cleanup and the entities are extracted.
-        processed_text, entities = processor.post_process_generation(generated_text)
+        else:
+            # By default, the generated  text is cleanup and the entities are extracted.
+            processed_text, entities = processor.post_process_generation(generated_text)
+
+        results.append((processed_text, entities))
 
-    print("generated text: ", processed_text)
     # return the processed text and the entities, which are the bounding boxes
-    return processed_text, entities
+    return results
 
-def handle_image_results(image_path, entities):
+def handle_image_results(image_obj, entities):
     result_entities = []
-    image_obj = convert_base64_to_image(image_path)
     image_width, image_height = image_obj.size
     # draw the entities on the image and save it into a buffer
     image_entities = draw_entity_boxes_on_image(image_obj, entities, show=False, save_path=None)
@@ -852,19 +880,19 @@ def post_process(request: ImageToTextRequest):
         if complex and request.individual == False:
             processed_text, result_entities, result_images = process_complex(request.model_name, request.images, prompt, mode)
         else:
-            for image in request.images:
-                image_path = image.src
+            # convert images from base64 to PIL, once per image
+            images = [convert_base64_to_image(image.src) for image in request.images]
+            results = process_images(request.model_name, images, prompt, complex)
+            for image, image_obj, (processed_text, entities) in zip(request.images, images, results):
                 image_width = image.width
                 image_height = image.height
-                # process the image
-                processed_text, entities = process_image(request.model_name, image_path, prompt, complex)
                 if complex:
                     result_entities = entities
-                    image_base64 = convert_image_to_base64(plot_bbox(convert_base64_to_image(image.src), entities))
+                    image_base64 = convert_image_to_base64(plot_bbox(image_obj, entities))
 
                 else:
                     # handle the image results
-                    result_entities, image_base64 = handle_image_results(image_path, entities)
+                    result_entities, image_base64 = handle_image_results(image_obj, entities)
 
                 result_images.append(ImageType(src=f"{image_base64}", width=image_width, height=image_height, begin=0, end=len(processed_text)))
         # Return the processed data in response
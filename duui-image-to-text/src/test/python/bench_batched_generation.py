@@ -0,0 +1,32 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from test_batched_generation import PROMPT, SERVICE_DIR, load_service, random_images, save_tiny_checkpoint
+
+
+def benchmark(count, batch_sizes):
+    with tempfile.TemporaryDirectory() as path:
+        save_tiny_checkpoint(path)
+        service = load_service(os.environ.__setitem__, setattr, path)
+        images = random_images(count, seed=1)
+        service.process_images(path, images[:1], PROMPT)
+        for batch_size in batch_sizes:
+            service.settings.image_to_text_batch_size = batch_size
+            start = time.perf_counter()
+            service.process_images(path, images, PROMPT)
+            elapsed = time.perf_counter() - start
+            print(f"batch size {batch_size}: {count} images, {count / elapsed:.1f} images/s")
+
+
+if __name__ == "__main__":
+    # e.g. python src/test/python/bench_batched_generation.py --images 32, batch size 1 is one image per generate call
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--images", type=int, default=32)
+    parser.add_argument("--batch-size", type=int, nargs="+", default=[1, 4, 8, 16])
+    args = parser.parse_args()
+    sys.path.insert(0, str(SERVICE_DIR))
+    os.chdir(SERVICE_DIR)
+    benchmark(args.images, args.batch_size)
@@ -0,0 +1,179 @@
+import base64
+import importlib
+import io
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+torch = pytest.importorskip("torch")
+transformers = pytest.importorskip("transformers")
+tokenizers = pytest.importorskip("tokenizers")
+from PIL import Image  # noqa: E402
+
+if not hasattr(transformers, "AutoModelForVision2Seq"):
+    pytest.skip("the service needs transformers 4, see requirements.txt", allow_module_level=True)
+
+SERVICE_DIR = Path(__file__).resolve().parents[2] / "main" / "python"
+WORDS = "<s> <pad> </s> <unk> <mask> an image of a cat dog house tree sky red blue green on the in with".split()
+PROMPT = "<grounding>An image of"
+MAX_NEW_TOKENS = 16
+IMAGE_SIZES = [(64, 48), (80, 80), (40, 60)]
+
+
+def save_tiny_checkpoint(path):
+    # a randomly initialized Kosmos-2 with a word level tokenizer and 32px images, no download needed
+    backend = tokenizers.Tokenizer(tokenizers.models.WordLevel({w: i for i, w in enumerate(WORDS)}, unk_token="<unk>"))
+    backend.pre_tokenizer = tokenizers.pre_tokenizers.Whitespace()
+    backend.decoder = tokenizers.decoders.WordPiece(prefix="##")
+    tokenizer = transformers.XLMRobertaTokenizerFast(
+        tokenizer_object=backend, bos_token="<s>", eos_token="</s>", pad_token="<pad>", unk_token="<unk>",
+        mask_token="<mask>", cls_token="<s>", sep_token="</s>",
+    )
+    image_processor = transformers.CLIPImageProcessor(size={"shortest_edge": 32}, crop_size={"height": 32, "width": 32})
+    processor = transformers.Kosmos2Processor(image_processor, tokenizer, num_patch_index_tokens=1024)
+    config = transformers.Kosmos2Config(
+        text_config=dict(
+            vocab_size=len(processor.tokenizer), embed_dim=64, layers=2, attention_heads=2, ffn_dim=128,
+            max_position_embeddings=256, bos_token_id=tokenizer.bos_token_id, eos_token_id=tokenizer.eos_token_id,
+            pad_token_id=tokenizer.pad_token_id,
+        ),
+        vision_config=dict(
+            hidden_size=32, intermediate_size=64, num_hidden_layers=2, num_attention_heads=2, image_size=32, patch_size=8
+        ),
+        latent_query_num=64,
+    )
+    torch.manual_seed(0)
+    model = transformers.Kosmos2ForConditionalGeneration(config)
+    processor.save_pretrained(path)
+    model.save_pretrained(path)
+
+
+def load_tiny_model(path):
+    model = transformers.Kosmos2ForConditionalGeneration.from_pretrained(path).eval()
+    # only plain words are generated, no eos or patch index tokens, so every text has MAX_NEW_TOKENS words
+    suppress_tokens = list(range(5)) + list(range(len(WORDS), model.config.text_config.vocab_size))
+    generate = model.generate
+    model.generate = lambda **kwargs: generate(
+        **{**kwargs, "max_new_tokens": MAX_NEW_TOKENS, "suppress_tokens": suppress_tokens}
+    )
+    return model
+
+
+def random_images(count, seed=0):
+    rng = random.Random(seed)
+    images = []
+    for _ in range(count):
+        width, height = rng.choice(IMAGE_SIZES)
+        base = [rng.randrange(256) for _ in range(3)]
+        image = Image.new("RGB", (width, height))
+        image.putdata([tuple(min(255, c + rng.randrange(40)) for c in base) for _ in range(width * height)])
+        images.append(image)
+    return images
+
+
+def to_base64(image):
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return base64.b64encode(buffer.getvalue()).decode("ascii")
+
+
+def load_service(set_env, set_attr, path):
+    set_env("IMAGE_TO_TEXT_ANNOTATOR_NAME", "duui-image-to-text")
+    set_env("IMAGE_TO_TEXT_ANNOTATOR_VERSION", "0.0.1")
+    set_env("IMAGE_TO_TEXT_LOG_LEVEL", "WARNING")
+    set_env("IMAGE_TO_TEXT_MODEL_VERSION", "0.0.1")
+    set_env("IMAGE_TO_TEXT_MODEL_CACHE_SIZE", "3")
+    sys.modules.pop("duui_image_to_text", None)
+    module = importlib.import_module("duui_image_to_text")
+    # load_model only knows the hub checkpoints
+    model = load_tiny_model(path)
+    set_attr(module, "load_model", lambda *args, **kwargs: model)
+    return module
+
+
+@pytest.fixture(scope="module")
+def checkpoint(tmp_path_factory):
+    path = tmp_path_factory.mktemp("tiny-kosmos-2")
+    save_tiny_checkpoint(path)
+    return str(path)
+
+
+@pytest.fixture
+def service(monkeypatch, checkpoint):
+    monkeypatch.chdir(SERVICE_DIR)
+    monkeypatch.syspath_prepend(str(SERVICE_DIR))
+    return load_service(monkeypatch.setenv, monkeypatch.setattr, checkpoint)
+
+
+def test_batches_are_grouped_by_size(service):
+    images = random_images(20)
+    batches = list(service.image_batches(images, 4))
+
+    assert sorted(i for batch in batches for i in batch) == list(range(20))
+    for batch in batches:
+        assert len(batch) <= 4
+        assert len({images[i].size for i in batch}) == 1
+
+
+def test_batched_results_match_per_image_results(service, checkpoint, monkeypatch):
+    images = random_images(12)
+
+    monkeypatch.setattr(service.settings, "image_to_text_batch_size", 1)
+    expected = service.process_images(checkpoint, images, PROMPT)
+    monkeypatch.setattr(service.settings, "image_to_text_batch_size", 8)
+    results = service.process_images(checkpoint, images, PROMPT)
+
+    assert results == expected
+
+
+def test_results_are_returned_in_image_order(service, checkpoint, monkeypatch):
+    model = service.load_model(checkpoint)
+    generate = model.generate
+
+    def generate_image_word(**kwargs):
+        # the random model writes the same words for every image, the first word is replaced by one that
+        # depends on the pixels, so that a result given to the wrong image is noticed
+        generated_ids = generate(**kwargs).clone()
+        pixel_means = kwargs["pixel_values"].mean(dim=(1, 2, 3))
+        generated_ids[:, kwargs["input_ids"].shape[1]] = 5 + (pixel_means * 1000).long() % (len(WORDS) - 5)
+        return generated_ids
+
+    monkeypatch.setattr(model, "generate", generate_image_word)
+    images = random_images(12)
+
+    monkeypatch.setattr(service.settings, "image_to_text_batch_size", 1)
+    expected = service.process_images(checkpoint, images, PROMPT)
+    monkeypatch.setattr(service.settings, "image_to_text_batch_size", 8)
+    results = service.process_images(checkpoint, images, PROMPT)
+
+    assert results == expected
+    assert len({text for text, _ in results}) > 1
+
+
+def test_processor_is_loaded_once_and_images_decoded_once(service, checkpoint, monkeypatch):
+    processor_loads = []
+    from_pretrained = transformers.AutoProcessor.from_pretrained
+    monkeypatch.setattr(
+        service.AutoProcessor, "from_pretrained",
+        lambda *args, **kwargs: processor_loads.append(args[0]) or from_pretrained(*args, **kwargs)
+    )
+    decoded = []
+    convert_base64_to_image = service.convert_base64_to_image
+    monkeypatch.setattr(service, "convert_base64_to_image", lambda src: decoded.append(src) or convert_base64_to_image(src))
+
+    images = random_images(6)
+    request = service.ImageToTextRequest(
+        images=[
+            service.ImageType(src=to_base64(image), width=image.width, height=image.height, begin=0, end=0)
+            for image in images
+        ],
+        prompt=PROMPT, number_of_images=len(images), doc_lang="en", model_name=checkpoint,
+    )
+    responses = [service.post_process(request) for _ in range(2)]
+
+    assert processor_loads == [checkpoint]
+    assert len(decoded) == 2 * len(images)
+    assert responses[0].errors == []
+    assert len(responses[0].images) == len(images)
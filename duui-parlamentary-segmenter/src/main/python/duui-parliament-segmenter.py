@@ -6,10 +6,10 @@ from pydantic import BaseModel
 from pydantic_settings import BaseSettings
 from starlette.responses import PlainTextResponse, JSONResponse
 from typing import List, Optional
+from functools import lru_cache
+from threading import Lock
 import re
-from mp import get_mp
-import pandas as pd
-import difflib
+from mp import get_mp, MPIndex
 
 class Settings(BaseSettings):
     # Name of this annotator
@@ -19,6 +19,10 @@ class Settings(BaseSettings):
     annotator_version: str
     # Log level
     log_level: str
+    # Legislative period of the members of parliament
+    legislative_period: int = 2
+    # Directory of the MP registry, fetched from Wikipedia if missing
+    mp_cache_dir: str = "mp_cache"
 
 
 # Speech
@@ -45,10 +49,10 @@ class Speaker(BaseModel):
     electoral_county: Optional[str] = None
     electoral_county_deducted: Optional[str] = None
 
-def find_mp(speaker: Speaker, mp_df: pd.DataFrame, threshold: float = 0.8) -> Speaker:
+def find_mp(speaker: Speaker, mp_index: MPIndex, threshold: float = 0.8) -> Speaker:
     """
     Enriches a Speaker object with party and electoral_county
-    by matching speaker.name against mp_df.family_name,
+    by matching speaker.name against the family names of the MP index,
     falling back to a fuzzy match if needed.
     """
     if not speaker.name:
@@ -56,31 +60,86 @@ def find_mp(speaker: Speaker, mp_df: pd.DataFrame, threshold: float = 0.8) -> Sp
         speaker.electoral_county = None
         return speaker
 
-    name_lower = speaker.name.lower()
-    # 1) Exact match
-    mask_exact = mp_df["family_name"].str.lower() == name_lower
-    if mask_exact.any():
-        row = mp_df.loc[mask_exact].iloc[0]
-    else:
-        # 2) Fuzzy fallback
-        candidates = mp_df["family_name"].dropna().unique().tolist()
-        closest = difflib.get_close_matches(speaker.name, candidates, n=1, cutoff=threshold)
-        if not closest:
-            speaker.party = None
-            speaker.electoral_county = None
-            return speaker
-        mask_fuzzy = mp_df["family_name"].str.lower() == closest[0].lower()
-        row = mp_df.loc[mask_fuzzy].iloc[0]
-
-    speaker.party_deducted = row.get("Partei") or None
-    speaker.electoral_county_deducted = row.get("Wahlkreis") or None
+    entry = mp_index.lookup(speaker.name, threshold)
+    if entry is None:
+        speaker.party = None
+        speaker.electoral_county = None
+        return speaker
+
+    speaker.party_deducted, speaker.electoral_county_deducted = entry
     return speaker
 
+
+# Improved regex pattern with anchors and optional parts
+SPEAKER_PATTERN = re.compile(
+    r"""
+    ^\s*
+    (?:
+        (?P<trash1>[^A-ZÄÖÜa-zäöüß]*) # trash
+        (?P<firstname>[A-ZÄÖÜ]\.)?\s*? # Initial of first name
+        (?P<title>[Dv]r\.|Prof\.)?\s*?  # Optional title
+        (?P<nobility>(Graf)?(Freiherr)?\s?v?\.?)?\s*? # Optional nobility indication
+        (?P<name>[A-ZÄÖÜ][a-zäöüß]+(?:\s+[A-ZÄÖÜ][a-zäöüß]+)?)\s*  # Name
+        (?:
+          \(\s*(?P<party>[A-ZÄÖÜa-zäöüß]{,5})\s*\)   # “(Party)”
+          \s*,\s*                                 # comma + optional space
+        )?
+        (?:
+          \(\s*(?P<wkr>[A-ZÄÖÜa-zäöüß]{6,})\s*\)   # “(Wahlkreis)”
+          \s*,\s*                                 # comma + optional space
+        )?
+        (?P<trash2>.{,20}) # trash
+        (?P<role>Abgeordneter(?:in)?(?:,\sBerichterstatter)?)  # Role
+        :
+    |
+        (?P<trash_ap>[^A-ZÄÖÜa-zäöüß]*) # trash
+        (?P<alt_label>Alterspräsident(?:in)?)\s*
+        (?P<title_ap>Dr\.|Prof\.)?\s*?  # Optional title
+        (?P<name_ap>[A-ZÄÖÜ][a-zäöüß]+(?:\s+[A-ZÄÖÜ][a-zäöüß]+)?)\s*  # Name
+        :
+    |
+        (?P<trash_p>[^A-ZÄÖÜa-zäöüß]*) # trash
+        (?P<president>Präsident(?:in)?)\s*:
+    |
+        (?P<trash_vp>[^A-ZÄÖÜa-zäöüß]*) # trash
+        (?P<vicepresident>Vizepräsident(?:in)?)\s*
+        (?P<title_vp>[Dv]r\.|Prof\.)?\s*?  # Optional title
+        (?P<name_vp>[A-ZÄÖÜ][a-zäöüß]+(?:\s+[A-ZÄÖÜ][a-zäöüß]+)?)\s*  # Name
+        :
+    |
+        (?P<trash_bc>[^A-ZÄÖÜa-zäöüß]*) # trash
+        (?P<title_bc>[Dv]r\.|Prof\.)?\s*?  # Optional title
+        (?P<nobility_bc>(Graf)?\s?v?\.?)?\s*? # Optional nobility indication
+        (?P<name_bc>[A-ZÄÖÜ][a-zäöüß]+(?:\s+[A-ZÄÖÜ][a-zäöüß]+)?)\s*  # Name
+        ,\s*?
+        (?P<role_bc>[^:]{,100}?)\s*  # Role
+        :
+    )
+    """,
+    re.VERBOSE | re.MULTILINE
+)
+TRIM_PATTERN = re.compile(r'^\s+|\s+$')
+NEWLINE_PATTERN = re.compile(r'\n')
+
 # Load settings from env vars
 settings = Settings()
 logging.basicConfig(level=settings.log_level)
 logger = logging.getLogger(__name__)
 
+# The MP index is built on first use, the lock avoids fetching the registry twice
+mp_index_lock = Lock()
+
+
+@lru_cache(maxsize=None)
+def _load_mp_index(legislative_period: int) -> MPIndex:
+    return MPIndex(get_mp(legislative_period=legislative_period, cache_dir=settings.mp_cache_dir))
+
+
+def get_mp_index(legislative_period: int) -> MPIndex:
+    with mp_index_lock:
+        return _load_mp_index(legislative_period)
+
+
 # Load the predefined typesystem that is needed for this annotator to work
 typesystem_filename = 'typesystem.xml'
 logger.debug("Loading typesystem from \"%s\"", typesystem_filename)
@@ -196,71 +255,22 @@ def post_process(request: DUUIRequest):
 
     text = request.text
 
-    # Get list of members of parliament for respective legislative period
-    mp_df = get_mp(legislative_period=2) # has to be adjusted
-
-    # Improved regex pattern with anchors and optional parts
-    pattern = re.compile(
-        r"""
-        ^\s*
-        (?:
-            (?P<trash1>[^A-ZÄÖÜa-zäöüß]*) # trash
-            (?P<firstname>[A-ZÄÖÜ]\.)?\s*? # Initial of first name
-            (?P<title>[Dv]r\.|Prof\.)?\s*?  # Optional title
-            (?P<nobility>(Graf)?(Freiherr)?\s?v?\.?)?\s*? # Optional nobility indication
-            (?P<name>[A-ZÄÖÜ][a-zäöüß]+(?:\s+[A-ZÄÖÜ][a-zäöüß]+)?)\s*  # Name
-            (?:
-              \(\s*(?P<party>[A-ZÄÖÜa-zäöüß]{,5})\s*\)   # “(Party)”
-              \s*,\s*                                 # comma + optional space
-            )?
-            (?:
-              \(\s*(?P<wkr>[A-ZÄÖÜa-zäöüß]{6,})\s*\)   # “(Wahlkreis)”
-              \s*,\s*                                 # comma + optional space
-            )?
-            (?P<trash2>.{,20}) # trash
-            (?P<role>Abgeordneter(?:in)?(?:,\sBerichterstatter)?)  # Role
-            :
-        |
-            (?P<trash_ap>[^A-ZÄÖÜa-zäöüß]*) # trash
-            (?P<alt_label>Alterspräsident(?:in)?)\s*
-            (?P<title_ap>Dr\.|Prof\.)?\s*?  # Optional title
-            (?P<name_ap>[A-ZÄÖÜ][a-zäöüß]+(?:\s+[A-ZÄÖÜ][a-zäöüß]+)?)\s*  # Name
-            :
-        |
-            (?P<trash_p>[^A-ZÄÖÜa-zäöüß]*) # trash
-            (?P<president>Präsident(?:in)?)\s*:
-        |
-            (?P<trash_vp>[^A-ZÄÖÜa-zäöüß]*) # trash
-            (?P<vicepresident>Vizepräsident(?:in)?)\s*
-            (?P<title_vp>[Dv]r\.|Prof\.)?\s*?  # Optional title
-            (?P<name_vp>[A-ZÄÖÜ][a-zäöüß]+(?:\s+[A-ZÄÖÜ][a-zäöüß]+)?)\s*  # Name
-            :
-        |
-            (?P<trash_bc>[^A-ZÄÖÜa-zäöüß]*) # trash
-            (?P<title_bc>[Dv]r\.|Prof\.)?\s*?  # Optional title
-            (?P<nobility_bc>(Graf)?\s?v?\.?)?\s*? # Optional nobility indication
-            (?P<name_bc>[A-ZÄÖÜ][a-zäöüß]+(?:\s+[A-ZÄÖÜ][a-zäöüß]+)?)\s*  # Name
-            ,\s*?
-            (?P<role_bc>[^:]{,100}?)\s*  # Role
-            :
-        )
-        """,
-        re.VERBOSE | re.MULTILINE
-    )
+    # Get index of members of parliament for respective legislative period
+    mp_index = get_mp_index(settings.legislative_period)
 
     def _get(group: str) -> Optional[str]:
         val = match.group(group)
         if val is None:
             return None
         # strip leading/trailing whitespace
-        val = re.sub(r'^\s+|\s+$', '', val)
-        val = re.sub(r'\n', ' ', val)
+        val = TRIM_PATTERN.sub('', val)
+        val = NEWLINE_PATTERN.sub(' ', val)
         return val if val else None
 
     speeches: list[Speech] = []
     speakers: list[Speaker] = []
 
-    matches = list(pattern.finditer(text))
+    matches = list(SPEAKER_PATTERN.finditer(text))
 
     for i, match in enumerate(matches):
         begin, end = match.span()
@@ -280,7 +290,7 @@ def post_process(request: DUUIRequest):
                 electoral_county=_get("wkr")
             )
 
-            speaker = find_mp(speaker=speaker, mp_df=mp_df)
+            speaker = find_mp(speaker=speaker, mp_index=mp_index)
 
         # Alterspräsident(in)
         elif match.group("alt_label"):
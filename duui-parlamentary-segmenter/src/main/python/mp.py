@@ -1,7 +1,18 @@
+import difflib
+import logging
+import os
+from typing import Dict, Optional, Tuple
+
 import pandas as pd
 from nameparser import HumanName
 
-def get_mp(legislative_period:int):
+logger = logging.getLogger(__name__)
+
+# Version of the on-disk registry, increase if the columns or the name splitting change
+MP_REGISTRY_VERSION = 1
+
+
+def fetch_mp(legislative_period: int) -> pd.DataFrame:
     # URLs der Wahlperioden 1–8
     url = (
         "https://de.wikipedia.org/wiki/"
@@ -42,3 +53,70 @@ def get_mp(legislative_period:int):
     df = pd.concat([df, name_parts], axis=1)
 
     return df
+
+
+def mp_registry_path(cache_dir: str, legislative_period: int) -> str:
+    return os.path.join(cache_dir, f"mp_wp{legislative_period}_v{MP_REGISTRY_VERSION}.csv")
+
+
+def get_mp(legislative_period: int, cache_dir: Optional[str] = None) -> pd.DataFrame:
+    # Members of parliament of the legislative period, read from the registry in cache_dir
+    # if it exists, otherwise fetched from Wikipedia and written to the registry
+    if cache_dir is None:
+        return fetch_mp(legislative_period)
+
+    path = mp_registry_path(cache_dir, legislative_period)
+    if os.path.exists(path):
+        logger.debug("Loading MP registry from \"%s\"", path)
+        return pd.read_csv(path)
+
+    logger.info("MP registry \"%s\" not found, fetching legislative period %d", path, legislative_period)
+    df = fetch_mp(legislative_period)
+    os.makedirs(cache_dir, exist_ok=True)
+    # write to a temporary file first, so that concurrent workers never read a partial registry
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    df.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, path)
+    return df
+
+
+def _str_or_none(value) -> Optional[str]:
+    # empty cells are NaN in the DataFrame
+    return value if isinstance(value, str) and value else None
+
+
+class MPIndex:
+    """
+    Lookup of party and electoral county by family name, built once per registry.
+    Exact matches are resolved by the lowercased family name, the fuzzy fallback
+    (difflib) is only computed once per unknown name.
+    """
+
+    def __init__(self, mp_df: pd.DataFrame):
+        self.entries: Dict[str, Tuple[Optional[str], Optional[str]]] = {}
+        for family_name, party, county in zip(
+                mp_df["family_name"],
+                mp_df["Partei"] if "Partei" in mp_df.columns else [None] * len(mp_df),
+                mp_df["Wahlkreis"] if "Wahlkreis" in mp_df.columns else [None] * len(mp_df)
+        ):
+            if isinstance(family_name, str):
+                # the first row wins, as with the previous DataFrame lookup
+                self.entries.setdefault(family_name.lower(), (_str_or_none(party), _str_or_none(county)))
+        self.candidates = mp_df["family_name"].dropna().unique().tolist()
+        self.fuzzy_matches: Dict[Tuple[str, float], Optional[str]] = {}
+
+    def lookup(self, name: str, threshold: float = 0.8) -> Optional[Tuple[Optional[str], Optional[str]]]:
+        # 1) Exact match
+        entry = self.entries.get(name.lower())
+        if entry is not None:
+            return entry
+
+        # 2) Fuzzy fallback
+        key = (name, threshold)
+        if key not in self.fuzzy_matches:
+            closest = difflib.get_close_matches(name, self.candidates, n=1, cutoff=threshold)
+            self.fuzzy_matches[key] = closest[0].lower() if closest else None
+        closest = self.fuzzy_matches[key]
+        if closest is None:
+            return None
+        return self.entries.get(closest)
@@ -0,0 +1,51 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from test_mp import dataframe_find_mp, load_mp, load_service, synthetic_mps, synthetic_protocol
+
+
+def benchmark(speech_counts, mps, repeats):
+    mp_df = synthetic_mps(mps)
+    work_dir = Path(tempfile.mkdtemp())
+    mp = load_mp(lambda path: sys.path.insert(0, path))
+    # the registry is built from the synthetic MPs instead of Wikipedia
+    mp.fetch_mp = lambda period: mp_df.copy()
+    service = load_service(os.environ.__setitem__, work_dir, work_dir / "cache")
+    find_mp = service.find_mp
+    for count in speech_counts:
+        text = synthetic_protocol(mp_df, count)
+        request = service.DUUIRequest(doc_len=len(text), lang="de", text=text)
+
+        service.find_mp = dataframe_find_mp(mp_df)
+        start = time.perf_counter()
+        service.post_process(request)
+        dataframe_time = time.perf_counter() - start
+
+        service.find_mp = find_mp
+        service._load_mp_index.cache_clear()
+        start = time.perf_counter()
+        service.post_process(request)
+        first_time = time.perf_counter() - start
+        start = time.perf_counter()
+        for _ in range(repeats):
+            service.post_process(request)
+        index_time = (time.perf_counter() - start) / repeats
+        print(
+            f"{count} speeches, {len(mp_df)} MPs: DataFrame lookup {dataframe_time:.3f}s, "
+            f"index {first_time:.3f}s first request, {index_time:.3f}s after that, "
+            f"speedup {dataframe_time / index_time:.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    # e.g. python src/test/python/bench_mp.py --speeches 1000 5000 --mps 470
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--speeches", type=int, nargs="+", default=[1000, 5000])
+    parser.add_argument("--mps", type=int, default=470)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+    benchmark(args.speeches, args.mps, args.repeats)
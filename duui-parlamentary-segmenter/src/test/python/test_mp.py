@@ -0,0 +1,234 @@
+import difflib
+import importlib
+import importlib.util
+import os
+import random
+import shutil
+import sys
+from pathlib import Path
+
+import pytest
+
+pd = pytest.importorskip("pandas")
+pytest.importorskip("nameparser")
+pytest.importorskip("cassis")
+pytest.importorskip("pydantic_settings")
+
+COMPONENT_DIR = Path(__file__).resolve().parents[3]
+SERVICE_DIR = COMPONENT_DIR / "src" / "main" / "python"
+
+PREFIXES = ["Berg", "Hof", "Schmid", "Wag", "Kling", "Roth", "Lind", "Stein", "Wald", "Brand", "Kessel", "Ober"]
+MIDDLES = ["", "en", "el", "ing", "er", "au"]
+SUFFIXES = ["mann", "er", "hardt", "inger", "bauer", "feld", "ner", "ke"]
+FIRST_NAMES = ["Hermann", "Otto", "Marie", "Paul", "Clara", "Ernst", "Gertrud", "Wilhelm"]
+PARTIES = ["SPD", "Zentrum", "DNVP", "DDP", "KPD", "BVP", None]
+COUNTIES = ["Berlin", "Potsdam", "Breslau", "Leipzig", "Hamburg", "Oppeln", None]
+FILLER = "die versammlung hat den antrag zur kenntnis genommen und setzt die beratung fort".split()
+
+
+def synthetic_mps(count=470, seed=0):
+    # registry like fetch_mp returns it, with empty party and county cells and a few family names twice
+    rng = random.Random(seed)
+    family_names = sorted({f"{p}{m}{s}" for p in PREFIXES for m in MIDDLES for s in SUFFIXES})
+    family_names = rng.sample(family_names, count - count // 20)
+    family_names += rng.sample(family_names, count // 20)
+    rows = []
+    for family_name in family_names:
+        first_name = rng.choice(FIRST_NAMES)
+        rows.append({
+            "Abgeordneter": f"{first_name} {family_name}", "Partei": rng.choice(PARTIES),
+            "Wahlkreis": rng.choice(COUNTIES), "Legislaturperiode": 2, "title": None, "nobility": None,
+            "first_name": first_name, "middle_name": None, "family_name": family_name,
+        })
+    return pd.DataFrame(rows)
+
+
+def misspell(name, rng):
+    i = rng.randrange(1, len(name))
+    return name[:i] + name[i] + name[i:]
+
+
+def synthetic_protocol(mp_df, speeches, seed=0):
+    # plenary protocol with known, misspelled and unknown speakers, the president and the vice president
+    rng = random.Random(seed)
+    family_names = mp_df["family_name"].tolist()
+    lines = []
+    for _ in range(speeches):
+        kind = rng.random()
+        if kind < 0.6:
+            name = rng.choice(family_names)
+            lines.append(f"{name} ({rng.choice(['SPD', 'KPD', 'DVP'])}), Abgeordneter:")
+        elif kind < 0.75:
+            lines.append(f"{misspell(rng.choice(family_names), rng)}, Abgeordneter:")
+        elif kind < 0.85:
+            lines.append("Dr. Quastenflosser, Abgeordneter:")
+        elif kind < 0.95:
+            lines.append("Präsident:")
+        else:
+            lines.append(f"Vizepräsident {rng.choice(family_names)}:")
+        lines.append(" ".join(rng.choices(FILLER, k=rng.randint(10, 60))) + ".")
+    return "\n".join(lines)
+
+
+def dataframe_find_mp(mp_df):
+    # the former find_mp: lowercases the family_name column and runs difflib for every speaker,
+    # empty cells leaked into the response as NaN
+    def find_mp(speaker, mp_index=None, threshold=0.8):
+        if not speaker.name:
+            speaker.party = None
+            speaker.electoral_county = None
+            return speaker
+
+        mask_exact = mp_df["family_name"].str.lower() == speaker.name.lower()
+        if mask_exact.any():
+            row = mp_df.loc[mask_exact].iloc[0]
+        else:
+            candidates = mp_df["family_name"].dropna().unique().tolist()
+            closest = difflib.get_close_matches(speaker.name, candidates, n=1, cutoff=threshold)
+            if not closest:
+                speaker.party = None
+                speaker.electoral_county = None
+                return speaker
+            row = mp_df.loc[mp_df["family_name"].str.lower() == closest[0].lower()].iloc[0]
+
+        party, county = row.get("Partei"), row.get("Wahlkreis")
+        speaker.party_deducted = None if pd.isna(party) else party or None
+        speaker.electoral_county_deducted = None if pd.isna(county) else county or None
+        return speaker
+
+    return find_mp
+
+
+def load_mp(syspath_prepend):
+    syspath_prepend(str(SERVICE_DIR))
+    sys.modules.pop("mp", None)
+    return importlib.import_module("mp")
+
+
+def load_service(set_env, work_dir, cache_dir):
+    # the service reads its type system and Lua script from the working directory, as in the image
+    set_env("ANNOTATOR_NAME", "duui-parliament-segmenter")
+    set_env("ANNOTATOR_VERSION", "0.0.1")
+    set_env("LOG_LEVEL", "WARNING")
+    set_env("LEGISLATIVE_PERIOD", "2")
+    set_env("MP_CACHE_DIR", str(cache_dir))
+    shutil.copy(COMPONENT_DIR / "src" / "main" / "resources" / "typesystem.xml", work_dir / "typesystem.xml")
+    shutil.copy(SERVICE_DIR / "duui-parliament-segmenter.lua", work_dir / "duui-parliament-segmenter.lua")
+    os.chdir(work_dir)
+    spec = importlib.util.spec_from_file_location("duui_parliament_segmenter", SERVICE_DIR / "duui-parliament-segmenter.py")
+    service = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(service)
+    return service
+
+
+@pytest.fixture
+def mp(monkeypatch):
+    return load_mp(monkeypatch.syspath_prepend)
+
+
+@pytest.fixture
+def mp_df():
+    return synthetic_mps()
+
+
+def test_registry_round_trip(mp, mp_df, monkeypatch, tmp_path):
+    fetched = []
+    monkeypatch.setattr(mp, "fetch_mp", lambda period: fetched.append(period) or mp_df.copy())
+    cache_dir = tmp_path / "cache"
+    path = mp.mp_registry_path(str(cache_dir), 2)
+    replaced = []
+    os_replace = os.replace
+
+    def replace(src, dst):
+        # the registry only appears complete, under its final name
+        assert not os.path.exists(dst)
+        assert len(pd.read_csv(src)) == len(mp_df)
+        replaced.append((src, dst))
+        os_replace(src, dst)
+
+    monkeypatch.setattr(mp.os, "replace", replace)
+    written = mp.get_mp(2, cache_dir=str(cache_dir))
+
+    assert fetched == [2]
+    assert [dst for _, dst in replaced] == [path]
+    assert os.listdir(cache_dir) == [os.path.basename(path)]
+    pd.testing.assert_frame_equal(written, mp_df)
+
+    def offline(period):
+        raise AssertionError("the registry must be read without fetching")
+
+    monkeypatch.setattr(mp, "fetch_mp", offline)
+    read = mp.get_mp(2, cache_dir=str(cache_dir))
+    # the CSV keeps no types, all-empty columns come back as float NaN
+    pd.testing.assert_frame_equal(read, mp_df.fillna(float("nan")), check_dtype=False)
+
+    # empty cells are read back as NaN, the index turns them into None
+    index = mp.MPIndex(read)
+    row = read[read["Partei"].isna()].iloc[0]
+    assert pd.isna(row["Partei"])
+    party, county = index.lookup(row["family_name"])
+    assert party is None
+    assert county is None or isinstance(county, str)
+    for _, row in read.drop_duplicates("family_name").iterrows():
+        assert index.lookup(row["family_name"]) == tuple(None if pd.isna(v) else v for v in (row["Partei"], row["Wahlkreis"]))
+
+
+def test_registry_is_versioned_per_period(mp, tmp_path):
+    assert mp.mp_registry_path(str(tmp_path), 2) != mp.mp_registry_path(str(tmp_path), 3)
+    assert f"v{mp.MP_REGISTRY_VERSION}" in os.path.basename(mp.mp_registry_path(str(tmp_path), 2))
+
+
+def test_lookup_exact_fuzzy_and_miss(mp, mp_df, monkeypatch):
+    index = mp.MPIndex(mp_df)
+    first = mp_df.iloc[0]
+    expected = (first["Partei"], first["Wahlkreis"])
+
+    # exact, independent of the case, the first row of a family name wins
+    assert index.lookup(first["family_name"]) == expected
+    assert index.lookup(first["family_name"].upper()) == expected
+    duplicated = mp_df[mp_df["family_name"].duplicated(keep=False)]
+    family_name = duplicated["family_name"].iloc[0]
+    rows = duplicated[duplicated["family_name"] == family_name]
+    assert index.lookup(family_name) == (rows.iloc[0]["Partei"], rows.iloc[0]["Wahlkreis"])
+
+    # fuzzy, computed once per name
+    calls = []
+    get_close_matches = difflib.get_close_matches
+    monkeypatch.setattr(mp.difflib, "get_close_matches", lambda *args, **kwargs: calls.append(args[0]) or get_close_matches(*args, **kwargs))
+    misspelled = first["family_name"][:3] + first["family_name"][3] + first["family_name"][3:]
+    assert index.lookup(misspelled) == index.lookup(get_close_matches(misspelled, index.candidates, n=1, cutoff=0.8)[0])
+    assert index.lookup(misspelled) is not None
+    assert calls == [misspelled]
+
+    # miss
+    assert index.lookup("Quastenflosser") is None
+    assert index.lookup("Quastenflosser") is None
+    assert calls == [misspelled, "Quastenflosser"]
+    # a lower threshold is a different fallback
+    assert index.lookup("Quastenflosser", threshold=0.1) is not None
+
+
+def test_post_process_matches_dataframe_lookup(monkeypatch, tmp_path, mp_df):
+    mp = load_mp(monkeypatch.syspath_prepend)
+    fetched = []
+    monkeypatch.setattr(mp, "fetch_mp", lambda period: fetched.append(period) or mp_df.copy())
+    monkeypatch.chdir(tmp_path)
+    service = load_service(monkeypatch.setenv, tmp_path, tmp_path / "cache")
+    text = synthetic_protocol(mp_df, 300)
+    request = service.DUUIRequest(doc_len=len(text), lang="de", text=text)
+
+    response = service.post_process(request)
+    assert service.post_process(request) == response
+    assert fetched == [2]
+
+    # the registry was written and is read back for the former lookup
+    registry = pd.read_csv(mp.mp_registry_path(str(tmp_path / "cache"), 2))
+    monkeypatch.setattr(service, "find_mp", dataframe_find_mp(registry))
+    expected = service.post_process(request)
+
+    assert response == expected
+    assert len(response.speakers) == len(response.speeches) >= 300
+    deducted = [s for s in response.speakers if s.role == "Abgeordneter" and s.name != "Quastenflosser"]
+    assert sum(s.party_deducted is not None or s.electoral_county_deducted is not None for s in deducted) > len(deducted) // 2
+    assert all(s.party_deducted is None and s.electoral_county_deducted is None
+               for s in response.speakers if s.name == "Quastenflosser")
@@ -1,8 +1,12 @@
 import logging
+import multiprocessing
+import os
 from base64 import b64decode
+from concurrent.futures import ProcessPoolExecutor
 from platform import python_version
 from sys import version as sys_version
-from tempfile import NamedTemporaryFile, TemporaryDirectory
+from tempfile import NamedTemporaryFile
+from threading import Lock
 from time import time
 from typing import List, Optional
 
@@ -10,11 +14,10 @@ import cv2
 import numpy as np
 import pytesseract
 import textract
-from PIL import Image
 from cassis import load_typesystem
 from fastapi import FastAPI, Response
 from fastapi.responses import PlainTextResponse
-from pdf2image import convert_from_path
+from pdf2image import convert_from_path, pdfinfo_from_path
 from pydantic import BaseModel
 from pydantic_settings import BaseSettings
 
@@ -23,6 +26,8 @@ class Settings(BaseSettings):
     annotator_name: str
     annotator_version: str
     log_level: str
+    # Number of processes for page parallel OCR, 0 uses all available cores
+    ocr_workers: int = 0
 
     class Config:
         env_prefix = 'duui_pdf_extract_ocr_'
@@ -108,6 +113,57 @@ with open(lua_communication_script_filename, 'rb') as f:
     logger.debug("Lua communication script:")
     logger.debug(lua_communication_script_filename)
 
+# Pool of OCR worker processes, created on first use
+ocr_executor = None
+ocr_executor_lock = Lock()
+
+
+def init_ocr_worker():
+    # every page gets its own process, tesseract should not start additional threads
+    os.environ["OMP_THREAD_LIMIT"] = "1"
+
+
+def available_cpus() -> int:
+    # CPUs this process may run on, respects the CPU affinity of the container,
+    # sched_getaffinity is not available on all platforms (e.g. macOS)
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def get_ocr_executor() -> ProcessPoolExecutor:
+    global ocr_executor
+    with ocr_executor_lock:
+        if ocr_executor is None:
+            workers = settings.ocr_workers if settings.ocr_workers > 0 else available_cpus()
+            logger.info("Starting %d OCR worker processes", workers)
+            ocr_executor = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=init_ocr_worker
+            )
+        return ocr_executor
+
+
+# Render a single page of the PDF into memory and run OCR on it, runs inside a worker
+# process, only one page per worker is kept in memory at a time
+def ocr_page(pdf_path, page_number, dpi, lang, preprocess):
+    # see https://github.com/texttechnologylab/GerParCor/blob/main/python_Text_extraction/pdf_to_text/scanned_pdf_to_text.py#L18
+    images = convert_from_path(pdf_path, dpi=dpi, first_page=page_number, last_page=page_number)
+
+    page_text = ""
+    for image in images:
+        # see https://github.com/texttechnologylab/GerParCor/blob/main/python_Text_extraction/pdf_to_text/scanned_pdf_to_text.py#L53
+        if preprocess:
+            image = preprocess_bad_quality_text(cv2.cvtColor(np.asarray(image.convert("RGB")), cv2.COLOR_RGB2BGR))
+
+        # see https://github.com/texttechnologylab/GerParCor/blob/main/python_Text_extraction/pdf_to_text/scanned_pdf_to_text.py#L102
+        page_text += pytesseract.image_to_string(image, lang=lang)
+
+    return page_text
+
+
 app = FastAPI(
     title=settings.annotator_name,
     description="TTLab TextImager DUUI PDF Extract/OCR",
@@ -197,6 +253,7 @@ def post_process(request: TextImagerRequest) -> TextImagerResponse:
     with NamedTemporaryFile(suffix=".pdf") as pdf_temp_file:
         # the pdf is base64 encoded as we can not send bytes directly
         pdf_temp_file.write(b64decode(request.data))
+        pdf_temp_file.flush()
 
         # first try: extract text directly
         try:
@@ -221,27 +278,28 @@ def post_process(request: TextImagerRequest) -> TextImagerResponse:
                 model_name = "pytesseract"
                 model_version = pytesseract.__version__
 
-                with TemporaryDirectory() as ocr_temp_dir:
-                    # see https://github.com/texttechnologylab/GerParCor/blob/main/python_Text_extraction/pdf_to_text/scanned_pdf_to_text.py#L18
-                    images = convert_from_path(pdf_temp_file.name, dpi=request.ocr_dpi, fmt="JPEG", output_folder=ocr_temp_dir)
-
-                    temp_text = ""
-                    for image in images:
-                        # see https://github.com/texttechnologylab/GerParCor/blob/main/python_Text_extraction/pdf_to_text/scanned_pdf_to_text.py#L53
-                        if "frk" in lang or request.ocr_preprocess:
-                            preprocess_bad_quality_text(image.filename)
-                            image = Image.open(image.filename)
-
-                        # see https://github.com/texttechnologylab/GerParCor/blob/main/python_Text_extraction/pdf_to_text/scanned_pdf_to_text.py#L102
-                        temp_text += pytesseract.image_to_string(image.filename, lang=lang)
-
-                    # see https://github.com/texttechnologylab/GerParCor/blob/main/python_Text_extraction/pdf_to_text/scanned_pdf_to_text.py#L104
-                    temp_text = temp_text.replace('-\n', '')
-
-                    if len(temp_text) < request.min_chars:
-                        logger.warning(f"OCR produced less than {request.min_chars} characters")
-                    else:
-                        text = temp_text
+                page_count = pdfinfo_from_path(pdf_temp_file.name)["Pages"]
+                preprocess = "frk" in lang or request.ocr_preprocess
+
+                # pages are rendered and recognized in parallel, the results are returned in page order
+                executor = get_ocr_executor()
+                page_texts = executor.map(
+                    ocr_page,
+                    [pdf_temp_file.name] * page_count,
+                    range(1, page_count + 1),
+                    [request.ocr_dpi] * page_count,
+                    [lang] * page_count,
+                    [preprocess] * page_count
+                )
+                temp_text = "".join(page_texts)
+
+                # see https://github.com/texttechnologylab/GerParCor/blob/main/python_Text_extraction/pdf_to_text/scanned_pdf_to_text.py#L104
+                temp_text = temp_text.replace('-\n', '')
+
+                if len(temp_text) < request.min_chars:
+                    logger.warning(f"OCR produced less than {request.min_chars} characters")
+                else:
+                    text = temp_text
 
             except Exception as ex:
                 logger.exception(ex)
@@ -274,14 +332,13 @@ def post_process(request: TextImagerRequest) -> TextImagerResponse:
     )
 
 # see https://github.com/texttechnologylab/GerParCor/blob/main/python_Text_extraction/pdf_to_text/scanned_pdf_to_text.py#L53
-def preprocess_bad_quality_text(img_path):
+def preprocess_bad_quality_text(img):
     """
-    :param img_path: path to image for rescale, convert the color from RGB to Gray, erode, dilate and remove/reduce the noises with a filter
+    :param img: BGR image to rescale, convert the color from RGB to Gray, erode, dilate and remove/reduce the noises with a filter
     """
     # https://tesseract-ocr.github.io/tessdoc/ImproveQuality.html
     # https://nanonets.com/blog/ocr-with-tesseract/
     # base on: https://towardsdatascience.com/getting-started-with-tesseract-part-ii-f7f9a0899b3f & https://towardsdatascience.com/getting-started-with-tesseract-part-i-2a6a6b1cf75e
-    img = cv2.imread(img_path, cv2.IMREAD_UNCHANGED)
     img = cv2.resize(img, None, fx=2, fy=2, interpolation=cv2.INTER_CUBIC)
     img = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
     kernel = np.ones((1, 1), np.uint8)
@@ -292,4 +349,4 @@ def preprocess_bad_quality_text(img_path):
     img = cv2.adaptiveThreshold(
         cv2.bilateralFilter(img, 9, 75, 75), 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 31, 2
     )
-    cv2.imwrite(img_path, img)
+    return img
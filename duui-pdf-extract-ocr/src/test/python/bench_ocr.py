@@ -0,0 +1,56 @@
+import argparse
+import os
+import resource
+import sys
+import time
+from tempfile import NamedTemporaryFile, TemporaryDirectory
+
+import pdf2image
+import pytesseract
+
+from test_ocr import COMPONENT_DIR, DPI, load_service, scanned_pdf
+
+
+def sequential_ocr(pdf_path, dpi, lang):
+    # the former OCR fallback: all pages are written to a temporary directory as JPEG
+    # and recognized one after another
+    with TemporaryDirectory() as ocr_temp_dir:
+        images = pdf2image.convert_from_path(pdf_path, dpi=dpi, fmt="JPEG", output_folder=ocr_temp_dir)
+        return "".join(pytesseract.image_to_string(image.filename, lang=lang) for image in images)
+
+
+def benchmark(variant, pages):
+    # run each variant in its own process, ru_maxrss is the peak of the service process and
+    # of the largest child process (worker, pdftoppm or tesseract)
+    service = load_service(os.environ.__setitem__)
+    with NamedTemporaryFile(suffix=".pdf") as pdf_file:
+        pdf_file.write(scanned_pdf(pages))
+        pdf_file.flush()
+        start = time.perf_counter()
+        if variant == "sequential":
+            sequential_ocr(pdf_file.name, DPI, "eng")
+        else:
+            executor = service.get_ocr_executor()
+            "".join(executor.map(
+                service.ocr_page, [pdf_file.name] * pages, range(1, pages + 1), [DPI] * pages,
+                ["eng"] * pages, [False] * pages
+            ))
+            executor.shutdown()
+        elapsed = time.perf_counter() - start
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    rss_children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+    print(
+        f"{variant}: {pages} pages, {elapsed:.1f}s, {pages / elapsed:.2f} pages/s, "
+        f"peak RSS {rss:.0f} MB, largest child {rss_children:.0f} MB"
+    )
+
+
+if __name__ == "__main__":
+    # e.g. python src/test/python/bench_ocr.py sequential --pages 20 && python src/test/python/bench_ocr.py parallel --pages 20
+    parser = argparse.ArgumentParser()
+    parser.add_argument("variant", choices=["sequential", "parallel"])
+    parser.add_argument("--pages", type=int, default=20)
+    args = parser.parse_args()
+    sys.path.insert(0, str(COMPONENT_DIR))
+    os.chdir(COMPONENT_DIR)
+    benchmark(args.variant, args.pages)
@@ -0,0 +1,94 @@
+import importlib
+import io
+import os
+import shutil
+import sys
+from base64 import b64encode
+from pathlib import Path
+
+import numpy as np
+import pytest
+from PIL import Image, ImageDraw, ImageFont
+
+pytesseract = pytest.importorskip("pytesseract")
+pdf2image = pytest.importorskip("pdf2image")
+pytest.importorskip("textract")
+if shutil.which("tesseract") is None or shutil.which("pdftoppm") is None:
+    pytest.skip("tesseract and poppler are not installed", allow_module_level=True)
+
+COMPONENT_DIR = Path(__file__).resolve().parents[3]
+DPI = 200
+WORDS = ["alpha", "bravo", "charlie", "delta", "echo", "foxtrot", "golf", "hotel", "india", "juliett"]
+
+
+def scanned_pdf(pages, lines_per_page=30):
+    # pages without a text layer, as produced by a scanner, so the text extraction fails and OCR is used
+    font = ImageFont.load_default(size=36)
+    images = []
+    for page in range(1, pages + 1):
+        image = Image.new("RGB", (int(8.27 * DPI), int(11.69 * DPI)), "white")
+        draw = ImageDraw.Draw(image)
+        draw.text((150, 100), f"Page {page}", fill="black", font=font)
+        for line in range(lines_per_page):
+            words = " ".join(WORDS[(page + line + i) % len(WORDS)] for i in range(6))
+            draw.text((150, 200 + line * 60), words, fill="black", font=font)
+        images.append(image)
+    buffer = io.BytesIO()
+    images[0].save(buffer, format="PDF", save_all=True, append_images=images[1:], resolution=DPI)
+    return buffer.getvalue()
+
+
+def load_service(set_env):
+    set_env("DUUI_PDF_EXTRACT_OCR_ANNOTATOR_NAME", "duui-pdf-extract-ocr")
+    set_env("DUUI_PDF_EXTRACT_OCR_ANNOTATOR_VERSION", "0.0.1")
+    set_env("DUUI_PDF_EXTRACT_OCR_LOG_LEVEL", "WARNING")
+    module_name = "src.main.python.duui"
+    sys.modules.pop(module_name, None)
+    return importlib.import_module(module_name)
+
+
+@pytest.fixture
+def service(monkeypatch):
+    monkeypatch.chdir(COMPONENT_DIR)
+    monkeypatch.syspath_prepend(str(COMPONENT_DIR))
+    monkeypatch.setenv("DUUI_PDF_EXTRACT_OCR_OCR_WORKERS", "2")
+    module = load_service(monkeypatch.setenv)
+    yield module
+    if module.ocr_executor is not None:
+        module.ocr_executor.shutdown()
+
+
+def test_pages_are_recognized_in_page_order(service):
+    request = service.TextImagerRequest(lang="en", data=b64encode(scanned_pdf(3)).decode("ascii"))
+    text = service.post_process(request).text
+
+    positions = [text.find(f"Page {page}") for page in range(1, 4)]
+    assert -1 not in positions
+    assert positions == sorted(positions)
+    assert text.count("foxtrot") >= 3 * 15
+
+
+def test_page_is_rendered_and_recognized_in_memory(service, tmp_path):
+    pdf_path = tmp_path / "scan.pdf"
+    pdf_path.write_bytes(scanned_pdf(2))
+
+    assert "Page 2" in service.ocr_page(str(pdf_path), 2, DPI, "eng", False)
+    assert "Page 1" in service.ocr_page(str(pdf_path), 1, DPI, "eng", True)
+
+
+def test_default_workers_follow_the_cpu_affinity(service, monkeypatch):
+    monkeypatch.setattr(os, "sched_getaffinity", lambda pid: {2, 3}, raising=False)
+    monkeypatch.setattr(os, "cpu_count", lambda: 64)
+    assert service.available_cpus() == 2
+
+    monkeypatch.delattr(os, "sched_getaffinity")
+    assert service.available_cpus() == 64
+
+
+def test_preprocessing_returns_an_array(service):
+    image = np.full((100, 80, 3), 255, dtype=np.uint8)
+    image[40:60, 10:70] = 0
+
+    processed = service.preprocess_bad_quality_text(image)
+    assert processed.shape == (200, 160)
+    assert set(np.unique(processed)) <= {0, 255}
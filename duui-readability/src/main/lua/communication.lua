@@ -8,12 +8,48 @@ function serialize(inputCas, outputStream, parameters)
     local doc_text = inputCas:getDocumentText()
     local doc_len = DUUIUtils:getDocumentTextLength(inputCas)
 
-    outputStream:write(json.encode({
-        lang = doc_lang,
-        text = doc_text,
-        begin = 0,
-        ["end"] = doc_len,
-    }))
+    -- optional, comma separated list of metrics, all if not set
+    local metrics = nil
+    if parameters["metrics"] ~= nil then
+        metrics = {}
+        local metrics_count = 1
+        for metric in string.gmatch(parameters["metrics"], "([^,]+)") do
+            metrics[metrics_count] = metric
+            metrics_count = metrics_count + 1
+        end
+    end
+
+    -- optional annotation type (e.g. paragraphs), all annotations are processed in one request
+    local selection_type = parameters["selection"]
+    if selection_type == nil or selection_type == "text" then
+        outputStream:write(json.encode({
+            lang = doc_lang,
+            text = doc_text,
+            begin = 0,
+            ["end"] = doc_len,
+            metrics = metrics,
+        }))
+    else
+        local selections = {}
+        local selections_count = 1
+        local clazz = Class:forName(selection_type);
+        local selections_it = JCasUtil:select(inputCas, clazz):iterator()
+        while selections_it:hasNext() do
+            local selection = selections_it:next()
+            selections[selections_count] = {
+                text = selection:getCoveredText(),
+                begin = selection:getBegin(),
+                ["end"] = selection:getEnd()
+            }
+            selections_count = selections_count + 1
+        end
+
+        outputStream:write(json.encode({
+            lang = doc_lang,
+            selections = selections,
+            metrics = metrics,
+        }))
+    end
 end
 
 function deserialize(inputCas, inputStream)
@@ -1,5 +1,6 @@
 import json
 import logging
+from functools import lru_cache
 from platform import python_version
 from sys import version as sys_version
 from time import time
@@ -9,14 +10,21 @@ import readability
 from cassis import load_typesystem
 from fastapi import FastAPI, Response
 from fastapi.responses import PlainTextResponse
+from nltk.stem.porter import PorterStemmer
+from nltk.tokenize import TweetTokenizer, sent_tokenize
 from pydantic import BaseModel
 from pydantic_settings import BaseSettings
+from readability.scorers import Smog
+from readability.text.analyzer import Analyzer, AnalyzerStatistics
+from readability.text.syllables import count as count_syllables
 
 
 class Settings(BaseSettings):
     annotator_name: str
     annotator_version: str
     log_level: str
+    # Max number of distinct tokens with cached statistics
+    token_cache_size: int = 100000
 
     class Config:
         env_prefix = 'duui_readability_'
@@ -43,13 +51,24 @@ SUPPORTED_LANGS = [
 ]
 
 
-class TextImagerRequest(BaseModel):
-    lang: str
+class TextImagerSelection(BaseModel):
     text: str
     begin: int
     end: int
 
 
+class TextImagerRequest(BaseModel):
+    lang: str
+    # full document, used if no selections are given
+    text: Optional[str] = None
+    begin: Optional[int] = None
+    end: Optional[int] = None
+    # multiple texts (e.g. paragraphs) to process in one request
+    selections: Optional[List[TextImagerSelection]] = None
+    # metrics to compute, all if not set
+    metrics: Optional[List[str]] = None
+
+
 class AnnotationMeta(BaseModel):
     name: str
     version: str
@@ -113,6 +132,138 @@ with open(lua_communication_script_filename, 'rb') as f:
     logger.debug("Lua communication script:")
     logger.debug(lua_communication_script_filename)
 
+# Result fields of each metric, in order of the response
+METRICS = {
+    "flesch_kincaid": ["score", "grade_level"],
+    "flesch": ["score", "ease", "grade_levels"],
+    "gunning_fog": ["score", "grade_level"],
+    "coleman_liau": ["score", "grade_level"],
+    "dale_chall": ["score", "grade_levels"],
+    "ari": ["score", "grade_levels", "ages"],
+    "linsear_write": ["score", "grade_level"],
+    "smog": ["score", "grade_level"],
+    "spache": ["score", "grade_level"],
+}
+
+# The library reloads the word lists and creates a new tokenizer and stemmer for every text,
+# these are shared between all texts instead
+_base_analyzer = Analyzer()
+dale_chall_words = _base_analyzer._load_dale_chall()
+spache_words = _base_analyzer._load_spache()
+tokenizer = TweetTokenizer()
+porter_stemmer = PorterStemmer()
+
+
+@lru_cache(maxsize=settings.token_cache_size)
+def token_statistics(token):
+    # same checks as readability.text.analyzer.Analyzer._statistics, once per distinct token
+    if _base_analyzer._is_punctuation(token):
+        return None
+    syllables = count_syllables(token)
+    stem = porter_stemmer.stem(token.lower())
+    gunning_complex = syllables >= 3 and not (
+        _base_analyzer._is_proper_noun(token) or _base_analyzer._is_compound_word(token)
+    )
+    return syllables, len(token), gunning_complex, stem not in dale_chall_words, stem not in spache_words
+
+
+class SharedAnalyzer(Analyzer):
+    def analyze(self, text):
+        self._dale_chall_set = dale_chall_words
+        self._spache_set = spache_words
+        stats = self._statistics(text)
+        self.sentences = stats['sentences']  # used by smog
+        return AnalyzerStatistics(stats)
+
+    def _statistics(self, text):
+        syllable_count = 0
+        poly_syllable_count = 0
+        word_count = 0
+        letters_count = 0
+        gunning_complex_count = 0
+        dale_chall_complex_count = 0
+        spache_complex_count = 0
+
+        for t in tokenizer.tokenize(text):
+            token_stats = token_statistics(t)
+            if token_stats is None:
+                continue
+            syllables, letters, gunning_complex, dale_chall_complex, spache_complex = token_stats
+            word_count += 1
+            syllable_count += syllables
+            letters_count += letters
+            poly_syllable_count += 1 if syllables >= 3 else 0
+            gunning_complex_count += 1 if gunning_complex else 0
+            dale_chall_complex_count += 1 if dale_chall_complex else 0
+            spache_complex_count += 1 if spache_complex else 0
+
+        sentences = sent_tokenize(text)
+
+        return {
+            'num_syllables': syllable_count,
+            'num_poly_syllable_words': poly_syllable_count,
+            'num_words': word_count,
+            'num_sentences': len(sentences),
+            'num_letters': letters_count,
+            'num_gunning_complex': gunning_complex_count,
+            'num_dale_chall_complex': dale_chall_complex_count,
+            'num_spache_complex': spache_complex_count,
+            'sentences': sentences,
+        }
+
+
+class SharedSmog(Smog):
+    def _smog_text_stats(self, sentences):
+        # same sample as Smog, but analyzed with the shared analyzer
+        mid = len(sentences) // 2
+        smog_text = ' '.join(sentences[:10] + sentences[mid-5: mid+5] + sentences[-10:])
+        return SharedAnalyzer().analyze(smog_text)
+
+
+class SharedReadability(readability.Readability):
+    def __init__(self, text):
+        self._analyzer = SharedAnalyzer()
+        self._statistics = self._analyzer.analyze(text)
+
+    def smog(self, all_sentences=False):
+        return SharedSmog(self._statistics, self._analyzer.sentences, all_sentences=all_sentences).score()
+
+
+def process_selection(selection, metrics):
+    # text statistics are computed once, all metrics are derived from them
+    r = SharedReadability(selection.text)
+
+    results = []
+    for metric in metrics:
+        try:
+            if metric not in METRICS:
+                raise ValueError(f"Unknown readability metric \"{metric}\"")
+            rr = getattr(r, metric)()
+            results.append(TextImagerCategory(
+                value=metric,
+                score=rr.score,
+                tags=json.dumps({
+                    field: getattr(rr, field)
+                    for field in METRICS[metric]
+                }),
+                begin=selection.begin,
+                end=selection.end
+            ))
+        except Exception as ex:
+            logger.exception(ex)
+            results.append(TextImagerCategory(
+                value=metric,
+                score=None,
+                tags=json.dumps({
+                    "error": str(ex)
+                }),
+                begin=selection.begin,
+                end=selection.end
+            ))
+
+    return r._statistics.num_words, results
+
+
 app = FastAPI(
     title=settings.annotator_name,
     description="TTLab TextImager Readability",
@@ -180,228 +331,20 @@ def get_input_output() -> TextImagerInputOutput:
 def post_process(request: TextImagerRequest) -> TextImagerResponse:
     modification_timestamp_seconds = int(time())
 
+    selections = request.selections
+    if selections is None:
+        selections = [TextImagerSelection(text=request.text, begin=request.begin, end=request.end)]
+    metrics = request.metrics if request.metrics else list(METRICS.keys())
+
     results = []
-    r = readability.Readability(request.text)
-    if r._statistics.num_words < 100:
-        logger.error("Text has less than 100 words, readability analysis might not be generated")
-
-    try:
-        rr = r.flesch_kincaid()
-        results.append(TextImagerCategory(
-            value="flesch_kincaid",
-            score=rr.score,
-            tags=json.dumps({
-                "score": rr.score,
-                "grade_level": rr.grade_level
-            }),
-            begin=request.begin,
-            end=request.end
-        ))
-    except Exception as ex:
-        logger.exception(ex)
-        results.append(TextImagerCategory(
-            value="flesch_kincaid",
-            score=None,
-            tags=json.dumps({
-                "error": str(ex)
-            }),
-            begin=request.begin,
-            end=request.end
-        ))
-
-    try:
-        rr = r.flesch()
-        results.append(TextImagerCategory(
-            value="flesch",
-            score=rr.score,
-            tags=json.dumps({
-                "score": rr.score,
-                "ease": rr.ease,
-                "grade_levels": rr.grade_levels
-            }),
-            begin=request.begin,
-            end=request.end
-        ))
-    except Exception as ex:
-        logger.exception(ex)
-        results.append(TextImagerCategory(
-            value="flesch",
-            score=None,
-            tags=json.dumps({
-                "error": str(ex)
-            }),
-            begin=request.begin,
-            end=request.end
-        ))
-
-    try:
-        rr = r.gunning_fog()
-        results.append(TextImagerCategory(
-            value="gunning_fog",
-            score=rr.score,
-            tags=json.dumps({
-                "score": rr.score,
-                "grade_level": rr.grade_level
-            }),
-            begin=request.begin,
-            end=request.end
-        ))
-    except Exception as ex:
-        logger.exception(ex)
-        results.append(TextImagerCategory(
-            value="gunning_fog",
-            score=None,
-            tags=json.dumps({
-                "error": str(ex)
-            }),
-            begin=request.begin,
-            end=request.end
-        ))
-
-    try:
-        rr = r.coleman_liau()
-        results.append(TextImagerCategory(
-            value="coleman_liau",
-            score=rr.score,
-            tags=json.dumps({
-                "score": rr.score,
-                "grade_level": rr.grade_level
-            }),
-            begin=request.begin,
-            end=request.end
-        ))
-    except Exception as ex:
-        logger.exception(ex)
-        results.append(TextImagerCategory(
-            value="coleman_liau",
-            score=None,
-            tags=json.dumps({
-                "error": str(ex)
-            }),
-            begin=request.begin,
-            end=request.end
-        ))
-
-    try:
-        rr = r.dale_chall()
-        results.append(TextImagerCategory(
-            value="dale_chall",
-            score=rr.score,
-            tags=json.dumps({
-                "score": rr.score,
-                "grade_levels": rr.grade_levels
-            }),
-            begin=request.begin,
-            end=request.end
-        ))
-    except Exception as ex:
-        logger.exception(ex)
-        results.append(TextImagerCategory(
-            value="dale_chall",
-            score=None,
-            tags=json.dumps({
-                "error": str(ex)
-            }),
-            begin=request.begin,
-            end=request.end
-        ))
-
-    try:
-        rr = r.ari()
-        results.append(TextImagerCategory(
-            value="ari",
-            score=rr.score,
-            tags=json.dumps({
-                "score": rr.score,
-                "grade_levels": rr.grade_levels,
-                "ages": rr.ages
-            }),
-            begin=request.begin,
-            end=request.end
-        ))
-    except Exception as ex:
-        logger.exception(ex)
-        results.append(TextImagerCategory(
-            value="ari",
-            score=None,
-            tags=json.dumps({
-                "error": str(ex)
-            }),
-            begin=request.begin,
-            end=request.end
-        ))
-
-    try:
-        rr = r.linsear_write()
-        results.append(TextImagerCategory(
-            value="linsear_write",
-            score=rr.score,
-            tags=json.dumps({
-                "score": rr.score,
-                "grade_level": rr.grade_level,
-            }),
-            begin=request.begin,
-            end=request.end
-        ))
-    except Exception as ex:
-        logger.exception(ex)
-        results.append(TextImagerCategory(
-            value="linsear_write",
-            score=None,
-            tags=json.dumps({
-                "error": str(ex)
-            }),
-            begin=request.begin,
-            end=request.end
-        ))
-
-    try:
-        rr = r.smog()
-        results.append(TextImagerCategory(
-            value="smog",
-            score=rr.score,
-            tags=json.dumps({
-                "score": rr.score,
-                "grade_level": rr.grade_level,
-            }),
-            begin=request.begin,
-            end=request.end
-        ))
-    except Exception as ex:
-        logger.exception(ex)
-        results.append(TextImagerCategory(
-            value="smog",
-            score=None,
-            tags=json.dumps({
-                "error": str(ex)
-            }),
-            begin=request.begin,
-            end=request.end
-        ))
-
-    try:
-        rr = r.spache()
-        results.append(TextImagerCategory(
-            value="spache",
-            score=rr.score,
-            tags=json.dumps({
-                "score": rr.score,
-                "grade_level": rr.grade_level,
-            }),
-            begin=request.begin,
-            end=request.end
-        ))
-    except Exception as ex:
-        logger.exception(ex)
-        results.append(TextImagerCategory(
-            value="spache",
-            score=None,
-            tags=json.dumps({
-                "error": str(ex)
-            }),
-            begin=request.begin,
-            end=request.end
-        ))
+    short_selections = 0
+    for selection in selections:
+        num_words, selection_results = process_selection(selection, metrics)
+        if num_words < 100:
+            short_selections += 1
+        results.extend(selection_results)
+    if short_selections > 0:
+        logger.error("%d of %d texts have less than 100 words, readability analysis might not be generated", short_selections, len(selections))
 
     meta = AnnotationMeta(
         name=settings.annotator_name,
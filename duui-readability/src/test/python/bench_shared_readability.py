@@ -0,0 +1,47 @@
+import argparse
+import logging
+import os
+import sys
+import time
+
+from test_shared_readability import COMPONENT_DIR, library_results, load_service, patch_sentence_tokenizer, synthetic_text
+
+
+def benchmark(service, selection_counts, n_words):
+    metrics = list(service.METRICS)
+    # load the word lists and the tokenizers outside of the measurements
+    warmup = service.TextImagerSelection(text=synthetic_text(n_words), begin=0, end=1)
+    library_results(service, warmup, metrics)
+    service.process_selection(warmup, metrics)
+    for count in selection_counts:
+        selections = [
+            service.TextImagerSelection(text=synthetic_text(n_words, seed), begin=seed, end=seed + 1)
+            for seed in range(1, count + 1)
+        ]
+        start = time.perf_counter()
+        for selection in selections:
+            library_results(service, selection, metrics)
+        library_time = time.perf_counter() - start
+        service.token_statistics.cache_clear()
+        start = time.perf_counter()
+        service.post_process(service.TextImagerRequest(lang="en", selections=selections, metrics=metrics))
+        shared_time = time.perf_counter() - start
+        print(
+            f"{count} selections of {n_words} words: per metric {library_time:.3f}s, shared {shared_time:.3f}s, "
+            f"speedup {library_time / shared_time:.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    # e.g. python src/test/python/bench_shared_readability.py --selections 10 100 --words 300
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--selections", type=int, nargs="+", default=[10, 100])
+    parser.add_argument("--words", type=int, default=300)
+    args = parser.parse_args()
+    os.chdir(COMPONENT_DIR)
+    sys.path.insert(0, str(COMPONENT_DIR))
+    service = load_service(os.environ.__setitem__)
+    patch_sentence_tokenizer(setattr, service)
+    # texts below 30 sentences log the failed smog scores
+    logging.disable(logging.ERROR)
+    benchmark(service, args.selections, args.words)
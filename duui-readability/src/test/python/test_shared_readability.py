@@ -0,0 +1,133 @@
+import importlib
+import json
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+readability = pytest.importorskip("readability")
+nltk = pytest.importorskip("nltk")
+from nltk.tokenize.punkt import PunktSentenceTokenizer  # noqa: E402
+
+COMPONENT_DIR = Path(__file__).resolve().parents[3]
+
+VOCABULARY = (
+    "the a of and to in is it that was he for on are as with his they at be this from have or by one had "
+    "not but what all were when we there can an your which their said if do will each about how up out them "
+    "then she many some so these would other into has more her two like him see time could no make than first "
+    "government university information development international environment organization particularly "
+    "responsibility communication understanding administration opportunity extraordinary community political "
+    "Frankfurt Germany Smith well-known long-term self-explanatory don't it's 42 3.5 #hashtag @user :)"
+).split()
+
+
+def load_service(set_env):
+    set_env("DUUI_READABILITY_ANNOTATOR_NAME", "duui-readability")
+    set_env("DUUI_READABILITY_ANNOTATOR_VERSION", "0.0.1")
+    set_env("DUUI_READABILITY_LOG_LEVEL", "WARNING")
+    module_name = "src.main.python.duui"
+    sys.modules.pop(module_name, None)
+    return importlib.import_module(module_name)
+
+
+def patch_sentence_tokenizer(set_attr, service):
+    # without the punkt_tab data of NLTK, the library and the service both split sentences with an
+    # untrained Punkt tokenizer, the comparison only needs both sides to use the same one
+    try:
+        nltk.data.find("tokenizers/punkt_tab/english/")
+    except LookupError:
+        sent_tokenize = PunktSentenceTokenizer().tokenize
+        set_attr(sys.modules["readability.text.analyzer"], "sent_tokenize", sent_tokenize)
+        set_attr(service, "sent_tokenize", sent_tokenize)
+
+
+def synthetic_text(n_words, seed=0):
+    rng = random.Random(seed)
+    sentences = []
+    remaining = n_words
+    while remaining > 0:
+        length = min(remaining, rng.randint(3, 25))
+        sentence = " ".join(rng.choice(VOCABULARY) for _ in range(length))
+        sentences.append(sentence[0].upper() + sentence[1:] + rng.choice([".", "!", "?", "..."]))
+        remaining -= length
+    return " ".join(sentences)
+
+
+def library_results(service, selection, metrics):
+    # the former service: py-readability-metrics with one call per metric
+    r = readability.Readability(selection.text)
+    results = []
+    for metric in metrics:
+        try:
+            rr = getattr(r, metric)()
+            tags = {field: getattr(rr, field) for field in service.METRICS[metric]}
+            results.append(service.TextImagerCategory(
+                value=metric, score=rr.score, tags=json.dumps(tags), begin=selection.begin, end=selection.end
+            ))
+        except Exception as ex:
+            results.append(service.TextImagerCategory(
+                value=metric, score=None, tags=json.dumps({"error": str(ex)}), begin=selection.begin,
+                end=selection.end
+            ))
+    return results
+
+
+@pytest.fixture
+def service(monkeypatch):
+    monkeypatch.chdir(COMPONENT_DIR)
+    monkeypatch.syspath_prepend(str(COMPONENT_DIR))
+    module = load_service(monkeypatch.setenv)
+    patch_sentence_tokenizer(monkeypatch.setattr, module)
+    return module
+
+
+@pytest.mark.parametrize("n_words,seed", [(50, 0), (120, 1), (400, 2), (1500, 3), (3000, 4)])
+def test_every_metric_matches_the_library(service, n_words, seed):
+    selection = service.TextImagerSelection(text=synthetic_text(n_words, seed), begin=3, end=42)
+    metrics = list(service.METRICS)
+
+    num_words, results = service.process_selection(selection, metrics)
+
+    assert num_words == readability.Readability(selection.text)._statistics.num_words
+    assert results == library_results(service, selection, metrics)
+    if n_words >= 1500:
+        # long enough for every metric, including smog with its 30 sentences
+        assert all(result.score is not None for result in results)
+
+
+def test_selections_are_processed_in_order(service):
+    texts = [synthetic_text(n, seed) for seed, n in enumerate([300, 80, 1200, 300])]
+    selections = []
+    begin = 0
+    for text in texts:
+        selections.append(service.TextImagerSelection(text=text, begin=begin, end=begin + len(text)))
+        begin += len(text) + 1
+    metrics = ["smog", "flesch", "dale_chall"]
+
+    response = service.post_process(service.TextImagerRequest(lang="en", selections=selections, metrics=metrics))
+
+    expected = []
+    for selection in selections:
+        expected.extend(library_results(service, selection, metrics))
+    assert response.results == expected
+
+
+def test_unknown_metric_is_reported_per_selection(service):
+    selections = [service.TextImagerSelection(text=synthetic_text(150, seed), begin=seed, end=seed + 1) for seed in range(3)]
+    request = service.TextImagerRequest(lang="en", selections=selections, metrics=["flesch", "not_a_metric"])
+
+    results = service.post_process(request).results
+
+    assert [r.value for r in results] == ["flesch", "not_a_metric"] * 3
+    assert [r.begin for r in results[1::2]] == [0, 1, 2]
+    assert all(r.score is None for r in results[1::2])
+    assert {json.loads(r.tags)["error"] for r in results[1::2]} == {'Unknown readability metric "not_a_metric"'}
+
+
+def test_document_text_without_selections(service):
+    text = synthetic_text(500, seed=7)
+    response = service.post_process(service.TextImagerRequest(lang="en", text=text, begin=0, end=len(text)))
+
+    selection = service.TextImagerSelection(text=text, begin=0, end=len(text))
+    assert response.results == library_results(service, selection, list(service.METRICS))
@@ -0,0 +1,57 @@
+from importlib import import_module
+from typing import TYPE_CHECKING, Any
+
+# The names are resolved on first access so that importing a single module, e.g.
+# duui_runtime.batching or duui_runtime.audio, does not import FastAPI, cassis
+# and pydantic-settings, which are only installed with the "service" extra
+_exports = {
+    "AnnotationMeta": "models",
+    "DocumentModification": "models",
+    "DuuiService": "service",
+    "InferenceExecutor": "executor",
+    "ModelPool": "pool",
+    "RequestMetrics": "metrics",
+    "RuntimeSettings": "settings",
+    "TextImagerCapability": "models",
+    "TextImagerDocumentation": "models",
+    "Typesystem": "resources",
+    "UimaSentence": "models",
+    "UimaSentenceSelection": "models",
+    "estimate_model_size": "pool",
+    "fix_unicode_problems": "text",
+    "load_lua_communication_script": "resources",
+    "load_typesystem_file": "resources",
+    "stage": "metrics",
+}
+
+__all__ = sorted(_exports)
+
+if TYPE_CHECKING:
+    from .executor import InferenceExecutor
+    from .metrics import RequestMetrics, stage
+    from .models import (
+        AnnotationMeta,
+        DocumentModification,
+        TextImagerCapability,
+        TextImagerDocumentation,
+        UimaSentence,
+        UimaSentenceSelection,
+    )
+    from .pool import ModelPool, estimate_model_size
+    from .resources import Typesystem, load_lua_communication_script, load_typesystem_file
+    from .service import DuuiService
+    from .settings import RuntimeSettings
+    from .text import fix_unicode_problems
+
+
+def __getattr__(name: str) -> Any:
+    module = _exports.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
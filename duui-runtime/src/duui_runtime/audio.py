@@ -0,0 +1,49 @@
+import subprocess
+from tempfile import NamedTemporaryFile
+
+import numpy as np
+
+# Sample rate expected by most speech models (Whisper, NeMo)
+DEFAULT_SAMPLE_RATE = 16000
+
+
+class AudioDecodingError(Exception):
+    pass
+
+
+def _ffmpeg_decode(source: str, data: bytes, sample_rate: int, channels: int) -> bytes:
+    command = [
+        "ffmpeg",
+        "-hide_banner",
+        "-loglevel", "error",
+        "-threads", "0",
+        "-i", source,
+        "-f", "f32le",
+        "-acodec", "pcm_f32le",
+        "-ac", str(channels),
+        "-ar", str(sample_rate),
+        "pipe:1",
+    ]
+    process = subprocess.run(command, input=data, capture_output=True)
+    if process.returncode != 0:
+        raise AudioDecodingError(process.stderr.decode("utf-8", errors="replace"))
+    return process.stdout
+
+
+def decode_audio(data: bytes, sample_rate: int = DEFAULT_SAMPLE_RATE, channels: int = 1) -> np.ndarray:
+    # Decode any audio format supported by ffmpeg into a float32 buffer, the bytes
+    # are piped through stdin/stdout without touching the disk. Containers that can
+    # not be read from a pipe (e.g. mp4 with the index at the end) fall back to a
+    # temporary file as ffmpeg needs to seek in these.
+    try:
+        raw = _ffmpeg_decode("pipe:0", data, sample_rate, channels)
+    except AudioDecodingError:
+        with NamedTemporaryFile() as fp:
+            fp.write(data)
+            fp.flush()
+            raw = _ffmpeg_decode(fp.name, b"", sample_rate, channels)
+
+    audio = np.frombuffer(raw, dtype=np.float32).copy()
+    if channels > 1:
+        audio = audio.reshape(-1, channels)
+    return audio
@@ -0,0 +1,67 @@
+from typing import Any, List, Sequence
+
+import numpy as np
+import torch
+
+# Default number of (padded) tokens per forward pass
+DEFAULT_MAX_TOKENS = 8192
+
+
+def token_budget_batches(lengths: Sequence[int], max_tokens: int = DEFAULT_MAX_TOKENS, max_batch_size: int = 0) -> List[List[int]]:
+    # Group the indices of the inputs into batches, inputs are sorted by length so that
+    # each batch contains inputs of similar length and the padded size of every batch
+    # (batch size * longest input) stays under the token budget.
+    # Inputs longer than the budget are put in a batch of their own.
+    order = sorted(range(len(lengths)), key=lambda i: lengths[i], reverse=True)
+
+    batches = []
+    batch = []
+    batch_max_length = 0
+    for i in order:
+        length = max(1, lengths[i])
+        new_max_length = max(batch_max_length, length)
+        too_many_tokens = new_max_length * (len(batch) + 1) > max_tokens
+        too_many_inputs = 0 < max_batch_size <= len(batch)
+        if batch and (too_many_tokens or too_many_inputs):
+            batches.append(batch)
+            batch = []
+            new_max_length = length
+        batch.append(i)
+        batch_max_length = new_max_length
+    if batch:
+        batches.append(batch)
+
+    return batches
+
+
+class TokenBudgetBatcher:
+    # Runs a sequence classification model (single forward pass per input) in
+    # length sorted micro-batches under a token budget instead of one giant padded
+    # batch, the logits are returned in the original order of the texts.
+    def __init__(self, tokenizer: Any, model: Any, device: Any, max_tokens: int = DEFAULT_MAX_TOKENS, max_length: int = 512, max_batch_size: int = 0):
+        self.tokenizer = tokenizer
+        self.model = model
+        self.device = device
+        self.max_tokens = max_tokens
+        self.max_length = max_length
+        self.max_batch_size = max_batch_size
+
+    def logits(self, texts: List[str]) -> np.ndarray:
+        if len(texts) == 0:
+            return np.zeros((0, self.model.config.num_labels), dtype=np.float32)
+
+        # tokenize without padding once, padding is added per batch
+        encodings = self.tokenizer(texts, truncation=True, max_length=self.max_length)
+        lengths = [len(ids) for ids in encodings["input_ids"]]
+
+        results: List[Any] = [None] * len(texts)
+        with torch.inference_mode():
+            for batch in token_budget_batches(lengths, self.max_tokens, self.max_batch_size):
+                features = [{key: encodings[key][i] for key in encodings.keys()} for i in batch]
+                inputs = self.tokenizer.pad(features, return_tensors="pt").to(self.device)
+                outputs = self.model(**inputs)
+                logits = outputs[0].float().cpu().numpy()
+                for i, row in zip(batch, logits):
+                    results[i] = row
+
+        return np.stack(results)
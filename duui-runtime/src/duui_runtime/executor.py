@@ -0,0 +1,26 @@
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, TypeVar
+
+T = TypeVar("T")
+
+
+class InferenceExecutor:
+    # Runs blocking inference in a bounded thread pool so that async endpoints do not
+    # block the event loop, i.e. /v1/communication_layer and health checks stay responsive
+    # while a large document is processed. The number of workers also bounds how many
+    # requests run inference at the same time.
+    def __init__(self, max_workers: int = 1, thread_name_prefix: str = "duui-inference"):
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=thread_name_prefix)
+
+    async def run(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        # copy the context to keep the request metrics available in the worker thread
+        context = contextvars.copy_context()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(context.run, func, *args, **kwargs))
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait)
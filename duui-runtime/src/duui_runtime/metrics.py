@@ -0,0 +1,112 @@
+import logging
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from threading import Lock
+from time import perf_counter
+from typing import Deque, Dict, Iterator, List, Optional
+
+from fastapi import Request, Response
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+# Stage timings of the request currently processed, in ms
+_request_stages: ContextVar[Optional[Dict[str, float]]] = ContextVar("duui_request_stages", default=None)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    # Time a part of the request processing, e.g. "load_model" or "inference",
+    # the result is added to the metrics of the current request if there is one
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        stages = _request_stages.get()
+        if stages is not None:
+            stages[name] = stages.get(name, 0.0) + (perf_counter() - start) * 1000
+
+
+class RequestTiming(BaseModel):
+    method: str
+    path: str
+    status_code: int
+    duration_ms: float
+    stages: Dict[str, float]
+
+
+class EndpointSummary(BaseModel):
+    count: int
+    mean_ms: float
+    p50_ms: float
+    p95_ms: float
+    max_ms: float
+
+
+class MetricsSummary(BaseModel):
+    endpoints: Dict[str, EndpointSummary]
+    recent: List[RequestTiming]
+
+
+def _percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(q * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class RequestMetrics:
+    # HTTP middleware collecting the duration of every request and its stages,
+    # the timings are returned in the "Server-Timing" header and kept for /v1/metrics
+    def __init__(self, history_size: int = 100):
+        self._history: Deque[RequestTiming] = deque(maxlen=history_size)
+        self._lock = Lock()
+
+    async def __call__(self, request: Request, call_next) -> Response:
+        stages: Dict[str, float] = {}
+        token = _request_stages.set(stages)
+        start = perf_counter()
+        try:
+            response = await call_next(request)
+        finally:
+            _request_stages.reset(token)
+        duration_ms = (perf_counter() - start) * 1000
+
+        timing = RequestTiming(
+            method=request.method,
+            path=request.url.path,
+            status_code=response.status_code,
+            duration_ms=duration_ms,
+            stages=dict(stages),
+        )
+        with self._lock:
+            self._history.append(timing)
+
+        server_timing = [f"total;dur={duration_ms:.1f}"]
+        server_timing.extend(f"{name};dur={ms:.1f}" for name, ms in stages.items())
+        response.headers["Server-Timing"] = ", ".join(server_timing)
+
+        logger.debug("%s %s took %.1f ms %s", timing.method, timing.path, duration_ms, timing.stages)
+        return response
+
+    def summary(self) -> MetricsSummary:
+        with self._lock:
+            history = list(self._history)
+
+        durations: Dict[str, List[float]] = {}
+        for timing in history:
+            durations.setdefault(f"{timing.method} {timing.path}", []).append(timing.duration_ms)
+
+        return MetricsSummary(
+            endpoints={
+                endpoint: EndpointSummary(
+                    count=len(values),
+                    mean_ms=sum(values) / len(values),
+                    p50_ms=_percentile(values, 0.5),
+                    p95_ms=_percentile(values, 0.95),
+                    max_ms=max(values),
+                )
+                for endpoint, values in durations.items()
+            },
+            recent=history,
+        )
@@ -0,0 +1,59 @@
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+
+# UIMA type: adds metadata to each annotation
+class AnnotationMeta(BaseModel):
+    name: str
+    version: str
+    modelName: str
+    modelVersion: str
+
+
+# UIMA type: mark modification of the document
+class DocumentModification(BaseModel):
+    user: str
+    timestamp: int
+    comment: str
+
+
+class UimaSentence(BaseModel):
+    text: str
+    begin: int
+    end: int
+
+
+class UimaSentenceSelection(BaseModel):
+    selection: str
+    sentences: List[UimaSentence]
+
+
+# Capabilities
+class TextImagerCapability(BaseModel):
+    # List of supported languages by the annotator
+    # - ISO 639-1 (two letter codes) as default in meta data
+    # - ISO 639-3 (three letters) optionally in extra meta to allow a finer mapping
+    supported_languages: List[str]
+    # Are results on same inputs reproducible without side effects?
+    reproducible: bool
+
+
+# Documentation response
+class TextImagerDocumentation(BaseModel):
+    # Name of this annotator
+    annotator_name: str
+    # Version of this annotator
+    version: str
+    # Annotator implementation language (Python, Java, ...)
+    implementation_lang: Optional[str] = None
+    # Optional map of additional meta data
+    meta: Optional[dict] = None
+    # Docker container id, if any
+    docker_container_id: Optional[str] = None
+    # Optional map of supported parameters
+    parameters: Optional[dict] = None
+    # Capabilities of this annotator
+    capability: TextImagerCapability
+    # Analysis engine XML, if available
+    implementation_specific: Optional[str] = None
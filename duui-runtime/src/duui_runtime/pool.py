@@ -0,0 +1,166 @@
+import logging
+from collections import OrderedDict
+from threading import Lock
+from time import perf_counter
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+def estimate_model_size(model: Any) -> int:
+    # Estimate the memory of a model in bytes from its torch parameters and buffers,
+    # wrapper objects (HF pipelines, the checker classes of the components, ...) are
+    # searched for a "model" attribute, unknown objects are counted as 0 bytes
+    seen = set()
+    candidates = [model]
+    size = 0
+    while candidates:
+        obj = candidates.pop()
+        if obj is None or id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        if callable(getattr(obj, "parameters", None)) and callable(getattr(obj, "buffers", None)):
+            try:
+                for tensor in list(obj.parameters()) + list(obj.buffers()):
+                    size += tensor.numel() * tensor.element_size()
+                continue
+            except Exception as ex:
+                logger.debug("Could not estimate size of %s: %s", type(obj).__name__, ex)
+        candidates.append(getattr(obj, "model", None))
+    return size
+
+
+class _PoolEntry:
+    def __init__(self, model: Any, size: int):
+        self.model = model
+        self.size = size
+
+
+class ModelPool:
+    # Bounded LRU pool of loaded models, replaces the per component
+    # "lru_cache + global Lock" pattern:
+    # - models with different keys are loaded concurrently, the same key is only loaded once
+    # - the pool is limited by the number of models and optionally by their estimated memory
+    # - the lock is not held during inference, components that need exclusive access to
+    #   a model still have to synchronize this themselves
+    def __init__(
+        self,
+        max_models: int = 1,
+        max_memory_mb: int = 0,
+        size_of: Callable[[Any], int] = estimate_model_size,
+        on_evict: Optional[Callable[[Hashable, Any], None]] = None,
+    ):
+        self.max_models = max_models
+        self.max_memory_bytes = max_memory_mb * 1024 * 1024
+        self._size_of = size_of
+        self._on_evict = on_evict
+        self._entries: "OrderedDict[Hashable, _PoolEntry]" = OrderedDict()
+        self._lock = Lock()
+        # one lock per key that is loaded or being loaded, dropped again when the key is evicted
+        self._load_locks: Dict[Hashable, Lock] = {}
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def keys(self) -> List[Hashable]:
+        with self._lock:
+            return list(self._entries.keys())
+
+    @property
+    def memory_bytes(self) -> int:
+        with self._lock:
+            return sum(e.size for e in self._entries.values())
+
+    def _lookup(self, key: Hashable) -> Optional[_PoolEntry]:
+        # must be called with self._lock held
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def get(self, key: Hashable, loader: Callable[[], T]) -> T:
+        with self._lock:
+            entry = self._lookup(key)
+            if entry is not None:
+                return entry.model
+            load_lock = self._load_locks.setdefault(key, Lock())
+
+        with load_lock:
+            # another request might have loaded the model while waiting
+            with self._lock:
+                entry = self._lookup(key)
+                if entry is not None:
+                    return entry.model
+
+            logger.info("Loading model \"%s\"...", key)
+            start = perf_counter()
+            try:
+                model = loader()
+            except Exception:
+                with self._lock:
+                    self._load_locks.pop(key, None)
+                raise
+            size = self._size_of(model)
+            logger.info("Finished loading model \"%s\" in %.2fs (~%.1f MB)", key, perf_counter() - start, size / 1024 / 1024)
+
+            with self._lock:
+                self._entries[key] = _PoolEntry(model, size)
+                evicted = self._shrink(keep=key)
+
+        for evicted_key, evicted_entry in evicted:
+            self._evicted(evicted_key, evicted_entry)
+
+        return model
+
+    def evict(self, key: Hashable) -> bool:
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._load_locks.pop(key, None)
+        if entry is None:
+            return False
+        self._evicted(key, entry)
+        return True
+
+    def clear(self) -> None:
+        with self._lock:
+            evicted = list(self._entries.items())
+            self._entries.clear()
+            for key, _ in evicted:
+                self._load_locks.pop(key, None)
+        for key, entry in evicted:
+            self._evicted(key, entry)
+
+    def _shrink(self, keep: Hashable) -> List[Tuple[Hashable, _PoolEntry]]:
+        # must be called with self._lock held, never evicts the model that was just loaded
+        evicted = []
+        while len(self._entries) > 1:
+            over_count = 0 < self.max_models < len(self._entries)
+            over_memory = 0 < self.max_memory_bytes < sum(e.size for e in self._entries.values())
+            if not over_count and not over_memory:
+                break
+            oldest_key = next(iter(self._entries))
+            if oldest_key == keep:
+                break
+            evicted.append((oldest_key, self._entries.pop(oldest_key)))
+            self._load_locks.pop(oldest_key, None)
+
+        if 0 < self.max_memory_bytes < self._entries[keep].size:
+            logger.warning("Model \"%s\" alone exceeds the model pool memory limit of %d MB", keep, self.max_memory_bytes // 1024 // 1024)
+
+        return evicted
+
+    def _evicted(self, key: Hashable, entry: _PoolEntry) -> None:
+        logger.info("Unloading model \"%s\"", key)
+        if self._on_evict is not None:
+            try:
+                self._on_evict(key, entry.model)
+            except Exception as ex:
+                logger.exception("Failed to run eviction hook for model \"%s\": %s", key, ex)
@@ -0,0 +1,32 @@
+import logging
+
+from cassis import TypeSystem, load_typesystem
+
+logger = logging.getLogger(__name__)
+
+
+class Typesystem:
+    # Typesystem of a component together with its serialized XML,
+    # the XML is rendered once at startup instead of on every request
+    def __init__(self, typesystem: TypeSystem):
+        self.typesystem = typesystem
+        self.xml = typesystem.to_xml()
+        self.xml_content = self.xml.encode("utf-8")
+
+
+def load_typesystem_file(typesystem_filename: str) -> Typesystem:
+    logger.info("Loading typesystem from \"%s\"", typesystem_filename)
+    with open(typesystem_filename, 'rb') as f:
+        typesystem = Typesystem(load_typesystem(f))
+    logger.debug("Base typesystem:")
+    logger.debug(typesystem.xml)
+    return typesystem
+
+
+def load_lua_communication_script(lua_communication_script_filename: str) -> str:
+    logger.info("Loading Lua communication script from \"%s\"", lua_communication_script_filename)
+    with open(lua_communication_script_filename, 'rb') as f:
+        lua_communication_script = f.read().decode("utf-8")
+    logger.debug("Lua communication script:")
+    logger.debug(lua_communication_script)
+    return lua_communication_script
@@ -0,0 +1,129 @@
+import logging
+from contextlib import asynccontextmanager
+from time import time
+from typing import Any, AsyncIterator, Callable, Dict, Optional, TypeVar
+
+from fastapi import FastAPI, Response
+from fastapi.responses import PlainTextResponse
+
+from .executor import InferenceExecutor
+from .metrics import MetricsSummary, RequestMetrics
+from .models import AnnotationMeta, DocumentModification, TextImagerDocumentation
+from .pool import ModelPool
+from .resources import Typesystem, load_lua_communication_script, load_typesystem_file
+from .settings import RuntimeSettings
+
+T = TypeVar("T")
+
+DEFAULT_CONTACT: Dict[str, str] = {
+    "name": "TTLab Team",
+    "url": "https://texttechnologylab.org",
+}
+
+DEFAULT_LICENSE: Dict[str, str] = {
+    "name": "AGPL",
+    "url": "http://www.gnu.org/licenses/agpl-3.0.en.html",
+}
+
+
+class DuuiService:
+    # Owns everything a Python DUUI component needs besides its own processing:
+    # settings, logging, typesystem, Lua script, the FastAPI app with the standard
+    # v1 endpoints, the model pool, the inference executor and request metrics.
+    # Components only add their "/v1/process" endpoint to "service.app".
+    def __init__(
+        self,
+        settings: RuntimeSettings,
+        description: str,
+        documentation: Optional[Callable[[], TextImagerDocumentation]] = None,
+        contact: Optional[Dict[str, str]] = None,
+        on_model_evict: Optional[Callable[[Any, Any], None]] = None,
+    ):
+        self.settings = settings
+
+        logging.basicConfig(
+            format='%(asctime)s %(levelname)-8s %(message)s',
+            level=settings.log_level,
+            datefmt='%Y-%m-%d %H:%M:%S')
+        self.logger = logging.getLogger(settings.annotator_name)
+        self.logger.info("TTLab TextImager DUUI %s", description)
+        self.logger.info("Name: %s", settings.annotator_name)
+        self.logger.info("Version: %s", settings.annotator_version)
+
+        self.typesystem: Optional[Typesystem] = None
+        if settings.typesystem_filename is not None:
+            self.typesystem = load_typesystem_file(settings.typesystem_filename)
+
+        self.lua_communication_script: Optional[str] = None
+        if settings.lua_communication_script_filename is not None:
+            self.lua_communication_script = load_lua_communication_script(settings.lua_communication_script_filename)
+
+        self.models = ModelPool(
+            max_models=settings.model_cache_size,
+            max_memory_mb=settings.model_cache_max_memory_mb,
+            on_evict=on_model_evict,
+        )
+        self.executor = InferenceExecutor(max_workers=settings.executor_workers)
+        self.metrics = RequestMetrics(history_size=settings.metrics_history_size)
+
+        self.app = FastAPI(
+            openapi_url="/openapi.json",
+            docs_url="/api",
+            redoc_url=None,
+            title=settings.annotator_name,
+            description=description,
+            version=settings.annotator_version,
+            terms_of_service="https://www.texttechnologylab.org/legal_notice/",
+            contact=contact or DEFAULT_CONTACT,
+            license_info=DEFAULT_LICENSE,
+            lifespan=self._lifespan,
+        )
+        self.app.middleware("http")(self.metrics)
+        self._add_routes(documentation)
+
+    @asynccontextmanager
+    async def _lifespan(self, app: FastAPI) -> AsyncIterator[None]:
+        yield
+        self.executor.shutdown()
+
+    def _add_routes(self, documentation: Optional[Callable[[], TextImagerDocumentation]]) -> None:
+        if self.lua_communication_script is not None:
+            @self.app.get("/v1/communication_layer", response_class=PlainTextResponse)
+            def get_communication_layer() -> str:
+                return self.lua_communication_script
+
+        if self.typesystem is not None:
+            @self.app.get("/v1/typesystem")
+            def get_typesystem() -> Response:
+                return Response(
+                    content=self.typesystem.xml_content,
+                    media_type="application/xml"
+                )
+
+        if documentation is not None:
+            @self.app.get("/v1/documentation")
+            def get_documentation() -> TextImagerDocumentation:
+                return documentation()
+
+        @self.app.get("/v1/metrics")
+        def get_metrics() -> MetricsSummary:
+            return self.metrics.summary()
+
+    async def run(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        # Run blocking processing off the event loop
+        return await self.executor.run(func, *args, **kwargs)
+
+    def annotation_meta(self, model_name: str, model_version: str) -> AnnotationMeta:
+        return AnnotationMeta(
+            name=self.settings.annotator_name,
+            version=self.settings.annotator_version,
+            modelName=model_name,
+            modelVersion=model_version,
+        )
+
+    def document_modification(self, timestamp: Optional[int] = None, comment: Optional[str] = None) -> DocumentModification:
+        return DocumentModification(
+            user=self.settings.annotator_name,
+            timestamp=timestamp if timestamp is not None else int(time()),
+            comment=comment or f"{self.settings.annotator_name} ({self.settings.annotator_version})",
+        )
@@ -0,0 +1,27 @@
+from typing import Optional
+
+from pydantic_settings import BaseSettings
+
+
+# Settings shared by all components using the runtime
+# These are automatically loaded from env variables, components can extend
+# this class with their own fields (model_name, model_source, ...)
+class RuntimeSettings(BaseSettings):
+    # Name of this annotator
+    annotator_name: str
+    # Version of this annotator
+    annotator_version: str
+    # Log level
+    log_level: str = "INFO"
+    # Max number of models kept loaded in the model pool
+    model_cache_size: int = 1
+    # Max memory in MB all pooled models may use, 0 disables the memory limit
+    model_cache_max_memory_mb: int = 0
+    # Number of threads running blocking inference off the event loop
+    executor_workers: int = 1
+    # Number of finished requests kept for the /v1/metrics endpoint
+    metrics_history_size: int = 100
+    # Path to the typesystem, optional if the component does not provide one
+    typesystem_filename: Optional[str] = None
+    # Path to the Lua communication script
+    lua_communication_script_filename: Optional[str] = None
@@ -0,0 +1,53 @@
+import random
+from typing import Any, List, Sequence, Tuple
+
+# Tiny randomly initialized models for the tests and benchmarks of the components, so that
+# batching and selection code runs on the CPU without downloading weights (requires the
+# "test" extra, torch, tokenizers and transformers are imported on first use)
+
+WORDS = [f"word{chr(97 + i)}{chr(97 + j)}" for i in range(26) for j in range(26)]
+SPECIAL_TOKENS = ["[PAD]", "[UNK]", "[CLS]", "[SEP]"]
+
+
+def tiny_tokenizer(words: Sequence[str] = WORDS) -> Any:
+    # word level tokenizer over SPECIAL_TOKENS + words, "[CLS] text [SEP]" like BERT
+    import tokenizers
+    import transformers
+
+    vocab = {token: i for i, token in enumerate([*SPECIAL_TOKENS, *words])}
+    backend = tokenizers.Tokenizer(tokenizers.models.WordLevel(vocab, unk_token="[UNK]"))
+    backend.pre_tokenizer = tokenizers.pre_tokenizers.Whitespace()
+    backend.post_processor = tokenizers.processors.TemplateProcessing(
+        single="[CLS] $A [SEP]", special_tokens=[("[CLS]", vocab["[CLS]"]), ("[SEP]", vocab["[SEP]"])]
+    )
+    return transformers.PreTrainedTokenizerFast(
+        tokenizer_object=backend, pad_token="[PAD]", unk_token="[UNK]", cls_token="[CLS]", sep_token="[SEP]",
+        model_max_length=512,
+    )
+
+
+def tiny_random_classifier(hidden_size: int = 32, layers: int = 2, num_labels: int = 3, seed: int = 0) -> Tuple[Any, Any]:
+    # BERT sequence classifier with random weights and the tiny_tokenizer, returns (tokenizer, model)
+    import torch
+    import transformers
+
+    tokenizer = tiny_tokenizer()
+    config = transformers.BertConfig(
+        vocab_size=len(tokenizer), hidden_size=hidden_size, num_hidden_layers=layers, num_attention_heads=2,
+        intermediate_size=hidden_size * 4, max_position_embeddings=512, num_labels=num_labels,
+    )
+    torch.manual_seed(seed)
+    return tokenizer, transformers.BertForSequenceClassification(config).eval()
+
+
+def save_tiny_random_classifier(path: str, **kwargs: Any) -> None:
+    # tiny_random_classifier as a local checkpoint, for components that load models by path
+    tokenizer, model = tiny_random_classifier(**kwargs)
+    model.save_pretrained(path)
+    tokenizer.save_pretrained(path)
+
+
+def random_texts(count: int, max_words: int, seed: int = 0) -> List[str]:
+    # texts of 1 to max_words random WORDS
+    rng = random.Random(seed)
+    return [" ".join(rng.choices(WORDS, k=rng.randint(1, max_words))) for _ in range(count)]
@@ -0,0 +1,6 @@
+def fix_unicode_problems(text: str) -> str:
+    # fix emoji in python string and prevent json error on response
+    # File "/usr/local/lib/python3.8/site-packages/starlette/responses.py", line 190, in render
+    # UnicodeEncodeError: 'utf-8' codec can't encode characters in position xx-yy: surrogates not allowed
+    clean_text = text.encode('utf-16', 'surrogatepass').decode('utf-16', 'surrogateescape')
+    return clean_text
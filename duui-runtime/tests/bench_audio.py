@@ -0,0 +1,48 @@
+import argparse
+import subprocess
+import time
+from tempfile import NamedTemporaryFile
+
+import numpy as np
+
+from duui_runtime.audio import decode_audio
+from test_audio import sine_wav
+
+
+def load_audio_from_file(path, sample_rate):
+    # the former whisperx.load_audio call: ffmpeg reads the file and writes 16 bit PCM
+    command = [
+        "ffmpeg", "-nostdin", "-threads", "0", "-i", path,
+        "-f", "s16le", "-ac", "1", "-acodec", "pcm_s16le", "-ar", str(sample_rate), "-",
+    ]
+    out = subprocess.run(command, capture_output=True, check=True).stdout
+    return np.frombuffer(out, np.int16).flatten().astype(np.float32) / 32768.0
+
+
+def temp_file_decode(data, sample_rate):
+    # the former whisperX request: the audio is written to a temporary file and decoded
+    # for the transcription and a second time for the alignment
+    with NamedTemporaryFile() as audio_file:
+        with open(audio_file.name, "wb") as fp:
+            fp.write(data)
+        load_audio_from_file(audio_file.name, sample_rate)
+        load_audio_from_file(audio_file.name, sample_rate)
+
+
+def benchmark(seconds, repeats):
+    data = sine_wav(seconds)
+    for name, decode in [("temp file, decoded twice", temp_file_decode), ("pipe, decoded once", decode_audio)]:
+        start = time.perf_counter()
+        for _ in range(repeats):
+            decode(data, sample_rate=16000)
+        print(f"{name}: {seconds:.0f}s audio, {(time.perf_counter() - start) / repeats * 1000:.0f} ms/request")
+
+
+if __name__ == "__main__":
+    # e.g. python tests/bench_audio.py --seconds 60 600
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, nargs="+", default=[60.0, 600.0])
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+    for seconds in args.seconds:
+        benchmark(seconds, args.repeats)
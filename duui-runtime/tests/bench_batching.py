@@ -0,0 +1,45 @@
+import argparse
+import resource
+import time
+
+import torch
+
+from duui_runtime.batching import TokenBudgetBatcher
+from duui_runtime.testing import random_texts, tiny_random_classifier
+
+
+def single_batch(tokenizer, model, texts):
+    # the former implementation: one padded forward pass over all texts
+    with torch.inference_mode():
+        inputs = tokenizer(texts, padding=True, truncation=True, max_length=512, return_tensors="pt")
+        return model(**inputs)[0].numpy()
+
+
+def benchmark(texts_count, max_tokens, variant):
+    # run each variant in its own process, ru_maxrss is the peak of the whole process
+    tokenizer, model = tiny_random_classifier(hidden_size=128, layers=4)
+    # a few long texts in many short ones, as in documents with headings and long paragraphs
+    texts = random_texts(texts_count, max_words=20) + random_texts(texts_count // 50, max_words=500, seed=1)
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    if variant == "single":
+        single_batch(tokenizer, model, texts)
+    else:
+        TokenBudgetBatcher(tokenizer, model, "cpu", max_tokens=max_tokens).logits(texts)
+    elapsed = time.perf_counter() - start
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(
+        f"{variant}: {len(texts)} texts, {len(texts) / elapsed:.0f} texts/s, "
+        f"peak RSS +{(rss_after - rss_before) / 1024:.0f} MB"
+    )
+
+
+if __name__ == "__main__":
+    # e.g. python tests/bench_batching.py single && python tests/bench_batching.py budget
+    parser = argparse.ArgumentParser()
+    parser.add_argument("variant", choices=["single", "budget"])
+    parser.add_argument("--texts", type=int, default=2000)
+    parser.add_argument("--max-tokens", type=int, default=8192)
+    args = parser.parse_args()
+    torch.set_num_threads(1)
+    benchmark(args.texts, args.max_tokens, args.variant)
@@ -0,0 +1,71 @@
+import io
+import shutil
+import subprocess
+import wave
+from tempfile import TemporaryDirectory
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from duui_runtime.audio import AudioDecodingError, decode_audio
+
+if shutil.which("ffmpeg") is None:
+    pytest.skip("ffmpeg is not installed", allow_module_level=True)
+
+
+def sine_wav(seconds, frequency=440.0, sample_rate=44100, channels=2):
+    # 16 bit PCM wav, as sent by most DUUI readers
+    samples = np.sin(2 * np.pi * frequency * np.arange(int(seconds * sample_rate)) / sample_rate)
+    pcm = (np.repeat(samples[:, None], channels, axis=1) * 0.5 * 32767).astype("<i2")
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as fp:
+        fp.setnchannels(channels)
+        fp.setsampwidth(2)
+        fp.setframerate(sample_rate)
+        fp.writeframes(pcm.tobytes())
+    return buffer.getvalue()
+
+
+def ffmpeg_convert(data, suffix, *options):
+    with TemporaryDirectory() as temp_dir:
+        source = Path(temp_dir) / "input.wav"
+        target = Path(temp_dir) / f"output{suffix}"
+        source.write_bytes(data)
+        subprocess.run(
+            ["ffmpeg", "-hide_banner", "-loglevel", "error", "-i", str(source), *options, str(target)], check=True
+        )
+        return target.read_bytes()
+
+
+def dominant_frequency(audio, sample_rate):
+    spectrum = np.abs(np.fft.rfft(audio))
+    return np.fft.rfftfreq(len(audio), 1 / sample_rate)[np.argmax(spectrum)]
+
+
+def test_wav_is_resampled_to_float32():
+    audio = decode_audio(sine_wav(2.0, channels=1), sample_rate=16000)
+
+    assert audio.dtype == np.float32
+    assert audio.ndim == 1
+    assert abs(len(audio) - 32000) <= 16
+    assert np.abs(audio).max() == pytest.approx(0.5, abs=0.01)
+    assert dominant_frequency(audio, 16000) == pytest.approx(440.0, abs=1.0)
+
+
+def test_channels():
+    assert decode_audio(sine_wav(1.0), sample_rate=16000).ndim == 1
+    assert decode_audio(sine_wav(1.0), sample_rate=16000, channels=2).shape[1] == 2
+
+
+def test_container_that_needs_seeking_falls_back_to_a_file():
+    # mp4 with the index at the end can not be read from a pipe
+    data = ffmpeg_convert(sine_wav(1.0), ".mp4", "-c:a", "aac")
+    audio = decode_audio(data, sample_rate=16000)
+    assert abs(len(audio) - 16000) <= 2048
+    assert dominant_frequency(audio, 16000) == pytest.approx(440.0, abs=2.0)
+
+
+def test_invalid_audio_raises():
+    with pytest.raises(AudioDecodingError):
+        decode_audio(b"not audio")
@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("transformers")
+pytest.importorskip("tokenizers")
+
+from duui_runtime.batching import TokenBudgetBatcher, token_budget_batches  # noqa: E402
+from duui_runtime.testing import random_texts, tiny_random_classifier  # noqa: E402
+
+
+def test_batches_stay_under_the_budget():
+    lengths = [5, 100, 20, 3, 100, 50, 700]
+    batches = token_budget_batches(lengths, max_tokens=200)
+
+    assert sorted(i for batch in batches for i in batch) == list(range(len(lengths)))
+    for batch in batches:
+        # inputs longer than the budget get a batch of their own
+        assert len(batch) == 1 or max(lengths[i] for i in batch) * len(batch) <= 200
+
+
+def test_max_batch_size():
+    batches = token_budget_batches([1] * 10, max_tokens=1000, max_batch_size=4)
+    assert [len(batch) for batch in batches] == [4, 4, 2]
+
+
+def test_logits_match_a_single_forward_pass_in_input_order():
+    tokenizer, model = tiny_random_classifier()
+    texts = random_texts(40, max_words=60)
+
+    batcher = TokenBudgetBatcher(tokenizer, model, "cpu", max_tokens=256)
+    logits = batcher.logits(texts)
+
+    with torch.inference_mode():
+        inputs = tokenizer(texts, padding=True, truncation=True, max_length=512, return_tensors="pt")
+        expected = model(**inputs)[0].numpy()
+    assert logits.shape == (40, 3)
+    np.testing.assert_allclose(logits, expected, atol=1e-4)
+    assert batcher.logits([]).shape == (0, 3)
@@ -0,0 +1,81 @@
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from duui_runtime.pool import ModelPool
+
+
+def test_same_key_is_loaded_once():
+    loads = []
+
+    def loader(key):
+        def load():
+            time.sleep(0.1)
+            loads.append(key)
+            return object()
+        return load
+
+    pool = ModelPool(max_models=2)
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        models = list(executor.map(lambda key: pool.get(key, loader(key)), ["a", "b"] * 8))
+
+    assert sorted(loads) == ["a", "b"]
+    assert len({id(m) for m in models}) == 2
+
+
+def test_least_recently_used_model_is_evicted():
+    evicted = []
+    pool = ModelPool(max_models=2, on_evict=lambda key, model: evicted.append(key))
+    pool.get("a", object)
+    pool.get("b", object)
+    pool.get("a", object)
+    pool.get("c", object)
+
+    assert evicted == ["b"]
+    assert pool.keys() == ["a", "c"]
+
+
+def test_load_locks_are_dropped_with_their_models():
+    pool = ModelPool(max_models=2)
+    for i in range(100):
+        pool.get(f"model-{i}", object)
+    assert sorted(pool._load_locks) == ["model-98", "model-99"]
+
+    pool.evict("model-98")
+    assert list(pool._load_locks) == ["model-99"]
+
+    def failing_loader():
+        raise RuntimeError("no such model")
+
+    with pytest.raises(RuntimeError):
+        pool.get("broken", failing_loader)
+    assert list(pool._load_locks) == ["model-99"]
+
+    pool.clear()
+    assert pool._load_locks == {}
+
+
+def test_memory_limit():
+    pool = ModelPool(max_models=0, max_memory_mb=2, size_of=lambda model: 1024 * 1024)
+    for key in "abc":
+        pool.get(key, object)
+
+    assert pool.keys() == ["b", "c"]
+    assert pool.memory_bytes == 2 * 1024 * 1024
+
+
+def test_helpers_do_not_import_the_service_dependencies():
+    code = (
+        "import sys\n"
+        "import duui_runtime\n"
+        "from duui_runtime.pool import ModelPool\n"
+        "from duui_runtime.text import fix_unicode_problems\n"
+        "from duui_runtime.batching import token_budget_batches\n"
+        "from duui_runtime.audio import decode_audio\n"
+        "print(sorted(m for m in ('fastapi', 'cassis', 'pydantic_settings') if m in sys.modules))\n"
+    )
+    output = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True).stdout
+    assert output.strip() == "[]"
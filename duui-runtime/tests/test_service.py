@@ -0,0 +1,132 @@
+from threading import Lock
+from typing import List
+
+import pytest
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+
+from duui_runtime import DuuiService, RuntimeSettings, UimaSentence, fix_unicode_problems, stage
+
+TYPESYSTEM = """<?xml version="1.0" encoding="UTF-8"?>
+<typeSystemDescription xmlns="http://uima.apache.org/resourceSpecifier">
+    <types>
+        <typeDescription>
+            <name>org.texttechnologylab.annotation.DummyLength</name>
+            <supertypeName>uima.tcas.Annotation</supertypeName>
+        </typeDescription>
+    </types>
+</typeSystemDescription>
+"""
+
+LUA = "-- dummy communication layer\n"
+
+
+class Settings(RuntimeSettings):
+    model_name: str = "dummy"
+    model_version: str = "0.1"
+
+
+class DUUIRequest(BaseModel):
+    sentences: List[UimaSentence]
+
+
+class DUUIResponse(BaseModel):
+    lengths: List[int]
+
+
+class DummyModel:
+    # tiny local model, counts how often it is loaded
+    loads = 0
+    loads_lock = Lock()
+
+    def __init__(self):
+        with DummyModel.loads_lock:
+            DummyModel.loads += 1
+
+    def predict(self, texts: List[str]) -> List[int]:
+        return [len(text) for text in texts]
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    typesystem_filename = tmp_path / "TypeSystem.xml"
+    typesystem_filename.write_text(TYPESYSTEM, encoding="utf-8")
+    lua_filename = tmp_path / "communication.lua"
+    lua_filename.write_text(LUA, encoding="utf-8")
+
+    monkeypatch.setenv("ANNOTATOR_NAME", "duui-dummy")
+    monkeypatch.setenv("ANNOTATOR_VERSION", "0.0.1")
+    monkeypatch.setenv("TYPESYSTEM_FILENAME", str(typesystem_filename))
+    monkeypatch.setenv("LUA_COMMUNICATION_SCRIPT_FILENAME", str(lua_filename))
+    monkeypatch.setenv("EXECUTOR_WORKERS", "2")
+    settings = Settings()
+
+    service = DuuiService(settings, description="Dummy annotator")
+
+    def process(texts: List[str]) -> List[int]:
+        with stage("load_model"):
+            model = service.models.get((settings.model_name, settings.model_version), DummyModel)
+        with stage("inference"):
+            return model.predict(texts)
+
+    @service.app.post("/v1/process")
+    async def post_process(request: DUUIRequest) -> DUUIResponse:
+        texts = [fix_unicode_problems(s.text) for s in request.sentences]
+        return DUUIResponse(lengths=await service.run(process, texts))
+
+    DummyModel.loads = 0
+    yield service
+    service.executor.shutdown()
+
+
+def test_standard_endpoints(service):
+    client = TestClient(service.app)
+
+    response = client.get("/v1/communication_layer")
+    assert response.status_code == 200
+    assert response.text == LUA
+
+    response = client.get("/v1/typesystem")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/xml"
+    assert b"org.texttechnologylab.annotation.DummyLength" in response.content
+
+
+def test_process_with_dummy_model(service):
+    client = TestClient(service.app)
+    request = {"sentences": [{"text": "Hallo Welt", "begin": 0, "end": 10}, {"text": "Test", "begin": 11, "end": 15}]}
+
+    for _ in range(3):
+        response = client.post("/v1/process", json=request)
+        assert response.status_code == 200
+        assert response.json() == {"lengths": [10, 4]}
+
+    # the model is loaded once and kept in the pool
+    assert DummyModel.loads == 1
+    assert ("dummy", "0.1") in service.models
+
+    server_timing = response.headers["Server-Timing"]
+    assert server_timing.startswith("total;dur=")
+    assert "load_model;dur=" in server_timing
+    assert "inference;dur=" in server_timing
+
+
+def test_metrics(service):
+    client = TestClient(service.app)
+    request = {"sentences": [{"text": "Hallo", "begin": 0, "end": 5}]}
+    for _ in range(2):
+        client.post("/v1/process", json=request)
+
+    metrics = client.get("/v1/metrics").json()
+    assert metrics["endpoints"]["POST /v1/process"]["count"] == 2
+    assert set(metrics["recent"][-1]["stages"]) == {"load_model", "inference"}
+
+
+def test_meta(service):
+    meta = service.annotation_meta("dummy", "0.1")
+    assert meta.name == "duui-dummy"
+    assert meta.modelVersion == "0.1"
+
+    modification = service.document_modification(timestamp=42)
+    assert modification.timestamp == 42
+    assert modification.comment == "duui-dummy (0.0.1)"
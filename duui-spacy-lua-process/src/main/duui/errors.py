@@ -4,3 +4,15 @@ class NoModelError(Exception):
 
 class InvalidConfigurationError(Exception):
     pass
+
+
+class NoSentenceSegmenterError(Exception):
+    pass
+
+
+class WorkerPoolFullError(Exception):
+    pass
+
+
+class WorkerPoolBrokenError(Exception):
+    pass
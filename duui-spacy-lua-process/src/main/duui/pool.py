@@ -0,0 +1,77 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Optional, TypeVar
+
+from fastapi.logger import logger
+
+from duui.errors import WorkerPoolBrokenError, WorkerPoolFullError
+from duui.workers import init_worker
+
+T = TypeVar("T")
+
+
+# Pool of spaCy worker processes with a bounded request queue.
+# Requests are dispatched to the worker processes without blocking the event loop,
+# so that long running requests do not delay other endpoints. At most
+# `workers + max_queued_requests` requests are accepted at the same time,
+# further requests fail with a `WorkerPoolFullError`.
+# If a worker process dies (e.g. OOM or segfault), the executor is unusable, the
+# requests running at that time fail with a `WorkerPoolBrokenError` and the pool
+# is restarted with new worker processes.
+class WorkerPool:
+    def __init__(
+        self,
+        workers: int,
+        max_queued_requests: int,
+        initializer: Callable[[], None] = init_worker,
+    ):
+        self.workers = workers
+        self.max_pending = workers + max_queued_requests
+        self.pending = 0
+        self.initializer = initializer
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def start(self) -> None:
+        logger.info(f"Starting {self.workers} spaCy worker process(es)")
+        # use "spawn" to not fork an already initialized CUDA context
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=self.initializer,
+        )
+
+    def restart(self, broken: ProcessPoolExecutor) -> None:
+        # several requests can fail with the same broken executor, only restart it once
+        if self._executor is not broken:
+            return
+        logger.error("A spaCy worker process died, restarting the worker pool")
+        broken.shutdown(wait=False, cancel_futures=True)
+        self.start()
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    async def submit(self, func: Callable[..., T], *args: Any) -> T:
+        if self._executor is None:
+            raise RuntimeError("Worker pool is not running")
+        if self.pending >= self.max_pending:
+            raise WorkerPoolFullError(
+                f"All {self.workers} workers are busy and {self.max_pending - self.workers} requests are queued"
+            )
+
+        self.pending += 1
+        executor = self._executor
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(executor, func, *args)
+        except BrokenProcessPool as e:
+            self.restart(executor)
+            raise WorkerPoolBrokenError(
+                "A spaCy worker process died while processing the request, the workers were restarted"
+            ) from e
+        finally:
+            self.pending -= 1
@@ -55,6 +55,10 @@ class AppSettings(SpacySettings):
     component_version: str = "0.1.0"
     max_loaded_models: int = 1
     request_batch_size: int = 1024
+    # number of worker processes running spaCy, each worker holds its own models
+    process_workers: int = 1
+    # number of requests that may wait for a free worker before new requests are rejected
+    max_queued_requests: int = 4
 
 
 SETTINGS: Final[AppSettings] = AppSettings()
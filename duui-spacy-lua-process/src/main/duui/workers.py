@@ -0,0 +1,160 @@
+from types import SimpleNamespace
+from typing import Final
+
+import spacy
+from spacy import Language
+
+from duui.errors import NoModelError, NoSentenceSegmenterError
+from duui.models import (
+    AnnotationMeta,
+    AnnotationType,
+    DependencyType,
+    DuuiResponse,
+    DuuiSentence,
+    EntityType,
+    EosResponse,
+    TokenType,
+)
+from duui.settings import SETTINGS, SpacySettings
+from duui.utils import get_spacy_model
+
+# Models loaded in this worker process, same structure as the FastAPI app state
+WORKER_STATE: Final[SimpleNamespace] = SimpleNamespace(models={}, lru=[])
+
+
+# Initializer of each worker process, preloads the default model
+def init_worker() -> None:
+    try:
+        get_spacy_model(WORKER_STATE, SETTINGS)
+    except NoModelError:
+        pass
+
+
+def get_annotation_meta(nlp: Language, name: str) -> AnnotationMeta:
+    return AnnotationMeta(
+        name=name,
+        version=SETTINGS.component_version,
+        spacy_version=spacy.__version__,
+        model_lang=nlp.lang,
+        model_name=nlp.meta["name"],
+        model_pipes=nlp.pipe_names,
+        model_spacy_git_version=nlp.meta["spacy_git_version"],
+        model_spacy_version=nlp.meta["spacy_version"],
+        model_version=nlp.meta["version"],
+    )
+
+
+# Annotate a batch of sentences, runs inside a worker process
+def process_sentences(
+    sentences: list[DuuiSentence], config: SpacySettings
+) -> DuuiResponse:
+    nlp: Language = get_spacy_model(WORKER_STATE, config)
+
+    to_disable = config.spacy_disable or SETTINGS.spacy_disable or []
+    to_disable = set(to_disable).intersection(nlp.pipe_names)
+    with nlp.select_pipes(disable=to_disable):
+        tokens: list[TokenType] = []
+        dependencies: list[TokenType] = []
+        entities: list[EntityType] = []
+
+        texts = [sentence.text for sentence in sentences]
+        for doc, sent in zip(
+            nlp.pipe(texts, batch_size=config.spacy_batch_size),
+            sentences,
+        ):
+            # map the token index in this Doc to the token index in the list of result tokens
+            index_lookup: dict[int, int] = {}
+
+            for token in doc:
+                offset: int = sent.offset
+                begin = offset + token.idx
+                end = offset + token.idx + len(token.text)
+                tokens.append(
+                    TokenType(
+                        begin=begin,
+                        end=end,
+                        lemma=token.lemma_,
+                        pos_value=token.tag_,
+                        pos_coarse=token.pos_,
+                        morph_value=str(token.morph) if token.has_morph() else None,
+                        morph_features=token.morph.to_dict()
+                        if token.has_morph()
+                        else None,
+                    )
+                )
+                index_lookup[token.i] = len(tokens) - 1
+
+            if nlp.has_pipe("parser"):
+                for token in (
+                    token
+                    for token in doc
+                    if not token.is_space and not token.head.is_space
+                ):
+                    dependent_index = index_lookup[token.i]
+                    dependent = tokens[dependent_index]
+
+                    govenor_index = index_lookup[token.head.i]
+
+                    dependencies.append(
+                        DependencyType(
+                            begin=dependent.begin,
+                            end=dependent.end,
+                            dependency_type=token.dep_.upper(),
+                            governor_index=govenor_index,
+                            dependent_index=dependent_index,
+                        )
+                    )
+
+            if nlp.has_pipe("ner"):
+                for entity in doc.ents:
+                    entities.append(
+                        EntityType(
+                            begin=entity.start_char + sent.offset,
+                            end=entity.end_char + sent.offset,
+                            value=entity.label_,
+                            identifier=entity.kb_id_ if entity.kb_id_ else None,
+                        )
+                    )
+
+        return DuuiResponse(
+            metadata=get_annotation_meta(nlp, SETTINGS.component_name),
+            tokens=tokens,
+            dependencies=dependencies,
+            entities=entities,
+        )
+
+
+# Annotate the sentence boundaries of a full text, runs inside a worker process
+def process_eos(text: str, config: SpacySettings) -> EosResponse:
+    nlp: Language = get_spacy_model(WORKER_STATE, config)
+
+    if "senter" in nlp.pipe_names:
+        eos_pipe = ["senter"]
+    elif "parser" in nlp.pipe_names:
+        eos_pipe = ["senter"]
+        nlp.enable_pipe("senter")
+    elif "sentencizer" in nlp.pipe_names:
+        eos_pipe = ["sentencizer"]
+    else:
+        raise NoSentenceSegmenterError(
+            "spaCy model does not have a sentence segmentation component"
+        )
+
+    with nlp.select_pipes(enable=eos_pipe):
+        max_len = nlp.max_length
+        nlp.max_length = len(text) + 1
+        doc = nlp(text)
+        nlp.max_length = max_len
+
+        sentences = [
+            AnnotationType(
+                begin=sent.start_char,
+                end=sent.end_char,
+            )
+            for sent in doc.sents
+        ]
+
+        return EosResponse(
+            metadata=get_annotation_meta(nlp, SETTINGS.component_name + "/eos"),
+            sentences=sentences,
+        )
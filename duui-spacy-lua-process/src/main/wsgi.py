@@ -1,4 +1,5 @@
 import logging
+from contextlib import asynccontextmanager
 from platform import python_version
 from sys import version as sys_version
 from typing import Final, get_args
@@ -7,7 +8,6 @@ import spacy
 import uvicorn
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.responses import PlainTextResponse
-from spacy import Language
 
 from duui.const import (
     LUA_COMMUNICATION_LAYER,
@@ -15,24 +15,22 @@ from duui.const import (
     SpacyModelName,
     SpacyPipelineComponent,
 )
-from duui.errors import NoModelError
+from duui.errors import (
+    NoSentenceSegmenterError,
+    WorkerPoolBrokenError,
+    WorkerPoolFullError,
+)
 from duui.models import (
-    AnnotationMeta,
-    AnnotationType,
     ComponentCapability,
     ComponentDocumentation,
-    DependencyType,
     DuuiRequest,
     DuuiResponse,
-    EntityType,
     EosRequest,
     EosResponse,
-    TokenType,
 )
+from duui.pool import WorkerPool
 from duui.settings import SETTINGS, SpacySettings
-from duui.utils import (
-    get_spacy_model,
-)
+from duui.workers import process_eos, process_sentences
 
 LOGGING_CONFIG: Final[dict] = uvicorn.config.LOGGING_CONFIG
 LOGGING_CONFIG["loggers"][""] = {
@@ -42,15 +40,18 @@ LOGGING_CONFIG["loggers"][""] = {
 }
 logging.config.dictConfig(LOGGING_CONFIG)
 
-app = FastAPI()
-if not hasattr(app.state, "models"):
-    app.state.models = {}
-if not hasattr(app.state, "lru"):
-    app.state.lru = []
-try:
-    get_spacy_model(app.state, SETTINGS)
-except NoModelError:
-    pass
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # spaCy runs in worker processes, each holding its own models,
+    # so that processing never blocks the event loop of the service
+    app.state.pool = WorkerPool(SETTINGS.process_workers, SETTINGS.max_queued_requests)
+    app.state.pool.start()
+    yield
+    app.state.pool.shutdown()
+
+
+app = FastAPI(lifespan=lifespan)
 
 
 #####
@@ -106,90 +107,7 @@ async def v1_process(
 ) -> DuuiResponse:
     config: SpacySettings = params.config or SETTINGS
 
-    nlp: Language = get_spacy_model(request.app.state, config)
-
-    to_disable = config.spacy_disable or SETTINGS.spacy_disable or []
-    to_disable = set(to_disable).intersection(nlp.pipe_names)
-    with nlp.select_pipes(disable=to_disable):
-        tokens: list[TokenType] = []
-        dependencies: list[TokenType] = []
-        entities: list[EntityType] = []
-
-        texts = [sentence.text for sentence in params.sentences]
-        for doc, sent in zip(
-            nlp.pipe(texts, batch_size=config.spacy_batch_size),
-            params.sentences,
-        ):
-            # map the token index in this Doc to the token index in the list of result tokens
-            index_lookup: dict[int, int] = {}
-
-            for token in doc:
-                offset: int = sent.offset
-                begin = offset + token.idx
-                end = offset + token.idx + len(token.text)
-                tokens.append(
-                    TokenType(
-                        begin=begin,
-                        end=end,
-                        lemma=token.lemma_,
-                        pos_value=token.tag_,
-                        pos_coarse=token.pos_,
-                        morph_value=str(token.morph) if token.has_morph() else None,
-                        morph_features=token.morph.to_dict()
-                        if token.has_morph()
-                        else None,
-                    )
-                )
-                index_lookup[token.i] = len(tokens) - 1
-
-            if nlp.has_pipe("parser"):
-                for token in (
-                    token
-                    for token in doc
-                    if not token.is_space and not token.head.is_space
-                ):
-                    dependent_index = index_lookup[token.i]
-                    dependent = tokens[dependent_index]
-
-                    govenor_index = index_lookup[token.head.i]
-
-                    dependencies.append(
-                        DependencyType(
-                            begin=dependent.begin,
-                            end=dependent.end,
-                            dependency_type=token.dep_.upper(),
-                            governor_index=govenor_index,
-                            dependent_index=dependent_index,
-                        )
-                    )
-
-            if nlp.has_pipe("ner"):
-                for entity in doc.ents:
-                    entities.append(
-                        EntityType(
-                            begin=entity.start_char + sent.offset,
-                            end=entity.end_char + sent.offset,
-                            value=entity.label_,
-                            identifier=entity.kb_id_ if entity.kb_id_ else None,
-                        )
-                    )
-
-        return DuuiResponse(
-            metadata=AnnotationMeta(
-                name=SETTINGS.component_name,
-                version=SETTINGS.component_version,
-                spacy_version=spacy.__version__,
-                model_lang=nlp.lang,
-                model_name=nlp.meta["name"],
-                model_pipes=nlp.pipe_names,
-                model_spacy_git_version=nlp.meta["spacy_git_version"],
-                model_spacy_version=nlp.meta["spacy_version"],
-                model_version=nlp.meta["version"],
-            ),
-            tokens=tokens,
-            dependencies=dependencies,
-            entities=entities,
-        )
+    return await submit(request, process_sentences, params.sentences, config)
 
 
 ###
@@ -205,46 +123,17 @@ async def post_eos(
 ) -> EosResponse:
     config: SpacySettings = params.config or SETTINGS
 
-    nlp: Language = get_spacy_model(request.app.state, config)
+    try:
+        return await submit(request, process_eos, params.text, config)
+    except NoSentenceSegmenterError as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
-    if "senter" in nlp.pipe_names:
-        eos_pipe = ["senter"]
-    elif "parser" in nlp.pipe_names:
-        eos_pipe = ["senter"]
-        nlp.enable_pipe("senter")
-    elif "sentencizer" in nlp.pipe_names:
-        eos_pipe = ["sentencizer"]
-    else:
-        raise HTTPException(
-            status_code=500,
-            detail="spaCy model does not have a sentence segmentation component",
-        )
 
-    with nlp.select_pipes(enable=eos_pipe):
-        max_len = nlp.max_length
-        nlp.max_length = len(params.text) + 1
-        doc = nlp(params.text)
-        nlp.max_length = max_len
-
-        sentences = [
-            AnnotationType(
-                begin=sent.start_char,
-                end=sent.end_char,
-            )
-            for sent in doc.sents
-        ]
-
-        return EosResponse(
-            metadata=AnnotationMeta(
-                name=SETTINGS.component_name + "/eos",
-                version=SETTINGS.component_version,
-                spacy_version=spacy.__version__,
-                model_lang=nlp.lang,
-                model_name=nlp.meta["name"],
-                model_pipes=nlp.pipe_names,
-                model_spacy_git_version=nlp.meta["spacy_git_version"],
-                model_spacy_version=nlp.meta["spacy_version"],
-                model_version=nlp.meta["version"],
-            ),
-            sentences=sentences,
+async def submit(request: Request, func, *args):
+    pool: WorkerPool = request.app.state.pool
+    try:
+        return await pool.submit(func, *args)
+    except (WorkerPoolFullError, WorkerPoolBrokenError) as e:
+        raise HTTPException(
+            status_code=503, detail=str(e), headers={"Retry-After": "1"}
         )
@@ -0,0 +1,172 @@
+import asyncio
+import os
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import httpx
+import pytest
+import spacy
+from spacy.language import Language
+
+SERVICE_DIR = Path(__file__).resolve().parents[2] / "main"
+# the worker processes are spawned and import this module, they need the service on the
+# path, and the service reads communication_layer.lua from the working directory
+sys.path.insert(0, str(SERVICE_DIR))
+os.chdir(SERVICE_DIR)
+
+from duui.errors import WorkerPoolBrokenError  # noqa: E402
+from duui.pool import WorkerPool  # noqa: E402
+
+# CPU time each sentence takes in the blank pipeline, stands in for the model
+SENTENCE_COST = 0.002
+
+
+@Language.component("cpu_cost")
+def cpu_cost(doc):
+    end = time.perf_counter() + SENTENCE_COST
+    while time.perf_counter() < end:
+        pass
+    return doc
+
+
+def init_blank_worker() -> None:
+    # registers a blank pipeline as the default model of the worker process
+    from duui.settings import SETTINGS
+    from duui.workers import WORKER_STATE
+
+    nlp = spacy.blank("en")
+    nlp.add_pipe("cpu_cost")
+    model_name = SETTINGS.resolve_model()
+    WORKER_STATE.models[model_name] = nlp
+    WORKER_STATE.lru.insert(0, model_name)
+
+
+def crash_worker(*args):
+    # simulates a worker killed by the OOM killer or a segfault
+    os._exit(1)
+
+
+@pytest.fixture
+def wsgi():
+    import wsgi
+
+    return wsgi
+
+
+@contextmanager
+def running_pool(app, workers, max_queued_requests=32):
+    pool = WorkerPool(workers, max_queued_requests, initializer=init_blank_worker)
+    pool.start()
+    app.state.pool = pool
+    try:
+        yield pool
+    finally:
+        pool.shutdown()
+
+
+def client(app):
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://duui", timeout=120)
+
+
+def process_request(sentences):
+    text = "Dies ist ein Satz ."
+    return {"sentences": [{"text": text, "offset": i * (len(text) + 1)} for i in range(sentences)]}
+
+
+async def warm_up(http, workers):
+    # the worker processes are spawned on demand, start all of them before measuring
+    responses = await asyncio.gather(*(http.post("/v1/process", json=process_request(1)) for _ in range(workers * 2)))
+    assert all(r.status_code == 200 for r in responses)
+
+
+async def run_load(http, clients, sentences):
+    start = time.perf_counter()
+    responses = await asyncio.gather(*(http.post("/v1/process", json=process_request(sentences)) for _ in range(clients)))
+    elapsed = time.perf_counter() - start
+    assert all(r.status_code == 200 for r in responses)
+    assert all(len(r.json()["tokens"]) == sentences * 5 for r in responses)
+    return elapsed
+
+
+def test_large_request_does_not_block_other_endpoints(wsgi):
+    async def scenario():
+        async with client(wsgi.app) as http:
+            await warm_up(http, 1)
+
+            # ~2 s of spaCy processing
+            large = asyncio.create_task(http.post("/v1/process", json=process_request(1000)))
+            await asyncio.sleep(0.2)
+
+            latencies = []
+            for _ in range(10):
+                start = time.perf_counter()
+                response = await http.get("/v1/communication_layer")
+                latencies.append(time.perf_counter() - start)
+                assert response.status_code == 200
+            assert not large.done()
+
+            response = await large
+            assert response.status_code == 200
+            assert len(response.json()["tokens"]) == 5000
+            return max(latencies)
+
+    with running_pool(wsgi.app, workers=1):
+        max_latency = asyncio.run(scenario())
+    print(f"max /v1/communication_layer latency during a large request: {max_latency * 1000:.1f} ms")
+    assert max_latency < 0.5
+
+
+@pytest.mark.skipif((os.cpu_count() or 1) < 2, reason="throughput scaling needs at least 2 CPUs")
+def test_throughput_scales_with_workers(wsgi):
+    async def scenario():
+        async with client(wsgi.app) as http:
+            await warm_up(http, workers)
+            return await run_load(http, clients=8, sentences=100)
+
+    elapsed = {}
+    for workers in (1, 2):
+        with running_pool(wsgi.app, workers=workers):
+            elapsed[workers] = asyncio.run(scenario())
+    print(f"8 concurrent clients: 1 worker {elapsed[1]:.2f}s, 2 workers {elapsed[2]:.2f}s")
+    assert elapsed[1] / elapsed[2] > 1.5
+
+
+def test_full_queue_is_rejected(wsgi):
+    async def scenario():
+        async with client(wsgi.app) as http:
+            await warm_up(http, 1)
+            return await asyncio.gather(*(http.post("/v1/process", json=process_request(200)) for _ in range(4)))
+
+    with running_pool(wsgi.app, workers=1, max_queued_requests=1):
+        responses = asyncio.run(scenario())
+    status_codes = sorted(r.status_code for r in responses)
+    assert status_codes == [200, 200, 503, 503]
+    assert all(r.headers["Retry-After"] == "1" for r in responses if r.status_code == 503)
+
+
+def test_dead_worker_restarts_pool(wsgi):
+    async def scenario():
+        async with client(wsgi.app) as http:
+            await warm_up(http, 1)
+
+            with pytest.raises(WorkerPoolBrokenError):
+                await wsgi.app.state.pool.submit(crash_worker)
+
+            process_sentences = wsgi.process_sentences
+            wsgi.process_sentences = crash_worker
+            try:
+                crashed = await http.post("/v1/process", json=process_request(1))
+            finally:
+                wsgi.process_sentences = process_sentences
+
+            # the pool was restarted, following requests are processed again
+            recovered = await http.post("/v1/process", json=process_request(3))
+            return crashed, recovered
+
+    with running_pool(wsgi.app, workers=1):
+        crashed, recovered = asyncio.run(scenario())
+    assert crashed.status_code == 503
+    assert recovered.status_code == 200
+    assert len(recovered.json()["tokens"]) == 15
@@ -32,32 +32,30 @@ function serialize(inputCas, outputStream, parameters)
         spaces = {}
         sent_starts = {}
 
+        -- collect sentence begins once, each token is then checked in constant time
+        local sentence_begins = {}
+        if use_existing_sentences then
+            local sentences_it = JCasUtil:select(inputCas, Sentence):iterator()
+            while sentences_it:hasNext() do
+                sentence_begins[sentences_it:next():getBegin()] = true
+            end
+        end
+
         local tokens_count = 1
-        local tokens_it = luajava.newInstance("java.util.ArrayList", JCasUtil:select(inputCas, Token)):listIterator()
-        local sentences = luajava.newInstance("java.util.ArrayList", JCasUtil:select(inputCas, Sentence))
+        local tokens_it = JCasUtil:select(inputCas, Token):iterator()
+        local previous_end = nil
         while tokens_it:hasNext() do
             local token = tokens_it:next()
+            local token_begin = token:getBegin()
             tokens[tokens_count] = token:getCoveredText()
-            -- try to get next to see if space is needed
-            has_space = false
-            if tokens_it:hasNext() then
-                local next_token = tokens_it:next()
-                has_space = next_token:getBegin() ~= token:getEnd()
-                tokens_it:previous()
+            -- the previous token needs a space if this token does not start directly after it
+            if previous_end ~= nil then
+                spaces[tokens_count - 1] = token_begin ~= previous_end
             end
-            spaces[tokens_count] = has_space
+            spaces[tokens_count] = false
+            previous_end = token:getEnd()
             if use_existing_sentences then
-                local sentences_it = sentences:listIterator()
-                sent_starts[tokens_count] = false
-                while sentences_it:hasNext() do
-                    local sentence = sentences_it:next()
-                    if sentence:getBegin() == token:getBegin() then
-                        sent_starts[tokens_count] = true
-                        break
-                    elseif sentence:getBegin() > token:getBegin() then
-                        break
-                    end
-                end
+                sent_starts[tokens_count] = sentence_begins[token_begin] == true
             end
 
             tokens_count = tokens_count + 1
@@ -98,8 +96,9 @@ function deserialize(inputCas, inputStream)
     modification_anno:setComment(modification_meta["comment"])
     modification_anno:addToIndexes()
 
-    -- Get meta data, this is the same for every annotation
-    local meta = results["meta"]
+    -- Collect all annotations added by this response, they are referenced by the
+    -- meta data annotation at the end
+    local meta_references = {}
 
     -- If was pretokenized, use existing tokens
     local is_pretokenized = results["is_pretokenized"]
@@ -114,19 +113,7 @@ function deserialize(inputCas, inputStream)
             sent_anno:setBegin(sent["begin"])
             sent_anno:setEnd(sent["end"])
             sent_anno:addToIndexes()
-
-            -- Create annotator meta data annotation, using the base meta data
-            local meta_anno = luajava.newInstance("org.texttechnologylab.annotation.SpacyAnnotatorMetaData", inputCas)
-            meta_anno:setReference(sent_anno)
-            meta_anno:setName(meta["name"])
-            meta_anno:setVersion(meta["version"])
-            meta_anno:setModelName(meta["modelName"])
-            meta_anno:setModelVersion(meta["modelVersion"])
-            meta_anno:setSpacyVersion(meta["spacyVersion"])
-            meta_anno:setModelLang(meta["modelLang"])
-            meta_anno:setModelSpacyVersion(meta["modelSpacyVersion"])
-            meta_anno:setModelSpacyGitVersion(meta["modelSpacyGitVersion"])
-            meta_anno:addToIndexes()
+            meta_references[#meta_references+1] = sent_anno
         end
     end
 
@@ -154,6 +141,7 @@ function deserialize(inputCas, inputStream)
             token_anno:setBegin(token["begin"])
             token_anno:setEnd(token["end"])
             token_anno:addToIndexes()
+            meta_references[#meta_references+1] = token_anno
 
             -- URL detection
             if token["like_url"] then
@@ -178,19 +166,6 @@ function deserialize(inputCas, inputStream)
             -- Save current token using its index
             -- Note: Lua starts counting at 1
             all_tokens[i-1] = token_anno
-
-            -- Create meta data for this token
-            local meta_anno = luajava.newInstance("org.texttechnologylab.annotation.SpacyAnnotatorMetaData", inputCas)
-            meta_anno:setReference(token_anno)
-            meta_anno:setName(meta["name"])
-            meta_anno:setVersion(meta["version"])
-            meta_anno:setModelName(meta["modelName"])
-            meta_anno:setModelVersion(meta["modelVersion"])
-            meta_anno:setSpacyVersion(meta["spacyVersion"])
-            meta_anno:setModelLang(meta["modelLang"])
-            meta_anno:setModelSpacyVersion(meta["modelSpacyVersion"])
-            meta_anno:setModelSpacyGitVersion(meta["modelSpacyGitVersion"])
-            meta_anno:addToIndexes()
         end
 
         if token["write_lemma"] then
@@ -205,23 +180,12 @@ function deserialize(inputCas, inputStream)
                 lemma_anno:setValue(token["lemma"])
             end
             lemma_anno:addToIndexes()
+            meta_references[#meta_references+1] = lemma_anno
 
             -- If there is a token, i.e. writing is not disabled for tokens, add this lemma infos to the token
             if token_anno ~= nil then
                 token_anno:setLemma(lemma_anno)
             end
-
-            local meta_anno = luajava.newInstance("org.texttechnologylab.annotation.SpacyAnnotatorMetaData", inputCas)
-            meta_anno:setReference(lemma_anno)
-            meta_anno:setName(meta["name"])
-            meta_anno:setVersion(meta["version"])
-            meta_anno:setModelName(meta["modelName"])
-            meta_anno:setModelVersion(meta["modelVersion"])
-            meta_anno:setSpacyVersion(meta["spacyVersion"])
-            meta_anno:setModelLang(meta["modelLang"])
-            meta_anno:setModelSpacyVersion(meta["modelSpacyVersion"])
-            meta_anno:setModelSpacyGitVersion(meta["modelSpacyGitVersion"])
-            meta_anno:addToIndexes()
         end
 
         if token["write_pos"] then
@@ -232,22 +196,11 @@ function deserialize(inputCas, inputStream)
             pos_anno:setPosValue(token["pos"])
             pos_anno:setCoarseValue(token["pos_coarse"])
             pos_anno:addToIndexes()
+            meta_references[#meta_references+1] = pos_anno
 
             if token_anno ~= nil then
                 token_anno:setPos(pos_anno)
             end
-
-            local meta_anno = luajava.newInstance("org.texttechnologylab.annotation.SpacyAnnotatorMetaData", inputCas)
-            meta_anno:setReference(pos_anno)
-            meta_anno:setName(meta["name"])
-            meta_anno:setVersion(meta["version"])
-            meta_anno:setModelName(meta["modelName"])
-            meta_anno:setModelVersion(meta["modelVersion"])
-            meta_anno:setSpacyVersion(meta["spacyVersion"])
-            meta_anno:setModelLang(meta["modelLang"])
-            meta_anno:setModelSpacyVersion(meta["modelSpacyVersion"])
-            meta_anno:setModelSpacyGitVersion(meta["modelSpacyGitVersion"])
-            meta_anno:addToIndexes()
         end
 
         if token["write_morph"] then
@@ -313,22 +266,11 @@ function deserialize(inputCas, inputStream)
             end
 
             morph_anno:addToIndexes()
+            meta_references[#meta_references+1] = morph_anno
 
             if token_anno ~= nil then
                 token_anno:setMorph(morph_anno)
             end
-
-            local meta_anno = luajava.newInstance("org.texttechnologylab.annotation.SpacyAnnotatorMetaData", inputCas)
-            meta_anno:setReference(morph_anno)
-            meta_anno:setName(meta["name"])
-            meta_anno:setVersion(meta["version"])
-            meta_anno:setModelName(meta["modelName"])
-            meta_anno:setModelVersion(meta["modelVersion"])
-            meta_anno:setSpacyVersion(meta["spacyVersion"])
-            meta_anno:setModelLang(meta["modelLang"])
-            meta_anno:setModelSpacyVersion(meta["modelSpacyVersion"])
-            meta_anno:setModelSpacyGitVersion(meta["modelSpacyGitVersion"])
-            meta_anno:addToIndexes()
         end
     end
 
@@ -365,18 +307,7 @@ function deserialize(inputCas, inputStream)
             end
 
             dep_anno:addToIndexes()
-
-            local meta_anno = luajava.newInstance("org.texttechnologylab.annotation.SpacyAnnotatorMetaData", inputCas)
-            meta_anno:setReference(dep_anno)
-            meta_anno:setName(meta["name"])
-            meta_anno:setVersion(meta["version"])
-            meta_anno:setModelName(meta["modelName"])
-            meta_anno:setModelVersion(meta["modelVersion"])
-            meta_anno:setSpacyVersion(meta["spacyVersion"])
-            meta_anno:setModelLang(meta["modelLang"])
-            meta_anno:setModelSpacyVersion(meta["modelSpacyVersion"])
-            meta_anno:setModelSpacyGitVersion(meta["modelSpacyGitVersion"])
-            meta_anno:addToIndexes()
+            meta_references[#meta_references+1] = dep_anno
         end
     end
 
@@ -388,18 +319,29 @@ function deserialize(inputCas, inputStream)
             ent_anno:setEnd(ent["end"])
             ent_anno:setValue(ent["value"])
             ent_anno:addToIndexes()
+            meta_references[#meta_references+1] = ent_anno
+        end
+    end
 
-            local meta_anno = luajava.newInstance("org.texttechnologylab.annotation.SpacyAnnotatorMetaData", inputCas)
-            meta_anno:setReference(ent_anno)
-            meta_anno:setName(meta["name"])
-            meta_anno:setVersion(meta["version"])
-            meta_anno:setModelName(meta["modelName"])
-            meta_anno:setModelVersion(meta["modelVersion"])
-            meta_anno:setSpacyVersion(meta["spacyVersion"])
-            meta_anno:setModelLang(meta["modelLang"])
-            meta_anno:setModelSpacyVersion(meta["modelSpacyVersion"])
-            meta_anno:setModelSpacyGitVersion(meta["modelSpacyGitVersion"])
-            meta_anno:addToIndexes()
+    -- Add meta data, this is the same for every annotation, so it is only added once
+    -- per response and references all annotations of this response via a shared array
+    local meta = results["meta"]
+    if meta ~= nil then
+        local references = luajava.newInstance("org.apache.uima.jcas.cas.FSArray", inputCas, #meta_references)
+        for i, anno in ipairs(meta_references) do
+            references:set(i-1, anno)
         end
+
+        local meta_anno = luajava.newInstance("org.texttechnologylab.annotation.SpacyAnnotatorMetaData", inputCas)
+        meta_anno:setReference(references)
+        meta_anno:setName(meta["name"])
+        meta_anno:setVersion(meta["version"])
+        meta_anno:setModelName(meta["modelName"])
+        meta_anno:setModelVersion(meta["modelVersion"])
+        meta_anno:setSpacyVersion(meta["spacyVersion"])
+        meta_anno:setModelLang(meta["modelLang"])
+        meta_anno:setModelSpacyVersion(meta["modelSpacyVersion"])
+        meta_anno:setModelSpacyGitVersion(meta["modelSpacyGitVersion"])
+        meta_anno:addToIndexes()
     end
 end
@@ -1,6 +1,7 @@
 import logging
-from functools import lru_cache
+from collections import OrderedDict
 from platform import python_version
+from queue import Empty, Queue
 from sys import version as sys_version
 from threading import Lock
 from time import time
@@ -30,6 +31,8 @@ class Settings(BaseSettings):
     log_level: str
     # Model LRU cache size
     model_cache_size: int
+    # Number of replicas per model, allows processing this many requests of the same model in parallel
+    model_replicas: int = 1
     # This is set to the model if only one single model is in the Docker image
     single_model: Optional[str] = None
     # This is set to the language of the single model
@@ -358,12 +361,6 @@ def get_spacy_model_name(document_lang, parameters):
     return model_name, document_lang
 
 
-# Create LRU cache with max size for model
-lru_cache_with_size = lru_cache(maxsize=settings.model_cache_size)
-
-# Lock for model loading
-model_load_lock = Lock()
-
 # Load the predefined typesystem that is needed for this annotator to work
 typesystem_filename = 'TypeSystemSpacy.xml'
 logger.debug("Loading typesystem from \"%s\"", typesystem_filename)
@@ -383,15 +380,94 @@ with open(lua_communication_script_filename, 'rb') as f:
     logger.debug(lua_communication_script_filename)
 
 
-# Load/cache spaCy model
-@lru_cache_with_size
-def load_cache_spacy_model(model_name, model_lang, enabled_tools):
+# Replicas of one spaCy model, each replica is only used by one request at a time,
+# new replicas are loaded on demand until the max number of replicas is reached
+class SpacyModelReplicas:
+    def __init__(self, loader, max_replicas):
+        self.loader = loader
+        self.max_replicas = max(1, max_replicas)
+        self.free = Queue()
+        self.loaded = 0
+        self.lock = Lock()
+
+    def acquire(self):
+        try:
+            return self.free.get_nowait()
+        except Empty:
+            pass
+
+        with self.lock:
+            load_new = self.loaded < self.max_replicas
+            if load_new:
+                self.loaded += 1
+
+        if not load_new:
+            # all replicas are loaded, wait for one to be returned
+            return self.free.get()
+
+        try:
+            return self.loader()
+        except Exception:
+            with self.lock:
+                self.loaded -= 1
+            raise
+
+    def release(self, nlp):
+        self.free.put(nlp)
+
+
+# A checked out replica, returned to its pool on release
+class SpacyModelLease:
+    def __init__(self, replicas, nlp):
+        self.replicas = replicas
+        self.nlp = nlp
+
+    def release(self):
+        if self.nlp is not None:
+            self.replicas.release(self.nlp)
+            self.nlp = None
+
+
+# LRU pool of model replicas per key:
+# - the lock is only held to look up the replicas, models are loaded outside of it
+# - a replica is checked out for the whole request, no two requests share a pipeline
+# - replicas of evicted keys that are still in use are dropped when released
+class SpacyModelPool:
+    def __init__(self, max_models, max_replicas):
+        self.max_models = max(1, max_models)
+        self.max_replicas = max_replicas
+        self.models = OrderedDict()
+        self.lock = Lock()
+
+    def acquire(self, key, loader):
+        with self.lock:
+            replicas = self.models.get(key)
+            if replicas is None:
+                replicas = SpacyModelReplicas(loader, self.max_replicas)
+                self.models[key] = replicas
+                while len(self.models) > self.max_models:
+                    evicted_key, _ = self.models.popitem(last=False)
+                    logger.info("Evicting spaCy model %s from cache", evicted_key)
+            else:
+                self.models.move_to_end(key)
+
+        return SpacyModelLease(replicas, replicas.acquire())
+
+
+model_pool = SpacyModelPool(settings.model_cache_size, settings.model_replicas)
+# Sentencizers have their own pool, so that they do not evict the main models. A request
+# checks out its sentencizer while it holds the main model replica, always in this order
+sentencizer_pool = SpacyModelPool(settings.model_cache_size, settings.model_replicas)
+
+
+# Load spaCy model
+def load_new_spacy_model(model_name, model_lang, enabled_tools):
     # What tools to enable in the pipeline?
     enabled_tools = None
     if settings.variant:
         # handle special case for sentencizer
         if settings.variant == "-sentencizer":
-            return load_cache_spacy_sentencizer_model(model_lang)
+            return load_new_spacy_sentencizer_model(model_lang)
 
         # at the moment, only one tool is supported and no dynamic loading
         enabled_tools = [settings.variant[1:]]
@@ -403,27 +479,25 @@ def load_cache_spacy_model(model_name, model_lang, enabled_tools):
     return nlp
 
 
-# Load spaCy model using LRU cached function
+# Check out a spaCy model replica from the pool, must be released after processing
 def load_spacy_model(model_name, model_lang, enabled_tools):
-    model_load_lock.acquire()
-
     err = None
     try:
         logger.info("Getting spaCy model \"%s\"...", model_name)
-        nlp = load_cache_spacy_model(model_name, model_lang, enabled_tools)
+        lease = model_pool.acquire(
+            (model_name, model_lang, enabled_tools),
+            lambda: load_new_spacy_model(model_name, model_lang, enabled_tools)
+        )
     except Exception as ex:
-        nlp = None
+        lease = None
         err = str(ex)
         logging.exception("Failed to load spaCy model: %s", ex)
 
-    model_load_lock.release()
-
-    return nlp, err
+    return lease, err
 
 
-# Load/cache spaCy sentencizer model
-@lru_cache_with_size
-def load_cache_spacy_sentencizer_model(model_lang):
+# Load spaCy sentencizer model
+def load_new_spacy_sentencizer_model(model_lang):
     logger.info("Loading spaCy sentencizer model \"%s\"...", model_lang)
 
     nlp_sents = spacy.blank(model_lang)
@@ -433,22 +507,32 @@ def load_cache_spacy_sentencizer_model(model_lang):
     return nlp_sents
 
 
-# Load spaCy sentencizer model using LRU cached function
+# Check out a spaCy sentencizer replica from the pool, must be released after processing
 def load_spacy_sentencizer_model(model_lang):
-    model_load_lock.acquire()
-
     err = None
     try:
         logger.info("Getting spaCy sentencizer model \"%s\"...", model_lang)
-        nlp = load_cache_spacy_sentencizer_model(model_lang)
+        lease = sentencizer_pool.acquire(
+            model_lang,
+            lambda: load_new_spacy_sentencizer_model(model_lang)
+        )
     except Exception as ex:
-        nlp = None
+        lease = None
         err = str(ex)
         logging.exception("Failed to load spaCy sentencizer model: %s", ex)
 
-    model_load_lock.release()
+    return lease, err
+
 
-    return nlp, err
+# Create docs for the texts without the max length check of the pipeline, the
+# limit is bypassed per request instead of changing "max_length" of the shared model
+def make_docs(nlp, texts):
+    for text in texts:
+        if len(text) > nlp.max_length:
+            logger.info("Text length %d exceeds spaCy max length %d, tokenizing directly", len(text), nlp.max_length)
+            yield nlp.tokenizer(text)
+        else:
+            yield text
 
 
 # Start fastapi
@@ -592,6 +676,7 @@ def post_process(request: TextImagerRequest) -> TextImagerResponse:
     meta = None
     modification_meta = None
     is_pretokenized = False
+    nlp_lease = None
 
     # Save modification start time for later
     modification_timestamp_seconds = int(time())
@@ -616,10 +701,11 @@ def post_process(request: TextImagerRequest) -> TextImagerResponse:
             logger.info("Using single model image: \"%s\"", model_name)
         logger.info("Using spaCy model: \"%s\"", model_name)
 
-        # Load model, this is cached
-        nlp, nlp_err = load_spacy_model(model_name, model_lang, settings.variant)
-        if nlp is None:
+        # Check out a model replica, this is cached
+        nlp_lease, nlp_err = load_spacy_model(model_name, model_lang, settings.variant)
+        if nlp_lease is None:
             raise Exception(f"spaCy model \"{model_name}\" could not be loaded: {nlp_err}")
+        nlp = nlp_lease.nlp
 
         # Get meta data on spaCy and used model
         spacy_meta = nlp.meta
@@ -654,10 +740,14 @@ def post_process(request: TextImagerRequest) -> TextImagerResponse:
                     logger.info(f"Splitting text into sentences using \"{model_lang}\" sentencizer...")
                     try:
                         # Load cached sentencizer model
-                        nlp_sents, nlp_sents_err = load_spacy_sentencizer_model(model_lang)
-                        if nlp_sents is None:
+                        nlp_sents_lease, nlp_sents_err = load_spacy_sentencizer_model(model_lang)
+                        if nlp_sents_lease is None:
                             raise Exception(f"spaCy sentencizer model \"{model_lang}\" could not be loaded: {nlp_sents_err}")
-                        doc_sents = nlp_sents(request.text)
+                        try:
+                            nlp_sents = nlp_sents_lease.nlp
+                            doc_sents = nlp_sents(next(make_docs(nlp_sents, [request.text])))
+                        finally:
+                            nlp_sents_lease.release()
                         texts = []
                         texts_meta = []
                         for sent in doc_sents.sents:
@@ -703,24 +793,6 @@ def post_process(request: TextImagerRequest) -> TextImagerResponse:
         if len(texts) == 0 and not is_pretokenized:
             logger.warning("No texts found and not pretokenized, aborting...")
         else:
-            # Find max text length, if not pretokenized
-            max_length_new = None
-            if not is_pretokenized:
-                for text in texts:
-                    text_len = len(text)
-                    if nlp.max_length < text_len:
-                        if max_length_new is None:
-                            max_length_new = text_len + 100
-                        else:
-                            max_length_new = max(max_length_new, text_len+100)
-
-            # Increase max length, if needed
-            max_length_before = None
-            if max_length_new is not None:
-                logger.info("Increasing spaCy max length %d -> %d", nlp.max_length, max_length_new)
-                max_length_before = nlp.max_length
-                nlp.max_length = max_length_new
-
             # Process text with spaCy
             logger.debug("Start processing...")
 
@@ -743,14 +815,9 @@ def post_process(request: TextImagerRequest) -> TextImagerResponse:
                 logger.debug("Procesed pretokenized %d tokens into %d documents.", len(request.tokens), len(docs))
             else:
                 logger.debug(" Using full text...")
-                docs = list(nlp.pipe(texts))
+                docs = list(nlp.pipe(make_docs(nlp, texts)))
                 logger.debug("Procesed %d texts into %d documents.", len(texts), len(docs))
 
-            # Reset max length, if changed
-            if max_length_before is not None:
-                logger.info("Resetting spaCy max length to %d", max_length_before)
-                nlp.max_length = max_length_before
-
             # Build a "annotation comment" annotation
             # Can be used for each annotation
             meta = AnnotationMeta(
@@ -967,6 +1034,11 @@ def post_process(request: TextImagerRequest) -> TextImagerResponse:
     except Exception as ex:
         logger.exception(ex)
 
+    finally:
+        # Return the model replica to the pool
+        if nlp_lease is not None:
+            nlp_lease.release()
+
     # Return data as JSON
     return TextImagerResponse(
         sentences=sentences,
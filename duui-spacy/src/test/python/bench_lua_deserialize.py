@@ -0,0 +1,31 @@
+import argparse
+import time
+from pathlib import Path
+
+from test_lua_deserialize import LUA_SCRIPT, META, deserialize, synthetic_response
+
+
+def benchmark(scripts, sentences):
+    text, data = synthetic_response(sentences)
+    print(f"{sentences * 20} tokens, {len(data) / 1e6:.1f} MB response")
+    for script in scripts:
+        start = time.perf_counter()
+        cas = deserialize(script, text, data)
+        deserialized = time.perf_counter() - start
+        start = time.perf_counter()
+        xmi = cas.to_xmi()
+        serialized = time.perf_counter() - start
+        print(
+            f"{script}: {len(list(cas.select(META)))} metadata FS, {len(xmi) / 1e6:.1f} MB XMI, "
+            f"deserialize {deserialized:.2f}s, XMI serialization {serialized:.2f}s"
+        )
+
+
+if __name__ == "__main__":
+    # compares the CAS produced by this deserializer with another version of the script, e.g.
+    # git show <rev>:duui-spacy/src/main/python/textimager_duui_spacy.lua > /tmp/old.lua
+    parser = argparse.ArgumentParser()
+    parser.add_argument("baseline", nargs="*", type=Path, help="other versions of the Lua script")
+    parser.add_argument("--sentences", type=int, default=5000)
+    args = parser.parse_args()
+    benchmark([*args.baseline, LUA_SCRIPT], args.sentences)
@@ -0,0 +1,26 @@
+import argparse
+import time
+from pathlib import Path
+
+from lua_host import LuaScript
+from test_lua_serialize import LUA_SCRIPT, PARAMETERS, synthetic_document
+
+
+def benchmark(scripts, token_counts):
+    for tokens in token_counts:
+        jcas = synthetic_document(tokens)
+        for script in scripts:
+            lua = LuaScript(script)
+            start = time.perf_counter()
+            lua.serialize(jcas, PARAMETERS)
+            print(f"{script}: {tokens} tokens, serialize {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    # compares the serializer with another version of the script, e.g.
+    # git show <rev>:duui-spacy/src/main/python/textimager_duui_spacy.lua > /tmp/old.lua
+    parser = argparse.ArgumentParser()
+    parser.add_argument("baseline", nargs="*", type=Path, help="other versions of the Lua script")
+    parser.add_argument("--tokens", type=int, nargs="+", default=[25000, 50000, 100000])
+    args = parser.parse_args()
+    benchmark([*args.baseline, LUA_SCRIPT], args.tokens)
@@ -0,0 +1,161 @@
+import json
+from types import MethodType, SimpleNamespace
+
+import lupa.lua54 as lupa
+
+# Runs the DUUI Lua communication script outside of the Java DUUI runtime: the luajava
+# classes used by the script are emulated with a cassis CAS. DUUI runs the scripts with Lua 5.4.
+
+
+class JavaObject:
+    # stands in for the JCas classes of a feature structure:
+    # setX(value) and getX() access feature x, addToIndexes() adds the feature structure to the CAS
+    def __init__(self, cas, fs):
+        self.cas = cas
+        self.fs = fs
+
+    def feature(self, name):
+        # JCasGen capitalizes the feature name, e.g. setPosValue for PosValue and setBegin for begin
+        if self.fs.type.get_feature(name) is None:
+            return name[0].lower() + name[1:]
+        return name
+
+    def addToIndexes(self):
+        self.cas.add(self.fs)
+
+    def getCoveredText(self):
+        return self.cas.sofa_string[self.fs.begin:self.fs.end]
+
+    def set(self, index, value):
+        # FSArray.set
+        self.fs.elements[index] = value.fs
+
+    def __getattr__(self, name):
+        if name.startswith("_") or not name.startswith(("get", "set")):
+            raise AttributeError(name)
+        feature = self.feature(name[3:])
+        if name.startswith("set"):
+            def accessor(obj, value):
+                setattr(obj.fs, feature, value.fs if isinstance(value, JavaObject) else value)
+        else:
+            def accessor(obj):
+                return getattr(obj.fs, feature)
+        # bound, so that lupa drops the receiver of obj:method() calls
+        return MethodType(accessor, self)
+
+
+class JavaIterator:
+    def __init__(self, items):
+        self.items = items
+        self.position = 0
+
+    def hasNext(self):
+        return self.position < len(self.items)
+
+    def next(self):
+        self.position += 1
+        return self.items[self.position - 1]
+
+    def previous(self):
+        self.position -= 1
+        return self.items[self.position]
+
+
+class JavaList:
+    # java.util.Collection returned by JCasUtil.select and java.util.ArrayList
+    def __init__(self, items):
+        self.items = list(items)
+
+    def iterator(self):
+        return JavaIterator(self.items)
+
+    def listIterator(self):
+        return self.iterator()
+
+
+class JCas:
+    def __init__(self, cas, language="x-unspecified"):
+        self.cas = cas
+        self.language = language
+
+    def getDocumentText(self):
+        return self.cas.sofa_string
+
+    def getDocumentLanguage(self):
+        return self.language
+
+
+class JCasUtil:
+    def select(self, jcas, type_name):
+        return JavaList(JavaObject(jcas.cas, fs) for fs in jcas.cas.select(type_name))
+
+
+class LuaJava:
+    def bindClass(self, name):
+        if name == "org.apache.uima.fit.util.JCasUtil":
+            return JCasUtil()
+        if name == "java.nio.charset.StandardCharsets":
+            return SimpleNamespace(UTF_8="UTF-8")
+        return name
+
+    def newInstance(self, name, *args):
+        if name == "java.lang.String":
+            # lupa already decodes the bytes read from the stream
+            return args[0]
+        if name == "java.util.ArrayList":
+            return JavaList(args[0].items)
+        cas = args[0].cas
+        if name == "org.apache.uima.jcas.cas.FSArray":
+            return JavaObject(cas, cas.typesystem.get_type("uima.cas.FSArray")(elements=[None] * args[1]))
+        return JavaObject(cas, cas.typesystem.get_type(name)())
+
+
+class InputStream:
+    def __init__(self, data):
+        self.data = data
+
+    def readAllBytes(self):
+        return self.data
+
+
+class OutputStream:
+    def __init__(self):
+        self.data = []
+
+    def write(self, data):
+        self.data.append(data)
+
+    def getvalue(self):
+        return "".join(self.data)
+
+
+def lua_to_python(value):
+    # Lua tables with the keys 1..n become lists, other tables dicts
+    if lupa.lua_type(value) != "table":
+        return value
+    items = dict(value.items())
+    if items and list(items) == list(range(1, len(items) + 1)):
+        return [lua_to_python(v) for v in items.values()]
+    return {k: lua_to_python(v) for k, v in items.items()}
+
+
+class LuaScript:
+    def __init__(self, path):
+        self.lua = lupa.LuaRuntime()
+        # lupa can hand out a wrong Python object after the Lua collector freed the userdata of
+        # another one, the scripts only run for one document
+        self.lua.execute('collectgarbage("stop")')
+        self.lua.globals().luajava = LuaJava()
+        self.lua.globals().json = self.lua.table_from({
+            "decode": lambda s: self.lua.table_from(json.loads(s), recursive=True),
+            "encode": lambda t: json.dumps(lua_to_python(t)),
+        })
+        self.lua.execute(path.read_text())
+
+    def serialize(self, jcas, parameters):
+        output = OutputStream()
+        self.lua.globals().serialize(jcas, output, self.lua.table_from(parameters))
+        return json.loads(output.getvalue())
+
+    def deserialize(self, jcas, data):
+        self.lua.globals().deserialize(jcas, InputStream(data))
@@ -0,0 +1,92 @@
+import json
+from pathlib import Path
+
+import pytest
+from cassis import Cas, load_typesystem
+
+pytest.importorskip("lupa")
+
+from lua_host import JCas, LuaScript  # noqa: E402
+
+SERVICE_DIR = Path(__file__).resolve().parents[2] / "main" / "python"
+LUA_SCRIPT = SERVICE_DIR / "textimager_duui_spacy.lua"
+TYPESYSTEM = SERVICE_DIR / "TypeSystemSpacy.xml"
+
+META = "org.texttechnologylab.annotation.SpacyAnnotatorMetaData"
+ANNOTATION_TYPES = [
+    "de.tudarmstadt.ukp.dkpro.core.api.segmentation.type.Sentence",
+    "de.tudarmstadt.ukp.dkpro.core.api.segmentation.type.Token",
+    "de.tudarmstadt.ukp.dkpro.core.api.segmentation.type.Lemma",
+    "de.tudarmstadt.ukp.dkpro.core.api.lexmorph.type.pos.POS",
+    "de.tudarmstadt.ukp.dkpro.core.api.lexmorph.type.morph.MorphologicalFeatures",
+    "de.tudarmstadt.ukp.dkpro.core.api.syntax.type.dependency.Dependency",
+    "de.tudarmstadt.ukp.dkpro.core.api.ner.type.NamedEntity",
+]
+
+
+def synthetic_response(sentences, tokens_per_sentence=20):
+    # a response as returned by the annotator, with every annotation type enabled
+    text = []
+    response = {
+        "sentences": [],
+        "tokens": [],
+        "dependencies": [],
+        "entities": [],
+        "meta": {
+            "name": "textimager-duui-spacy",
+            "version": "0.0.1",
+            "modelName": "en_core_web_sm",
+            "modelVersion": "3.8.0",
+            "spacyVersion": "3.8.0",
+            "modelLang": "en",
+            "modelSpacyVersion": ">=3.8.0,<3.9.0",
+            "modelSpacyGitVersion": "unknown",
+        },
+        "modification_meta": {"user": "textimager-duui-spacy", "timestamp": 0, "comment": "textimager-duui-spacy (0.0.1)"},
+        "is_pretokenized": False,
+    }
+    offset = 0
+    for s in range(sentences):
+        sentence_begin = offset
+        first = len(response["tokens"])
+        for t in range(tokens_per_sentence):
+            word = f"w{t}"
+            begin, end = offset, offset + len(word)
+            text.append(word + " ")
+            offset = end + 1
+            response["tokens"].append({
+                "begin": begin, "end": end, "ind": first + t, "write_token": True,
+                "lemma": word, "write_lemma": True,
+                "pos": "NOUN", "pos_coarse": "NOUN", "write_pos": True,
+                "morph": "Number=Sing", "morph_details": {"number": "Sing"}, "write_morph": True,
+            })
+            response["dependencies"].append({
+                "begin": begin, "end": end, "type": "ROOT" if t == 0 else "dep", "flavor": "basic",
+                "dependent_ind": first + t, "governor_ind": first, "write_dep": True,
+            })
+        response["sentences"].append({"begin": sentence_begin, "end": offset - 1, "write_sentence": True})
+        response["entities"].append({"begin": sentence_begin, "end": sentence_begin + 2, "value": "ORG", "write_entity": True})
+    return "".join(text), json.dumps(response).encode("utf-8")
+
+
+def deserialize(script, text, data):
+    with open(TYPESYSTEM, "rb") as f:
+        cas = Cas(typesystem=load_typesystem(f))
+    cas.sofa_string = text
+    LuaScript(script).deserialize(JCas(cas), data)
+    return cas
+
+
+def test_metadata_is_shared_and_references_every_annotation():
+    text, data = synthetic_response(sentences=3, tokens_per_sentence=5)
+    cas = deserialize(LUA_SCRIPT, text, data)
+
+    metas = list(cas.select(META))
+    assert len(metas) == 1
+    assert metas[0].modelName == "en_core_web_sm"
+
+    annotations = [a for type_name in ANNOTATION_TYPES for a in cas.select(type_name)]
+    # sentences, tokens, lemmas, POS, morph features, dependencies and entities
+    assert len(annotations) == 3 + 5 * 15 + 3
+    assert metas[0].reference.type.name == "uima.cas.FSArray"
+    assert sorted(a.xmiID for a in metas[0].reference.elements) == sorted(a.xmiID for a in annotations)
@@ -0,0 +1,64 @@
+from pathlib import Path
+
+import pytest
+from cassis import Cas, load_typesystem
+
+pytest.importorskip("lupa")
+
+from lua_host import JCas, LuaScript  # noqa: E402
+
+SERVICE_DIR = Path(__file__).resolve().parents[2] / "main" / "python"
+LUA_SCRIPT = SERVICE_DIR / "textimager_duui_spacy.lua"
+TYPESYSTEM = SERVICE_DIR / "TypeSystemSpacy.xml"
+
+TOKEN = "de.tudarmstadt.ukp.dkpro.core.api.segmentation.type.Token"
+SENTENCE = "de.tudarmstadt.ukp.dkpro.core.api.segmentation.type.Sentence"
+PARAMETERS = {"use_existing_tokens": "true", "use_existing_sentences": "true"}
+
+
+def synthetic_document(tokens, tokens_per_sentence=20):
+    # pre-tokenized document, every sentence ends with a "." that is not preceded by a space
+    with open(TYPESYSTEM, "rb") as f:
+        cas = Cas(typesystem=load_typesystem(f))
+    Token = cas.typesystem.get_type(TOKEN)
+    Sentence = cas.typesystem.get_type(SENTENCE)
+
+    text = []
+    offset = 0
+    sentence_begin = 0
+    for k in range(tokens):
+        last = k % tokens_per_sentence == tokens_per_sentence - 1 or k == tokens - 1
+        word = "." if last else f"w{k % 100}"
+        if last and text:
+            # no space before the full stop
+            text[-1] = text[-1].rstrip()
+            offset -= 1
+        cas.add(Token(begin=offset, end=offset + len(word)))
+        text.append(word + " ")
+        offset += len(word) + 1
+        if last:
+            cas.add(Sentence(begin=sentence_begin, end=offset - 1))
+            sentence_begin = offset
+    cas.sofa_string = "".join(text)
+    return JCas(cas, language="en")
+
+
+def test_existing_tokens_and_sentences():
+    jcas = synthetic_document(45, tokens_per_sentence=20)
+    request = LuaScript(LUA_SCRIPT).serialize(jcas, PARAMETERS)
+
+    tokens = list(jcas.cas.select(TOKEN))
+    assert request["text"] == ""
+    assert request["lang"] == "en"
+    assert request["tokens"] == [t.get_covered_text() for t in tokens]
+    assert request["sent_starts"] == [k % 20 == 0 for k in range(45)]
+    # a space follows every token except the one before a full stop and the last token
+    assert request["spaces"] == [k % 20 != 18 and k not in (43, 44) for k in range(45)]
+
+
+def test_text_is_sent_without_existing_tokens():
+    jcas = synthetic_document(10)
+    request = LuaScript(LUA_SCRIPT).serialize(jcas, {})
+
+    assert request["text"] == jcas.cas.sofa_string
+    assert "tokens" not in request
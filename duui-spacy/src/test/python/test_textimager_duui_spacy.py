@@ -0,0 +1,120 @@
+import importlib
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from threading import Lock
+
+import pytest
+import spacy
+from spacy.language import Language
+
+SERVICE_DIR = Path(__file__).resolve().parents[2] / "main" / "python"
+
+# Pipelines in use right now and the max seen per pipeline and in total
+usage_lock = Lock()
+active = Counter()
+max_active_per_pipeline = Counter()
+max_active_total = 0
+
+
+@Language.component("slow_usage_tracker")
+def slow_usage_tracker(doc):
+    # records how many requests use the same pipeline at the same time
+    global max_active_total
+    key = id(doc.vocab)
+    with usage_lock:
+        active[key] += 1
+        max_active_per_pipeline[key] = max(max_active_per_pipeline[key], active[key])
+        max_active_total = max(max_active_total, sum(active.values()))
+    time.sleep(0.05)
+    with usage_lock:
+        active[key] -= 1
+    return doc
+
+
+class BlankLoader:
+    # replaces spacy.load with a blank pipeline, counts the loaded replicas
+    def __init__(self, max_length=1000000):
+        self.max_length = max_length
+        self.loads = []
+        self.pipelines = []
+
+    def __call__(self, model_name, enable=None):
+        nlp = spacy.blank("en")
+        nlp.add_pipe("sentencizer")
+        nlp.add_pipe("slow_usage_tracker")
+        nlp.max_length = self.max_length
+        self.loads.append(model_name)
+        self.pipelines.append(nlp)
+        return nlp
+
+
+@pytest.fixture
+def duui_spacy(monkeypatch):
+    global max_active_total
+    monkeypatch.setenv("TEXTIMAGER_SPACY_VARIANT", "")
+    monkeypatch.setenv("TEXTIMAGER_SPACY_ANNOTATOR_NAME", "textimager-duui-spacy")
+    monkeypatch.setenv("TEXTIMAGER_SPACY_ANNOTATOR_VERSION", "0.0.1")
+    monkeypatch.setenv("TEXTIMAGER_SPACY_LOG_LEVEL", "WARNING")
+    monkeypatch.setenv("TEXTIMAGER_SPACY_MODEL_CACHE_SIZE", "1")
+    monkeypatch.setenv("TEXTIMAGER_SPACY_MODEL_REPLICAS", "2")
+    monkeypatch.chdir(SERVICE_DIR)
+    monkeypatch.syspath_prepend(str(SERVICE_DIR))
+    sys.modules.pop("textimager_duui_spacy", None)
+    module = importlib.import_module("textimager_duui_spacy")
+    active.clear()
+    max_active_per_pipeline.clear()
+    max_active_total = 0
+    yield module
+    sys.modules.pop("textimager_duui_spacy", None)
+
+
+def request(module, text, **parameters):
+    return module.TextImagerRequest(text=text, lang="en", parameters={"model_name": "en_core_web_sm", **parameters})
+
+
+def test_concurrent_requests_use_separate_replicas(duui_spacy, monkeypatch):
+    loader = BlankLoader()
+    monkeypatch.setattr(duui_spacy.spacy, "load", loader)
+
+    texts = [f"Request number {i} has a few tokens. It also has a second sentence." for i in range(16)]
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        responses = list(executor.map(lambda text: duui_spacy.post_process(request(duui_spacy, text)), texts))
+
+    # at most MODEL_REPLICAS pipelines are loaded, each used by one request at a time
+    assert len(loader.pipelines) == 2
+    assert max(max_active_per_pipeline.values()) == 1
+    assert max_active_total == 2
+
+    for text, response in zip(texts, responses):
+        doc = spacy.blank("en")(text)
+        assert [(t.begin, t.end) for t in response.tokens] == [(t.idx, t.idx + len(t)) for t in doc]
+        assert len(response.sentences) == 2
+
+
+def test_long_text_does_not_change_shared_max_length(duui_spacy, monkeypatch):
+    loader = BlankLoader(max_length=40)
+    monkeypatch.setattr(duui_spacy.spacy, "load", loader)
+
+    text = "A long text. " * 20
+    response = duui_spacy.post_process(request(duui_spacy, text))
+
+    assert len(response.tokens) == 80
+    assert [nlp.max_length for nlp in loader.pipelines] == [40]
+
+
+def test_sentencizer_does_not_evict_main_model(duui_spacy, monkeypatch):
+    loader = BlankLoader(max_length=40)
+    monkeypatch.setattr(duui_spacy.spacy, "load", loader)
+
+    text = "A long text. " * 20
+    for _ in range(3):
+        response = duui_spacy.post_process(request(duui_spacy, text, split_large_texts="true"))
+        assert len(response.sentences) == 20
+
+    # MODEL_CACHE_SIZE=1 holds the main model and the sentencizer, they are in separate pools
+    assert loader.loads == ["en_core_web_sm"]
+    assert list(duui_spacy.model_pool.models) == [("en_core_web_sm", "en", "")]
+    assert list(duui_spacy.sentencizer_pool.models) == ["en"]
@@ -1,6 +1,7 @@
 import logging
 import os
 import sys
+import numpy as np
 import torch
 
 from datetime import datetime
@@ -166,6 +167,10 @@ from supar.utils.tokenizer import Tokenizer
 from supar.utils.transform import CoNLLSentence, Transform
 
 
+# Roles of the tokens of a sentence, see CoNLL.build_srl_role_array
+SRL_ROLE_DTYPE = np.dtype([('token', np.int32), ('predicate', np.int32), ('label', object)])
+
+
 class CoNLL(Transform):
     r"""
     The CoNLL object holds ten fields required for CoNLL-X data format :cite:`buchholz-marsi-2006-conll`.
@@ -232,42 +237,45 @@ class CoNLL(Transform):
 
     @classmethod
     def get_sibs(cls, sequence, placeholder='_'):
-        sibs = [[0] * (len(sequence) + 1) for _ in range(len(sequence) + 1)]
-        heads = [0] + [-1 if i == placeholder else int(i) for i in sequence]
-
-        for i, hi in enumerate(heads[1:], 1):
-            for j, hj in enumerate(heads[i+1:], i + 1):
-                di, dj = hi - i, hj - j
-                if hi >= 0 and hj >= 0 and hi == hj and di * dj > 0:
-                    if abs(di) > abs(dj):
-                        sibs[i][hi] = j
-                    else:
-                        sibs[j][hj] = i
-                    break
-        return sibs[1:]
+        # the sibling of a token is the next token on the same side of the same head,
+        # sorting tokens by (head, side, position) makes siblings neighbours
+        n = len(sequence)
+        sibs = np.zeros((n + 1, n + 1), dtype=np.int64)
+        heads = np.array([-1 if i == placeholder else int(i) for i in sequence], dtype=np.int64)
+        sides = np.sign(heads - np.arange(1, n + 1))
+        tokens = np.flatnonzero((heads >= 0) & (sides != 0))
+        tokens = tokens[np.lexsort((tokens, sides[tokens], heads[tokens]))]
+        first, second = tokens[:-1], tokens[1:]
+        siblings = (heads[first] == heads[second]) & (sides[first] == sides[second])
+        i, j = first[siblings] + 1, second[siblings] + 1
+        hs = heads[i - 1]
+        farther = np.abs(hs - i) > np.abs(hs - j)
+        sibs[i[farther], hs[farther]] = j[farther]
+        sibs[j[~farther], hs[~farther]] = i[~farther]
+        return sibs[1:].tolist()
 
     @classmethod
     def get_edges(cls, sequence):
-        edges = [[0]*(len(sequence)+1) for _ in range(len(sequence)+1)]
+        edges = np.zeros((len(sequence)+1, len(sequence)+1), dtype=np.int64)
         for i, s in enumerate(sequence, 1):
             if s != '_':
                 for pair in s.split('|'):
-                    edges[i][int(pair.split(':')[0])] = 1
-        return edges
+                    edges[i, int(pair.split(':')[0])] = 1
+        return edges.tolist()
 
     @classmethod
     def get_labels(cls, sequence):
-        labels = [[None]*(len(sequence)+1) for _ in range(len(sequence)+1)]
+        labels = np.full((len(sequence)+1, len(sequence)+1), None, dtype=object)
         for i, s in enumerate(sequence, 1):
             if s != '_':
                 for pair in s.split('|'):
                     edge, label = pair.split(':')
-                    labels[i][int(edge)] = label
-        return labels
+                    labels[i, int(edge)] = label
+        return labels.tolist()
 
     @classmethod
-    def get_srl_edges(cls, sequence):
-        edges = [[[False]*(len(sequence)+1) for _ in range(len(sequence)+1)] for _ in range(len(sequence)+1)]
+    def get_srl_tags(cls, sequence):
+        # BIO tags of the arguments of each predicate (row 0 is unused), predicates tag themselves with [prd]
         spans = [['O']*len(sequence) for _ in range(len(sequence)+1)]
         for i, s in enumerate(sequence):
             if s != '_':
@@ -277,101 +285,65 @@ class CoNLL(Transform):
                         spans[int(head)][i] = label
                     else:
                         spans[i + 1][i] = label
-        for i, label in enumerate(sequence):
-            edges[i+1][i+1][0] = '[prd]' in label
+        return spans
 
-        def factorize(tags):
-            spans = []
-            for i, tag in enumerate(tags, 1):
-                if tag.startswith('B'):
-                    spans.append([i, i+1, tag[2:]])
-                elif tag.startswith('O') and (len(spans) == 0 or spans[-1][-1] != 'O'):
-                    spans.append([i, i+1, 'O'])
-                elif tag.startswith('['):
-                    spans.append([i, i+1, tag])
-                else:
-                    spans[-1][1] += 1
-            return spans
-        for prd, arg_labels in enumerate(spans[1:], 1):
-            for *span, label in factorize(arg_labels):
-                if span[0] != prd:
+    @classmethod
+    def factorize_srl_tags(cls, tags):
+        spans = []
+        for i, tag in enumerate(tags, 1):
+            if tag.startswith('B'):
+                spans.append([i, i+1, tag[2:]])
+            elif tag.startswith('O') and (len(spans) == 0 or spans[-1][-1] != 'O'):
+                spans.append([i, i+1, 'O'])
+            elif tag.startswith('['):
+                spans.append([i, i+1, tag])
+            else:
+                spans[-1][1] += 1
+        return spans
+
+    @classmethod
+    def get_srl_edges(cls, sequence):
+        # returned as array: the chart is cubic in the sentence length and the edge field
+        # (no bos/eos row) turns it into a tensor directly, nested lists would only slow this down
+        n = len(sequence)
+        edges = np.zeros((n+1, n+1, n+1), dtype=bool)
+        edges[np.arange(1, n+1), np.arange(1, n+1), 0] = ['[prd]' in label for label in sequence]
+        for prd, arg_labels in enumerate(cls.get_srl_tags(sequence)[1:], 1):
+            spans = cls.factorize_srl_tags(arg_labels)
+            # tokens of the same span are connected, except for the predicate itself
+            span_ids = np.repeat(np.arange(len(spans)), [end - start for start, end, _ in spans])
+            connected = span_ids[:, None] == span_ids[None, :]
+            np.fill_diagonal(connected, False)
+            connected[prd-1] = False
+            edges[prd, 1:, 1:] |= connected
+            for start, end, label in spans:
+                if start != prd:
                     if label != 'O':
-                        edges[prd][span[0] if span[0] < prd else span[1]-1][prd] = True
+                        edges[prd, start if start < prd else end-1, prd] = True
                     else:
-                        for i in range(*span):
-                            edges[prd][i][prd] = True
-                for i in range(*span):
-                    if i != prd:
-                        for j in range(*span):
-                            if i != j:
-                                edges[prd][i][j] = True
+                        edges[prd, start:end, prd] = True
         return edges
 
     @classmethod
     def get_srl_roles(cls, sequence):
-        labels = [['O']*(len(sequence)+1) for _ in range(len(sequence)+1)]
-        spans = [['O']*len(sequence) for _ in range(len(sequence)+1)]
-        for i, s in enumerate(sequence):
-            if s != '_':
-                for pair in s.split('|'):
-                    head, label = pair.split(':')
-                    if label != '[prd]':
-                        spans[int(head)][i] = label
-                    else:
-                        spans[i + 1][i] = label
-
-        def factorize(tags):
-            spans = []
-            for i, tag in enumerate(tags, 1):
-                if tag.startswith('B'):
-                    spans.append([i, i+1, tag[2:]])
-                elif tag.startswith('O') and (len(spans) == 0 or spans[-1][-1] != 'O'):
-                    spans.append([i, i+1, 'O'])
-                elif tag.startswith('['):
-                    spans.append([i, i+1, tag])
-                else:
-                    spans[-1][1] += 1
-            return spans
-        for prd, arg_labels in enumerate(spans[1:], 1):
+        labels = np.full((len(sequence)+1, len(sequence)+1), 'O', dtype=object)
+        for prd, arg_labels in enumerate(cls.get_srl_tags(sequence)[1:], 1):
             if '[prd]' not in sequence[prd-1]:
                 continue
-            labels[prd][0] = '[prd]'
-            for *span, label in factorize(arg_labels):
+            labels[prd, 0] = '[prd]'
+            for start, end, label in cls.factorize_srl_tags(arg_labels):
                 if not label.startswith('['):
-                    for i in range(*span):
-                        labels[prd][i] = label
-            labels[prd][prd] = '[prd]'
-        return labels
+                    labels[prd, start:end] = label
+            labels[prd, prd] = '[prd]'
+        return labels.tolist()
 
     @classmethod
     def get_srl_spans(cls, sequence):
         labels = []
-        spans = [['O']*len(sequence) for _ in range(len(sequence)+1)]
-        for i, s in enumerate(sequence):
-            if s != '_':
-                for pair in s.split('|'):
-                    head, label = pair.split(':')
-                    if label != '[prd]':
-                        spans[int(head)][i] = label
-                    else:
-                        spans[i + 1][i] = label
-
-        def factorize(tags):
-            spans = []
-            for i, tag in enumerate(tags, 1):
-                if tag.startswith('B'):
-                    spans.append([i, i+1, tag[2:]])
-                elif tag.startswith('O') and (len(spans) == 0 or spans[-1][-1] != 'O'):
-                    spans.append([i, i+1, 'O'])
-                elif tag.startswith('['):
-                    spans.append([i, i+1, tag])
-                else:
-                    spans[-1][1] += 1
-            return spans
-        for prd, arg_labels in enumerate(spans[1:], 1):
+        for prd, arg_labels in enumerate(cls.get_srl_tags(sequence)[1:], 1):
             if '[prd]' not in sequence[prd-1]:
                 continue
-            for i, j, label in factorize(arg_labels):
+            for i, j, label in cls.factorize_srl_tags(arg_labels):
                 if i != prd and not label.startswith('['):
                     labels.append((prd, i, j-1, label))
         return labels
@@ -400,6 +372,34 @@ class CoNLL(Transform):
         labels = [('_' if not label else label).lstrip('|') for label in labels]
         return labels
 
+    @classmethod
+    def build_srl_role_array(cls, spans):
+        r"""
+        Structured counterpart of :meth:`build_srl_roles`, one row per token role in the same order
+        as in the joined strings, so that the roles do not have to be parsed again.
+
+        Returns:
+            A :class:`numpy.ndarray` of :data:`SRL_ROLE_DTYPE` sorted by token: ``token`` is the 0-based
+            token index, ``predicate`` the 1-based index of the predicate (0 marks the predicate itself)
+            and ``label`` is ``[prd]`` or the BIO tag of the argument.
+        """
+        rows = []
+        # tokens whose roles contain [prd], these are not marked as predicate again
+        marked = set()
+        for span in spans:
+            prd, head, start, end, label = span
+            if label == 'O':
+                continue
+            if prd-1 not in marked:
+                rows.append((prd-1, 0, '[prd]'))
+                marked.add(prd-1)
+            rows.append((start-1, prd, f'B-{label}'))
+            rows.extend((i, prd, f'I-{label}') for i in range(start, end))
+            if '[prd]' in label:
+                marked.update(range(start-1, end))
+        roles = np.array(rows, dtype=SRL_ROLE_DTYPE)
+        return roles[np.argsort(roles['token'], kind='stable')]
+
     @classmethod
     def toconll(cls, tokens):
         r"""
@@ -1102,6 +1102,7 @@ class CRF2oSemanticRoleLabelingParser(CRFSemanticRoleLabelingParser):
         role_preds = [[(*i[:-1], self.ROLE.vocab[i[-1]]) for i in s]
                       for s in self.model.decode(s_edge, s_sib, s_role, mask)]
         batch.roles = [CoNLL.build_srl_roles(pred, length) for pred, length in zip(role_preds, lens.tolist())]
+        batch.role_arrays = [CoNLL.build_srl_role_array(pred) for pred in role_preds]
         if self.args.prob:
             scores = zip(*(s.cpu().unbind() for s in (s_edge, s_sib, s_role)))
             batch.probs = [(s[0][:i+1, :i+1], s[1][:i+1, :i+1, :i+1], s[2][:i+1, :i+1])
@@ -1316,7 +1317,13 @@ def load_parser(device, model_path=None, model_type=None):
     return parser, args
 
 #def predict_roles(tokens__, parser, model_path=None, model_type=None):
-def predict_roles(tokens__, parser, args):
+def predict_roles(tokens__, parser, args, buckets=32):
+    """
+    Predicts the semantic roles of the tokenized sentences, sentences of similar length are batched together
+    in (at most) buckets buckets. The batches are prepared in the service process, the dataset is built
+    per request, so a loader with worker processes would start them for every request.
+    Returns one array of SRL_ROLE_DTYPE per sentence, see CoNLL.build_srl_role_array.
+    """
     # print(dt, 'Start processing', flush=True)
 
     tset = []
@@ -1334,37 +1341,26 @@ def predict_roles(tokens__, parser, args):
             tset.append(tokens)
         else:
             tset.append(['X'])
-    buckets = 32
-    workers = 0
     args.data = tset
     parser.transform.eval()
     #
     data = Dataset(parser.transform, **args)
+    for i, sentence in enumerate(data.sentences):
+        sentence.index = i
     # print(args.batch_size)
-    data.build(args.batch_size, buckets, False, False, workers)
+    data.build(args.batch_size, buckets, False, False, 0)
 
     start = datetime.now()
     parser.model.eval()
 
+    # the roles are collected from the batches by sentence index, in the order of the buckets
+    roles = [np.array([], dtype=SRL_ROLE_DTYPE) for _ in tset]
     for batch in data.loader:
-       batch = parser.pred_step(batch)
-
-    s_i = 0
-    for s in data:
-        t_i = 0
-        for idx, token, arg in zip(s.values[0], s.values[1], s.values[8]):
-            #print(f'{idx:<3} {token:<20} {arg:20}')
-            try:
-                token_ = tokens__[s_i][t_i]['text']
-            except IndexError:
-                continue
-            #assert tokens__[s_i][t_i]['text'] == token
-            tokens__[s_i][t_i]['arg'] = arg#.replace('B-', '').replace('I-', '')
-            t_i += 1
-        s_i += 1
-
+        batch = parser.pred_step(batch)
+        for sentence, role_array in zip(batch.sentences, batch.role_arrays):
+            roles[sentence.index] = role_array
 
-    return tokens__
+    return roles
 
 if __name__ == '__main__':
     tokens = [[
@@ -1383,4 +1379,5 @@ if __name__ == '__main__':
         ]]
 
     parser, args = load_parser('cpu')
-    predict_roles(tokens, parser, args)
+    for roles in predict_roles(tokens, parser, args):
+        print(roles)
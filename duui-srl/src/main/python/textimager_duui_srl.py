@@ -32,6 +32,8 @@ class Settings(BaseSettings):
     textimager_srl_parser_model_name: str
     #batch size
     textimager_srl_parser_batch_size: int
+    # Max number of length buckets the sentences are batched in
+    textimager_srl_parser_buckets: int = 32
 
 
 # sys.path.append('crfsrl')
@@ -353,63 +355,43 @@ def post_process(request: TextImagerRequest) -> TextImagerResponse:
     # tokens__ = srl.predict_roles(tokens__, parser, model_path=settings.textimager_srl_parser_model_name,
     #                              model_type=settings.textimager_srl_parser_model_type)
     args.batch_size = settings.textimager_srl_parser_batch_size
-    tokens__ = srl.predict_roles(tokens__, parser, args)
+    role_arrays = srl.predict_roles(tokens__, parser, args, settings.textimager_srl_parser_buckets)
 
     entities = {}
     links = []
     done = set()
-    for sentence in tokens__:
+    for sentence, roles in zip(tokens__, role_arrays):
+        # roles of empty sentences refer to a placeholder token
+        roles = roles[roles['token'] < len(sentence)]
+        is_predicate = roles['predicate'] == 0
         preds_done = {}
-        for i, token in enumerate(sentence, start=1):
-            try:
-                args = token['arg'].split('|')
-            except KeyError:
+        for i in roles['token'][is_predicate].tolist():
+            token_begin = int(sentence[i]['begin'])
+            token_end = int(sentence[i]['end'])
+            if (token_begin, token_end) in entities:
+                entity = entities[(token_begin, token_end)]
+            else:
+                entity = Entity(begin=token_begin, end=token_end, write=True)
+                entities[(token_begin, token_end)] = entity
+            # entity = Entity(begin=token_begin, end=token_end, write=True)
+            # entities[(token_begin, token_end)] = entity
+            preds_done[i + 1] = (token_begin, token_end)
+        arguments = roles[~is_predicate]
+        for i, token_i, token_arg in zip(arguments['token'].tolist(), arguments['predicate'].tolist(), arguments['label'].tolist()):
+            token_begin = sentence[i]['begin']
+            token_end = sentence[i]['end']
+            pred_begin, pred_end = preds_done[token_i]
+            if (pred_begin, pred_end, token_begin, token_end) in done:
                 continue
-            for j in range(len(args)):
-                split = args[j].split(':')
-                if split[0] == '_'  or len(split) < 2:
-                    continue
-                token_begin = int(token['begin'])
-                token_end = int(token['end'])
-                try:
-                    token_i = int(split[0])
-                except ValueError:
-                    continue
-                if token_i == 0:
-                    if (token_begin, token_end) in entities:
-                        entity = entities[(token_begin, token_end)]
-                    else:
-                        entity = Entity(begin=token_begin, end=token_end, write=True)
-                        entities[(token_begin, token_end)] = entity
-                    # entity = Entity(begin=token_begin, end=token_end, write=True)
-                    # entities[(token_begin, token_end)] = entity
-                    preds_done[i] = (token_begin, token_end)
-        for i, token in enumerate(sentence, start=0):
-            try:
-                args = token['arg'].split('|')
-            except KeyError:
-                continue
-            for j in range(len(args)):
-                split = args[j].split(':')#.replace('B-', '').replace('I-', '')
-                if split[0] == '_'  or len(split) < 2:
-                    continue
-                token_arg = split[1]
-                token_begin = token['begin']
-                token_end = token['end']
-                token_i = int(split[0])
-                if token_i != 0:
-                    pred_begin, pred_end = preds_done[token_i]
-                    if (pred_begin, pred_end, token_begin, token_end) in done:
-                        continue
-                    if (token_begin, token_end) in entities:
-                        entity = entities[(token_begin, token_end)]
-                    else:
-                        entity = Entity(begin=token_begin, end=token_end, write=True)
-                        entities[(token_begin, token_end)] = entity
-                    links.append(Link(begin_fig=pred_begin, end_fig=pred_end,
-                        begin_gr=token_begin, end_gr=token_end,
-                        rel_type=token_arg, write=True))
-                    done.add((pred_begin, pred_end, token_begin, token_end))
+            if (token_begin, token_end) in entities:
+                entity = entities[(token_begin, token_end)]
+            else:
+                entity = Entity(begin=token_begin, end=token_end, write=True)
+                entities[(token_begin, token_end)] = entity
+            links.append(Link(begin_fig=pred_begin, end_fig=pred_end,
+                begin_gr=token_begin, end_gr=token_end,
+                rel_type=token_arg, write=True))
+            done.add((pred_begin, pred_end, token_begin, token_end))
 
     dte = datetime.now()
     print(dte, 'Finished processing', flush=True)
@@ -0,0 +1,48 @@
+import argparse
+import random
+import sys
+import time
+
+import torch
+
+from test_conll_charts import ListCoNLL, load_srl, random_graph, random_heads, random_srl
+
+
+def preprocess(conll, sentences):
+    # ms per sentence for the charts of one sentence, the edge field turns the SRL chart into a tensor
+    start = time.perf_counter()
+    for heads, graph, sequence in sentences:
+        conll.get_sibs(heads)
+        conll.get_edges(graph)
+        conll.get_labels(graph)
+        torch.tensor(conll.get_srl_edges(sequence), dtype=torch.long)
+        conll.get_srl_roles(sequence)
+        conll.get_srl_spans(sequence)
+    return (time.perf_counter() - start) / len(sentences) * 1000
+
+
+def benchmark(lengths, tokens):
+    srl = load_srl(lambda modules, name, module: modules.__setitem__(name, module), lambda path: sys.path.insert(0, path))
+    rng = random.Random(0)
+    print(f"{'length':>6} {'lists ms':>10} {'numpy ms':>10} {'speedup':>8}")
+    for n in lengths:
+        sentences = []
+        while len(sentences) < max(3, tokens // n):
+            sequence = random_srl(rng, n)
+            try:
+                ListCoNLL.get_srl_edges(sequence)
+            except IndexError:
+                continue
+            sentences.append((random_heads(rng, n), random_graph(rng, n), sequence))
+        lists = preprocess(ListCoNLL, sentences)
+        arrays = preprocess(srl.CoNLL, sentences)
+        print(f"{n:>6} {lists:>10.2f} {arrays:>10.2f} {lists / arrays:>7.1f}x")
+
+
+if __name__ == "__main__":
+    # e.g. python src/test/python/bench_conll_charts.py --lengths 10 40 80 160
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--lengths", type=int, nargs="+", default=[10, 20, 40, 80, 160])
+    parser.add_argument("--tokens", type=int, default=400, help="tokens per length, at least 3 sentences")
+    args = parser.parse_args()
+    benchmark(args.lengths, args.tokens)
@@ -0,0 +1,268 @@
+import importlib
+import random
+import sys
+import types
+from pathlib import Path
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("torch")
+
+SERVICE_DIR = Path(__file__).resolve().parents[2] / "main" / "python"
+
+# modules of supar and crfsrl imported by srl.py, the crfsrl checkout (with its supar submodule) only
+# exists in the image, the chart methods of CoNLL do not use them
+PARSER_MODULES = [
+    "supar", "supar.utils", "supar.utils.logging", "supar.utils.common", "supar.utils.data", "supar.utils.field",
+    "supar.utils.fn", "supar.utils.metric", "supar.utils.optim", "supar.utils.parallel", "supar.utils.tokenizer",
+    "supar.utils.transform", "crfsrl", "crfsrl.metric", "crfsrl.model",
+]
+LABELS = ["ARG0", "ARG1", "ARG2", "ARGM-LOC", "ARGM-TMP"]
+
+
+class PlaceholderModule(types.ModuleType):
+    # every imported name is a new empty class
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        value = type(name, (), {})
+        setattr(self, name, value)
+        return value
+
+
+def load_srl(set_item, syspath_prepend):
+    if importlib.util.find_spec("crfsrl") is None:
+        for name in PARSER_MODULES:
+            set_item(sys.modules, name, PlaceholderModule(name))
+    syspath_prepend(str(SERVICE_DIR))
+    sys.modules.pop("srl", None)
+    return importlib.import_module("srl")
+
+
+class ListCoNLL:
+    # the former charts of srl.CoNLL, built as nested lists
+
+    @classmethod
+    def get_sibs(cls, sequence, placeholder='_'):
+        sibs = [[0] * (len(sequence) + 1) for _ in range(len(sequence) + 1)]
+        heads = [0] + [-1 if i == placeholder else int(i) for i in sequence]
+
+        for i, hi in enumerate(heads[1:], 1):
+            for j, hj in enumerate(heads[i+1:], i + 1):
+                di, dj = hi - i, hj - j
+                if hi >= 0 and hj >= 0 and hi == hj and di * dj > 0:
+                    if abs(di) > abs(dj):
+                        sibs[i][hi] = j
+                    else:
+                        sibs[j][hj] = i
+                    break
+        return sibs[1:]
+
+    @classmethod
+    def get_edges(cls, sequence):
+        edges = [[0]*(len(sequence)+1) for _ in range(len(sequence)+1)]
+        for i, s in enumerate(sequence, 1):
+            if s != '_':
+                for pair in s.split('|'):
+                    edges[i][int(pair.split(':')[0])] = 1
+        return edges
+
+    @classmethod
+    def get_labels(cls, sequence):
+        labels = [[None]*(len(sequence)+1) for _ in range(len(sequence)+1)]
+        for i, s in enumerate(sequence, 1):
+            if s != '_':
+                for pair in s.split('|'):
+                    edge, label = pair.split(':')
+                    labels[i][int(edge)] = label
+        return labels
+
+    @classmethod
+    def tags(cls, sequence):
+        spans = [['O']*len(sequence) for _ in range(len(sequence)+1)]
+        for i, s in enumerate(sequence):
+            if s != '_':
+                for pair in s.split('|'):
+                    head, label = pair.split(':')
+                    if label != '[prd]':
+                        spans[int(head)][i] = label
+                    else:
+                        spans[i + 1][i] = label
+        return spans
+
+    @classmethod
+    def factorize(cls, tags):
+        spans = []
+        for i, tag in enumerate(tags, 1):
+            if tag.startswith('B'):
+                spans.append([i, i+1, tag[2:]])
+            elif tag.startswith('O') and (len(spans) == 0 or spans[-1][-1] != 'O'):
+                spans.append([i, i+1, 'O'])
+            elif tag.startswith('['):
+                spans.append([i, i+1, tag])
+            else:
+                spans[-1][1] += 1
+        return spans
+
+    @classmethod
+    def get_srl_edges(cls, sequence):
+        edges = [[[False]*(len(sequence)+1) for _ in range(len(sequence)+1)] for _ in range(len(sequence)+1)]
+        for i, label in enumerate(sequence):
+            edges[i+1][i+1][0] = '[prd]' in label
+        for prd, arg_labels in enumerate(cls.tags(sequence)[1:], 1):
+            for *span, label in cls.factorize(arg_labels):
+                if span[0] != prd:
+                    if label != 'O':
+                        edges[prd][span[0] if span[0] < prd else span[1]-1][prd] = True
+                    else:
+                        for i in range(*span):
+                            edges[prd][i][prd] = True
+                for i in range(*span):
+                    if i != prd:
+                        for j in range(*span):
+                            if i != j:
+                                edges[prd][i][j] = True
+        return edges
+
+    @classmethod
+    def get_srl_roles(cls, sequence):
+        labels = [['O']*(len(sequence)+1) for _ in range(len(sequence)+1)]
+        for prd, arg_labels in enumerate(cls.tags(sequence)[1:], 1):
+            if '[prd]' not in sequence[prd-1]:
+                continue
+            labels[prd][0] = '[prd]'
+            for *span, label in cls.factorize(arg_labels):
+                if not label.startswith('['):
+                    for i in range(*span):
+                        labels[prd][i] = label
+            labels[prd][prd] = '[prd]'
+        return labels
+
+    @classmethod
+    def get_srl_spans(cls, sequence):
+        labels = []
+        for prd, arg_labels in enumerate(cls.tags(sequence)[1:], 1):
+            if '[prd]' not in sequence[prd-1]:
+                continue
+            for i, j, label in cls.factorize(arg_labels):
+                if i != prd and not label.startswith('['):
+                    labels.append((prd, i, j-1, label))
+        return labels
+
+
+def parse_srl_roles(roles):
+    # (token, predicate, label) rows as the service parsed them from the joined role strings
+    rows = []
+    for token, role in enumerate(roles):
+        if role == '_':
+            continue
+        for pair in role.split('|'):
+            predicate, label = pair.split(':')
+            rows.append((token, int(predicate), label))
+    return rows
+
+
+def random_heads(rng, n):
+    return ['_' if rng.random() < 0.05 else str(rng.randint(0, n)) for _ in range(n)]
+
+
+def random_graph(rng, n):
+    return ['_' if rng.random() < 0.3 else
+            '|'.join(f'{rng.randint(0, n)}:{rng.choice("abc")}' for _ in range(rng.randint(1, 3)))
+            for _ in range(n)]
+
+
+def random_srl(rng, n):
+    # CoNLL SRL column: predicates are marked with 0:[prd], arguments with BIO tags per predicate
+    pairs = [[] for _ in range(n)]
+    for prd in range(1, n + 1):
+        if rng.random() > 0.25:
+            continue
+        pairs[prd - 1].append('0:[prd]')
+        i = 1
+        while i <= n:
+            if rng.random() < 0.3:
+                length = rng.randint(1, 4)
+                label = rng.choice(LABELS)
+                for k in range(i, min(n, i + length - 1) + 1):
+                    if k == prd and rng.random() < 0.8:
+                        break
+                    pairs[k - 1].append(f'{prd}:{"B" if k == i else "I"}-{label}')
+                i += length
+            else:
+                i += 1
+    return ['|'.join(p) if p else '_' for p in pairs]
+
+
+def random_role_spans(rng, n):
+    # decoded (predicate, head, start, end, label) spans as passed to build_srl_roles
+    spans = []
+    for _ in range(rng.randint(0, 2 * n)):
+        start = rng.randint(1, n)
+        end = rng.randint(start, min(n, start + 4))
+        label = rng.choice(LABELS + ['O', '[prd]'] if rng.random() < 0.1 else LABELS)
+        spans.append((rng.randint(1, n), 0, start, end, label))
+    return spans
+
+
+@pytest.fixture
+def srl(monkeypatch):
+    return load_srl(monkeypatch.setitem, monkeypatch.syspath_prepend)
+
+
+def test_sibs_edges_and_labels(srl):
+    rng = random.Random(0)
+    for _ in range(1000):
+        n = rng.randint(0, 40)
+        heads = random_heads(rng, n)
+        assert srl.CoNLL.get_sibs(heads) == ListCoNLL.get_sibs(heads)
+        graph = random_graph(rng, n)
+        assert srl.CoNLL.get_edges(graph) == ListCoNLL.get_edges(graph)
+        assert srl.CoNLL.get_labels(graph) == ListCoNLL.get_labels(graph)
+
+
+def test_sibs_of_projective_trees(srl):
+    # every token has a head, siblings on both sides of the head
+    rng = random.Random(1)
+    for _ in range(200):
+        n = rng.randint(1, 60)
+        heads = [str(rng.choice([0] + [j for j in range(1, n + 1) if j != i])) for i in range(1, n + 1)]
+        assert srl.CoNLL.get_sibs(heads) == ListCoNLL.get_sibs(heads)
+
+
+def test_srl_charts(srl):
+    rng = random.Random(2)
+    checked = 0
+    for _ in range(1000):
+        sequence = random_srl(rng, rng.randint(0, 30))
+        try:
+            expected = ListCoNLL.get_srl_edges(sequence)
+        except IndexError:
+            # arguments that start inside of their predicate, the former chart fails on these as well
+            continue
+        edges = srl.CoNLL.get_srl_edges(sequence)
+        assert edges.dtype == bool
+        assert edges.tolist() == expected
+        assert srl.CoNLL.get_srl_roles(sequence) == ListCoNLL.get_srl_roles(sequence)
+        assert srl.CoNLL.get_srl_spans(sequence) == ListCoNLL.get_srl_spans(sequence)
+        checked += 1
+    assert checked > 900
+
+
+def test_role_array_matches_role_strings(srl):
+    rng = random.Random(3)
+    for _ in range(2000):
+        n = rng.randint(1, 25)
+        spans = random_role_spans(rng, n)
+        roles = srl.CoNLL.build_srl_role_array(spans)
+
+        assert roles.dtype == srl.SRL_ROLE_DTYPE
+        rows = list(zip(roles['token'].tolist(), roles['predicate'].tolist(), roles['label'].tolist()))
+        assert rows == parse_srl_roles(srl.CoNLL.build_srl_roles(spans, n))
+
+
+def test_empty_role_array(srl):
+    roles = srl.CoNLL.build_srl_role_array([])
+    assert roles.dtype == srl.SRL_ROLE_DTYPE
+    assert len(roles) == 0
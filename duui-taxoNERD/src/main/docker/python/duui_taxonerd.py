@@ -1,3 +1,4 @@
+from functools import lru_cache
 from typing import List, Optional
 
 from attr.filters import exclude
@@ -9,7 +10,8 @@ from pydantic import BaseModel
 from pydantic_settings import BaseSettings
 from starlette.responses import JSONResponse
 from taxonerd import *
-from functools import lru_cache
+from threading import Lock
+import logging
 import uvicorn
 
 
@@ -47,10 +49,18 @@ class DUUIResponse(BaseModel):
 class Settings(BaseSettings):
     # Name of the Model
     model: str
+    # Max number of loaded model configurations (model, linker, threshold)
+    model_cache_size: int = 3
+    # Load the default configuration at startup
+    warmup: bool = False
+    # Log level
+    log_level: str = "INFO"
 
 # settings + cache
 settings = Settings()
-lru_cache_with_size = lru_cache(maxsize=3)
+
+logging.basicConfig(level=settings.log_level)
+logger = logging.getLogger(__name__)
 
 # config = {"prefer_gpu": True,
 #           "model": settings.model,
@@ -69,47 +79,72 @@ model_settings = {'model': settings.model,
           ]
          }
 
-ner = TaxoNERD(prefer_gpu=True)
+# Loaded models, keyed by (model, linker, threshold), each with a lock so that
+# a TaxoNERD instance only processes one request at a time
+model_load_lock = Lock()
 
-# @lru_cache(maxsize=1)
-def load_taxonerd(settings):
+
+@lru_cache(maxsize=settings.model_cache_size)
+def load_taxonerd(model, linker, threshold):
     # Add with_linking="gbif_backbone" or with_linking="taxref" to activate entity linking
     # ner.load(model="en_ner_eco_biobert", linker=request.linking, threshold=request.threshold)
-    print(settings)
     #ner.load(model=settings["model"], exclude=settings["exclude"], linker=settings["linker"], threshold=settings["threshold"])
-    ner.load(model=settings["model"], exclude=[], linker=settings["linker"], threshold=settings["threshold"])
-    return ner
+    ner = TaxoNERD(prefer_gpu=True)
+    ner.load(model=model, exclude=[], linker=linker, threshold=threshold)
+    return ner, Lock()
 
-def analyse(text, ner):
 
-    result = ner.find_in_text(text)
-    print(result)
+def get_taxonerd(model, linker, threshold):
+    # concurrent requests for a configuration that is not loaded yet wait for the
+    # first one instead of loading it again
+    with model_load_lock:
+        return load_taxonerd(model, linker, threshold)
 
-    taxons = []
 
-    for index, row in result.iterrows():
-        offset = row['offsets'].split(" ")
-        entity = row['entity']
-        entries = []
+def analyse(text, ner):
 
-        for e in entity:
-            entries.append(GBIF(
+    result = ner.find_in_text(text)
+    logger.debug(result)
+
+    if result.empty:
+        return []
+
+    # offsets are "<label> <begin> <end>"
+    offsets = result['offsets'].str.split(" ")
+    begins = offsets.str[1].astype(int).tolist()
+    ends = offsets.str[2].astype(int).tolist()
+    if 'entity' in result.columns:
+        entities = result['entity'].tolist()
+    else:
+        entities = [None] * len(result)
+
+    taxons = [
+        Taxon(
+            begin=begin,
+            end=end,
+            comment=None if entity is None else [
+                GBIF(
                     id=str(e[0]),
                     value=str(e[1]),
                     propability=float(e[2])
-                ))
-
-        taxons.append(Taxon(
-            begin=int(offset[1]),
-            end=int(offset[2]),
-            comment=entries
-        ))
+                )
+                for e in entity
+            ]
+        )
+        for begin, end, entity in zip(begins, ends, entities)
+    ]
 
-    print(taxons)
+    logger.debug(taxons)
 
     return taxons
 
 
+if settings.warmup:
+    warmup_ner, warmup_lock = get_taxonerd(model_settings["model"], model_settings["linker"], model_settings["threshold"])
+    with warmup_lock:
+        analyse("Quercus robur and Fagus sylvatica grow in European forests.", warmup_ner)
+
+
 app = FastAPI(
     openapi_url="/openapi.json",
     docs_url="/api",
@@ -176,17 +211,12 @@ def get_communication_layer() -> str:
 @app.post("/v1/process")
 def post_process(request: DUUIRequest) -> DUUIResponse:
 
-    print(request)
+    logger.debug(request)
 
-    text = request.text
-    model_settings["linker"]=request.linking
-    model_settings["threshold"]=request.threshold
-    # print(config)
-    # print(model)
-    ner = load_taxonerd(model_settings)
+    ner, ner_lock = get_taxonerd(model_settings["model"], request.linking, request.threshold)
 
-    print("Finish Loading")
-    taxons = analyse(text, ner)
+    with ner_lock:
+        taxons = analyse(request.text, ner)
 
     # Return data as JSON
     return DUUIResponse(
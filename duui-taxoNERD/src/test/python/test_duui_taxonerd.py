@@ -0,0 +1,86 @@
+import importlib
+import sys
+import time
+import types
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from threading import Lock
+
+import pandas as pd
+import pytest
+
+SERVICE_DIR = Path(__file__).resolve().parents[2] / "main" / "docker" / "python"
+
+
+class StubTaxoNERD:
+    # counts the load calls, loading takes a while so that concurrent requests overlap
+    loads = []
+    loads_lock = Lock()
+
+    def __init__(self, prefer_gpu=False):
+        self.config = None
+
+    def load(self, model, exclude, linker, threshold):
+        time.sleep(0.2)
+        with StubTaxoNERD.loads_lock:
+            StubTaxoNERD.loads.append((model, linker, threshold))
+        self.config = (model, linker, threshold)
+
+    def find_in_text(self, text):
+        if not text:
+            return pd.DataFrame(columns=["offsets", "text"])
+        return pd.DataFrame({
+            "offsets": ["LIVB 0 14", "LIVB 19 35"],
+            "text": ["Quercus robur", "Fagus sylvatica"],
+            "entity": [[("2878688", "Quercus robur", 1.0)], [("2882316", "Fagus sylvatica", 0.95)]],
+        })
+
+
+@pytest.fixture
+def service(monkeypatch):
+    # taxonerd is only installed in the image, the service only needs the TaxoNERD class
+    if importlib.util.find_spec("taxonerd") is None:
+        stub_module = types.ModuleType("taxonerd")
+        stub_module.TaxoNERD = StubTaxoNERD
+        monkeypatch.setitem(sys.modules, "taxonerd", stub_module)
+    monkeypatch.setenv("MODEL", "en_ner_eco_biobert")
+    monkeypatch.setenv("MODEL_CACHE_SIZE", "3")
+    monkeypatch.chdir(SERVICE_DIR)
+    monkeypatch.syspath_prepend(str(SERVICE_DIR))
+    sys.modules.pop("duui_taxonerd", None)
+    module = importlib.import_module("duui_taxonerd")
+    monkeypatch.setattr(module, "TaxoNERD", StubTaxoNERD)
+    StubTaxoNERD.loads = []
+    yield module
+    sys.modules.pop("duui_taxonerd", None)
+
+
+def test_concurrent_requests_load_each_configuration_once(service):
+    requests = [
+        service.DUUIRequest(text="Quercus robur and Fagus sylvatica", linking=linking, threshold=0.7)
+        for linking in ["gbif_backbone", "taxref"] * 10
+    ]
+    with ThreadPoolExecutor(max_workers=20) as executor:
+        responses = list(executor.map(service.post_process, requests))
+
+    assert sorted(StubTaxoNERD.loads) == [
+        ("en_ner_eco_biobert", "gbif_backbone", 0.7),
+        ("en_ner_eco_biobert", "taxref", 0.7),
+    ]
+    for response in responses:
+        assert [(t.begin, t.end) for t in response.taxons] == [(0, 14), (19, 35)]
+
+
+def test_cached_configuration_is_reused(service):
+    first, _ = service.get_taxonerd("en_ner_eco_biobert", "gbif_backbone", 0.7)
+    second, _ = service.get_taxonerd("en_ner_eco_biobert", "gbif_backbone", 0.7)
+    assert first is second
+    assert len(StubTaxoNERD.loads) == 1
+
+
+def test_analyse_converts_entities(service):
+    ner, _ = service.get_taxonerd("en_ner_eco_biobert", "gbif_backbone", 0.7)
+    taxons = service.analyse("Quercus robur and Fagus sylvatica", ner)
+    assert taxons[1].comment[0].id == "2882316"
+    assert taxons[1].comment[0].propability == pytest.approx(0.95)
+    assert service.analyse("", ner) == []
@@ -1,6 +1,7 @@
 import torch
 import math
 from transformers import AutoModelForSequenceClassification, AutoTokenizer
+from duui_runtime.batching import DEFAULT_MAX_TOKENS, TokenBudgetBatcher
 from scipy.special import softmax
 import numpy as np
 from pysentimiento import create_analyzer
@@ -487,27 +488,25 @@ class EmotionClassification:
 
 
 class EmotionCheck:
-    def __init__(self, model_name: str, device='cuda:0'):
+    def __init__(self, model_name: str, device='cuda:0', max_tokens: int = DEFAULT_MAX_TOKENS):
         self.device = device
         self.tokenizer = AutoTokenizer.from_pretrained(model_name)
         self.model = AutoModelForSequenceClassification.from_pretrained(model_name).to(device)
         self.class_mapping = self.model.config.id2label
         self.labels = list(map_emotion[model_name].values())
+        self.batcher = TokenBudgetBatcher(self.tokenizer, self.model, device, max_tokens=max_tokens)
 
     def emotion_prediction(self, texts: List[str]):
-        with torch.no_grad():
-            score_list = []
-            inputs = self.tokenizer(texts, return_tensors="pt", padding=True, truncation=True, max_length=512).to(self.device)
-            outputs = self.model(**inputs)
-            scores = outputs[0].detach().cpu().numpy()
-            for score in scores:
-                score_dict_i = {}
-                score_i = softmax(score)
-                ranking = np.argsort(score_i)
-                ranking = ranking[::-1]
-                for i in range(score.shape[0]):
-                    score_dict_i[self.labels[ranking[i]]] = float(score_i[ranking[i]])
-                score_list.append(score_dict_i)
+        score_list = []
+        scores = self.batcher.logits(texts)
+        for score in scores:
+            score_dict_i = {}
+            score_i = softmax(score)
+            ranking = np.argsort(score_i)
+            ranking = ranking[::-1]
+            for i in range(score.shape[0]):
+                score_dict_i[self.labels[ranking[i]]] = float(score_i[ranking[i]])
+            score_list.append(score_dict_i)
         return score_list
 
 
@@ -538,27 +537,25 @@ class EmoAtlas:
         return output
 
 class PolyTextLabEmotionModel:
-    def __init__(self, model_name: str, device='cuda:0', token_reader="default"):
+    def __init__(self, model_name: str, device='cuda:0', token_reader="default", max_tokens: int = DEFAULT_MAX_TOKENS):
         self.device = device
         self.tokenizer = AutoTokenizer.from_pretrained("xlm-roberta-large")
         self.model = AutoModelForSequenceClassification.from_pretrained("poltextlab/xlm-roberta-large-pooled-MORES", token=token_reader).to(device)
         self.class_mapping = self.model.config.id2label
         self.labels = list(self.class_mapping.values())
+        self.batcher = TokenBudgetBatcher(self.tokenizer, self.model, device, max_tokens=max_tokens)
 
     def emotion_prediction(self, texts: List[str]):
-        with torch.no_grad():
-            score_list = []
-            inputs = self.tokenizer(texts, return_tensors="pt", padding=True, truncation=True, max_length=512).to(self.device)
-            outputs = self.model(**inputs)
-            scores = outputs[0].detach().cpu().numpy()
-            for score in scores:
-                score_dict_i = {}
-                score_i = softmax(score)
-                ranking = np.argsort(score_i)
-                ranking = ranking[::-1]
-                for i in range(score.shape[0]):
-                    score_dict_i[self.labels[ranking[i]]] = float(score_i[ranking[i]])
-                score_list.append(score_dict_i)
+        score_list = []
+        scores = self.batcher.logits(texts)
+        for score in scores:
+            score_dict_i = {}
+            score_i = softmax(score)
+            ranking = np.argsort(score_i)
+            ranking = ranking[::-1]
+            for i in range(score.shape[0]):
+                score_dict_i[self.labels[ranking[i]]] = float(score_i[ranking[i]])
+            score_list.append(score_dict_i)
         return score_list
 
 
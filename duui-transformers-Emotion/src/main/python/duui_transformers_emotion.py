@@ -88,6 +88,8 @@ class Settings(BaseSettings):
     model_version: str
     #cach_size
     model_cache_size: int
+    # max number of padded tokens per forward pass
+    batch_max_tokens: int = 8192
     # url of the model
     model_source: str
     # language of the model
@@ -231,7 +233,7 @@ def load_model(model_name, language="en"):
     elif "UniversalJoy/" in model_name:
         model_i = EmotionClassification(model_name, device)
     else:
-        model_i = EmotionCheck(model_name, device)
+        model_i = EmotionCheck(model_name, device, max_tokens=settings.batch_max_tokens)
     return model_i
 
 
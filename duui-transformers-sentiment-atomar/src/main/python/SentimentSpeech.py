@@ -1,6 +1,7 @@
 import torch
 import math
 from transformers import AutoModelForSequenceClassification, AutoTokenizer
+from duui_runtime.batching import DEFAULT_MAX_TOKENS, TokenBudgetBatcher
 from scipy.special import softmax
 import numpy as np
 from typing import List
@@ -53,28 +54,25 @@ model_mapping = {
 
 
 class SentimentCheck:
-    def __init__(self, model_name: str, device='cuda:0'):
+    def __init__(self, model_name: str, device='cuda:0', max_tokens: int = DEFAULT_MAX_TOKENS):
         self.device = device
         self.tokenizer = AutoTokenizer.from_pretrained(model_name)
         self.model = AutoModelForSequenceClassification.from_pretrained(model_name, ).to(device)
         self.class_mapping = model_mapping[model_name]
         self.labels = list(self.class_mapping.values())
+        self.batcher = TokenBudgetBatcher(self.tokenizer, self.model, device, max_tokens=max_tokens)
 
     def prediction(self, texts: List[str]):
-        with torch.no_grad():
-            score_list = []
-            inputs = self.tokenizer(texts, return_tensors="pt", padding=True, truncation=True, max_length=512).to(
-                self.device)
-            outputs = self.model(**inputs)
-            scores = outputs[0].detach().cpu().numpy()
-            for score in scores:
-                score_dict_i = {}
-                score_i = softmax(score)
-                ranking = np.argsort(score_i)
-                ranking = ranking[::-1]
-                for i in range(score.shape[0]):
-                    score_dict_i[self.labels[ranking[i]]] = float(score_i[ranking[i]])
-                score_list.append(score_dict_i)
+        score_list = []
+        scores = self.batcher.logits(texts)
+        for score in scores:
+            score_dict_i = {}
+            score_i = softmax(score)
+            ranking = np.argsort(score_i)
+            ranking = ranking[::-1]
+            for i in range(score.shape[0]):
+                score_dict_i[self.labels[ranking[i]]] = float(score_i[ranking[i]])
+            score_list.append(score_dict_i)
         return score_list
 
 
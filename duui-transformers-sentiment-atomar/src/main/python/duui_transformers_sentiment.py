@@ -42,6 +42,8 @@ class Settings(BaseSettings):
     model_version: str
     #cach_size
     model_cache_size: int
+    # max number of padded tokens per forward pass
+    batch_max_tokens: int = 8192
     # url of the model
     model_source: str
     # language of the model
@@ -177,7 +179,7 @@ def load_model(model_name):
     if model_name=="oliverguhr/german-sentiment-bert":
         model_i = SentimentCheckGerman(device)
     else:
-        model_i = SentimentCheck(model_name, device)
+        model_i = SentimentCheck(model_name, device, max_tokens=settings.batch_max_tokens)
     return model_i
 
 
@@ -8,6 +8,7 @@ from time import time
 from typing import Dict, Union
 from datetime import datetime
 
+import numpy as np
 from cassis import load_typesystem
 from fastapi import FastAPI, Response
 from fastapi.responses import PlainTextResponse
@@ -343,6 +344,9 @@ logger.info("Version: %s", settings.textimager_duui_transformers_sentiment_annot
 device = 0 if torch.cuda.is_available() else -1
 logger.info(f'USING {device}')
 
+# fraction of the GPU memory reserved by torch after which the cuda cache is emptied
+CUDA_CACHE_CLEAN_THRESHOLD = 0.8
+
 typesystem_filename = 'src/main/resources/TypeSystemSentiment.xml'
 logger.info("Loading typesystem from \"%s\"", typesystem_filename)
 with open(typesystem_filename, 'rb') as f:
@@ -422,10 +426,15 @@ def get_typesystem() -> Response:
 
 
 def clean_cuda_cache():
+    # only empty the cache under memory pressure, emptying it on every request
+    # forces torch to allocate all memory again on the next request
     if device >= 0:
-        logger.info('emptying cuda cache')
-        torch.cuda.empty_cache()
-        logger.info('cuda cache empty')
+        reserved = torch.cuda.memory_reserved(device)
+        total = torch.cuda.get_device_properties(device).total_memory
+        if reserved > CUDA_CACHE_CLEAN_THRESHOLD * total:
+            logger.info('emptying cuda cache, %d of %d bytes reserved', reserved, total)
+            torch.cuda.empty_cache()
+            logger.info('cuda cache empty')
 
 
 @app.post("/v1/process")
@@ -434,8 +443,6 @@ def post_process(request: TextImagerRequest) -> TextImagerResponse:
     meta = None
     modification_meta = None
 
-    clean_cuda_cache()
-
     dt = datetime.now()
 
     try:
@@ -529,41 +536,36 @@ def load_model(model_name, model_version, labels_count, adapter_path=None):
     )
 
 
-def map_sentiment(sentiment_result: List[Dict[str, Union[str, float]]], sentiment_mapping: Dict[str, float], sentiment_polarity: Dict[str, List[str]], sentence: UimaSentence) -> SentimentSentence:
-    # get label from top result and map to sentiment values -1, 0 or 1
-    sentiment_value = 0.0
-    top_result = sentiment_result[0]
-    if top_result["label"] in sentiment_mapping:
-        sentiment_value = sentiment_mapping[top_result["label"]]
-
-    # get scores of all labels
-    details = {
-        s["label"]: s["score"]
-        for s in sentiment_result
-    }
+def map_sentiments(results: List[List[Dict[str, Union[str, float]]]], sentiment_mapping: Dict[str, float], sentiment_polarity: Dict[str, List[str]]):
+    # collect the scores of all sentences in one matrix: sentences x labels
+    labels = list(dict.fromkeys(r["label"] for result in results for r in result))
+    label_index = {label: i for i, label in enumerate(labels)}
+    scores = np.zeros((len(results), len(labels)), dtype=np.float64)
+    for row, result in enumerate(results):
+        for r in result:
+            scores[row, label_index[r["label"]]] = r["score"]
 
-    # calculate polarity: pos-neg
-    polarities = {
-        "pos": 0,
-        "neu": 0,
-        "neg": 0
+    # get label from top result and map to sentiment values -1, 0 or 1
+    top = scores.argmax(axis=1)
+    mapping = np.array([sentiment_mapping.get(label, 0.0) for label in labels], dtype=np.float64)
+
+    # calculate polarity: pos-neg, using the summed scores of the labels mapped to pos, neu and neg
+    polarity_masks = np.array([
+        [label in sentiment_polarity[p] for label in labels]
+        for p in ("pos", "neu", "neg")
+    ], dtype=np.float64)
+    polarities = scores @ polarity_masks.T
+
+    return {
+        "labels": labels,
+        "scores": scores,
+        "sentiment": mapping[top],
+        "score": scores[np.arange(len(results)), top],
+        "pos": polarities[:, 0],
+        "neu": polarities[:, 1],
+        "neg": polarities[:, 2],
+        "polarity": polarities[:, 0] - polarities[:, 2],
     }
-    for p in polarities:
-        for l in sentiment_polarity[p]:
-            for s in sentiment_result:
-                if s["label"] == l:
-                    polarities[p] += s["score"]
-
-    polarity = polarities["pos"] - polarities["neg"]
-
-    return SentimentSentence(
-        sentence=sentence,
-        sentiment=sentiment_value,
-        score=top_result["score"],
-        details=details,
-        polarity=polarity,
-        **polarities
-    )
 
 
 def fix_unicode_problems(text):
@@ -585,6 +587,9 @@ def process_selection(model_name, model_data, selection, doc_len, batch_size, ig
     logger.debug("Preprocessed texts:")
     logger.debug(texts)
 
+    if len(texts) == 0:
+        return []
+
     with model_lock:
         model_type = "huggingface" if not "type" in model_data else model_data["type"]
         if model_type == "local":
@@ -599,78 +604,61 @@ def process_selection(model_name, model_data, selection, doc_len, batch_size, ig
         else:
             sentiment_analysis = load_model(model_name, model_data["version"], len(model_data["mapping"]))
 
+        # bucket the texts by tokenized length, the pipeline batches consecutive
+        # inputs so that sorted inputs only need little padding per batch
         if ignore_max_length_truncation_padding:
-            results = sentiment_analysis(
-                texts, batch_size=batch_size
+            lengths = [len(ids) for ids in sentiment_analysis.tokenizer(texts)["input_ids"]]
+        else:
+            lengths = [len(ids) for ids in sentiment_analysis.tokenizer(texts, truncation=True, max_length=model_data["max_length"])["input_ids"]]
+        order = np.argsort(lengths, kind="stable")
+        sorted_texts = [texts[i] for i in order]
+
+        if ignore_max_length_truncation_padding:
+            sorted_results = sentiment_analysis(
+                sorted_texts, batch_size=batch_size
             )
         else:
-            results = sentiment_analysis(
-                texts, truncation=True, padding=True, max_length=model_data["max_length"], batch_size=batch_size
+            sorted_results = sentiment_analysis(
+                sorted_texts, truncation=True, padding=True, max_length=model_data["max_length"], batch_size=batch_size
             )
 
+    results = [None] * len(texts)
+    for i, r in zip(order, sorted_results):
+        results[i] = r
+
+    sentiments = map_sentiments(results, model_data["mapping"], model_data["3sentiment"])
+    labels = sentiments["labels"]
+
     processed_sentences = [
-        map_sentiment(r, model_data["mapping"], model_data["3sentiment"], s)
-        for s, r
-        in zip(selection.sentences, results)
+        SentimentSentence(
+            sentence=sentence,
+            sentiment=float(sentiments["sentiment"][i]),
+            score=float(sentiments["score"][i]),
+            details=dict(zip(labels, sentiments["scores"][i].tolist())),
+            polarity=float(sentiments["polarity"][i]),
+            pos=float(sentiments["pos"][i]),
+            neu=float(sentiments["neu"][i]),
+            neg=float(sentiments["neg"][i]),
+        )
+        for i, sentence in enumerate(selection.sentences)
     ]
 
+    # average over all sentences of the selection
     if len(results) > 1:
-        begin = 0
-        end = doc_len
-
-        sentiments = 0
-        for sentence in processed_sentences:
-            sentiments += sentence.sentiment
-        sentiment = sentiments / len(processed_sentences)
-
-        scores = 0
-        for sentence in processed_sentences:
-            scores += sentence.score
-        score = scores / len(processed_sentences)
-
-        details = {}
-        for sentence in processed_sentences:
-            for d in sentence.details:
-                if d not in details:
-                    details[d] = 0
-                details[d] += sentence.details[d]
-        for d in details:
-            details[d] = details[d] / len(processed_sentences)
-
-        polaritys = 0
-        for sentence in processed_sentences:
-            polaritys += sentence.polarity
-        polarity = polaritys / len(processed_sentences)
-
-        poss = 0
-        for sentence in processed_sentences:
-            poss += sentence.pos
-        pos = poss / len(processed_sentences)
-
-        neus = 0
-        for sentence in processed_sentences:
-            neus += sentence.neu
-        neu = neus / len(processed_sentences)
-
-        negs = 0
-        for sentence in processed_sentences:
-            negs += sentence.neg
-        neg = negs / len(processed_sentences)
-
         processed_sentences.append(
             SentimentSentence(
                 sentence=UimaSentence(
                     text="",
-                    begin=begin,
-                    end=end,
+                    begin=0,
+                    end=doc_len,
                 ),
-                sentiment=sentiment,
-                score=score,
-                details=details,
-                polarity=polarity,
-                pos=pos,
-                neu=neu,
-                neg=neg
+                sentiment=float(sentiments["sentiment"].mean()),
+                score=float(sentiments["score"].mean()),
+                details=dict(zip(labels, sentiments["scores"].mean(axis=0).tolist())),
+                polarity=float(sentiments["polarity"].mean()),
+                pos=float(sentiments["pos"].mean()),
+                neu=float(sentiments["neu"].mean()),
+                neg=float(sentiments["neg"].mean())
             )
         )
 
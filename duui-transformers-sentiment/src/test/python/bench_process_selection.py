@@ -0,0 +1,36 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import torch
+from duui_runtime.testing import save_tiny_random_classifier
+
+from test_process_selection import COMPONENT_DIR, load_service, local_model_data, random_selection
+
+
+def benchmark(counts, batch_size):
+    with tempfile.TemporaryDirectory() as path:
+        module = load_service(os.environ.__setitem__)
+        save_tiny_random_classifier(path, hidden_size=128, layers=4)
+        model_data = local_model_data(module, path)
+        for count in counts:
+            # sentences of 1 to 60 words, as in news or web documents
+            selection, doc_len = random_selection(module, count, max_words=60)
+            start = time.perf_counter()
+            module.process_selection("tiny", model_data, selection, doc_len, batch_size, False)
+            elapsed = time.perf_counter() - start
+            print(f"{count} sentences: {count / elapsed:.0f} sentences/s")
+
+
+if __name__ == "__main__":
+    # e.g. python src/test/python/bench_process_selection.py --sentences 1000 2000
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sentences", type=int, nargs="+", default=[500, 1000, 2000, 4000])
+    parser.add_argument("--batch-size", type=int, default=32)
+    args = parser.parse_args()
+    sys.path.insert(0, str(COMPONENT_DIR))
+    os.chdir(COMPONENT_DIR)
+    torch.set_num_threads(1)
+    benchmark(args.sentences, args.batch_size)
@@ -0,0 +1,70 @@
+import importlib
+import sys
+from pathlib import Path
+
+import pytest
+from duui_runtime.testing import random_texts, save_tiny_random_classifier
+
+COMPONENT_DIR = Path(__file__).resolve().parents[3]
+
+
+def load_service(set_env):
+    set_env("TEXTIMAGER_DUUI_TRANSFORMERS_SENTIMENT_ANNOTATOR_NAME", "textimager-duui-transformers-sentiment")
+    set_env("TEXTIMAGER_DUUI_TRANSFORMERS_SENTIMENT_ANNOTATOR_VERSION", "0.0.1")
+    set_env("TEXTIMAGER_DUUI_TRANSFORMERS_SENTIMENT_LOG_LEVEL", "WARNING")
+    set_env("TEXTIMAGER_DUUI_TRANSFORMERS_SENTIMENT_MODEL_CACHE_SIZE", "1")
+    module_name = "src.main.python.textimager_duui_transformers_sentiment"
+    sys.modules.pop(module_name, None)
+    return importlib.import_module(module_name)
+
+
+def local_model_data(service, path):
+    # the cardiffnlp model definition from models/, loaded from the local checkpoint
+    model_data = dict(service.SUPPORTED_MODELS["cardiffnlp/twitter-roberta-base-sentiment"])
+    model_data.update({"type": "local", "path": str(path)})
+    return model_data
+
+
+def random_selection(service, count, max_words, seed=0):
+    sentences = []
+    begin = 0
+    for text in random_texts(count, max_words, seed):
+        sentences.append(service.UimaSentence(text=text, begin=begin, end=begin + len(text)))
+        begin += len(text) + 1
+    return service.UimaSentenceSelection(selection="sentence", sentences=sentences), begin
+
+
+@pytest.fixture
+def service(monkeypatch, tmp_path):
+    monkeypatch.chdir(COMPONENT_DIR)
+    monkeypatch.syspath_prepend(str(COMPONENT_DIR))
+    module = load_service(monkeypatch.setenv)
+    save_tiny_random_classifier(tmp_path / "model")
+    module.load_model.cache_clear()
+    yield module, local_model_data(module, tmp_path / "model")
+    module.load_model.cache_clear()
+
+
+def test_results_match_the_unsorted_pipeline(service):
+    module, model_data = service
+    selection, doc_len = random_selection(module, 30, max_words=40)
+    sentences = module.process_selection("tiny", model_data, selection, doc_len, 4, False)
+
+    pipe = module.load_model(model_data["path"], None, len(model_data["mapping"]))
+    expected = pipe([s.text for s in selection.sentences], truncation=True, padding=True, max_length=512, batch_size=1)
+
+    assert len(sentences) == 31
+    for sentence, source, result in zip(sentences, selection.sentences, expected):
+        top = max(result, key=lambda r: r["score"])
+        scores = {r["label"]: r["score"] for r in result}
+        assert sentence.sentence.begin == source.begin
+        assert sentence.sentiment == model_data["mapping"][top["label"]]
+        assert sentence.score == pytest.approx(top["score"], abs=1e-5)
+        assert sentence.details == pytest.approx(scores, abs=1e-5)
+        assert sentence.polarity == pytest.approx(scores["LABEL_2"] - scores["LABEL_0"], abs=1e-5)
+
+    # the last sentence is the average of the selection
+    average = sentences[-1]
+    assert (average.sentence.begin, average.sentence.end) == (0, doc_len)
+    assert average.pos == pytest.approx(sum(s.pos for s in sentences[:-1]) / 30)
+    assert average.sentiment == pytest.approx(sum(s.sentiment for s in sentences[:-1]) / 30)
@@ -1,6 +1,7 @@
 import torch
 import math
 from transformers import AutoModelForSequenceClassification, AutoTokenizer, pipeline, AutoModelForCausalLM
+from duui_runtime.batching import DEFAULT_MAX_TOKENS, TokenBudgetBatcher
 from scipy.special import softmax
 import numpy as np
 from typing import List
@@ -71,7 +72,7 @@ models_list = {
 
 
 class ToxicCheck:
-    def __init__(self, model_name: str, device='cuda:0'):
+    def __init__(self, model_name: str, device='cuda:0', max_tokens: int = DEFAULT_MAX_TOKENS):
         self.device = device
         self.model_name = model_name
         if model_name == "malexandersalazar/xlm-roberta-large-binary-cls-toxicity":
@@ -91,38 +92,35 @@ class ToxicCheck:
             for i in range(len(self.labels)):
                 if self.labels[i] == "neutral" or self.labels[i] == "not toxic" or self.labels[i] == "not_toxic" or self.labels[i] == "non-toxic":
                     self.labels[i] = "non toxic"
+        self.batcher = TokenBudgetBatcher(self.tokenizer, self.model, device, max_tokens=max_tokens)
 
     def toxic_prediction(self, texts: List[str]):
-        with torch.no_grad():
-            score_list = []
-            inputs = self.tokenizer(texts, return_tensors="pt", padding=True, truncation=True, max_length=512).to(
-                self.device)
-            outputs = self.model(**inputs)
-            scores = outputs[0].detach().cpu().numpy()
-            if self.model_name == "nicholasKluge/ToxicityModel":
-                for score in scores:
-                    score_dict_i = {"non toxic": float(score[0]), "toxic": float(1 - score[0])}
-                    score_list.append(score_dict_i)
-            else:
-                for score in scores:
-                    score_dict_i = {}
-                    score_i = softmax(score)
-                    ranking = np.argsort(score_i)
-                    ranking = ranking[::-1]
-                    # if "HATE" in self.labels:
-                    #     score_dict_i["toxic"] = float(score_i[ranking["HATE"]])
-                    # if "NOT HATE" in self.labels:
-                    #     score_dict_i["non toxic"] = float(score_i[ranking["NOT HATE"]])
-                    # if "NOT_HATE" in self.labels:
-                    #     score_dict_i["non toxic"] = float(score_i[ranking["NOT_HATE"]])
-                    for i in range(score.shape[0]):
-                        if self.labels[ranking[i]] in map_toxic:
-                            score_dict_i[map_toxic[self.labels[ranking[i]]]] = float(score_i[ranking[i]])
-                        elif self.labels[ranking[i]] == "":
-                            score_dict_i[self.labels[ranking[i]].replace("-", " ")] = float(score_i[ranking[i]])
-                        else:
-                            score_dict_i[self.labels[ranking[i]]] = float(score_i[ranking[i]])
-                    score_list.append(score_dict_i)
+        score_list = []
+        scores = self.batcher.logits(texts)
+        if self.model_name == "nicholasKluge/ToxicityModel":
+            for score in scores:
+                score_dict_i = {"non toxic": float(score[0]), "toxic": float(1 - score[0])}
+                score_list.append(score_dict_i)
+        else:
+            for score in scores:
+                score_dict_i = {}
+                score_i = softmax(score)
+                ranking = np.argsort(score_i)
+                ranking = ranking[::-1]
+                # if "HATE" in self.labels:
+                #     score_dict_i["toxic"] = float(score_i[ranking["HATE"]])
+                # if "NOT HATE" in self.labels:
+                #     score_dict_i["non toxic"] = float(score_i[ranking["NOT HATE"]])
+                # if "NOT_HATE" in self.labels:
+                #     score_dict_i["non toxic"] = float(score_i[ranking["NOT_HATE"]])
+                for i in range(score.shape[0]):
+                    if self.labels[ranking[i]] in map_toxic:
+                        score_dict_i[map_toxic[self.labels[ranking[i]]]] = float(score_i[ranking[i]])
+                    elif self.labels[ranking[i]] == "":
+                        score_dict_i[self.labels[ranking[i]].replace("-", " ")] = float(score_i[ranking[i]])
+                    else:
+                        score_dict_i[self.labels[ranking[i]]] = float(score_i[ranking[i]])
+                score_list.append(score_dict_i)
         return score_list
 
 
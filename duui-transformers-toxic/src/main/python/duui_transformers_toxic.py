@@ -75,6 +75,8 @@ class Settings(BaseSettings):
     model_version: str
     #cach_size
     model_cache_size: int
+    # max number of padded tokens per forward pass
+    batch_max_tokens: int = 8192
     # url of the model
     model_source: str
     # language of the model
@@ -210,7 +212,7 @@ def load_model(model_name):
     if model_name == "Detoxify":
         model_i = Detoxifying(device)
     else:
-        model_i = ToxicCheck(model_name, device)
+        model_i = ToxicCheck(model_name, device, max_tokens=settings.batch_max_tokens)
     return model_i
 
 
@@ -16,6 +16,7 @@ from sys import version as sys_version
 from threading import Lock
 from time import time
 from typing import List, Optional
+from udep_windows import parse_sentences
 
 # Settings
 # These are automatically loaded from env variables
@@ -30,6 +31,12 @@ class Settings(BaseSettings):
     textimager_udepparser_model_name: str
     # Diaparser batch size
     textimager_udepparser_batch_size: int
+    # Max number of tokens parsed at once, longer sentences are parsed in overlapping windows
+    textimager_udepparser_max_sentence_length: int = 150
+    # Number of tokens shared by consecutive windows
+    textimager_udepparser_window_overlap: int = 50
+    # Empty the CUDA cache if torch reserved more than this fraction of the device memory
+    textimager_udepparser_cuda_memory_threshold: float = 0.8
 
 
 # Load settings from env vars
@@ -197,6 +204,16 @@ def load_cache_diaparser_model(model_name, device):
     logger.info("Finished loading diaparser model \"%s\"", model_name)
     return parser
 
+def release_cuda_memory():
+    # Emptying the cache forces torch to allocate again, only do it under memory pressure
+    if not torch.cuda.is_available():
+        return
+    reserved = torch.cuda.memory_reserved()
+    total = torch.cuda.get_device_properties(torch.cuda.current_device()).total_memory
+    if reserved > settings.textimager_udepparser_cuda_memory_threshold * total:
+        logger.info('emptying cuda cache, %d of %d bytes reserved', reserved, total)
+        torch.cuda.empty_cache()
+
 # Get spaCy model from language
 def get_parser_model_name():
     # Directly use specified in parameters, this ignores any model variants!
@@ -307,10 +324,6 @@ diaparser_model_name = get_parser_model_name()
 def post_process(request: TextImagerRequest) -> TextImagerResponse:
     device = 'GPU' if torch.cuda.is_available() else 'CPU'
     logger.info(f'USING {device}')
-    if device == 'GPU':
-        logger.info('emptying cuda cache')
-        torch.cuda.empty_cache()
-        logger.info('cuda cache empty')
 
     # Return data
     meta = None
@@ -334,88 +347,59 @@ def post_process(request: TextImagerRequest) -> TextImagerResponse:
         batch_size = 256
     print('using batch size', batch_size, flush=True)
 
-    tokens_ = []
-    for i, ts in enumerate(tokens__):
-        if len(ts) == 0 or len(ts) > 150:
-            continue
-        tokens_.append(ts)
-
+    parses = parse_sentences(
+        parser.predict,
+        [[t['text'] for t in tokens] for tokens in tokens__],
+        batch_size,
+        settings.textimager_udepparser_max_sentence_length,
+        settings.textimager_udepparser_window_overlap,
+        release_memory=release_cuda_memory
+    )
 
     count_token = 0
-    for i in range(0, len(tokens_), batch_size):
-        if device == 'GPU':
-            logger.info('emptying cuda cache')
-            torch.cuda.empty_cache()
-            logger.info('cuda cache empty')
-
-        tokens_batch = [ts for ts in tokens_[i: i+batch_size]]
-
-        ts_batch = []
-        for tokens in tokens_batch:
-            ts_batch.append([t['text'] for t in tokens])
-
-        try:
-            diaparse = parser.predict(ts_batch)
-        except IndexError as e:
-            #print(ts_batch)
-            logger.debug('Diaparser IndexError')
-            logger.debug(e)
+    skipped = 0
+    for tokens, parse in zip(tokens__, parses):
+        if parse is None:
+            if len(tokens) > 0:
+                skipped += 1
             continue
-
-        assert len(diaparse.sentences) == len(tokens_batch)
-
-        for j in range(len(tokens_batch)):
-            assert len(diaparse.sentences[j]) == len(tokens_batch[j])
-
-
-            # print(tokens_batch[j])
-            # print(diaparse.sentences[j].rels)
-            # print(diaparse.sentences[j].values[6])
-            for k in range(len(tokens_batch[j])):
-                # print(tokens_batch[j][k])
-                # print(diaparse.sentences[j].rels[k])
-                token_begin = tokens_batch[j][k]['begin']
-                token_end = tokens_batch[j][k]['end']
-                # token_text = tokens_batch[j][k]['text']
-                token_head = diaparse.sentences[j].values[6][k]
-                token_head = k if token_head == 0 else token_head - 1
-                # print(token_begin, token_end, token_head, token_text)
-                current_dep = Dependency(
-                    begin=token_begin,
-                    end=token_end,
-                    type=diaparse.sentences[j].rels[k],
-                    flavor='udep',
-                    dependent_ind=k,
-                    governor_ind=token_head,
-                    token_ind=count_token,
-                    write=True
-                )
-
-
-                current_token = Token(
-                    begin=token_begin,
-                    end=token_end,
-                    ind=count_token
-                )
-
-                assert len(udeps) == count_token
-                udeps.append(current_dep)
-                tokens_out.append(current_token)
-                count_token += 1
-            # print()
-
-        logger.info(f'{min(i+1+batch_size, len(tokens_))}/{len(tokens_)} done')
-
+        heads, rels = parse
+
+        for k in range(len(tokens)):
+            token_begin = tokens[k]['begin']
+            token_end = tokens[k]['end']
+            token_head = heads[k]
+            token_head = k if token_head == 0 else token_head - 1
+            current_dep = Dependency(
+                begin=token_begin,
+                end=token_end,
+                type=rels[k],
+                flavor='udep',
+                dependent_ind=k,
+                governor_ind=token_head,
+                token_ind=count_token,
+                write=True
+            )
+
+
+            current_token = Token(
+                begin=token_begin,
+                end=token_end,
+                ind=count_token
+            )
+
+            assert len(udeps) == count_token
+            udeps.append(current_dep)
+            tokens_out.append(current_token)
+            count_token += 1
+
+    if skipped > 0:
+        logger.warning(f'{skipped}/{len(tokens__)} sentences could not be parsed')
 
     dte = datetime.now()
     print(dte, 'Finished processing', flush=True)
     print('Time elapsed', f'{dte-dt}', flush=True)
 
-    if device == 'GPU':
-        logger.info('emptying cuda cache')
-        torch.cuda.empty_cache()
-        logger.info('cuda cache empty')
-
     assert len(tokens_out) == len(udeps)
     return TextImagerResponse(
         tokens=tokens_out,
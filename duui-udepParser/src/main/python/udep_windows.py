@@ -0,0 +1,142 @@
+import logging
+from typing import Callable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Parse of a sentence: heads (1-based, 0 is the root) and relation types per token
+Parse = Tuple[List[int], List[str]]
+
+# Errors of a parser prediction that only affect the sentences of the prediction
+PARSE_ERRORS = (IndexError, RuntimeError, ValueError)
+
+# Relation type for tokens that are reattached to the root when stitching windows
+STITCH_RELATION = "dep"
+
+
+def sentence_windows(length: int, max_length: int, overlap: int) -> List[Tuple[int, int]]:
+    """Token spans (start, end) to parse a sentence with, overlapping windows if it is longer than max_length."""
+    if length <= max_length:
+        return [(0, length)]
+    stride = max(1, max_length - overlap)
+    starts = list(range(0, length - max_length, stride)) + [length - max_length]
+    return [(start, start + max_length) for start in starts]
+
+
+def repair_tree(heads: List[int], rels: List[str]) -> None:
+    """Makes stitched heads a tree: one root, no cycles. Broken tokens are attached to the root."""
+    roots = [k for k, head in enumerate(heads) if head == 0]
+    root = roots[0] if roots else None
+    for k in roots[1:]:
+        heads[k] = root + 1
+        rels[k] = STITCH_RELATION
+
+    # 0: not visited, 1: on the current path, 2: done
+    state = [0] * len(heads)
+    for k in range(len(heads)):
+        path = []
+        node = k
+        while node is not None and state[node] == 0:
+            state[node] = 1
+            path.append(node)
+            node = heads[node] - 1 if heads[node] != 0 else None
+        if node is not None and state[node] == 1:
+            # the path ran into itself: cut the cycle at this token
+            if root is None:
+                root = node
+                heads[node] = 0
+                rels[node] = "root"
+            else:
+                heads[node] = root + 1
+                rels[node] = STITCH_RELATION
+        for p in path:
+            state[p] = 2
+
+
+def stitch_windows(length: int, windows: List[Tuple[int, int]], parses: List[Parse]) -> Parse:
+    """Combines window parses, every token takes its head from the window it is most central in."""
+    best = [(-1, 0)] * length
+    for w, (start, end) in enumerate(windows):
+        for k in range(start, end):
+            centrality = min(k - start, end - 1 - k)
+            if centrality > best[k][0]:
+                best[k] = (centrality, w)
+
+    heads = []
+    rels = []
+    for k in range(length):
+        w = best[k][1]
+        start = windows[w][0]
+        window_heads, window_rels = parses[w]
+        head = window_heads[k - start]
+        heads.append(0 if head == 0 else start + head)
+        rels.append(window_rels[k - start])
+
+    repair_tree(heads, rels)
+    return heads, rels
+
+
+def predict_parses(predict: Callable, sentences: List[List[str]]) -> List[Parse]:
+    diaparse = predict(sentences)
+    if len(diaparse.sentences) != len(sentences):
+        raise ValueError(f"Parser returned {len(diaparse.sentences)} sentences for {len(sentences)}")
+    parses = []
+    for words, sentence in zip(sentences, diaparse.sentences):
+        heads = list(sentence.values[6])
+        rels = list(sentence.rels)
+        if len(heads) != len(words) or len(rels) != len(words):
+            raise ValueError(f"Parser returned {len(heads)} heads for {len(words)} tokens")
+        parses.append((heads, rels))
+    return parses
+
+
+def parse_sentences(predict: Callable, sentences: List[List[str]], batch_size: int, max_length: int, overlap: int,
+                    release_memory: Optional[Callable[[], None]] = None) -> List[Optional[Parse]]:
+    """
+    Parses tokenized sentences in batches with predict (e.g. diaparser's Parser.predict).
+    Sentences longer than max_length are parsed in overlapping windows and stitched together.
+    If a batch fails, its sentences are parsed one by one, so that only failing sentences are
+    returned as None (as are empty sentences).
+    """
+    windows_per_sentence = []
+    # parse units: (sentence index, window start, window end)
+    units = []
+    for s, words in enumerate(sentences):
+        windows = sentence_windows(len(words), max_length, overlap) if words else []
+        windows_per_sentence.append(windows)
+        units.extend((s, start, end) for start, end in windows)
+
+    unit_parses = {}
+    for i in range(0, len(units), batch_size):
+        batch = units[i:i + batch_size]
+        inputs = [sentences[s][start:end] for s, start, end in batch]
+        try:
+            results = predict_parses(predict, inputs)
+        except PARSE_ERRORS as e:
+            logger.warning("Parsing batch of %d sentences failed, parsing them one by one: %s", len(batch), e)
+            if release_memory is not None:
+                release_memory()
+            results = []
+            for (s, start, end), words in zip(batch, inputs):
+                try:
+                    results.extend(predict_parses(predict, [words]))
+                except PARSE_ERRORS as e:
+                    logger.warning("Skipping sentence %d, parsing tokens %d-%d failed: %s", s, start, end, e)
+                    results.append(None)
+
+        for unit, parse in zip(batch, results):
+            unit_parses[unit] = parse
+
+        if release_memory is not None:
+            release_memory()
+        logger.info(f'{min(i + batch_size, len(units))}/{len(units)} done')
+
+    parses = []
+    for s, windows in enumerate(windows_per_sentence):
+        window_parses = [unit_parses[(s, start, end)] for start, end in windows]
+        if not window_parses or any(parse is None for parse in window_parses):
+            parses.append(None)
+        elif len(window_parses) == 1:
+            parses.append(window_parses[0])
+        else:
+            parses.append(stitch_windows(len(sentences[s]), windows, window_parses))
+    return parses
@@ -0,0 +1,124 @@
+import random
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "main" / "python"))
+
+from udep_windows import parse_sentences, repair_tree, sentence_windows, stitch_windows  # noqa: E402
+
+MAX_LENGTH = 150
+OVERLAP = 50
+
+
+class StubParser:
+    # stands in for diaparser's Parser.predict: parses every sentence as a chain (each token
+    # depends on the previous one), fails like diaparser on inputs that are too long and raises
+    # IndexError on batches containing the token "FAIL"
+    def __init__(self, max_length=MAX_LENGTH):
+        self.max_length = max_length
+        self.batches = []
+
+    def __call__(self, sentences):
+        self.batches.append([len(words) for words in sentences])
+        for words in sentences:
+            if len(words) > self.max_length:
+                raise RuntimeError(f"sentence of {len(words)} tokens exceeds the model limit")
+            if "FAIL" in words:
+                raise IndexError("list index out of range")
+        return SimpleNamespace(sentences=[
+            SimpleNamespace(values=[None] * 6 + [chain_heads(len(words))], rels=["root"] + ["dep"] * (len(words) - 1))
+            for words in sentences
+        ])
+
+
+def chain_heads(length):
+    return list(range(length))
+
+
+def words(length, marker=None):
+    tokens = [f"w{k}" for k in range(length)]
+    if marker is not None:
+        tokens[length // 2] = marker
+    return tokens
+
+
+def assert_tree(heads):
+    assert sum(1 for head in heads if head == 0) == 1
+    for k in range(len(heads)):
+        # following the heads from every token reaches the root without a cycle
+        node, steps = k, 0
+        while heads[node] != 0:
+            node = heads[node] - 1
+            steps += 1
+            assert steps <= len(heads)
+
+
+@pytest.mark.parametrize("length", [151, 400])
+def test_long_sentences_are_stitched_from_windows(length):
+    parser = StubParser()
+    parses = parse_sentences(parser, [words(length), words(10)], batch_size=4, max_length=MAX_LENGTH, overlap=OVERLAP)
+
+    heads, rels = parses[0]
+    assert heads == chain_heads(length)
+    assert rels == ["root"] + ["dep"] * (length - 1)
+    assert parses[1][0] == chain_heads(10)
+    assert max(max(batch) for batch in parser.batches) <= MAX_LENGTH
+
+
+def test_windows_cover_the_sentence():
+    assert sentence_windows(150, MAX_LENGTH, OVERLAP) == [(0, 150)]
+    assert sentence_windows(151, MAX_LENGTH, OVERLAP) == [(0, 150), (1, 151)]
+    windows = sentence_windows(400, MAX_LENGTH, OVERLAP)
+    assert windows[0][0] == 0 and windows[-1][1] == 400
+    assert all(end - start == MAX_LENGTH for start, end in windows)
+    # consecutive windows overlap by at least OVERLAP tokens
+    assert all(end - next_start >= OVERLAP for (_, end), (next_start, _) in zip(windows, windows[1:]))
+
+
+def test_index_error_only_skips_the_failing_sentence():
+    released = []
+    sentences = [words(5), words(7, marker="FAIL"), [], words(200), words(3)]
+    parses = parse_sentences(StubParser(), sentences, batch_size=8, max_length=MAX_LENGTH, overlap=OVERLAP,
+                             release_memory=lambda: released.append(True))
+
+    assert parses[1] is None
+    assert parses[2] is None
+    assert parses[0][0] == chain_heads(5)
+    assert parses[3][0] == chain_heads(200)
+    assert parses[4][0] == chain_heads(3)
+    assert released
+
+
+def test_failing_window_skips_its_sentence():
+    sentences = [words(300, marker="FAIL"), words(4)]
+    parses = parse_sentences(StubParser(), sentences, batch_size=2, max_length=MAX_LENGTH, overlap=OVERLAP)
+
+    assert parses[0] is None
+    assert parses[1][0] == chain_heads(4)
+
+
+def test_stitched_random_parses_are_trees():
+    rng = random.Random(0)
+    for _ in range(200):
+        length = rng.randint(151, 500)
+        windows = sentence_windows(length, MAX_LENGTH, OVERLAP)
+        # arbitrary window parses, with any number of roots and cycles
+        parses = [
+            ([rng.randint(0, end - start) for _ in range(end - start)], ["x"] * (end - start))
+            for start, end in windows
+        ]
+        heads, rels = stitch_windows(length, windows, parses)
+        assert len(heads) == len(rels) == length
+        assert_tree(heads)
+
+
+def test_repair_tree_without_root_breaks_the_cycle():
+    heads = [2, 3, 1]
+    rels = ["a", "b", "c"]
+    repair_tree(heads, rels)
+
+    assert_tree(heads)
+    assert rels.count("root") == 1
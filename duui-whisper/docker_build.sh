@@ -0,0 +1,18 @@
+#!/usr/bin/env bash
+set -euo pipefail
+
+export DUUI_WHISPER_ANNOTATOR_NAME=duui-whisper
+export DUUI_WHISPER_ANNOTATOR_VERSION=0.1.0
+
+export DOCKER_REGISTRY="docker.texttechnologylab.org/"
+
+docker build \
+  -t ${DOCKER_REGISTRY}${DUUI_WHISPER_ANNOTATOR_NAME}:${DUUI_WHISPER_ANNOTATOR_VERSION} \
+  --build-context duui-runtime=../duui-runtime \
+  -f "src/main/docker/Dockerfile" \
+  --progress=plain \
+  .
+
+docker tag \
+  ${DOCKER_REGISTRY}${DUUI_WHISPER_ANNOTATOR_NAME}:${DUUI_WHISPER_ANNOTATOR_VERSION} \
+  ${DOCKER_REGISTRY}${DUUI_WHISPER_ANNOTATOR_NAME}:latest
@@ -15,7 +15,8 @@ function serialize(inputCas, outputStream, params)
     -- Encode data as JSON object and write to stream
     -- TODO Note: The JSON library is automatically included and available in all Lua scripts
     outputStream:write(json.encode({
-        audio = audioBase64
+        audio = audioBase64,
+        model = params["model"]
     }))
 end
 
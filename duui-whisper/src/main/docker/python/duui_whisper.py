@@ -7,8 +7,11 @@ from fastapi.responses import PlainTextResponse
 from pydantic import BaseModel, BaseSettings
 from starlette.responses import JSONResponse
 from functools import lru_cache
+from threading import Lock
+import torch
 import whisper
 import base64
+from duui_runtime.audio import decode_audio
 
 # Token
 class AudioToken(BaseModel):
@@ -27,6 +30,8 @@ class AudioToken(BaseModel):
 class DUUIRequest(BaseModel):
     # audio in base64
     audio: str
+    # Whisper model size, e.g. "base", "small", "large-v2", defaults to the model from the settings
+    model: Optional[str]
 
 
 # Response of this annotator
@@ -49,21 +54,47 @@ class DUUIDocumentation(BaseModel):
 class Settings(BaseSettings):
     # Name of the Model
     model_name: Optional[str]
+    # Max number of loaded models
+    model_cache_size: int = 3
+    # Device to run the models on, detected if not set
+    device: Optional[str]
 
 
 # settings + cache
 settings = Settings()
-lru_cache_with_size = lru_cache(maxsize=3)
+lru_cache_with_size = lru_cache(maxsize=settings.model_cache_size)
 
-#config = {"name": settings.model_name}
-config = {"name": "base"}
+default_model_name = settings.model_name or "base"
+device = settings.device or ("cuda" if torch.cuda.is_available() else "cpu")
+
+# Sample rate expected by Whisper
+SAMPLE_RATE = 16000
+
+# Lock for model loading
+model_load_lock = Lock()
+
+
+# Whisper model with its own lock, the decoding installs hooks on the model
+# so one model can only transcribe one audio at a time
+class WhisperPipeline:
+    def __init__(self, model):
+        self.model = model
+        self.lock = Lock()
+
+    def transcribe(self, audio, **kwargs):
+        with self.lock:
+            return self.model.transcribe(audio=audio, **kwargs)
 
 
 @lru_cache_with_size
-def load_pipeline(**kwargs):
-    # loads a trankit-Model
-    return whisper.load_model(**kwargs)
+def load_cache_pipeline(name, device):
+    # loads a Whisper-Model
+    return WhisperPipeline(whisper.load_model(name, device=device))
+
 
+def load_pipeline(name, device):
+    with model_load_lock:
+        return load_cache_pipeline(name, device)
 
 
 # Start fastapi
@@ -147,33 +178,32 @@ def get_documentation() -> DUUIDocumentation:
 # Process request from DUUI
 @app.post("/v1/process")
 def post_process(request: DUUIRequest) -> DUUIResponse:
-    config = {"name": "base"}
     # load pipeline
-    pipeline = load_pipeline(**config)
+    pipeline = load_pipeline(request.model or default_model_name, device)
 
     results = []
 
-    try:
-        with open("tempAudio.mp3", "wb") as f:
-            f.write(base64.b64decode(request.audio))
-    except Exception as e:
-        print(str(e))
+    audio = decode_audio(base64.b64decode(request.audio), sample_rate=SAMPLE_RATE)
 
-    result = pipeline.transcribe(audio="tempAudio.mp3", word_timestamps=True)
+    result = pipeline.transcribe(audio, word_timestamps=True)
 
-    print(result)
-
-    for index, row in result["segments"].iterrows():
-        audioStart = row['start']
-        audioEnd = row['end']
-        text = row['text']
+    current_length = 0
+    for segment in result["segments"]:
+        audioStart = segment['start']
+        audioEnd = segment['end']
+        text = segment['text'].strip()
 
         results.append(AudioToken(
             timeStart=float(audioStart),
             timeEnd=float(audioEnd),
-            text=text
+            text=text,
+            begin=current_length,
+            end=current_length + len(text)
         ))
 
+        if len(text) > 0:
+            current_length += len(text) + 1
+
     return DUUIResponse(
         audio_token=results
     )
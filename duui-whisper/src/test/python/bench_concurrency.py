@@ -0,0 +1,47 @@
+import argparse
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi.testclient import TestClient
+
+from test_concurrency import SERVICE_DIR, StubWhisper, load_service, transcribe
+
+
+def benchmark(requests, seconds, workers):
+    service = load_service(os.environ.__setitem__, sys.modules.__setitem__)
+    client = TestClient(service.app)
+    models = ["tiny", "base"]
+    for model in models:
+        transcribe(client, 1.0, model=model)
+
+    # the former service ran one request at a time, all requests shared tempAudio.mp3
+    serialized = threading.Lock()
+
+    def one_at_a_time(model):
+        with serialized:
+            transcribe(client, seconds, model=model)
+
+    for name, run in [("one at a time", one_at_a_time), ("concurrent", lambda model: transcribe(client, seconds, model=model))]:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(run, [models[i % 2] for i in range(requests)]))
+        elapsed = time.perf_counter() - start
+        print(f"{name}: {requests} requests of {seconds:.0f}s audio, {requests / elapsed:.1f} requests/s")
+
+
+if __name__ == "__main__":
+    # e.g. python src/test/python/bench_concurrency.py --requests 20, the stub transcribes
+    # an audio second in --seconds-per-audio-second
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--seconds", type=float, default=30.0)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--seconds-per-audio-second", type=float, default=0.02)
+    args = parser.parse_args()
+    StubWhisper.seconds_per_audio_second = args.seconds_per_audio_second
+    sys.path.insert(0, str(SERVICE_DIR))
+    os.chdir(SERVICE_DIR)
+    benchmark(args.requests, args.seconds, args.workers)
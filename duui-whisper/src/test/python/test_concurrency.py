@@ -0,0 +1,121 @@
+import base64
+import importlib
+import io
+import shutil
+import sys
+import threading
+import time
+import types
+import wave
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+if shutil.which("ffmpeg") is None:
+    pytest.skip("ffmpeg is not installed", allow_module_level=True)
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+SERVICE_DIR = Path(__file__).resolve().parents[2] / "main" / "docker" / "python"
+SAMPLE_RATE = 16000
+
+
+class StubWhisper:
+    # stands in for a Whisper model: transcribing takes seconds_per_audio_second, the
+    # result is one segment with the model name and the duration of the audio
+    seconds_per_audio_second = 0.02
+    loads = []
+    active = {}
+    max_active = {}
+    counter_lock = threading.Lock()
+
+    def __init__(self, name):
+        self.name = name
+
+    @classmethod
+    def load_model(cls, name, device):
+        cls.loads.append((name, device))
+        return cls(name)
+
+    def transcribe(self, audio, word_timestamps):
+        with StubWhisper.counter_lock:
+            StubWhisper.active[self.name] = StubWhisper.active.get(self.name, 0) + 1
+            StubWhisper.max_active[self.name] = max(StubWhisper.max_active.get(self.name, 0), StubWhisper.active[self.name])
+            StubWhisper.max_active["all"] = max(StubWhisper.max_active.get("all", 0), sum(StubWhisper.active.values()))
+        duration = len(audio) / SAMPLE_RATE
+        time.sleep(duration * StubWhisper.seconds_per_audio_second)
+        with StubWhisper.counter_lock:
+            StubWhisper.active[self.name] -= 1
+        return {"segments": [{"start": 0.0, "end": duration, "text": f" {self.name} {duration:.1f}"}]}
+
+
+def sine_wav(seconds, frequency=440.0, sample_rate=44100):
+    samples = np.sin(2 * np.pi * frequency * np.arange(int(seconds * sample_rate)) / sample_rate)
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as fp:
+        fp.setnchannels(1)
+        fp.setsampwidth(2)
+        fp.setframerate(sample_rate)
+        fp.writeframes((samples * 0.5 * 32767).astype("<i2").tobytes())
+    return base64.b64encode(buffer.getvalue()).decode("ascii")
+
+
+def load_service(set_env, set_module):
+    # whisper is replaced by the stub transcriber
+    whisper = types.ModuleType("whisper")
+    whisper.load_model = StubWhisper.load_model
+    set_module("whisper", whisper)
+    set_env("DEVICE", "cpu")
+    set_env("MODEL_CACHE_SIZE", "2")
+    sys.modules.pop("duui_whisper", None)
+    return importlib.import_module("duui_whisper")
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.chdir(SERVICE_DIR)
+    monkeypatch.syspath_prepend(str(SERVICE_DIR))
+    monkeypatch.delenv("MODEL_NAME", raising=False)
+    monkeypatch.setattr(StubWhisper, "loads", [])
+    monkeypatch.setattr(StubWhisper, "active", {})
+    monkeypatch.setattr(StubWhisper, "max_active", {})
+    service = load_service(monkeypatch.setenv, lambda name, module: monkeypatch.setitem(sys.modules, name, module))
+    return TestClient(service.app)
+
+
+def transcribe(client, seconds, model=None):
+    response = client.post("/v1/process", json={"audio": sine_wav(seconds), "model": model})
+    assert response.status_code == 200
+    return response.json()["audio_token"]
+
+
+def test_concurrent_requests_get_their_own_audio(client):
+    durations = [1.0, 2.0, 3.0, 4.0, 5.0, 6.0]
+    with ThreadPoolExecutor(max_workers=len(durations)) as executor:
+        tokens = list(executor.map(lambda seconds: transcribe(client, seconds), durations))
+
+    for seconds, result in zip(durations, tokens):
+        assert result == [{"begin": 0, "end": 8, "timeStart": 0.0, "timeEnd": seconds, "text": f"base {seconds:.1f}"}]
+    assert StubWhisper.loads == [("base", "cpu")]
+    # one model transcribes one audio at a time
+    assert StubWhisper.max_active["base"] == 1
+
+
+def test_model_is_selected_per_request_and_cached(client):
+    assert transcribe(client, 1.0, model="tiny")[0]["text"] == "tiny 1.0"
+    assert transcribe(client, 1.0)[0]["text"] == "base 1.0"
+    assert transcribe(client, 1.0, model="tiny")[0]["text"] == "tiny 1.0"
+    assert StubWhisper.loads == [("tiny", "cpu"), ("base", "cpu")]
+
+
+def test_different_models_transcribe_in_parallel(client, monkeypatch):
+    monkeypatch.setattr(StubWhisper, "seconds_per_audio_second", 0.1)
+    models = ["tiny", "base"] * 3
+    with ThreadPoolExecutor(max_workers=len(models)) as executor:
+        list(executor.map(lambda model: transcribe(client, 5.0, model=model), models))
+
+    assert StubWhisper.max_active["tiny"] == 1
+    assert StubWhisper.max_active["base"] == 1
+    assert StubWhisper.max_active["all"] == 2
@@ -17,6 +17,7 @@ docker build \
   --build-arg DUUI_WHISPERX_ANNOTATOR_VERSION \
   --build-arg DUUI_WHISPERX_LOG_LEVEL \
   -t ${DOCKER_REGISTRY}${DUUI_WHISPERX_ANNOTATOR_NAME}:${DUUI_WHISPERX_ANNOTATOR_VERSION}${DUUI_WHISPERX_VARIANT} \
+  --build-context duui-runtime=../duui-runtime \
   -f "src/main/docker/Dockerfile${DUUI_WHISPERX_VARIANT}" \
   --progress=plain \
   .
@@ -3,14 +3,15 @@ import logging
 from functools import lru_cache
 from platform import python_version
 from sys import version as sys_version
-from tempfile import NamedTemporaryFile
 from threading import Lock
 from time import time
 from typing import List, Optional
 
 import torch
 import whisperx
+from whisperx.audio import SAMPLE_RATE
 from cassis import *
+from duui_runtime.audio import decode_audio
 from fastapi import FastAPI, Response
 from fastapi.encoders import jsonable_encoder
 from fastapi.responses import PlainTextResponse
@@ -270,59 +271,57 @@ def post_process(request: DUUIRequest) -> DUUIResponse:
         language = request.language
     logger.info("Language: %s", language)
 
-    with NamedTemporaryFile() as audio_file:
-        # if this fails we stop processing
-        with open(audio_file.name, "wb") as fp:
-            fp.write(base64.b64decode(request.audio))
-
-        model = load_model(request.model, language, not request.allow_download)
-        audio = whisperx.load_audio(audio_file.name)
-        # TODO language param
-        result = model.transcribe(audio, batch_size=request.batch_size)
-
-        # use language detected by the model if not provided
-        if not language:
-            language = result["language"]
-            logger.info("Using detected language: %s", language)
-
-        alignment_model, metadata = load_align_model(language)
-        aligned_result = whisperx.align(result["segments"], alignment_model, metadata, audio_file.name, device)
-
-        current_length = 0
-        for word in aligned_result["word_segments"]:
-            audio_start = word.get("start")
-            audio_end = word.get("end")
-            text = word.get("word").strip()
-
-            if audio_start is None or audio_end is None:  # If segment is not spoken out loud, such as '-'
-                continue
-
-            if len(text) == 0 and audio_start == audio_end:  # If segment contains no information
-                continue
-
-            results.append(AudioToken(
-                timeStart=float(audio_start),
-                timeEnd=float(audio_end),
-                text=text,
-                begin=current_length,
-                end=current_length + len(text)
-            ))
-
-            if len(text) > 0:
-                current_length += len(text) + 1
-
-        meta = AnnotationMeta(
-            name=settings.annotator_name,
-            version=settings.annotator_version,
-            modelName=f"whisperX {request.model}",
-            modelVersion=whisperx_version
-        )
-
-        modification_meta = DocumentModification(
-            user=settings.annotator_name,
-            timestamp=modification_timestamp_seconds,
-            comment=f"{settings.annotator_name} ({settings.annotator_version}), whisperX ({whisperx_version})"
-        )
+    # decode the audio once in memory, the buffer is used for transcription and alignment
+    # if this fails we stop processing
+    audio = decode_audio(base64.b64decode(request.audio), sample_rate=SAMPLE_RATE)
+
+    model = load_model(request.model, language, not request.allow_download)
+    # TODO language param
+    result = model.transcribe(audio, batch_size=request.batch_size)
+
+    # use language detected by the model if not provided
+    if not language:
+        language = result["language"]
+        logger.info("Using detected language: %s", language)
+
+    alignment_model, metadata = load_align_model(language)
+    aligned_result = whisperx.align(result["segments"], alignment_model, metadata, audio, device)
+
+    current_length = 0
+    for word in aligned_result["word_segments"]:
+        audio_start = word.get("start")
+        audio_end = word.get("end")
+        text = word.get("word").strip()
+
+        if audio_start is None or audio_end is None:  # If segment is not spoken out loud, such as '-'
+            continue
+
+        if len(text) == 0 and audio_start == audio_end:  # If segment contains no information
+            continue
+
+        results.append(AudioToken(
+            timeStart=float(audio_start),
+            timeEnd=float(audio_end),
+            text=text,
+            begin=current_length,
+            end=current_length + len(text)
+        ))
+
+        if len(text) > 0:
+            current_length += len(text) + 1
+
+    meta = AnnotationMeta(
+        name=settings.annotator_name,
+        version=settings.annotator_version,
+        modelName=f"whisperX {request.model}",
+        modelVersion=whisperx_version
+    )
+
+    modification_meta = DocumentModification(
+        user=settings.annotator_name,
+        timestamp=modification_timestamp_seconds,
+        comment=f"{settings.annotator_name} ({settings.annotator_version}), whisperX ({whisperx_version})"
+    )
 
     logger.debug(meta)
     logger.debug(modification_meta)